@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare the pyramid long wavelength filter against the full resolution one.
+
+Creates synthetic displacement frames (long wavelength signal, short wavelength
+noise, a masked block and a nodata border), then reports the runtime, peak
+memory (numpy allocations traced with `tracemalloc`) and the difference between
+`dolphin.filtering.filter_long_wavelength` and
+`disp_nisar._filtering.filter_long_wavelength_pyramid`.
+
+Usage:
+    python benchmarks/bench_long_wavelength_filter.py --sizes 2000 4000 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+from dolphin.filtering import filter_long_wavelength
+from scipy import ndimage
+
+from disp_nisar._filtering import filter_long_wavelength_pyramid
+
+
+def make_frame(
+    size: int, seed: int = 0, pixel_spacing: float = 30
+) -> tuple[np.ndarray, np.ndarray]:
+    """Create a synthetic (displacement, bad_pixel_mask) frame of `size` x `size`."""
+    rng = np.random.default_rng(seed)
+    y, x = np.ogrid[:size, :size]
+    x_m, y_m = x * pixel_spacing, y * pixel_spacing
+    long_wavelength = (
+        0.05 * np.sin(2 * np.pi * x_m / 80_000)
+        + 0.03 * np.cos(2 * np.pi * y_m / 60_000)
+        + 1e-7 * x_m
+    )
+    short = ndimage.gaussian_filter(rng.normal(size=(size, size)), 3).astype("float32")
+    disp = (long_wavelength + 0.02 * short).astype(np.float32)
+    bad_pixel_mask = np.zeros((size, size), dtype=bool)
+    bad_pixel_mask[size // 4 : size // 2, size // 3 : 2 * size // 3] = True
+    # Nodata border, as in a frame edge
+    disp[:, : size // 20] = np.nan
+    return disp, bad_pixel_mask
+
+
+def measure(func: Callable[[], np.ndarray]) -> tuple[np.ndarray, float, float]:
+    """Run `func`, returning (output, seconds, peak traced memory in MB)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = func()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak / 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 4000])
+    parser.add_argument("--wavelength-cutoff", type=float, default=25_000)
+    parser.add_argument("--pixel-spacing", type=float, default=30)
+    args = parser.parse_args()
+
+    header = (
+        f"{'size':>6} {'method':>8} {'time (s)':>9} {'peak (MB)':>10}"
+        f" {'rms diff':>10} {'max diff':>10}"
+    )
+    print(header)
+    for size in args.sizes:
+        disp, bad_pixel_mask = make_frame(size, pixel_spacing=args.pixel_spacing)
+        kwargs = {
+            "wavelength_cutoff": args.wavelength_cutoff,
+            "pixel_spacing": args.pixel_spacing,
+        }
+        full, t_full, mem_full = measure(
+            lambda: filter_long_wavelength(
+                np.nan_to_num(disp), bad_pixel_mask=bad_pixel_mask, **kwargs
+            )
+        )
+        pyramid, t_pyr, mem_pyr = measure(
+            lambda: filter_long_wavelength_pyramid(disp, bad_pixel_mask, **kwargs)
+        )
+        valid = ~np.isnan(disp) & ~bad_pixel_mask
+        diff = (pyramid - full)[valid]
+        rms = float(np.sqrt(np.mean(diff**2)))
+        print(f"{size:>6} {'full':>8} {t_full:>9.2f} {mem_full:>10.1f}")
+        print(
+            f"{size:>6} {'pyramid':>8} {t_pyr:>9.2f} {mem_pyr:>10.1f}"
+            f" {rms:>10.2e} {np.abs(diff).max():>10.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
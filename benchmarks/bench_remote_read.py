@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Compare remote HDF5 window reads: default fsspec files vs `RemoteFile`.
+
+Synthetic paged GSLC-like HDF5 files are served over HTTP by a local server
+that supports range requests and adds a fixed latency to each request, to
+stand in for S3/HTTPS access. Square windows are then read from each file
+through h5py with:
+
+- "fsspec": the file object of ``fs.open`` (what earthaccess returns), with
+  fsspec's default read-ahead cache
+- "tuned": `RemoteFile`, with blocks sized to the file's pages and an HDF5
+  page buffer (`open_remote_hdf5`)
+- "tuned+prefetch": `ChunkedStackReader`, which fetches the chunks of each
+  window in one batch of merged range requests
+
+The number of HTTP requests is reported with the times.
+
+Usage:
+    python benchmarks/bench_remote_read.py --dates 5 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import fsspec
+import h5py
+import numpy as np
+
+from disp_nisar import _stack_reader, _streaming
+from disp_nisar._remote_read import RemoteFile, fsspec_fetcher, open_remote_hdf5
+from disp_nisar._stack_reader import ChunkedStackReader
+
+SUBDATASET = "/science/LSAR/GSLC/grids/frequencyA/HH"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve the files of `server.directory` with range requests and latency."""
+
+    def do_HEAD(self) -> None:
+        """Send the headers of a file."""
+        self._serve(send_body=False)
+
+    def do_GET(self) -> None:
+        """Send a file, or the requested byte range of it."""
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool) -> None:
+        path = self.server.directory / self.path.lstrip("/")
+        size = path.stat().st_size
+        start, end = 0, size
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match[1])
+            end = min(int(match[2]) + 1, size) if match[2] else size
+        self.server.num_requests += 1
+        time.sleep(self.server.latency)
+        self.send_response(206 if match else 200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self.end_headers()
+        if send_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                self.wfile.write(f.read(end - start))
+
+    def log_message(self, *args) -> None:
+        """Keep the benchmark output clean."""
+
+
+def make_stack(
+    out_dir: Path, num_dates: int, shape: tuple[int, int], chunks: int
+) -> list[str]:
+    """Write `num_dates` paged synthetic GSLCs of `shape` to `out_dir`."""
+    rng = np.random.default_rng(0)
+    names = []
+    for i in range(num_dates):
+        name = f"gslc_{i:02d}.h5"
+        slc = (rng.normal(size=shape) + 1j * rng.normal(size=shape)).astype(
+            np.complex64
+        )
+        with h5py.File(
+            out_dir / name, "w", fs_strategy="page", fs_page_size=4 * 2**20
+        ) as hf:
+            hf.create_dataset(
+                SUBDATASET,
+                data=slc,
+                chunks=(chunks, chunks),
+                compression="gzip",
+                shuffle=True,
+            )
+        names.append(name)
+    return names
+
+
+class FileLoopReader:
+    """Read a window from each remote file in turn with h5py."""
+
+    def __init__(self, files: list) -> None:
+        """Open the HDF5 files over the given file objects."""
+        self._files = files
+
+    def __getitem__(self, key):
+        """Read the (rows, cols) window of `key` from all dates."""
+        _, rows, cols = key
+        return np.stack([hf[SUBDATASET][rows, cols] for hf in self._files])
+
+    def close(self) -> None:
+        """Close the files."""
+        for hf in self._files:
+            hf.close()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--cols", type=int, default=4096)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--window", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+    shape = (args.rows, args.cols)
+    rng = np.random.default_rng(1)
+    starts = rng.integers(
+        0, [shape[0] - args.window + 1, shape[1] - args.window + 1], (args.repeat, 2)
+    )
+    windows = [
+        (slice(r, r + args.window), slice(c, c + args.window)) for r, c in starts
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        server.directory = Path(tmp)
+        server.latency = args.latency_ms / 1e3
+        server.num_requests = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        names = make_stack(Path(tmp), args.dates, shape, args.chunks)
+        urls = [f"http://127.0.0.1:{server.server_port}/{n}" for n in names]
+        fs = fsspec.filesystem("http")
+
+        def open_tuned(url: str) -> RemoteFile:
+            fetch_ranges, size = fsspec_fetcher(fs, url)
+            return RemoteFile(fetch_ranges, size, name=url)
+
+        # The stack reader opens its remote files with `open_remote_file`
+        _streaming.open_remote_file = open_tuned
+        _stack_reader.is_remote_url = lambda _: True
+        makers = {
+            "fsspec": lambda: FileLoopReader([h5py.File(fs.open(u)) for u in urls]),
+            "tuned": lambda: FileLoopReader(
+                [open_remote_hdf5(open_tuned(u), [SUBDATASET]) for u in urls]
+            ),
+            "tuned+prefetch": lambda: ChunkedStackReader(urls, SUBDATASET),
+        }
+        print(f"{'reader':>15} {'open (s)':>9} {'s/window':>9} {'requests':>9}")
+        for name, make_reader in makers.items():
+            server.num_requests = 0
+            t0 = time.perf_counter()
+            reader = make_reader()
+            t_open = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for rows, cols in windows:
+                reader[:, rows, cols]
+            elapsed = (time.perf_counter() - t0) / len(windows)
+            reader.close()
+            print(f"{name:>15} {t_open:>9.2f} {elapsed:>9.2f} {server.num_requests:>9}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Compare window reads of an HDF5 stack: dask/xarray vs direct chunk reads.
+
+A synthetic stack of GSLC-like HDF5 files (chunked, shuffled and gzip-compressed
+complex64 grids) is read in square windows at random positions, all dates at
+once, as dolphin's block readers do:
+
+- "xarray": `XarrayStackReader` (dask graph per read; needs xarray and dask)
+- "chunked": `ChunkedStackReader` (chunks read and decoded in a thread pool)
+- "h5py": one h5py read per file, in a loop (baseline)
+
+Usage:
+    python benchmarks/bench_stack_reader.py --dates 10 --rows 8192 --cols 8192
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from disp_nisar._stack_reader import ChunkedStackReader
+
+SUBDATASET = "/science/LSAR/GSLC/grids/frequencyA/HH"
+
+
+def make_stack(
+    out_dir: Path, num_dates: int, shape: tuple[int, int], chunks: int
+) -> list[Path]:
+    """Write `num_dates` synthetic GSLCs of `shape` to `out_dir`."""
+    rng = np.random.default_rng(0)
+    files = []
+    for i in range(num_dates):
+        filename = out_dir / f"gslc_{i:02d}.h5"
+        slc = (rng.normal(size=shape) + 1j * rng.normal(size=shape)).astype(
+            np.complex64
+        )
+        with h5py.File(filename, "w") as hf:
+            hf.create_dataset(
+                SUBDATASET,
+                data=slc,
+                chunks=(chunks, chunks),
+                compression="gzip",
+                shuffle=True,
+            )
+        files.append(filename)
+    return files
+
+
+class H5pyLoopReader:
+    """Read a window from each file in turn with h5py."""
+
+    def __init__(self, files: list[Path]) -> None:
+        """Open every file of the stack."""
+        self._handles = [h5py.File(f) for f in files]
+
+    def __getitem__(self, key):
+        """Read the (rows, cols) window of `key` from all dates."""
+        _, rows, cols = key
+        return np.stack([hf[SUBDATASET][rows, cols] for hf in self._handles])
+
+    def close(self) -> None:
+        """Close the files."""
+        for hf in self._handles:
+            hf.close()
+
+
+def make_xarray_reader(files: list[Path], window: int):
+    """Open the stack with `XarrayStackReader`, chunked like the windows."""
+    from disp_nisar._streaming import HAS_EARTHACCESS, XarrayStackReader
+
+    if not HAS_EARTHACCESS:
+        msg = "XarrayStackReader needs earthaccess and xarray"
+        raise ImportError(msg)
+    return XarrayStackReader(files, SUBDATASET, chunks=(window, window))
+
+
+def time_reads(reader, windows: list[tuple[slice, slice]]) -> float:
+    """Return the mean time of reading each window, in seconds."""
+    t0 = time.perf_counter()
+    for rows, cols in windows:
+        reader[:, rows, cols]
+    return (time.perf_counter() - t0) / len(windows)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--cols", type=int, default=4096)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--windows", type=int, nargs="+", default=[256, 2048])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    shape = (args.rows, args.cols)
+    rng = np.random.default_rng(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_stack(Path(tmp), args.dates, shape, args.chunks)
+        print(f"{'window':>7} {'reader':>8} {'ms/read':>9} {'MB/s':>7}")
+        for window in args.windows:
+            starts = rng.integers(
+                0, [shape[0] - window + 1, shape[1] - window + 1], (args.repeat, 2)
+            )
+            windows = [(slice(r, r + window), slice(c, c + window)) for r, c in starts]
+            num_mb = args.dates * window * window * 8 / 1e6
+            makers = {
+                "xarray": lambda w=window: make_xarray_reader(files, w),
+                "chunked": lambda: ChunkedStackReader(
+                    files, SUBDATASET, max_workers=args.threads
+                ),
+                "h5py": lambda: H5pyLoopReader(files),
+            }
+            for name, make_reader in makers.items():
+                try:
+                    reader = make_reader()
+                except ImportError as e:
+                    print(f"{window:>7} {name:>8} skipped ({e})")
+                    continue
+                # First read opens the files / warms the caches
+                reader[:, windows[0][0], windows[0][1]]
+                elapsed = time_reads(reader, windows)
+                reader.close()
+                print(
+                    f"{window:>7} {name:>8} {1e3 * elapsed:>9.1f}"
+                    f" {num_mb / elapsed:>7.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Compare per-task overhead of a cold spawn pool and a warm `WorkerPool`.
+
+Both pools run the same trivial tasks, each needing a large shared context (a
+stand-in for the run configs and the date -> GSLC mapping):
+
+- "cold": a fresh spawn `ProcessPoolExecutor` per batch, with the context
+  pickled into every task and the heavy modules imported inside the first task
+  of each worker, as `create_displacement_products` used to do
+- "warm": one `WorkerPool` for all batches, with the context and the module
+  imports done once per worker
+
+Usage:
+    python benchmarks/bench_worker_pool.py --workers 4 --tasks 16 --batches 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from disp_nisar._worker_pool import DEFAULT_PRELOAD_MODULES, WorkerPool
+
+
+def make_context(num_dates: int) -> dict:
+    """Create a context shaped like a run's date -> GSLC files mapping."""
+    return {
+        "date_to_cslc_files": {
+            (f"2024{i:04d}",): [
+                f"/data/gslc/NISAR_L2_GSLC_{i:04d}_{j}.h5" for j in range(4)
+            ]
+            for i in range(num_dates)
+        },
+        "metadata": {f"key_{i}": "x" * 256 for i in range(num_dates)},
+    }
+
+
+def task(index: int, date_to_cslc_files: dict, metadata: dict) -> int:
+    """Import the product modules (if needed) and return a trivial result."""
+    for name in DEFAULT_PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    return index + len(date_to_cslc_files) + len(metadata)
+
+
+def run_cold(workers: int, tasks: int, batches: int, context: dict) -> float:
+    """Time `batches` batches of `tasks` tasks, each on a new spawn pool."""
+    t0 = time.perf_counter()
+    for _ in range(batches):
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(task, i, **context) for i in range(tasks)]
+            [f.result() for f in futures]
+    return time.perf_counter() - t0
+
+
+def run_warm(workers: int, tasks: int, batches: int, context: dict) -> float:
+    """Time `batches` batches of `tasks` tasks on one `WorkerPool`."""
+    t0 = time.perf_counter()
+    with WorkerPool(workers, context=context) as pool:
+        for _ in range(batches):
+            futures = [pool.submit(task, i) for i in range(tasks)]
+            [f.result() for f in futures]
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--num-dates", type=int, default=2000)
+    args = parser.parse_args()
+
+    context = make_context(args.num_dates)
+    num_tasks = args.tasks * args.batches
+    print(f"{'pool':>6} {'total (s)':>10} {'per task (ms)':>14}")
+    for name, run in [("cold", run_cold), ("warm", run_warm)]:
+        elapsed = run(args.workers, args.tasks, args.batches, context)
+        print(f"{name:>6} {elapsed:>10.2f} {1e3 * elapsed / num_tasks:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Compare reading a GSLC stack through HDF5/VRT and through a Zarr input stack.
+
+A synthetic stack of GSLC-like HDF5 files (gzip-compressed, chunked complex64
+grids) is read block by block, all dates at once, as phase linking does:
+
+- "hdf5": each block read from every file with h5py
+- "vrt": each block read through a dolphin `VRTStack` (needs GDAL)
+- "zarr": each block read from the `ZarrStack` written by `prepare_zarr_stack`
+  (the one-time conversion is timed separately)
+
+Usage:
+    python benchmarks/bench_zarr_input.py --dates 15 --rows 4096 --cols 4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from disp_nisar._zarr import ZarrStack
+from disp_nisar._zarr_input import prepare_zarr_stack
+
+SUBDATASET = "/science/LSAR/GSLC/grids/frequencyA/HH"
+
+
+def make_stack(out_dir: Path, num_dates: int, shape: tuple[int, int]) -> list[Path]:
+    """Write `num_dates` synthetic GSLCs of `shape` to `out_dir`."""
+    rng = np.random.default_rng(0)
+    grid = SUBDATASET.rsplit("/", 1)[0]
+    files = []
+    for i in range(num_dates):
+        filename = (
+            out_dir / f"NISAR_L2_GSLC_2024{1 + i // 28:02d}{1 + i % 28:02d}T000000.h5"
+        )
+        slc = (rng.normal(size=shape) + 1j * rng.normal(size=shape)).astype(
+            np.complex64
+        )
+        with h5py.File(filename, "w") as hf:
+            grp = hf.create_group(grid)
+            grp.create_dataset(
+                "HH", data=slc, chunks=(512, 512), compression="gzip", shuffle=True
+            )
+            grp["mask"] = np.ones(shape, dtype=np.uint8)
+            grp["xCoordinates"] = 300_000 + 10.0 * np.arange(shape[1])
+            grp["yCoordinates"] = 4_000_000 - 5.0 * np.arange(shape[0])
+            grp["projection"] = 32611
+        files.append(filename)
+    return files
+
+
+def iter_blocks(shape: tuple[int, int], block: int):
+    """Yield the (rows, cols) slices of the blocks covering `shape`."""
+    for r in range(0, shape[0], block):
+        for c in range(0, shape[1], block):
+            yield slice(r, r + block), slice(c, c + block)
+
+
+def read_hdf5(files: list[Path], shape: tuple[int, int], block: int) -> float:
+    """Time reading every block from every file with h5py."""
+    t0 = time.perf_counter()
+    handles = [h5py.File(f) for f in files]
+    for rows, cols in iter_blocks(shape, block):
+        np.stack([hf[SUBDATASET][rows, cols] for hf in handles])
+    for hf in handles:
+        hf.close()
+    return time.perf_counter() - t0
+
+
+def read_vrt(
+    files: list[Path], shape: tuple[int, int], block: int, out_dir: Path
+) -> float:
+    """Time reading every block through a dolphin `VRTStack`."""
+    from dolphin import io
+
+    t0 = time.perf_counter()
+    stack = io.VRTStack(files, subdataset=SUBDATASET, outfile=out_dir / "stack.vrt")
+    for rows, cols in iter_blocks(shape, block):
+        stack[:, rows, cols]
+    return time.perf_counter() - t0
+
+
+def read_zarr(zarr_path: Path, shape: tuple[int, int], block: int) -> float:
+    """Time reading every block from a `ZarrStack`."""
+    t0 = time.perf_counter()
+    stack = ZarrStack(zarr_path)
+    for rows, cols in iter_blocks(shape, block):
+        stack[:, rows, cols]
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=15)
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--cols", type=int, default=4096)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    shape = (args.rows, args.cols)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        files = make_stack(out_dir, args.dates, shape)
+        num_mb = args.dates * args.rows * args.cols * 8 / 1e6
+
+        t0 = time.perf_counter()
+        zarr_path = prepare_zarr_stack(
+            files, out_dir / "stack.zarr", max_workers=args.workers
+        )
+        print(f"conversion to Zarr: {time.perf_counter() - t0:.2f} s")
+
+        readers = {
+            "hdf5": lambda: read_hdf5(files, shape, args.block),
+            "vrt": lambda: read_vrt(files, shape, args.block, out_dir),
+            "zarr": lambda: read_zarr(zarr_path, shape, args.block),
+        }
+        print(f"{'reader':>6} {'total (s)':>10} {'MB/s':>8}")
+        for name, read in readers.items():
+            try:
+                elapsed = read()
+            except ImportError as e:
+                print(f"{name:>6} skipped ({e})")
+                continue
+            print(f"{name:>6} {elapsed:>10.2f} {num_mb / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
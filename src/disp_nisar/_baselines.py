@@ -1,18 +1,29 @@
-import isce3
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import h5py
 import numpy as np
-from dolphin import baseline
 from dolphin._types import Filename
 from numpy.typing import ArrayLike
-from opera_utils import (
-    get_cslc_orbit,
-)
 from pyproj import CRS, Transformer
 
+from ._orbit import OrbitArrays, compute_perpendicular_baselines, llh_to_xyz
 from ._streaming import open_h5_file
 
+if TYPE_CHECKING:
+    import isce3
+
+logger = logging.getLogger(__name__)
+
 
 def _get_look_side(h5file: Filename) -> isce3.core.LookSide:
     """Get the look side from a NISAR GSLC HDF5 file."""
+    import isce3
+
     with open_h5_file(h5file, "r") as hf:
         # Try NISAR path first
         for path in [
@@ -58,6 +69,7 @@ def compute_baselines(
     threshold: float = 1e-08,
     maxiter: int = 50,
     delta_range: float = 10.0,
+    engine: Literal["batch", "isce3"] = "batch",
 ):
     """Compute the perpendicular baseline at a subsampled grid for two CSLCs.
 
@@ -82,6 +94,11 @@ def compute_baselines(
     delta_range : float
         isce3 geo2rdr: Step size used for computing derivative of doppler
         Default = 10.0
+    engine : {"batch", "isce3"}
+        "batch" solves the zero-Doppler geometry of all grid points at once with
+        numpy (see `_orbit`); "isce3" calls `isce3.geometry.geo2rdr` point by
+        point.
+        Default = "batch"
 
     Returns
     -------
@@ -90,6 +107,24 @@ def compute_baselines(
 
     """
     lon_grid, lat_grid = _get_grids(x=x, y=y, epsg=epsg)
+    if engine == "batch":
+        # Zero-Doppler geometry: `wavelength`, look side and `delta_range` don't
+        # change the solution
+        baselines = compute_perpendicular_baselines(
+            llh_to_xyz(lon_grid, lat_grid, height),
+            OrbitArrays.from_h5(h5file_ref),
+            OrbitArrays.from_h5(h5file_sec),
+            threshold=threshold,
+            maxiter=maxiter,
+        )
+        return baselines.reshape(lon_grid.shape)
+    if engine != "isce3":
+        raise ValueError(f"Unknown baseline engine: {engine!r}")
+
+    import isce3
+    from dolphin import baseline
+    from opera_utils import get_cslc_orbit
+
     lon_arr = lon_grid.ravel()
     lat_arr = lat_grid.ravel()
 
@@ -137,9 +172,109 @@ def compute_baselines(
     return np.array(baselines).reshape(lon_grid.shape)
 
 
+def create_baseline_cache(
+    output_name: Filename,
+    cslc_files: Sequence[Filename],
+    x: ArrayLike,
+    y: ArrayLike,
+    epsg: int,
+    height: float = 0.0,
+) -> Path:
+    """Compute the baseline of every acquisition against one common reference.
+
+    The first of `cslc_files` (sorted by name) is the reference geometry. For
+    each acquisition, the perpendicular baseline from the reference orbit is
+    saved on the (`y`, `x`) grid, so the baseline of any pair can be derived by
+    difference (see `read_pair_baseline`) with one orbit solve per acquisition,
+    rather than two per product.
+
+    Parameters
+    ----------
+    output_name : Filename
+        Path to the HDF5 file to create.
+    cslc_files : Sequence[Filename]
+        One GSLC/CSLC file per acquisition (the one used for its orbit).
+    x : ArrayLike
+        x coordinates of the grid.
+    y : ArrayLike
+        y coordinates of the grid.
+    epsg : int
+        EPSG code of `x`, `y`.
+    height : float
+        Target height to use for baseline computation.
+        Default = 0.0
+
+    Returns
+    -------
+    Path
+        `output_name`
+
+    """
+    output_name = Path(output_name)
+    cslc_files = sorted(set(cslc_files), key=lambda f: Path(f).name)
+    lon_grid, lat_grid = _get_grids(x=x, y=y, epsg=epsg)
+    xyz = llh_to_xyz(lon_grid, lat_grid, height)
+    orbit_ref = OrbitArrays.from_h5(cslc_files[0])
+    logger.info(
+        f"Computing baselines of {len(cslc_files)} acquisitions against"
+        f" {Path(cslc_files[0]).name}"
+    )
+    tmp_name = output_name.with_suffix(".tmp" + output_name.suffix)
+    with h5py.File(tmp_name, "w") as hf:
+        hf["x"], hf["y"] = np.asarray(x), np.asarray(y)
+        hf.attrs.update(
+            {"reference_file": str(cslc_files[0]), "epsg": epsg, "height": height}
+        )
+        for filename in cslc_files:
+            baselines = compute_perpendicular_baselines(
+                xyz, orbit_ref, OrbitArrays.from_h5(filename)
+            )
+            hf[Path(filename).name] = baselines.reshape(lon_grid.shape)
+    tmp_name.replace(output_name)
+    return output_name
+
+
+def read_pair_baseline(
+    cache_file: Filename,
+    h5file_ref: Filename,
+    h5file_sec: Filename,
+    x: ArrayLike,
+    y: ArrayLike,
+) -> np.ndarray | None:
+    """Get the baseline between two acquisitions from a `create_baseline_cache` file.
+
+    Both baselines are relative to the same reference geometry, so the pair's
+    perpendicular baseline is their difference (to first order in the
+    separation of the orbits).
+
+    Returns
+    -------
+    np.ndarray | None
+        The perpendicular baselines on the (`y`, `x`) grid, or None if either
+        acquisition or the grid is missing from `cache_file`.
+
+    """
+    if not Path(cache_file).exists():
+        return None
+    with h5py.File(cache_file, "r") as hf:
+        keys = Path(h5file_ref).name, Path(h5file_sec).name
+        if not all(key in hf for key in keys):
+            return None
+        x, y = np.asarray(x), np.asarray(y)
+        if hf["x"].shape != x.shape or hf["y"].shape != y.shape:
+            return None
+        if not (np.allclose(hf["x"][()], x) and np.allclose(hf["y"][()], y)):
+            return None
+        return hf[keys[1]][()] - hf[keys[0]][()]
+
+
 def _interpolate_data(
-    data: np.ndarray, shape: tuple[int, int], method="linear"
+    data: np.ndarray,
+    shape: tuple[int, int],
+    method="linear",
+    rows: slice | None = None,
 ) -> np.ndarray:
+    """Upsample `data` to `shape`, optionally only returning the output `rows`."""
     from scipy.interpolate import RegularGridInterpolator
 
     # Create coordinate arrays for the original data
@@ -147,6 +282,8 @@ def _interpolate_data(
 
     # Create coordinate arrays for the desired output shape
     new_coords = [np.linspace(0, 1, s) for s in shape]
+    if rows is not None:
+        new_coords[0] = new_coords[0][rows]
 
     # Create the interpolator
     interp = RegularGridInterpolator(orig_coords, data, method=method)
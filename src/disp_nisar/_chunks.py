@@ -0,0 +1,291 @@
+"""Parallel encoding of HDF5 chunks, written with `write_direct_chunk`.
+
+HDF5 runs a dataset's filter pipeline (shuffle, deflate, ...) one chunk at a
+time on the writing thread. For the multi-GB product layers, compression
+dominates the write time, but every chunk can be encoded independently.
+
+Here each chunk of a strip is rounded (`round_mantissa`), shuffled and
+compressed in a thread pool (zlib releases the GIL), then the encoded bytes are
+written with `h5py.h5d.DatasetID.write_direct_chunk`. The bytes are exactly what
+the HDF5 filter pipeline would have produced, so any HDF5/NetCDF reader decodes
+them as usual.
+
+Only the filters with a registered codec (see `register_codec`) plus shuffle are
+supported; datasets with any other filter (e.g. fletcher32, scale-offset) or
+writes not aligned to the chunk grid fall back to a regular h5py write.
+"""
+
+from __future__ import annotations
+
+import logging
+import zlib
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+import h5py
+import numpy as np
+from dolphin.io import round_mantissa
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "copy_chunks",
+    "decode_chunk",
+    "encode_chunk",
+    "get_chunk_codec",
+    "register_codec",
+    "write_chunked",
+]
+
+FILTER_SHUFFLE = h5py.h5z.FILTER_SHUFFLE
+FILTER_DEFLATE = h5py.h5z.FILTER_DEFLATE
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Compress/decompress functions of one HDF5 filter.
+
+    Both are called with the bytes and the filter's `cd_values`.
+    """
+
+    encode: Callable[[bytes, tuple[int, ...]], bytes]
+    decode: Callable[[bytes, tuple[int, ...]], bytes]
+
+
+_CODECS: dict[int, Codec] = {
+    FILTER_DEFLATE: Codec(
+        encode=lambda buf, opts: zlib.compress(buf, opts[0] if opts else 4),
+        decode=lambda buf, _opts: zlib.decompress(buf),
+    ),
+}
+
+
+def register_codec(filter_id: int, codec: Codec) -> None:
+    """Register the `codec` implementing the HDF5 filter `filter_id`.
+
+    The codec's output must be byte-identical to what the HDF5 filter plugin
+    stores (e.g. a raw zstd frame for the zstd filter, id 32015).
+    """
+    _CODECS[filter_id] = codec
+
+
+@dataclass(frozen=True)
+class ChunkCodec:
+    """The filter pipeline of a dataset, as applied by `encode_chunk`.
+
+    Attributes
+    ----------
+    shuffle : bool
+        Whether the byte shuffle filter runs before compression.
+    filter_id : int | None
+        HDF5 id of the compression filter (None for no compression).
+    options : tuple[int, ...]
+        `cd_values` of the compression filter.
+
+    """
+
+    shuffle: bool
+    filter_id: int | None
+    options: tuple[int, ...] = ()
+
+
+def get_chunk_codec(dset: h5py.Dataset) -> ChunkCodec | None:
+    """Get the pipeline of `dset`, or None if it can't be reproduced here.
+
+    Examples
+    --------
+    >>> import h5py, numpy as np
+    >>> with h5py.File("ex.h5", "w", driver="core", backing_store=False) as hf:
+    ...     d = hf.create_dataset(
+    ...         "a", (8, 8), "f4", chunks=(4, 4), compression="gzip", shuffle=True
+    ...     )
+    ...     get_chunk_codec(d)
+    ChunkCodec(shuffle=True, filter_id=1, options=(4,))
+
+    """
+    if dset.chunks is None:
+        return None
+    dcpl = dset.id.get_create_plist()
+    shuffle = False
+    compression: tuple[int, tuple[int, ...]] | None = None
+    for i in range(dcpl.get_nfilters()):
+        filter_id, _flags, values, _name = dcpl.get_filter(i)
+        if filter_id == FILTER_SHUFFLE and compression is None:
+            shuffle = True
+        elif filter_id in _CODECS and compression is None:
+            compression = (filter_id, tuple(values))
+        else:
+            # Unsupported filter, or filters in an order we don't reproduce
+            return None
+    if compression is None:
+        return ChunkCodec(shuffle=shuffle, filter_id=None)
+    return ChunkCodec(shuffle=shuffle, filter_id=compression[0], options=compression[1])
+
+
+def encode_chunk(
+    chunk: np.ndarray, codec: ChunkCodec, keep_bits: int | None = None
+) -> bytes:
+    """Apply mantissa rounding, then the `codec` pipeline, to one full chunk."""
+    if keep_bits is not None and np.issubdtype(chunk.dtype, np.inexact):
+        # Round a copy: `chunk` may be a view of the caller's array
+        chunk = np.array(chunk, order="C")
+        round_mantissa(chunk, keep_bits=keep_bits)
+    else:
+        chunk = np.ascontiguousarray(chunk)
+    itemsize = chunk.dtype.itemsize
+    if codec.shuffle and itemsize > 1:
+        # HDF5's shuffle: all first bytes of each element, then all second bytes...
+        buf = chunk.view(np.uint8).reshape(-1, itemsize).T.tobytes()
+    else:
+        buf = chunk.tobytes()
+    if codec.filter_id is None:
+        return buf
+    return _CODECS[codec.filter_id].encode(buf, codec.options)
+
+
+def decode_chunk(
+    raw: bytes,
+    dtype: np.dtype,
+    chunk_shape: tuple[int, ...],
+    codec: ChunkCodec,
+    filter_mask: int = 0,
+) -> np.ndarray:
+    """Invert `encode_chunk` (or the HDF5 pipeline) for one stored chunk.
+
+    `filter_mask` is the mask returned by `read_direct_chunk`: bit `i` set means
+    filter `i` of the pipeline was skipped for this chunk.
+    """
+    dtype = np.dtype(dtype)
+    buf = raw
+    compress_index = 1 if codec.shuffle else 0
+    if codec.filter_id is not None and not filter_mask & (1 << compress_index):
+        buf = _CODECS[codec.filter_id].decode(buf, codec.options)
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    if codec.shuffle and dtype.itemsize > 1 and not filter_mask & 1:
+        planes = arr.reshape(dtype.itemsize, -1)
+        arr = np.empty((planes.shape[1], dtype.itemsize), dtype=np.uint8)
+        # One byte plane at a time: about twice as fast as copying `planes.T`
+        for i, plane in enumerate(planes):
+            arr[:, i] = plane
+    return np.ascontiguousarray(arr).view(dtype).reshape(chunk_shape)
+
+
+def write_chunked(
+    dset: h5py.Dataset,
+    data: np.ndarray,
+    row_start: int = 0,
+    col_start: int = 0,
+    keep_bits: int | None = None,
+    executor: Executor | None = None,
+) -> None:
+    """Write a 2D block of `data` into `dset`, encoding its chunks in parallel.
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        Chunked 2D dataset to write to.
+    data : np.ndarray
+        Block to write, at (`row_start`, `col_start`).
+    row_start : int
+        First row of the block in `dset`.
+    col_start : int
+        First column of the block in `dset`.
+    keep_bits : int, optional
+        If given (and `data` is floating point or complex), round the mantissa of
+        `data` to this many bits before compressing.
+    executor : Executor, optional
+        Pool used to encode the chunks. If None, chunks are encoded serially.
+
+    Notes
+    -----
+    If the block is not aligned with the chunk grid, or the dataset's filters
+    aren't supported by `get_chunk_codec`, this falls back to a regular write.
+
+    """
+    data = np.asarray(data, dtype=dset.dtype)
+    codec = get_chunk_codec(dset)
+    rows, cols = data.shape
+    if codec is None or not _is_aligned(dset, row_start, col_start, rows, cols):
+        logger.debug("Writing %s through the HDF5 filter pipeline", dset.name)
+        if keep_bits is not None and np.issubdtype(data.dtype, np.inexact):
+            round_mantissa(data, keep_bits=keep_bits)
+        dset[row_start : row_start + rows, col_start : col_start + cols] = data
+        return
+
+    chunk_rows, chunk_cols = dset.chunks
+    fillvalue = dset.fillvalue
+    offsets = [
+        (r, c) for r in range(0, rows, chunk_rows) for c in range(0, cols, chunk_cols)
+    ]
+
+    def _encode(offset: tuple[int, int]) -> bytes:
+        r, c = offset
+        tile = data[r : r + chunk_rows, c : c + chunk_cols]
+        if tile.shape != (chunk_rows, chunk_cols):
+            # Edge chunks are stored at full size: pad past the dataset extent
+            padded = np.full((chunk_rows, chunk_cols), fillvalue, dtype=data.dtype)
+            padded[: tile.shape[0], : tile.shape[1]] = tile
+            tile = padded
+        return encode_chunk(tile, codec, keep_bits=keep_bits)
+
+    encoded = executor.map(_encode, offsets) if executor else map(_encode, offsets)
+    # HDF5 calls are serialized by h5py anyway: write from this thread, in order
+    for (r, c), raw in zip(offsets, encoded):
+        dset.id.write_direct_chunk((row_start + r, col_start + c), raw, filter_mask=0)
+
+
+def _is_aligned(
+    dset: h5py.Dataset, row_start: int, col_start: int, rows: int, cols: int
+) -> bool:
+    """Check the block covers whole chunks (or ends at the dataset edge)."""
+    chunk_rows, chunk_cols = dset.chunks
+    n_rows, n_cols = dset.shape
+    row_end, col_end = row_start + rows, col_start + cols
+    return (
+        row_start % chunk_rows == 0
+        and col_start % chunk_cols == 0
+        and (row_end % chunk_rows == 0 or row_end == n_rows)
+        and (col_end % chunk_cols == 0 or col_end == n_cols)
+        and row_end <= n_rows
+        and col_end <= n_cols
+    )
+
+
+def copy_chunks(src: h5py.Dataset, dst: h5py.Dataset) -> bool:
+    """Copy the stored (still compressed) chunks of `src` into `dst` verbatim.
+
+    Parameters
+    ----------
+    src : h5py.Dataset
+        Dataset to copy from.
+    dst : h5py.Dataset
+        Dataset to copy into. Must have the same shape, dtype, chunks and filters.
+
+    Returns
+    -------
+    bool
+        False if the two layouts differ (nothing is copied), True otherwise.
+        Chunks never written in `src` are left unallocated in `dst`, so they
+        read back as the fill value.
+
+    """
+    same_fill = src.fillvalue == dst.fillvalue or (
+        np.isnan(src.fillvalue) and np.isnan(dst.fillvalue)
+    )
+    if (
+        src.shape != dst.shape
+        or src.dtype != dst.dtype
+        or src.chunks is None
+        or src.chunks != dst.chunks
+        or not same_fill
+    ):
+        return False
+    codec = get_chunk_codec(src)
+    if codec is None or codec != get_chunk_codec(dst):
+        return False
+    for i in range(src.id.get_num_chunks()):
+        offset = src.id.get_chunk_info(i).chunk_offset
+        filter_mask, raw = src.id.read_direct_chunk(offset)
+        dst.id.write_direct_chunk(offset, raw, filter_mask=filter_mask)
+    return True
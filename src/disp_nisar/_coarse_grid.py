@@ -0,0 +1,225 @@
+"""Coarse grids for the smooth correction layers of a product.
+
+A `CoarseGrid` samples the product grid every `subsample` pixels: coarse pixel
+`(i, j)` is centered on product pixel `(i * subsample, j * subsample)`. The last
+coarse row and column are the first ones at or past the last product pixel, so
+every product pixel lies between coarse points (the outermost coarse points may
+be slightly outside the frame).
+
+Product pixels are recovered by bilinear interpolation between the coarse
+points, using the x/y coordinates stored alongside the coarse layers. Outside of
+the coarse coordinates, the edge values are repeated.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Sequence
+
+import h5py
+import numpy as np
+from dolphin._types import Filename
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CoarseGrid", "interpolate_window", "read_correction_layer"]
+
+
+@dataclass(frozen=True)
+class CoarseGrid:
+    """Product grid subsampled by `subsample`.
+
+    Attributes
+    ----------
+    gt : tuple[float, ...]
+        GDAL GeoTransform of the full resolution product grid.
+    shape : tuple[int, int]
+        (rows, cols) of the full resolution product grid.
+    subsample : int
+        Spacing, in product pixels, between the coarse grid points.
+
+    Examples
+    --------
+    >>> grid = CoarseGrid(gt=(0, 30, 0, 900, 0, -30), shape=(101, 120), subsample=50)
+    >>> grid.coarse_shape
+    (3, 4)
+    >>> grid.coarse_gt
+    (-735.0, 1500, 0, 1635.0, 0, -1500)
+
+    """
+
+    gt: tuple[float, ...]
+    shape: tuple[int, int]
+    subsample: int
+
+    @property
+    def coarse_shape(self) -> tuple[int, int]:
+        """(rows, cols) of the coarse grid."""
+        rows, cols = (-(-(n - 1) // self.subsample) + 1 for n in self.shape)
+        return rows, cols
+
+    @property
+    def coarse_gt(self) -> tuple[float, ...]:
+        """GeoTransform of the coarse grid (upper left corner of its first pixel)."""
+        x_origin, x_res, _, y_origin, _, y_res = self.gt
+        s = self.subsample
+        # Coarse pixel centers fall on the centers of every `s`-th product pixel
+        return (
+            x_origin + x_res / 2 - s * x_res / 2,
+            s * x_res,
+            0,
+            y_origin + y_res / 2 - s * y_res / 2,
+            0,
+            s * y_res,
+        )
+
+    def indices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the product (row, col) indices of the coarse points.
+
+        Indices past the frame are clipped to the last row/column.
+        """
+        rows, cols = self.coarse_shape
+        s = self.subsample
+        return (
+            np.minimum(np.arange(rows) * s, self.shape[0] - 1),
+            np.minimum(np.arange(cols) * s, self.shape[1] - 1),
+        )
+
+    def coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the (y, x) coordinates of the coarse pixel centers."""
+        x_origin, x_res, _, y_origin, _, y_res = self.gt
+        rows, cols = self.coarse_shape
+        s = self.subsample
+        y = y_origin + y_res / 2 + np.arange(rows) * s * y_res
+        x = x_origin + x_res / 2 + np.arange(cols) * s * x_res
+        return y, x
+
+    def upsample(
+        self,
+        data: np.ndarray,
+        rows: slice | None = None,
+        cols: slice | None = None,
+    ) -> np.ndarray:
+        """Interpolate coarse `data` onto the product pixels in `rows`, `cols`."""
+        rows = rows or slice(None)
+        cols = cols or slice(None)
+        out_rows = np.arange(self.shape[0])[rows] / self.subsample
+        out_cols = np.arange(self.shape[1])[cols] / self.subsample
+        return _interpolate_indices(data, out_rows, out_cols)
+
+
+def interpolate_window(
+    data: np.ndarray | h5py.Dataset,
+    y: np.ndarray,
+    x: np.ndarray,
+    y_out: np.ndarray,
+    x_out: np.ndarray,
+) -> np.ndarray:
+    """Bilinearly interpolate `data` from the (`y`, `x`) to the (`y_out`, `x_out`) grid.
+
+    Only the rows of `data` needed for the output are read, so `data` may be an
+    h5py dataset.
+
+    Parameters
+    ----------
+    data : np.ndarray | h5py.Dataset
+        2D array on the grid (`y`, `x`).
+    y : np.ndarray
+        Monotonic y coordinates of the rows of `data`.
+    x : np.ndarray
+        Monotonic x coordinates of the columns of `data`.
+    y_out : np.ndarray
+        y coordinates of the output rows.
+    x_out : np.ndarray
+        x coordinates of the output columns.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (len(`y_out`), len(`x_out`)).
+
+    """
+    return _interpolate_indices(
+        data, _fractional_index(y, y_out), _fractional_index(x, x_out)
+    )
+
+
+def read_correction_layer(
+    filename: Filename,
+    name: str,
+    rows: slice | None = None,
+    cols: slice | None = None,
+    group: str = "corrections",
+) -> np.ndarray:
+    """Read a window of a correction layer at the product's full resolution.
+
+    Layers stored on a coarse grid (see `CoarseGrid`) are bilinearly interpolated
+    onto the requested product pixels; full resolution layers are sliced.
+
+    Parameters
+    ----------
+    filename : Filename
+        Path to the displacement product.
+    name : str
+        Name of the layer in `group`, e.g. "solid_earth_tide".
+    rows : slice, optional
+        Rows of the product grid to read. Default is all rows.
+    cols : slice, optional
+        Columns of the product grid to read. Default is all columns.
+    group : str
+        Group holding the layer and its x/y coordinates.
+
+    Returns
+    -------
+    np.ndarray
+        The layer on the product pixels `rows`, `cols`.
+
+    """
+    rows = rows or slice(None)
+    cols = cols or slice(None)
+    with h5py.File(filename, "r") as hf:
+        dset = hf[group][name]
+        y_out, x_out = hf["y"][rows], hf["x"][cols]
+        if dset.shape == (hf["y"].size, hf["x"].size):
+            return dset[rows, cols]
+        y, x = hf[group]["y"][()], hf[group]["x"][()]
+        return interpolate_window(dset, y, x, y_out, x_out)
+
+
+def _fractional_index(coords: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Get the (fractional) index of each `out` coordinate in `coords`."""
+    idx = np.arange(len(coords), dtype=np.float64)
+    if len(coords) > 1 and coords[0] > coords[-1]:
+        return np.interp(out, coords[::-1], idx[::-1])
+    return np.interp(out, coords, idx)
+
+
+def _interpolate_indices(
+    data: np.ndarray | h5py.Dataset,
+    out_rows: Sequence[float] | np.ndarray,
+    out_cols: Sequence[float] | np.ndarray,
+) -> np.ndarray:
+    """Interpolate `data` at the fractional row and column indices, separably."""
+    rows0, rows1, row_weights = _bracket(np.asarray(out_rows), data.shape[0])
+    cols0, cols1, col_weights = _bracket(np.asarray(out_cols), data.shape[1])
+    if rows0.size == 0 or cols0.size == 0:
+        return np.empty((rows0.size, cols0.size), dtype=np.float32)
+    # Read only the coarse rows in use
+    first, last = int(rows0.min()), int(rows1.max()) + 1
+    block = np.asarray(data[first:last], dtype=np.float64)
+    rows0, rows1 = rows0 - first, rows1 - first
+
+    wy = row_weights[:, None]
+    by_rows = block[rows0] * (1 - wy) + block[rows1] * wy
+    wx = col_weights[None, :]
+    out = by_rows[:, cols0] * (1 - wx) + by_rows[:, cols1] * wx
+    return out.astype(np.float32)
+
+
+def _bracket(index: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the neighbors and weight of the upper one for each fractional `index`."""
+    index = np.clip(index, 0, size - 1)
+    lower = np.floor(index).astype(int)
+    upper = np.minimum(lower + 1, size - 1)
+    return lower, upper, index - lower
@@ -0,0 +1,291 @@
+"""Run-scoped compute resources: thread limits, pool sizes and a dask cluster.
+
+The workflow's stages each sized their own thread and process pools from the
+CPU count (product chunk compression, the stack readers of the PS step), on
+top of dolphin's own workers, so the cores were oversubscribed. Each
+`XarrayStackReader` also configured dask on its own, starting a
+`LocalCluster` that was never closed.
+
+A `ComputeContext` is entered once per run (see `main.run`), sized from the
+run's `worker_settings` and core budget:
+
+- it limits the threads of BLAS, OpenMP and JAX to ``threads_per_worker``
+  for the run. The limits are inherited by the worker processes the stages
+  spawn, which run ``threads_per_worker``-sized numerical code side by side.
+- the stages size their pools from its `cores`, through
+  `get_threads_per_process`: the compression threads of the product
+  workers, and the chunk reading threads of the `ChunkedStackReader`s.
+- it starts a dask cluster, with a per-worker memory limit, only if an
+  `XarrayStackReader` computes on it. The workflow itself reads its stacks
+  with `ChunkedStackReader`, without dask.
+
+The cluster is shut down and the environment restored when the run ends.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+if TYPE_CHECKING:
+    from dolphin.workflows.config import WorkerSettings
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ComputeContext",
+    "get_compute_context",
+    "get_threads_per_process",
+    "total_memory",
+]
+
+# Fraction of the machine's memory given to the dask workers
+DEFAULT_MEMORY_FRACTION = 0.8
+
+_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+class ComputeContext:
+    """Thread limits and a lazily started dask cluster for one run.
+
+    Parameters
+    ----------
+    n_workers : int
+        Number of dask worker processes.
+    threads_per_worker : int
+        Threads of each worker, also the limit set for BLAS, OpenMP and JAX.
+    memory_limit : int, optional
+        Memory limit of each dask worker, in bytes.
+        Default is `memory_fraction` of `total_memory()`, split between the
+        workers.
+    memory_fraction : float
+        Fraction of the total memory used by the default `memory_limit`.
+    processes : bool
+        Run the dask workers in separate processes (which isolates JAX in each
+        of them) rather than threads.
+
+    Examples
+    --------
+    >>> with ComputeContext(n_workers=2, memory_limit=2**30) as compute:
+    ...     get_compute_context() is compute
+    True
+    >>> get_compute_context() is None
+    True
+
+    """
+
+    def __init__(
+        self,
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        memory_limit: int | None = None,
+        memory_fraction: float = DEFAULT_MEMORY_FRACTION,
+        processes: bool = True,
+    ) -> None:
+        if n_workers < 1 or threads_per_worker < 1:
+            msg = (
+                "n_workers and threads_per_worker must be positive, got"
+                f" {n_workers} and {threads_per_worker}"
+            )
+            raise ValueError(msg)
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker
+        if memory_limit is None:
+            memory_limit = int(total_memory() * memory_fraction) // n_workers
+        self.memory_limit = memory_limit
+        self.processes = processes
+        self._cluster: Any = None
+        self._client: Any = None
+        self._saved_env: dict[str, str | None] | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_worker_settings(
+        cls,
+        worker_settings: WorkerSettings,
+        max_cores: int | None = None,
+        **kwargs: Any,
+    ) -> ComputeContext:
+        """Size the context from dolphin's `WorkerSettings`.
+
+        Parameters
+        ----------
+        worker_settings : WorkerSettings
+            ``n_parallel_bursts`` workers of ``threads_per_worker`` threads each.
+        max_cores : int, optional
+            Core budget of the run: the number of workers is reduced so that
+            ``n_workers * threads_per_worker`` stays within it.
+            Default is `os.cpu_count()`.
+        **kwargs : Any
+            Other arguments of `ComputeContext`.
+
+        Returns
+        -------
+        ComputeContext
+
+        """
+        max_cores = max(1, max_cores or os.cpu_count() or 1)
+        threads_per_worker = min(max(1, worker_settings.threads_per_worker), max_cores)
+        n_workers = max(1, worker_settings.n_parallel_bursts or 1)
+        n_workers = min(n_workers, max(1, max_cores // threads_per_worker))
+        return cls(n_workers=n_workers, threads_per_worker=threads_per_worker, **kwargs)
+
+    @property
+    def cores(self) -> int:
+        """Number of cores of the run: ``n_workers * threads_per_worker``."""
+        return self.n_workers * self.threads_per_worker
+
+    def threads_per_process(self, num_processes: int = 1) -> int:
+        """Share the run's cores between `num_processes` processes."""
+        return max(1, self.cores // max(1, num_processes))
+
+    @property
+    def thread_environment(self) -> dict[str, str]:
+        """Environment variables limiting the threads of numerical libraries."""
+        threads = str(self.threads_per_worker)
+        return {
+            **dict.fromkeys(_THREAD_VARIABLES, threads),
+            "XLA_FLAGS": (
+                "--xla_cpu_multi_thread_eigen=true "
+                f"intra_op_parallelism_threads={threads} "
+                "inter_op_parallelism_threads=1"
+            ),
+            # Keep JAX from pre-allocating all the GPU memory
+            "XLA_PYTHON_CLIENT_PREALLOCATE": "false",
+            "XLA_PYTHON_CLIENT_MEM_FRACTION": "0.75",
+        }
+
+    def get_client(self) -> Any:
+        """Get the dask client of the run, starting its cluster on first use.
+
+        Returns
+        -------
+        dask.distributed.Client or None
+            None if dask.distributed is not installed.
+
+        """
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            try:
+                from dask.distributed import Client, LocalCluster
+            except ImportError:
+                logger.debug("dask.distributed not available, using threads")
+                return None
+            logger.info(
+                "Starting dask LocalCluster: %d workers x %d threads, %.1f GB each",
+                self.n_workers,
+                self.threads_per_worker,
+                self.memory_limit / 2**30,
+            )
+            self._cluster = LocalCluster(
+                n_workers=self.n_workers,
+                threads_per_worker=self.threads_per_worker,
+                memory_limit=self.memory_limit,
+                processes=self.processes,
+                silence_logs=logging.ERROR,
+            )
+            # Not made the default client: only the readers given this context
+            # compute on the cluster
+            self._client = Client(self._cluster, set_as_default=False)
+            logger.info("Dask dashboard: %s", self._client.dashboard_link)
+            return self._client
+
+    def compute(self, *collections: Any) -> tuple[Any, ...]:
+        """Compute dask collections on the run's cluster (or threads without one)."""
+        import dask
+
+        client = self.get_client()
+        if client is not None:
+            return dask.compute(*collections, scheduler=client)
+        return dask.compute(
+            *collections,
+            scheduler="threads",
+            num_workers=self.n_workers * self.threads_per_worker,
+        )
+
+    def close(self) -> None:
+        """Shut down the dask cluster, if one was started."""
+        with self._lock:
+            client, cluster = self._client, self._cluster
+            self._client = self._cluster = None
+        if client is not None:
+            client.close()
+        if cluster is not None:
+            cluster.close()
+            logger.info("Dask LocalCluster shut down")
+
+    def __enter__(self) -> Self:
+        self._saved_env = {k: os.environ.get(k) for k in self.thread_environment}
+        os.environ.update(self.thread_environment)
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        try:
+            self.close()
+        finally:
+            if self in _active:
+                _active.remove(self)
+            for key, value in (self._saved_env or {}).items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            self._saved_env = None
+
+    def __repr__(self) -> str:
+        return (
+            f"ComputeContext(n_workers={self.n_workers},"
+            f" threads_per_worker={self.threads_per_worker},"
+            f" memory_limit={self.memory_limit})"
+        )
+
+
+# Contexts entered in this process, innermost last
+_active: list[ComputeContext] = []
+
+
+def get_compute_context() -> ComputeContext | None:
+    """Get the innermost entered `ComputeContext`, or None outside of a run."""
+    return _active[-1] if _active else None
+
+
+def get_threads_per_process(num_processes: int = 1) -> int:
+    """Get the threads each of `num_processes` processes may use.
+
+    The cores of the active `ComputeContext` (or all the CPUs outside of a
+    run) are shared between the processes.
+    """
+    compute = get_compute_context()
+    if compute is not None:
+        return compute.threads_per_process(num_processes)
+    return max(1, (os.cpu_count() or 1) // max(1, num_processes))
+
+
+def total_memory() -> int:
+    """Get the memory available to this process, in bytes.
+
+    The physical memory, or the cgroup limit of the container if lower.
+    """
+    total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for limit_file in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        try:
+            limit = Path(limit_file).read_text().strip()
+        except OSError:
+            continue
+        if limit.isdigit():
+            total = min(total, int(limit))
+        break
+    return total
@@ -0,0 +1,333 @@
+"""Process-wide cache of the Earthdata login and the temporary S3 credentials.
+
+Logging in to Earthdata and requesting S3 credentials from ASF each cost a
+round trip, and many workers doing it at once risk being throttled. The
+`CredentialManager` of a process logs in once and keeps the S3 credentials of
+each endpoint with their expiry. A background timer refreshes them
+`refresh_margin` before they expire, so remote reads seldom wait on one.
+
+Worker processes are seeded with the parent's S3 credentials instead of
+requesting their own: pass `share_credentials()` to `init_worker_credentials`
+in the pool initializer (`WorkerPool` does it for its workers).
+
+Where the credentials come from is a `CredentialProvider`: `EarthaccessProvider`
+by default, or e.g. a `StaticCredentialProvider` installed with
+`set_credential_provider` in tests.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple, Protocol
+
+from opera_utils.credentials import AWSCredentials
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CachedCredentials",
+    "CredentialManager",
+    "CredentialProvider",
+    "EarthaccessProvider",
+    "StaticCredentialProvider",
+    "get_credential_manager",
+    "init_worker_credentials",
+    "set_credential_provider",
+    "share_credentials",
+]
+
+# ASF temporary credentials last one hour
+DEFAULT_LIFETIME = timedelta(hours=1)
+# Cached credentials closer than this to their expiry are fetched again in the
+# foreground, if the background refresh has not replaced them
+MIN_VALIDITY = timedelta(minutes=1)
+# Delay before retrying a failed background refresh
+RETRY_DELAY = timedelta(seconds=30)
+
+
+class CachedCredentials(NamedTuple):
+    """Temporary S3 credentials and the time they expire."""
+
+    credentials: AWSCredentials
+    expiration: datetime
+
+
+class CredentialProvider(Protocol):
+    """Source of the Earthdata login and the temporary S3 credentials."""
+
+    def login(self) -> Any:
+        """Log in to Earthdata, returning the session/auth object."""
+        ...
+
+    def fetch_s3_credentials(self, endpoint: str) -> CachedCredentials:
+        """Request new temporary S3 credentials from the `endpoint` URL."""
+        ...
+
+
+class EarthaccessProvider:
+    """Log in with `earthaccess` and request S3 credentials from ASF."""
+
+    def login(self) -> Any:
+        try:
+            import earthaccess
+        except ImportError as e:
+            msg = (
+                "earthaccess is required for streaming remote files. "
+                "Install with: pip install earthaccess"
+            )
+            raise ImportError(msg) from e
+
+        logger.info("Authenticating with NASA Earthdata Login")
+        return earthaccess.login()
+
+    def fetch_s3_credentials(self, endpoint: str) -> CachedCredentials:
+        from opera_utils.credentials import (
+            ASFCredentialEndpoints,
+            get_temporary_aws_credentials,
+        )
+
+        logger.info("Requesting temporary S3 credentials from %s", endpoint)
+        # Bypass opera_utils' own cache, which does not know the expiry
+        get_temporary_aws_credentials.cache_clear()
+        data = get_temporary_aws_credentials(ASFCredentialEndpoints(endpoint))
+        credentials = AWSCredentials(
+            access_key_id=data["accessKeyId"],
+            secret_access_key=data["secretAccessKey"],
+            session_token=data["sessionToken"],
+        )
+        return CachedCredentials(credentials, _parse_expiration(data))
+
+
+class StaticCredentialProvider:
+    """Provide fixed credentials, e.g. for tests or local S3-compatible stores.
+
+    Parameters
+    ----------
+    credentials : AWSCredentials, optional
+        Credentials returned for every endpoint.
+        Default reads the ``AWS_*`` environment variables at each fetch.
+    auth : Any
+        Object returned by `login`.
+    lifetime : timedelta
+        Validity of each fetched credential.
+
+    Attributes
+    ----------
+    num_logins, num_fetches : int
+        Number of calls of `login` and `fetch_s3_credentials`.
+
+    """
+
+    def __init__(
+        self,
+        credentials: AWSCredentials | None = None,
+        auth: Any = None,
+        lifetime: timedelta = DEFAULT_LIFETIME,
+    ) -> None:
+        self.credentials = credentials
+        self.auth = auth
+        self.lifetime = lifetime
+        self.num_logins = 0
+        self.num_fetches = 0
+
+    def login(self) -> Any:
+        self.num_logins += 1
+        return self.auth
+
+    def fetch_s3_credentials(self, endpoint: str) -> CachedCredentials:  # noqa: ARG002
+        self.num_fetches += 1
+        credentials = self.credentials or AWSCredentials.from_env()
+        return CachedCredentials(credentials, _now() + self.lifetime)
+
+
+class CredentialManager:
+    """Cache the login and the S3 credentials of a `CredentialProvider`.
+
+    Parameters
+    ----------
+    provider : CredentialProvider, optional
+        Where the credentials come from. Default is `EarthaccessProvider`.
+    refresh_margin : timedelta
+        How long before they expire the S3 credentials are refreshed in the
+        background.
+
+    """
+
+    def __init__(
+        self,
+        provider: CredentialProvider | None = None,
+        refresh_margin: timedelta = timedelta(minutes=10),
+    ) -> None:
+        self.provider = provider if provider is not None else EarthaccessProvider()
+        self.refresh_margin = refresh_margin
+        self._auth: Any = None
+        self._logged_in = False
+        self._s3: dict[str, CachedCredentials] = {}
+        self._timers: dict[str, threading.Timer] = {}
+        self._lock = threading.RLock()
+
+    def login(self) -> Any:
+        """Log in once, returning the provider's session/auth object."""
+        with self._lock:
+            if not self._logged_in:
+                self._auth = self.provider.login()
+                self._logged_in = True
+            return self._auth
+
+    def get_s3_credentials(self, endpoint: str) -> AWSCredentials:
+        """Get valid S3 credentials for the `endpoint` URL, fetching if needed."""
+        with self._lock:
+            cached = self._s3.get(endpoint)
+            if cached is None or _now() >= cached.expiration - MIN_VALIDITY:
+                cached = self._fetch(endpoint)
+            return cached.credentials
+
+    def snapshot(self) -> dict[str, CachedCredentials]:
+        """Get the cached S3 credentials, to seed another process with `seed`."""
+        with self._lock:
+            return dict(self._s3)
+
+    def seed(self, credentials: Mapping[str, CachedCredentials]) -> None:
+        """Cache S3 credentials fetched elsewhere, keeping the newest of each."""
+        with self._lock:
+            for endpoint, cached in credentials.items():
+                current = self._s3.get(endpoint)
+                if current is None or cached.expiration > current.expiration:
+                    self._store(endpoint, cached)
+
+    def close(self) -> None:
+        """Stop the background refreshes."""
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def _fetch(self, endpoint: str) -> CachedCredentials:
+        cached = self.provider.fetch_s3_credentials(endpoint)
+        self._store(endpoint, cached)
+        return cached
+
+    def _store(self, endpoint: str, cached: CachedCredentials) -> None:
+        self._s3[endpoint] = cached
+        remaining = cached.expiration - _now()
+        if remaining <= MIN_VALIDITY:
+            # Too short-lived to refresh ahead: fetched again on the next use
+            old = self._timers.pop(endpoint, None)
+            if old is not None:
+                old.cancel()
+            return
+        delay = remaining - self.refresh_margin
+        if delay <= timedelta(0):
+            # Valid for less than the margin: refresh halfway to the expiry
+            delay = remaining / 2
+        self._schedule_refresh(endpoint, delay)
+
+    def _schedule_refresh(self, endpoint: str, delay: timedelta) -> None:
+        old = self._timers.pop(endpoint, None)
+        if old is not None:
+            old.cancel()
+        timer = threading.Timer(
+            max(delay.total_seconds(), 0), self._refresh, args=(endpoint,)
+        )
+        timer.daemon = True
+        self._timers[endpoint] = timer
+        timer.start()
+
+    def _refresh(self, endpoint: str) -> None:
+        with self._lock:
+            if self._timers.get(endpoint) is not threading.current_thread():
+                # Replaced, or the manager was closed
+                return
+        # Fetched without the lock: readers keep the current credentials
+        try:
+            cached = self.provider.fetch_s3_credentials(endpoint)
+        except Exception:
+            logger.warning(
+                "Could not refresh the S3 credentials of %s, retrying in %s",
+                endpoint,
+                RETRY_DELAY,
+                exc_info=True,
+            )
+            with self._lock:
+                if self._timers.get(endpoint) is threading.current_thread():
+                    self._schedule_refresh(endpoint, RETRY_DELAY)
+            return
+        self.seed({endpoint: cached})
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_expiration(data: Mapping[str, Any]) -> datetime:
+    """Get the expiry of an ASF s3credentials response.
+
+    Examples
+    --------
+    >>> _parse_expiration({"expiration": "2024-05-10 18:12:34+00:00"})
+    datetime.datetime(2024, 5, 10, 18, 12, 34, tzinfo=datetime.timezone.utc)
+
+    """
+    try:
+        expiration = datetime.fromisoformat(data["expiration"])
+    except (KeyError, TypeError, ValueError):
+        logger.debug("No expiration in the S3 credentials, assuming one hour")
+        return _now() + DEFAULT_LIFETIME
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return expiration
+
+
+# The manager of the current process, created on first use
+_manager: CredentialManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_credential_manager() -> CredentialManager:
+    """Get the credential manager of the current process."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CredentialManager()
+        return _manager
+
+
+def set_credential_provider(
+    provider: CredentialProvider | None, **kwargs: Any
+) -> CredentialManager:
+    """Replace the process's credential manager with one using `provider`.
+
+    Parameters
+    ----------
+    provider : CredentialProvider, optional
+        New source of credentials. None restores `EarthaccessProvider`.
+    **kwargs : Any
+        Other arguments of `CredentialManager`.
+
+    Returns
+    -------
+    CredentialManager
+        The new manager. Its cache starts empty.
+
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+        _manager = CredentialManager(provider, **kwargs)
+        return _manager
+
+
+def share_credentials() -> dict[str, CachedCredentials]:
+    """Get the S3 credentials cached in this process, to send to workers."""
+    with _manager_lock:
+        return {} if _manager is None else _manager.snapshot()
+
+
+def init_worker_credentials(credentials: Mapping[str, CachedCredentials]) -> None:
+    """Seed a worker's credential manager, e.g. as a process pool initializer."""
+    if credentials:
+        get_credential_manager().seed(credentials)
@@ -0,0 +1,344 @@
+"""Multiresolution (pyramid) long wavelength filter.
+
+The short wavelength displacement layer is the displacement minus a Gaussian
+low-pass of it, where the cutoff (25-30 km) is hundreds of pixels wide. Rather
+than filtering the full resolution frame, the low-pass component is estimated on
+a grid decimated by a power of two, chosen so the Gaussian still spans several
+coarse cells, then upsampled with linear interpolation one strip at a time.
+
+As in `dolphin.filtering.filter_long_wavelength`, pixels which are masked (or
+have no data) are replaced by a best-fit plane of the valid pixels before the
+low-pass, so large masked areas do not drag the long wavelength estimate to 0.
+Decimation is mask-aware: each coarse cell averages its valid pixels together
+with the plane value for its masked pixels.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "LongWavelengthModel",
+    "compute_filter_sigma",
+    "estimate_long_wavelength",
+    "filter_long_wavelength_pyramid",
+    "remove_long_wavelength",
+]
+
+# Read a strip of `rows`: returns (displacement, bad_pixel_mask)
+BlockReader = Callable[[slice], tuple[np.ndarray, np.ndarray]]
+
+
+def compute_filter_sigma(
+    wavelength_cutoff: float, pixel_spacing: float, cutoff_value: float = 0.5
+) -> float:
+    """Get the Gaussian sigma (in pixels) whose response is `cutoff_value` at cutoff.
+
+    Parameters
+    ----------
+    wavelength_cutoff : float
+        Spatial wavelength (in meters) where the filter response equals
+        `cutoff_value`.
+    pixel_spacing : float
+        Pixel spacing (in meters).
+    cutoff_value : float
+        Frequency response of the filter at the cutoff. Default is 0.5.
+
+    Returns
+    -------
+    float
+        Standard deviation of the Gaussian kernel, in pixels.
+
+    Examples
+    --------
+    >>> round(compute_filter_sigma(25_000, 30), 1)
+    110.4
+
+    """
+    sigma_f = 1 / wavelength_cutoff / np.sqrt(np.log(1 / cutoff_value))
+    sigma_x = 1 / np.pi / 2 / sigma_f
+    return float(sigma_x / pixel_spacing)
+
+
+def get_decimation_factor(sigma: float, min_coarse_sigma: float = 4.0) -> int:
+    """Get the largest power of two keeping `sigma` >= `min_coarse_sigma` coarse cells.
+
+    Examples
+    --------
+    >>> get_decimation_factor(110.4)
+    16
+    >>> get_decimation_factor(3.0)
+    1
+
+    """
+    factor = 1
+    while sigma / (2 * factor) >= min_coarse_sigma:
+        factor *= 2
+    return factor
+
+
+@dataclass(frozen=True)
+class LongWavelengthModel:
+    """Low-pass displacement on a decimated grid, plus the plane used for filling.
+
+    Attributes
+    ----------
+    lowpass : np.ndarray
+        Low-pass filtered displacement on the coarse grid.
+    factor : int
+        Decimation factor between the full resolution and the coarse grid.
+    shape : tuple[int, int]
+        Full resolution shape.
+    plane_coeffs : np.ndarray
+        Coefficients (col, row, offset) of the plane fit to the valid pixels,
+        in units of full resolution pixels.
+
+    """
+
+    lowpass: np.ndarray
+    factor: int
+    shape: tuple[int, int]
+    plane_coeffs: np.ndarray
+
+    def plane(self, rows: slice) -> np.ndarray:
+        """Evaluate the fitted plane on the full resolution `rows`."""
+        row_idx = np.arange(rows.start, rows.stop, dtype=np.float64)[:, None]
+        col_idx = np.arange(self.shape[1], dtype=np.float64)[None, :]
+        a, b, c = self.plane_coeffs
+        return (a * col_idx + b * row_idx + c).astype(np.float32)
+
+    def upsample(self, rows: slice) -> np.ndarray:
+        """Linearly interpolate the coarse low-pass onto the full resolution `rows`."""
+        r0, r1, wr = _linear_weights(
+            np.arange(rows.start, rows.stop), self.factor, self.lowpass.shape[0]
+        )
+        c0, c1, wc = _linear_weights(
+            np.arange(self.shape[1]), self.factor, self.lowpass.shape[1]
+        )
+        # Separable interpolation: first along rows, then along columns
+        tmp = self.lowpass[r0] * (1 - wr)[:, None] + self.lowpass[r1] * wr[:, None]
+        return (tmp[:, c0] * (1 - wc) + tmp[:, c1] * wc).astype(np.float32)
+
+
+def estimate_long_wavelength(
+    read_block: BlockReader,
+    shape: tuple[int, int],
+    wavelength_cutoff: float,
+    pixel_spacing: float,
+    min_coarse_sigma: float = 4.0,
+    block_rows: int = 512,
+) -> LongWavelengthModel:
+    """Estimate the long wavelength component of a frame, reading it in strips.
+
+    Parameters
+    ----------
+    read_block : Callable[[slice], tuple[np.ndarray, np.ndarray]]
+        Function returning the (displacement, bad_pixel_mask) for a slice of rows.
+        NaN or 0 displacement is treated as nodata.
+    shape : tuple[int, int]
+        Full resolution (rows, cols) of the frame.
+    wavelength_cutoff : float
+        Spatial wavelength (in meters) of the filter cutoff.
+    pixel_spacing : float
+        Pixel spacing (in meters).
+    min_coarse_sigma : float
+        Minimum Gaussian sigma, in coarse cells, allowed when choosing the
+        decimation factor. Default is 4.
+    block_rows : int
+        Approximate number of rows to read at once. Rounded to a multiple of the
+        decimation factor so no coarse cell spans two strips.
+
+    Returns
+    -------
+    LongWavelengthModel
+        The coarse low-pass, used to subtract the long wavelengths blockwise.
+
+    """
+    from scipy import ndimage
+
+    rows, cols = shape
+    sigma = compute_filter_sigma(wavelength_cutoff, pixel_spacing)
+    factor = get_decimation_factor(sigma, min_coarse_sigma)
+    coarse_shape = (-(-rows // factor), -(-cols // factor))
+    logger.debug(
+        "Long wavelength filter: sigma=%.1f pixels, decimation factor %s (%s cells)",
+        sigma,
+        factor,
+        coarse_shape,
+    )
+    strip_rows = max(1, block_rows // factor) * factor
+
+    # First pass: per-cell sums of valid pixels, and the plane's normal equations
+    valid_sum = np.zeros(coarse_shape, dtype=np.float64)
+    valid_count = np.zeros(coarse_shape, dtype=np.float64)
+    ata = np.zeros((3, 3), dtype=np.float64)
+    atz = np.zeros(3, dtype=np.float64)
+    col_idx = np.arange(cols, dtype=np.float64)
+    for start in range(0, rows, strip_rows):
+        row_slice = slice(start, min(start + strip_rows, rows))
+        disp, valid = _read_valid(read_block, row_slice)
+        coarse_rows = slice(start // factor, -(-row_slice.stop // factor))
+        z = np.where(valid, disp, 0).astype(np.float64)
+        valid_sum[coarse_rows] += _block_sum(z, factor)
+        valid_count[coarse_rows] += _block_sum(valid, factor)
+        ata_block, atz_block = _plane_normal_equations(
+            valid, z, row_offset=start, col_idx=col_idx
+        )
+        ata += ata_block
+        atz += atz_block
+
+    if np.linalg.matrix_rank(ata) < 3:
+        logger.warning("Not enough valid pixels to fit a plane: filling with 0")
+        plane_coeffs = np.zeros(3)
+    else:
+        plane_coeffs = np.linalg.solve(ata, atz)
+
+    # Fill the masked part of each cell with the plane evaluated at the cell center
+    total_count = np.outer(_cell_sizes(rows, factor), _cell_sizes(cols, factor))
+    row_centers = _cell_centers(rows, factor)
+    col_centers = _cell_centers(cols, factor)
+    a, b, c = plane_coeffs
+    plane_centers = a * col_centers[None, :] + b * row_centers[:, None] + c
+    coarse = (valid_sum + plane_centers * (total_count - valid_count)) / total_count
+
+    # The box average and the linear upsampling widen the effective kernel by
+    # about `factor**2 / 4` pixels**2 of variance: take it out of the Gaussian
+    coarse_sigma = np.sqrt(max(sigma**2 - factor**2 / 4, 0.0)) / factor
+    lowpass = ndimage.gaussian_filter(coarse, sigma=coarse_sigma, mode="reflect")
+    return LongWavelengthModel(
+        lowpass=lowpass.astype(np.float32),
+        factor=factor,
+        shape=shape,
+        plane_coeffs=plane_coeffs,
+    )
+
+
+def filter_long_wavelength_pyramid(
+    unwrapped_phase: np.ndarray,
+    bad_pixel_mask: np.ndarray,
+    wavelength_cutoff: float = 25_000,
+    pixel_spacing: float = 30,
+    min_coarse_sigma: float = 4.0,
+) -> np.ndarray:
+    """Remove the long wavelengths from an in-memory array.
+
+    Same inputs and output as `dolphin.filtering.filter_long_wavelength`, but
+    using `estimate_long_wavelength` for the low-pass.
+
+    Parameters
+    ----------
+    unwrapped_phase : np.ndarray
+        Unwrapped phase (or displacement). NaN or 0 is treated as nodata.
+    bad_pixel_mask : np.ndarray
+        Boolean array, True where pixels should not contribute to the low-pass.
+    wavelength_cutoff : float
+        Spatial wavelength (in meters) of the filter cutoff. Default is 25 km.
+    pixel_spacing : float
+        Pixel spacing (in meters). Default is 30.
+    min_coarse_sigma : float
+        Minimum Gaussian sigma, in coarse cells. Default is 4.
+
+    Returns
+    -------
+    np.ndarray
+        The short wavelength component. Masked pixels hold the plane fit minus
+        the low-pass; nodata pixels are 0.
+
+    """
+    shape = unwrapped_phase.shape
+
+    def read_block(rows: slice) -> tuple[np.ndarray, np.ndarray]:
+        return unwrapped_phase[rows], bad_pixel_mask[rows]
+
+    model = estimate_long_wavelength(
+        read_block,
+        shape=shape,
+        wavelength_cutoff=wavelength_cutoff,
+        pixel_spacing=pixel_spacing,
+        min_coarse_sigma=min_coarse_sigma,
+    )
+    return remove_long_wavelength(
+        model, unwrapped_phase, bad_pixel_mask, rows=slice(0, shape[0])
+    )
+
+
+def remove_long_wavelength(
+    model: LongWavelengthModel,
+    disp: np.ndarray,
+    bad_pixel_mask: np.ndarray,
+    rows: slice,
+) -> np.ndarray:
+    """Subtract the long wavelengths of `model` from a strip of `rows`.
+
+    Masked pixels are replaced by the plane fit before subtracting; nodata
+    pixels (NaN or 0) are returned as 0.
+    """
+    disp0 = np.nan_to_num(disp)
+    nodata = disp0 == 0
+    filled = np.where(nodata | bad_pixel_mask, model.plane(rows), disp0)
+    out = (filled - model.upsample(rows)).astype(np.float32)
+    out[nodata] = 0
+    return out
+
+
+def _read_valid(read_block: BlockReader, rows: slice) -> tuple[np.ndarray, np.ndarray]:
+    disp, bad_pixel_mask = read_block(rows)
+    disp = np.nan_to_num(np.asarray(disp, dtype=np.float32))
+    return disp, (disp != 0) & ~np.asarray(bad_pixel_mask, dtype=bool)
+
+
+def _plane_normal_equations(
+    valid: np.ndarray, z: np.ndarray, row_offset: int, col_idx: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get `A.T @ A` and `A.T @ z` for `A = [col, row, 1]` over the valid pixels.
+
+    Computed from row/column marginals, without forming `A`.
+    """
+    row_idx = np.arange(row_offset, row_offset + valid.shape[0], dtype=np.float64)
+    valid = valid.astype(np.float64)
+    col_counts = valid.sum(axis=0)
+    row_counts = valid.sum(axis=1)
+    n = row_counts.sum()
+    sx, sy = col_counts @ col_idx, row_counts @ row_idx
+    sxx, syy = col_counts @ col_idx**2, row_counts @ row_idx**2
+    sxy = row_idx @ (valid @ col_idx)
+    ata = np.array([[sxx, sxy, sx], [sxy, syy, sy], [sx, sy, n]])
+    atz = np.array([z.sum(axis=0) @ col_idx, z.sum(axis=1) @ row_idx, z.sum()])
+    return ata, atz
+
+
+def _block_sum(arr: np.ndarray, factor: int) -> np.ndarray:
+    """Sum non-overlapping `factor` x `factor` blocks, zero padding the edges."""
+    rows, cols = arr.shape
+    pad_rows, pad_cols = -rows % factor, -cols % factor
+    padded = np.pad(arr.astype(np.float64), ((0, pad_rows), (0, pad_cols)))
+    new_shape = (padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    return padded.reshape(new_shape).sum(axis=(1, 3))
+
+
+def _cell_sizes(n: int, factor: int) -> np.ndarray:
+    starts = np.arange(0, n, factor)
+    return np.minimum(starts + factor, n) - starts
+
+
+def _cell_centers(n: int, factor: int) -> np.ndarray:
+    starts = np.arange(0, n, factor)
+    return (starts + np.minimum(starts + factor, n) - 1) / 2
+
+
+def _linear_weights(
+    idx: np.ndarray, factor: int, n_coarse: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the coarse neighbors and weights for full resolution indices `idx`."""
+    # Coarse cell `i` is centered on full resolution index `i * factor + (factor-1)/2`
+    t = (idx - (factor - 1) / 2) / factor
+    i0 = np.clip(np.floor(t).astype(int), 0, n_coarse - 1)
+    i1 = np.minimum(i0 + 1, n_coarse - 1)
+    w = np.clip(t - i0, 0, 1).astype(np.float32)
+    return i0, i1, w
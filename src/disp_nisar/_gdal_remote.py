@@ -92,6 +92,7 @@ def configure_gdal_for_remote(
     max_retry: int = 3,
     timeout: int = 60,
     chunk_size: int = 4 * 1024 * 1024,
+    cache_size: int = 128 * 1024 * 1024,
 ) -> None:
     """Configure GDAL for optimal remote file access.
 
@@ -102,7 +103,10 @@ def configure_gdal_for_remote(
     timeout : int, optional
         Timeout in seconds for HTTP requests, by default 60.
     chunk_size : int, optional
-        Chunk size for HTTP range requests in bytes, by default 4MB.
+        Chunk size for HTTP range requests in bytes, by default 4MB (the page
+        size of paged NISAR HDF5 files, see `disp_nisar._remote_read`).
+    cache_size : int, optional
+        Size of the cache of downloaded chunks in bytes, by default 128MB.
 
     """
     from osgeo import gdal
@@ -116,9 +120,13 @@ def configure_gdal_for_remote(
     gdal.SetConfigOption("CPL_VSIL_CURL_ALLOWED_EXTENSIONS", ".h5,.hdf5,.nc,.tif")
     gdal.SetConfigOption("GDAL_HTTP_TIMEOUT", str(timeout))
 
-    # Enable caching
+    # Read whole pages per request, and merge requests for consecutive ranges
+    gdal.SetConfigOption("CPL_VSIL_CURL_CHUNK_SIZE", str(chunk_size))
+    gdal.SetConfigOption("GDAL_HTTP_MERGE_CONSECUTIVE_RANGES", "YES")
+
+    # Enable caching (of many chunks, not just one)
     gdal.SetConfigOption("VSI_CACHE", "YES")
-    gdal.SetConfigOption("VSI_CACHE_SIZE", str(chunk_size))
+    gdal.SetConfigOption("VSI_CACHE_SIZE", str(cache_size))
 
     # For S3 access (requires AWS credentials in environment)
     # Set these if you have AWS credentials:
@@ -129,3 +137,4 @@ def configure_gdal_for_remote(
     logger.debug(f"  Max retry: {max_retry}")
     logger.debug(f"  Timeout: {timeout}s")
     logger.debug(f"  Chunk size: {chunk_size / 1024 / 1024:.1f} MB")
+    logger.debug(f"  Cache size: {cache_size / 1024 / 1024:.1f} MB")
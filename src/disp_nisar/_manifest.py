@@ -0,0 +1,259 @@
+"""Run manifest used to checkpoint and resume workflow stages.
+
+The manifest is a JSON file in the `work_directory` recording, for each
+completed stage, a fingerprint of what went into it and the outputs it
+produced. A fingerprint covers:
+
+- the size and modification time of every file path found in the inputs
+- a hash of the (JSON-serializable) configuration parameters of the stage
+
+On a rerun, a stage whose fingerprint matches (and whose output files all
+still exist) is skipped and its recorded outputs are reused.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from dolphin._types import Filename
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["RunManifest", "run_or_resume"]
+
+T = TypeVar("T")
+
+MANIFEST_VERSION = 1
+
+
+class RunManifest:
+    """Record of completed stages of a run, persisted as JSON.
+
+    Parameters
+    ----------
+    filename : Filename
+        Path to the manifest file. Loaded if it exists.
+
+    """
+
+    def __init__(self, filename: Filename):
+        self.filename = Path(filename)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        if self.filename.exists():
+            try:
+                data = json.loads(self.filename.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.filename}: {e}")
+            else:
+                if data.get("version") == MANIFEST_VERSION:
+                    self._entries = data.get("stages", {})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @staticmethod
+    def fingerprint(inputs: Any = None, params: Any = None) -> str:
+        """Hash the inputs (including file sizes/mtimes) and parameters of a stage.
+
+        Parameters
+        ----------
+        inputs : Any
+            Values passed to the stage. Every `Path` found (recursing into lists,
+            dicts and dataclasses) contributes its size and modification time.
+            Configuration models (e.g. a `DisplacementWorkflow`) only
+            contribute their values.
+        params : Any
+            Configuration relevant to the stage. As with `inputs`, any `Path`
+            contributes its size and modification time (pass a `str` to only
+            fingerprint the name, e.g. for input granules trimmed during the run).
+
+        Returns
+        -------
+        str
+            Hex digest identifying this combination of inputs and parameters.
+
+        """
+        files = []
+        paths = [*_iter_paths(inputs), *_iter_paths(params)]
+        for p in sorted({str(p) for p in paths}):
+            try:
+                st = Path(p).stat()
+                files.append((p, st.st_size, st.st_mtime_ns))
+            except OSError:
+                files.append((p, None, None))
+        payload = json.dumps(
+            {"inputs": _encode(inputs), "files": files, "params": _encode(params)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def lookup(self, key: str, fingerprint: str) -> tuple[bool, Any]:
+        """Get the recorded outputs of `key`, if still valid.
+
+        Returns
+        -------
+        found : bool
+            True if `key` completed with the same `fingerprint` and all of its
+            output files still exist.
+        outputs : Any
+            The recorded outputs (None if not `found`).
+
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False, None
+        outputs = _decode(entry.get("outputs"))
+        missing = [p for p in _iter_paths(outputs) if not Path(p).exists()]
+        if missing:
+            logger.info(f"Rerunning {key}: {len(missing)} outputs missing")
+            return False, None
+        return True, outputs
+
+    def record(self, key: str, fingerprint: str, outputs: Any = None) -> None:
+        """Mark `key` as complete and save the manifest to disk."""
+        entry = {
+            "fingerprint": fingerprint,
+            "outputs": _encode(outputs),
+            "completed": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._write()
+
+    def invalidate(self, key: str) -> None:
+        """Forget the completion record of `key`."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._write()
+
+    def _write(self) -> None:
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.filename.with_suffix(self.filename.suffix + ".tmp")
+        data = {"version": MANIFEST_VERSION, "stages": self._entries}
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+        # Atomic replace, so a kill mid-write never leaves a corrupt manifest
+        tmp.replace(self.filename)
+
+
+def run_or_resume(
+    manifest: RunManifest | None,
+    key: str,
+    func: Callable[[], T],
+    inputs: Any = None,
+    params: Any = None,
+) -> T:
+    """Call `func()`, unless `manifest` shows `key` already ran on the same inputs.
+
+    Parameters
+    ----------
+    manifest : RunManifest, optional
+        Manifest to check and update. If None, always calls `func`.
+    key : str
+        Name of the checkpoint in the manifest.
+    func : Callable[[], T]
+        Function creating the outputs.
+    inputs : Any
+        Inputs used to fingerprint the step (see `RunManifest.fingerprint`).
+    params : Any
+        Configuration used to fingerprint the step.
+
+    Returns
+    -------
+    T
+        The outputs of `func`, or the recorded outputs of the previous run.
+
+    """
+    if manifest is None:
+        return func()
+    fingerprint = manifest.fingerprint(inputs, params)
+    found, outputs = manifest.lookup(key, fingerprint)
+    if found:
+        logger.info(f"Skipping {key}: completed in a previous run")
+        return outputs
+    outputs = func()
+    manifest.record(key, fingerprint, outputs)
+    return outputs
+
+
+def _iter_paths(value: Any) -> Iterator[Path]:
+    if isinstance(value, Path):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _iter_paths(v)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            yield from _iter_paths(v)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for f in dataclasses.fields(value):
+            yield from _iter_paths(getattr(value, f.name))
+
+
+def _encode(value: Any) -> Any:
+    """Convert `value` to JSON-compatible types, tagging Paths, dataclasses, models."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Path):
+        return {"__path__": os.fspath(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            "__dataclass__": _class_name(type(value)),
+            "fields": {
+                f.name: _encode(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+            },
+        }
+    if isinstance(value, BaseModel):
+        return {
+            "__model__": _class_name(type(value)),
+            "fields": value.model_dump(mode="json"),
+        }
+    raise TypeError(f"Cannot record {type(value)} in the run manifest")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__path__" in value:
+        return Path(value["__path__"])
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__dataclass__" in value:
+        cls = _import_class(value["__dataclass__"])
+        return cls(**{k: _decode(v) for k, v in value["fields"].items()})
+    if "__model__" in value:
+        return _import_class(value["__model__"]).model_validate(value["fields"])
+    return {k: _decode(v) for k, v in value.items()}
+
+
+def _class_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_class(name: str) -> Any:
+    module_name, qualname = name.split(":")
+    cls: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        cls = getattr(cls, attr)
+    return cls
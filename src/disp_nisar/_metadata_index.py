@@ -0,0 +1,426 @@
+"""In-memory index of the GSLC metadata used while creating products.
+
+Product creation reads a handful of small fields from the input GSLCs (zero
+Doppler times, orbit type and pass direction, center frequency, ...) and copies
+the orbit group into each product. Done per product, this reopens every GSLC
+several times, which is slow on networked or remote filesystems.
+
+A `GslcMetadataIndex` scans each GSLC once, in parallel, at the start of a run.
+The index is picklable, so it can be sent to worker processes, and consumers
+query it instead of reopening the files. Files missing from the index are
+scanned (once) on first use.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import h5py
+import numpy as np
+from dolphin._types import Bbox, Filename
+from dolphin.constants import SPEED_OF_LIGHT
+
+from ._common import NISAR_IDENTIFICATION_GROUP
+from ._streaming import open_h5_file
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "GslcMetadata",
+    "GslcMetadataIndex",
+    "H5Node",
+    "get_grid_bbox",
+    "scan_gslc",
+    "write_snapshot",
+]
+
+NISAR_GRIDS_GROUP = "/science/LSAR/GSLC/grids"
+NISAR_ORBIT_GROUP = "/science/LSAR/GSLC/metadata/orbit"
+ZERO_DOPPLER_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# Groups/datasets copied from the GSLCs into the displacement products
+SNAPSHOT_PATHS = (
+    NISAR_ORBIT_GROUP,
+    f"{NISAR_IDENTIFICATION_GROUP}/lookDirection",
+    f"{NISAR_IDENTIFICATION_GROUP}/trackNumber",
+    f"{NISAR_IDENTIFICATION_GROUP}/orbitPassDirection",
+)
+# Creation properties of a dataset kept in its snapshot
+_DATASET_OPTIONS = (
+    "chunks",
+    "maxshape",
+    "compression",
+    "compression_opts",
+    "shuffle",
+    "fletcher32",
+)
+# Attributes rebuilt from `H5Node.scale_name` / `H5Node.dims`
+_DIMENSION_SCALE_ATTRS = {"CLASS", "NAME", "DIMENSION_LIST", "REFERENCE_LIST"}
+
+
+@dataclass(frozen=True)
+class H5Node:
+    """A dataset or group of an HDF5 file, held in memory.
+
+    Attributes
+    ----------
+    path : str
+        Absolute path of the node in its file.
+    attrs : dict[str, tuple[Any, np.dtype]]
+        Attribute values, with their HDF5 dtypes.
+    data : np.ndarray, optional
+        Contents of a dataset. None for a group.
+    dtype : np.dtype, optional
+        HDF5 dtype of a dataset.
+    options : dict[str, Any]
+        Creation properties (chunking, compression) of a dataset.
+    scale_name : str, optional
+        Name of the dimension scale, if the dataset is one.
+    dims : tuple[tuple[str, ...], ...]
+        Paths of the dimension scales attached to each axis of the dataset.
+
+    """
+
+    path: str
+    attrs: dict[str, tuple[Any, np.dtype]] = field(default_factory=dict)
+    data: np.ndarray | None = None
+    dtype: np.dtype | None = None
+    options: dict[str, Any] = field(default_factory=dict)
+    scale_name: str | None = None
+    dims: tuple[tuple[str, ...], ...] = ()
+
+    @property
+    def is_group(self) -> bool:
+        """Whether the node is a group."""
+        return self.dtype is None
+
+
+@dataclass(frozen=True)
+class GslcMetadata:
+    """Metadata of one GSLC read by `scan_gslc`.
+
+    Fields missing from the file are None (or empty).
+
+    Attributes
+    ----------
+    filename : str
+        Path or URL of the GSLC.
+    zero_doppler_start_time : datetime, optional
+        Zero Doppler start time of the acquisition.
+    zero_doppler_end_time : datetime, optional
+        Zero Doppler end time of the acquisition.
+    orbit_type : str, optional
+        Orbit ephemeris code, e.g. "POE".
+    orbit_direction : str, optional
+        "ascending" or "descending".
+    center_frequencies : dict[str, float]
+        Center frequency (Hz) of each frequency grid, e.g. "frequencyA".
+    frame_bboxes : dict[str, tuple[int, Bbox]]
+        EPSG code and bounds of each frequency grid.
+    snapshots : dict[str, tuple[H5Node, ...]]
+        Nodes of each of the `SNAPSHOT_PATHS` found in the file.
+
+    """
+
+    filename: str
+    zero_doppler_start_time: datetime | None = None
+    zero_doppler_end_time: datetime | None = None
+    orbit_type: str | None = None
+    orbit_direction: str | None = None
+    center_frequencies: dict[str, float] = field(default_factory=dict)
+    frame_bboxes: dict[str, tuple[int, Bbox]] = field(default_factory=dict)
+    snapshots: dict[str, tuple[H5Node, ...]] = field(default_factory=dict)
+
+
+class GslcMetadataIndex:
+    """Metadata of a run's GSLCs, looked up by file name.
+
+    Parameters
+    ----------
+    entries : Iterable[GslcMetadata], optional
+        Already scanned GSLCs.
+
+    Examples
+    --------
+    >>> index = GslcMetadataIndex([GslcMetadata("/data/gslc_20240101.h5")])
+    >>> index.get("/staged/gslc_20240101.h5").filename
+    '/data/gslc_20240101.h5'
+
+    """
+
+    def __init__(self, entries: Iterable[GslcMetadata] = ()):
+        self._entries = {_get_key(e.filename): e for e in entries}
+
+    @classmethod
+    def from_files(
+        cls, files: Sequence[Filename], max_workers: int = 8
+    ) -> GslcMetadataIndex:
+        """Scan `files` in parallel processes.
+
+        Files which can't be read are left out of the index (and so are scanned
+        again, raising the error, if they are looked up).
+
+        Parameters
+        ----------
+        files : Sequence[Filename]
+            Paths or URLs of the GSLCs.
+        max_workers : int
+            Number of processes scanning the files.
+            Default is 8.
+
+        Returns
+        -------
+        GslcMetadataIndex
+
+        """
+        files = list(dict.fromkeys(str(f) for f in files))
+        logger.info(f"Indexing the metadata of {len(files)} GSLCs")
+        if max_workers <= 1 or len(files) <= 1:
+            results = [_try_scan_gslc(f) for f in files]
+        else:
+            ctx = get_context("spawn")
+            with ProcessPoolExecutor(max_workers, mp_context=ctx) as executor:
+                results = list(executor.map(_try_scan_gslc, files))
+        return cls(r for r in results if r is not None)
+
+    def __contains__(self, filename: Filename) -> bool:
+        return _get_key(filename) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, filename: Filename) -> GslcMetadata:
+        """Get the metadata of `filename`, scanning the file if it's not indexed."""
+        key = _get_key(filename)
+        if key not in self._entries:
+            logger.debug(f"{filename} is not indexed: reading its metadata")
+            self._entries[key] = scan_gslc(filename)
+        return self._entries[key]
+
+    def get_frame_bbox(
+        self, filename: Filename, frequency: str = "frequencyA"
+    ) -> tuple[int, Bbox]:
+        """Get the EPSG code and bounds of a GSLC (see `get_nisar_frame_bbox`)."""
+        bboxes = self.get(filename).frame_bboxes
+        if frequency in bboxes:
+            return bboxes[frequency]
+        # Not a NISAR GSLC grid
+        from ._utils import get_nisar_frame_bbox
+
+        return get_nisar_frame_bbox(filename, frequency=frequency)
+
+    def get_wavelength(
+        self, filename: Filename, frequency: str = "frequencyA"
+    ) -> float:
+        """Get the radar wavelength (meters) of one frequency of a GSLC."""
+        center_frequencies = self.get(filename).center_frequencies
+        if frequency in center_frequencies:
+            return SPEED_OF_LIGHT / center_frequencies[frequency]
+        from ._utils import _frequency_to_wavelength
+
+        return _frequency_to_wavelength(frequency, filename)
+
+
+def scan_gslc(
+    filename: Filename, snapshot_paths: Sequence[str] = SNAPSHOT_PATHS
+) -> GslcMetadata:
+    """Read the metadata of a GSLC used by the product creation.
+
+    Parameters
+    ----------
+    filename : Filename
+        Path or URL of the GSLC.
+    snapshot_paths : Sequence[str]
+        Groups and datasets to hold in memory, to copy into products.
+
+    Returns
+    -------
+    GslcMetadata
+
+    """
+    with open_h5_file(filename) as f:
+        # Remote files are opened with h5netcdf: use its h5py file
+        hf = getattr(f, "_h5file", f)
+        center_frequencies = {}
+        frame_bboxes = {}
+        grids = hf.get(NISAR_GRIDS_GROUP)
+        for frequency, grid_group in (grids or {}).items():
+            if not isinstance(grid_group, h5py.Group):
+                continue
+            if "centerFrequency" in grid_group:
+                center_frequencies[frequency] = float(grid_group["centerFrequency"][()])
+            if "projection" in grid_group and "xCoordinates" in grid_group:
+                frame_bboxes[frequency] = get_grid_bbox(grid_group)
+
+        orbit_direction = _read_str(
+            hf, f"{NISAR_IDENTIFICATION_GROUP}/orbitPassDirection"
+        ) or _read_str(hf, "/identification/orbit_pass_direction")
+        return GslcMetadata(
+            filename=str(filename),
+            zero_doppler_start_time=_read_time(
+                hf, f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerStartTime"
+            ),
+            zero_doppler_end_time=_read_time(
+                hf, f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerEndTime"
+            ),
+            orbit_type=_read_str(hf, f"{NISAR_ORBIT_GROUP}/orbitType"),
+            orbit_direction=orbit_direction.lower() if orbit_direction else None,
+            center_frequencies=center_frequencies,
+            frame_bboxes=frame_bboxes,
+            snapshots={
+                path: _snapshot(hf[path]) for path in snapshot_paths if path in hf
+            },
+        )
+
+
+def get_grid_bbox(grid_group: h5py.Group) -> tuple[int, Bbox]:
+    """Get the EPSG code and (left, bottom, right, top) bounds of a GSLC grid."""
+    epsg = int(grid_group["projection"][()])
+    x_coords = grid_group["xCoordinates"][:]
+    y_coords = grid_group["yCoordinates"][:]
+    x_spacing = float(grid_group["xCoordinateSpacing"][()])
+    y_spacing = float(grid_group["yCoordinateSpacing"][()])
+    bounds = (
+        float(x_coords.min()) - abs(x_spacing) / 2,
+        float(y_coords.min()) - abs(y_spacing) / 2,
+        float(x_coords.max()) + abs(x_spacing) / 2,
+        float(y_coords.max()) + abs(y_spacing) / 2,
+    )
+    return epsg, Bbox(*bounds)
+
+
+def write_snapshot(
+    dst: h5py.File, nodes: Sequence[H5Node], new_path: str | None = None
+) -> None:
+    """Write snapshotted nodes into `dst`, as `h5py.Group.copy` would.
+
+    Parameters
+    ----------
+    dst : h5py.File
+        Open, writeable, destination file.
+    nodes : Sequence[H5Node]
+        Nodes of one snapshot; the first one is the copied group or dataset.
+    new_path : str, optional
+        Path of the copy in `dst`. Default is the source path.
+        An existing node at this path is replaced.
+
+    """
+    root = nodes[0].path
+    new_path = new_path or root
+
+    def _dst_path(path: str) -> str:
+        return new_path + path[len(root) :]
+
+    if new_path in dst:
+        del dst[new_path]
+    for node in nodes:
+        out_path = _dst_path(node.path)
+        if node.is_group:
+            obj = dst.require_group(out_path)
+        else:
+            obj = dst.create_dataset(
+                out_path, data=node.data, dtype=node.dtype, **node.options
+            )
+        for name, (value, dtype) in node.attrs.items():
+            obj.attrs.create(name, value, dtype=dtype)
+
+    # Dimension scales are attached once all datasets exist
+    for node in nodes:
+        if node.scale_name is not None:
+            dst[_dst_path(node.path)].make_scale(node.scale_name)
+    for node in nodes:
+        dset = None if node.is_group else dst[_dst_path(node.path)]
+        for axis, scale_paths in enumerate(node.dims):
+            for scale_path in scale_paths:
+                if scale_path.startswith(root) and _dst_path(scale_path) in dst:
+                    dset.dims[axis].attach_scale(dst[_dst_path(scale_path)])
+
+
+def _get_key(filename: Filename) -> str:
+    # Staged copies of remote GSLCs keep their file names
+    return Path(str(filename)).name
+
+
+def _try_scan_gslc(filename: str) -> GslcMetadata | None:
+    try:
+        return scan_gslc(filename)
+    except Exception:
+        logger.warning(f"Could not index the metadata of {filename}", exc_info=True)
+        return None
+
+
+def _read_str(hf: h5py.File, path: str) -> str | None:
+    if path not in hf:
+        return None
+    value = hf[path][()]
+    if isinstance(value, np.ndarray):
+        value = value.item()
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _read_time(hf: h5py.File, path: str) -> datetime | None:
+    value = _read_str(hf, path)
+    if value is None:
+        return None
+    # Drop the digits past microseconds, as `opera_utils.get_zero_doppler_time`
+    return datetime.strptime(value[:26], ZERO_DOPPLER_TIME_FORMAT)
+
+
+def _snapshot(obj: h5py.Group | h5py.Dataset) -> tuple[H5Node, ...]:
+    """Read a group (recursively) or a dataset into memory."""
+    nodes = [_to_node(obj)]
+    if isinstance(obj, h5py.Group):
+        obj.visititems(lambda _, child: nodes.append(_to_node(child)))
+    return tuple(nodes)
+
+
+def _to_node(obj: h5py.Group | h5py.Dataset) -> H5Node:
+    attrs = {}
+    for name in obj.attrs:
+        if name in _DIMENSION_SCALE_ATTRS:
+            continue
+        dtype = obj.attrs.get_id(name).dtype
+        if _has_reference(dtype):
+            logger.debug(f"Skipping reference attribute {name} of {obj.name}")
+            continue
+        attrs[name] = (obj.attrs[name], dtype)
+    if isinstance(obj, h5py.Group):
+        return H5Node(path=obj.name, attrs=attrs)
+
+    scale_name = None
+    if h5py.h5ds.is_scale(obj.id):
+        scale_name = _decode(obj.attrs.get("NAME", b""))
+    options = {name: getattr(obj, name) for name in _DATASET_OPTIONS}
+    if obj.shape == ():
+        options = {}
+    return H5Node(
+        path=obj.name,
+        attrs=attrs,
+        data=obj[()],
+        dtype=obj.dtype,
+        options={k: v for k, v in options.items() if v is not None},
+        scale_name=scale_name,
+        dims=tuple(
+            tuple(scale.name for scale in dim.values()) if scale_name is None else ()
+            for dim in obj.dims
+        ),
+    )
+
+
+def _has_reference(dtype: np.dtype) -> bool:
+    if h5py.check_dtype(ref=dtype) is not None:
+        return True
+    if dtype.fields:
+        return any(_has_reference(f[0]) for f in dtype.fields.values())
+    return dtype.subdtype is not None and _has_reference(dtype.subdtype[0])
+
+
+def _decode(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
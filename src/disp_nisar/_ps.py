@@ -13,7 +13,9 @@ from dolphin.utils import DummyProcessPoolExecutor
 from dolphin.workflows.config import DisplacementWorkflow
 from dolphin.workflows.wrapped_phase import _get_mask
 
-from ._streaming import XarrayStackReader, is_remote_url
+from ._stack_reader import ChunkedStackReader
+from ._streaming import is_remote_url
+from ._zarr_input import ZarrVRTStack
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,9 @@ class WeightScheme(str, Enum):
     EXPONENTIAL = "exponential"
 
 
-def precompute_ps(cfg: DisplacementWorkflow) -> tuple[list[Path], list[Path]]:
+def precompute_ps(
+    cfg: DisplacementWorkflow, zarr_store: PathOrStr | None = None
+) -> tuple[list[Path], list[Path]]:
     # TODO: Check if this is working after removing burst
 
     # ######################################
@@ -44,7 +48,7 @@ def precompute_ps(cfg: DisplacementWorkflow) -> tuple[list[Path], list[Path]]:
         max_workers=mw,
         mp_context=ctx,
     ) as exc:
-        future = exc.submit(run_frame_ps, cfg)
+        future = exc.submit(run_frame_ps, cfg, zarr_store)
         combined_dispersion_file, combined_mean_file = future.result()
         combined_dispersion_files.append(combined_dispersion_file)
         combined_mean_files.append(combined_mean_file)
@@ -52,7 +56,9 @@ def precompute_ps(cfg: DisplacementWorkflow) -> tuple[list[Path], list[Path]]:
     return combined_dispersion_files, combined_mean_files
 
 
-def run_frame_ps(cfg: DisplacementWorkflow) -> tuple[Path, Path]:
+def run_frame_ps(
+    cfg: DisplacementWorkflow, zarr_store: PathOrStr | None = None
+) -> tuple[Path, Path]:
     input_file_list = cfg.cslc_file_list
     if not input_file_list:
         msg = "No input files found"
@@ -69,45 +75,20 @@ def run_frame_ps(cfg: DisplacementWorkflow) -> tuple[Path, Path]:
     # Check if any files are remote URLs
     has_remote_files = any(is_remote_url(f) for f in non_compressed_slcs)
 
-    if has_remote_files:
-        logger.info("Detected remote files, using XarrayStackReader with dask")
-
-        # Get 2D block_shape from worker_settings (row, col)
-        block_shape_2d = cfg.worker_settings.block_shape
-        logger.info(f"Using block_shape from config: {block_shape_2d}")
-
-        # Convert to 3D chunks: (time, row, col)
-        # Process one time slice at a time
-        chunks_3d = {"time": 1, "row": block_shape_2d[0], "col": block_shape_2d[1]}
-
-        # Get number of workers from worker_settings
-        n_workers = cfg.worker_settings.n_parallel_bursts
-        logger.info(f"Using n_parallel_bursts from config: {n_workers}")
-
-        # Get halo size from phase_linking half_window if available
-        # This is used for operations that need neighboring pixels
-        if hasattr(cfg, "phase_linking") and hasattr(cfg.phase_linking, "half_window"):
-            halo_rows = cfg.phase_linking.half_window.y
-            halo_cols = cfg.phase_linking.half_window.x
-            logger.info(
-                f"Using halo from phase_linking.half_window: row={halo_rows},"
-                f" col={halo_cols}"
-            )
-        else:
-            halo_rows = 0
-            halo_cols = 0
-
-        # Build overlap dict: {0: time, 1: row, 2: col}
-        overlap = {0: 0, 1: halo_rows, 2: halo_cols} if halo_rows > 0 else None
-
-        # Use xarray-based reader for remote files with dask chunking
-        vrt_stack = XarrayStackReader(
-            file_list=non_compressed_slcs,
+    if zarr_store is not None:
+        logger.info(f"Reading the SLCs from the Zarr input stack {zarr_store}")
+        vrt_stack = ZarrVRTStack(
+            non_compressed_slcs,
+            subdataset=subdataset,
+            outfile=cfg.work_directory / "non_compressed_slc_stack.vrt",
+            zarr_path=zarr_store,
+        )
+    elif has_remote_files:
+        logger.info("Detected remote files, reading their HDF5 chunks directly")
+        vrt_stack = ChunkedStackReader(
+            non_compressed_slcs,
             subdataset=subdataset,
-            chunks=chunks_3d,  # 3D chunks: (time, row, col)
             nodata=np.nan,
-            overlap=overlap,
-            n_workers=n_workers,  # Configure dask workers
         )
     else:
         # Use traditional VRT for local files
@@ -121,7 +102,7 @@ def run_frame_ps(cfg: DisplacementWorkflow) -> tuple[Path, Path]:
         cfg.layover_shadow_mask_files[0] if cfg.layover_shadow_mask_files else None
     )
 
-    # For remote files, XarrayStackReader doesn't have an outfile, so use first file
+    # For remote files, ChunkedStackReader doesn't have an outfile, so use first file
     like_file = (
         vrt_stack.outfile if hasattr(vrt_stack, "outfile") else non_compressed_slcs[0]
     )
@@ -169,7 +150,6 @@ def run_frame_ps(cfg: DisplacementWorkflow) -> tuple[Path, Path]:
         compressed_slc_files,
         num_slc=len(non_compressed_slcs),
         subdataset=subdataset,
-        n_workers=cfg.worker_settings.n_parallel_bursts if has_remote_files else None,
     )
 
 
@@ -192,26 +172,18 @@ def run_combine(
     has_remote_compressed = any(is_remote_url(f) for f in compressed_slc_files)
 
     if has_remote_compressed:
-        logger.info("Using XarrayStackReader for remote compressed SLC files")
-
-        # Use same block shape as before - default to (256, 256) if not in scope
-        # Typically run_combine is called from run_frame_ps context
-        block_shape_2d = (256, 256)  # Default for block reading
-        chunks_3d = {"time": 1, "row": block_shape_2d[0], "col": block_shape_2d[1]}
-
-        reader_compslc = XarrayStackReader(
-            file_list=compressed_slc_files,
+        logger.info("Reading the remote compressed SLC files' chunks directly")
+        reader_compslc = ChunkedStackReader(
+            compressed_slc_files,
             subdataset=subdataset,
-            chunks=chunks_3d,
             nodata=np.nan,
-            n_workers=n_workers,
+            max_workers=n_workers,
         )
-        reader_compslc_dispersion = XarrayStackReader(
-            file_list=compressed_slc_files,
+        reader_compslc_dispersion = ChunkedStackReader(
+            compressed_slc_files,
             subdataset="/data/amplitude_dispersion",
-            chunks=chunks_3d,
             nodata=np.nan,
-            n_workers=n_workers,
+            max_workers=n_workers,
         )
     else:
         reader_compslc = io.HDF5StackReader.from_file_list(
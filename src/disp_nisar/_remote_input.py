@@ -8,22 +8,32 @@ Strategy: download whole granules in parallel via ``earthaccess.download``
 over a high-latency connection), then locally extract only the layers the
 workflow reads (one polarization + small metadata groups) and delete the
 full download. Net effect: fast network transfer + small final disk usage.
+
+The "subset" staging mode never downloads the full granule: the layers are
+read from the remote file with range requests (`RemoteFile`). The stored
+chunks of the large grids are fetched in batches of merged, concurrent range
+requests and written as is (still compressed) into the staged file. Only
+the bytes of the kept layers cross the network, and no full granule is ever
+written to the scratch disk.
 """
 
 from __future__ import annotations
 
 import logging
+import posixpath
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Literal, Sequence
 
 import h5netcdf
 import h5py
+import numpy as np
 from opera_utils import is_remote_url
 from tenacity import retry, stop_after_attempt, wait_fixed
 
-from ._streaming import S3Path
+from ._remote_read import RemoteFile, tune_remote_file
+from ._streaming import S3Path, authenticate_earthdata
 
 logger = logging.getLogger(__name__)
 
@@ -74,14 +84,114 @@ _GRID_AUX_DATASETS_GUNW_POL = (
 )
 
 
+# Attributes holding object references into the source file
+_REFERENCE_ATTRS = ("DIMENSION_LIST", "REFERENCE_LIST")
+
+
 def _normalize_url(url: str) -> str:
     return re.sub(r"^(https?|s3):/(?!/)", r"\1://", url)
 
 
+def _chunk_infos(dset: h5py.Dataset) -> list:
+    """Get the storage info of the allocated chunks of `dset`, in file order."""
+    infos: list = []
+    try:
+        dset.id.chunk_iter(infos.append)
+    except (AttributeError, NotImplementedError):
+        # HDF5 < 1.14: one (slower) lookup per chunk
+        infos = [dset.id.get_chunk_info(i) for i in range(dset.id.get_num_chunks())]
+    return sorted(infos, key=lambda info: info.byte_offset)
+
+
+def _prefetched_batches(
+    infos: Sequence, remote: RemoteFile, max_bytes: int
+) -> Iterator[Sequence]:
+    """Yield batches of chunks whose stored bytes were just fetched together.
+
+    Each batch (at most `max_bytes` of stored chunks) is fetched with one
+    `RemoteFile.prefetch`, i.e. concurrent, merged range requests, so its
+    chunks are then read from the block cache.
+    """
+    start, size = 0, 0
+    for i, info in enumerate(infos):
+        size += info.size
+        if size >= max_bytes or i == len(infos) - 1:
+            batch = infos[start : i + 1]
+            remote.prefetch((c.byte_offset, c.byte_offset + c.size) for c in batch)
+            yield batch
+            start, size = i + 1, 0
+
+
+def _copy_chunks(
+    src_dset: h5py.Dataset, dst: h5py.File, name: str, remote: RemoteFile
+) -> None:
+    """Copy a chunked dataset of a remote file by its stored (compressed) chunks.
+
+    The new dataset has the same type, shape, chunks and filters, so the
+    chunks are written as fetched, without decompressing them.
+    """
+    parent = dst.require_group(posixpath.dirname(name))
+    dset_id = h5py.h5d.create(
+        parent.id,
+        posixpath.basename(name).encode(),
+        # A transient copy, in case the type is committed in the source file
+        src_dset.id.get_type().copy(),
+        src_dset.id.get_space(),
+        dcpl=src_dset.id.get_create_plist(),
+    )
+    dst_dset = h5py.Dataset(dset_id)
+    for key, value in src_dset.attrs.items():
+        if key not in _REFERENCE_ATTRS:
+            dst_dset.attrs[key] = value
+    # Half the block cache, so the batch is not evicted before it is written
+    for batch in _prefetched_batches(
+        _chunk_infos(src_dset), remote, remote.cache_bytes // 2
+    ):
+        for info in batch:
+            raw = remote.pread(info.size, info.byte_offset)
+            dst_dset.id.write_direct_chunk(info.chunk_offset, raw, info.filter_mask)
+
+
+def _read_dataset(item: h5py.Dataset, remote: RemoteFile | None) -> np.ndarray:
+    """Read a dataset, fetching the chunks of a remote file in batches first."""
+    if remote is None or item.chunks is None or item.ndim == 0:
+        return item[...]
+    out = np.empty(item.shape, dtype=item.dtype)
+    rows = item.chunks[0]
+    by_row: dict[int, list] = {}
+    for info in _chunk_infos(item):
+        by_row.setdefault(info.chunk_offset[0], []).append(info)
+    # Read whole rows of chunks, several at a time
+    row_starts = sorted(by_row)
+    max_bytes = remote.cache_bytes // 2
+    i = 0
+    while i < len(row_starts):
+        j, size = i, 0
+        while j < len(row_starts) and (j == i or size < max_bytes):
+            size += sum(c.size for c in by_row[row_starts[j]])
+            j += 1
+        remote.prefetch(
+            (c.byte_offset, c.byte_offset + c.size)
+            for r in row_starts[i:j]
+            for c in by_row[r]
+        )
+        for r in row_starts[i:j]:
+            out[r : r + rows] = item[r : r + rows]
+        i = j
+    # Rows of chunks never written hold the fill value
+    for r in range(0, item.shape[0], rows):
+        if r not in by_row:
+            out[r : r + rows] = item[r : r + rows]
+    return out
+
+
 def _extract_subset(
-    src_path: Path, dst_path: Path, frequencies: Sequence[str], polarization: str
+    src_path: Path | RemoteFile,
+    dst_path: Path,
+    frequencies: Sequence[str],
+    polarization: str,
 ) -> None:
-    """Locally copy only the needed datasets/groups into a smaller file.
+    """Copy only the needed datasets/groups into a smaller file.
 
     HDF5 dimension scales use object references (DIMENSION_LIST / REFERENCE_LIST)
     that don't survive a cross-file copy. We copy the coordinate datasets first,
@@ -92,8 +202,13 @@ def _extract_subset(
     ``frequencyB`` for split-spectrum ionosphere) — each frequency's grid is
     copied into the same staged file while the frequency-agnostic metadata
     groups are copied only once.
+
+    `src_path` may also be a `RemoteFile`: the chunks of the large grids are
+    then fetched in batches of merged range requests.
     """
-    if "GSLC" in str(src_path):
+    remote = src_path if isinstance(src_path, RemoteFile) else None
+    label = remote.name if remote is not None else str(src_path)
+    if "GSLC" in label:
         with h5py.File(src_path, "r") as src, h5py.File(dst_path, "w") as dst:
             for k, v in src.attrs.items():
                 dst.attrs[k] = v
@@ -109,10 +224,18 @@ def _extract_subset(
                 for name in (*_GRID_AUX_DATASETS, polarization):
                     src_path_h5 = f"{grid}/{name}"
                     if src_path_h5 in src and src_path_h5 not in dst:
-                        src.copy(src_path_h5, dst, name=src_path_h5)
+                        obj = src[src_path_h5]
+                        if (
+                            remote is not None
+                            and isinstance(obj, h5py.Dataset)
+                            and obj.chunks is not None
+                        ):
+                            _copy_chunks(obj, dst, src_path_h5, remote)
+                        else:
+                            src.copy(src_path_h5, dst, name=src_path_h5)
 
                 _rebuild_dimension_scales(dst, grid, polarization)
-    elif "GUNW" in str(src_path):
+    elif "GUNW" in label:
         # 1. Open the source file normally with h5py
         # 2. Open the destination using h5netcdf (which forces NetCDF compliance)
         with (
@@ -204,7 +327,7 @@ def _extract_subset(
                                 dims.append(dim_name)
 
                         var = dst_grp.create_variable(
-                            name, data=item[...], dimensions=dims
+                            name, data=_read_dataset(item, remote), dimensions=dims
                         )
 
                         # Copy variable attributes, skipping system-reserved ones
@@ -230,7 +353,7 @@ def _extract_subset(
                 )
 
     else:
-        logger.info(f"{src_path} not recognized for subsetting")
+        logger.info(f"{label} not recognized for subsetting")
 
 
 def _rebuild_dimension_scales(dst: h5py.File, grid: str, polarization: str) -> None:
@@ -399,6 +522,42 @@ def _download_and_trim(
     return final
 
 
+@retry(stop=stop_after_attempt(5), wait=wait_fixed(15))
+def _stage_subset(
+    url: str,
+    scratch_dir: Path,
+    frequencies: Sequence[str],
+    polarization: str,
+) -> Path:
+    """Write the subset of one granule from range requests, never downloading it."""
+    from ._streaming import open_remote_file
+
+    norm = _normalize_url(url)
+    fname = Path(norm).name
+    final = scratch_dir / fname
+    if final.exists() and final.stat().st_size > 0:
+        logger.info(f"Reusing cached {final.name}")
+        return final
+
+    tmp = final.with_suffix(final.suffix + ".part")
+    logger.info(
+        f"Extracting {polarization}@{','.join(frequencies)} from {fname}"
+        " with range requests"
+    )
+    with open_remote_file(norm) as remote:
+        # Blocks of one page (or chunk), as the granule is laid out
+        tune_remote_file(remote)
+        _extract_subset(remote, tmp, frequencies, polarization)
+    tmp.replace(final)
+
+    logger.info(
+        f"Staged {final.name} ({final.stat().st_size / 1e6:.1f} MB,"
+        f" {remote.bytes_fetched / 1e6:.1f} MB of {remote.size / 1e6:.1f} MB"
+        " fetched)"
+    )
+    return final
+
+
 @retry(stop=stop_after_attempt(5), wait=wait_fixed(15))
 def parallel_s3_download(
     s3_urls: Sequence[str],
@@ -501,6 +660,7 @@ def stage_remote_inputs(
     frequencies: Sequence[str] = ("frequencyA",),
     polarization: str = "HH",
     n_workers: int = 6,
+    staging_mode: Literal["download", "subset"] = "download",
 ) -> list[Path]:
     """Download remote NISAR GSLCs (parallel) then trim each to needed layers.
 
@@ -520,10 +680,12 @@ def stage_remote_inputs(
         Polarization to keep (``"HH"``, ``"HV"``, ``"VV"``, ``"VH"``).
     n_workers : int
         Parallel download+trim workers.
+    staging_mode : {"download", "subset"}
+        "download" downloads each whole granule, then extracts the layers.
+        "subset" reads only the kept layers with range requests, and writes
+        them to the staged file directly.
 
     """
-    import earthaccess
-
     scratch_dir = Path(scratch_dir).resolve()
     scratch_dir.mkdir(parents=True, exist_ok=True)
     raw_dir = scratch_dir / "_raw"
@@ -532,7 +694,7 @@ def stage_remote_inputs(
     url_list = [str(u) for u in urls]
     remote_indices = [i for i, u in enumerate(url_list) if is_remote_url(u)]
     if remote_indices:
-        earthaccess.login()
+        authenticate_earthdata()
 
     out_paths: list[Path | None] = [None] * len(url_list)
     for i, u in enumerate(url_list):
@@ -551,7 +713,22 @@ def stage_remote_inputs(
     https_urls = [u for u in url_list if u.startswith("https://")]
     s3_urls = [u for u in url_list if u.startswith("s3://")]
 
-    if https_urls:
+    if staging_mode == "subset":
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            future_to_idx = {
+                pool.submit(
+                    _stage_subset,
+                    url_list[i],
+                    scratch_dir,
+                    frequencies,
+                    polarization,
+                ): i
+                for i in remote_indices
+            }
+            for fut in as_completed(future_to_idx):
+                i = future_to_idx[fut]
+                out_paths[i] = fut.result()
+    elif https_urls:
         with ThreadPoolExecutor(max_workers=n_workers) as pool:
             future_to_idx = {
                 pool.submit(
@@ -592,6 +769,7 @@ def run_dolphin(
     n_workers: int = 6,
 ) -> None:
     """Run the disp-nisar workflow, pre-staging any remote GSLC inputs."""
+    from disp_nisar._metadata_index import GslcMetadataIndex
     from disp_nisar.main import run
     from disp_nisar.pge_runconfig import RunConfig
 
@@ -624,6 +802,7 @@ def run_dolphin(
             frequencies=frequencies,
             polarization=polarization,
             n_workers=n_workers,
+            staging_mode=pge_runconfig.input_file_group.staging_mode,
         )
         pge_runconfig.input_file_group.gslc_file_list = local_files
     if len(gunw_files) > 0 and any(is_remote_url(f) for f in gunw_files):
@@ -642,8 +821,13 @@ def run_dolphin(
             frequencies=frequencies,
             polarization=polarization,
             n_workers=n_workers,
+            staging_mode=pge_runconfig.input_file_group.staging_mode,
         )
         pge_runconfig.dynamic_ancillary_file_group.gunw_files = local_files_gunw
 
-    cfg = pge_runconfig.to_workflow()
-    run(cfg, pge_runconfig=pge_runconfig, debug=debug)
+    # Index the staged GSLCs once, for both the workflow setup and the products
+    metadata_index = GslcMetadataIndex.from_files(
+        pge_runconfig.input_file_group.gslc_file_list
+    )
+    cfg = pge_runconfig.to_workflow(metadata_index=metadata_index)
+    run(cfg, pge_runconfig=pge_runconfig, debug=debug, metadata_index=metadata_index)
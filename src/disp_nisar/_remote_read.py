@@ -0,0 +1,375 @@
+"""Byte-range reads of remote HDF5 files, sized to the file's layout.
+
+earthaccess opens remote files as fsspec files with a fixed read-ahead block,
+unrelated to how the HDF5 file is laid out. A 4 MB page of a paged GSLC then
+takes several requests, or a chunk straddling two blocks takes two round
+trips, and requests for neighbouring chunks are never merged.
+
+`RemoteFile` is a read-only file object for h5py over a range-request
+`fetch_ranges` function (e.g. `fsspec_fetcher`). It caches the file in blocks
+aligned to ``block_size``, and fetches all the missing blocks of a read, or
+the byte ranges given to `RemoteFile.prefetch`, in one batch of requests,
+merging ranges less than ``max_gap`` bytes apart (`coalesce_ranges`).
+
+`tune_remote_file` (used by `open_remote_hdf5`) detects the layout of the file
+(`probe_layout`): its file-space page size and the chunk size of the datasets
+to read. It sets the block size to match, and a paged file is opened with an
+HDF5 page buffer of at least one page.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, NamedTuple
+
+import h5py
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "RemoteFile",
+    "RemoteLayout",
+    "coalesce_ranges",
+    "fsspec_fetcher",
+    "open_remote_hdf5",
+    "probe_layout",
+    "tune_remote_file",
+]
+
+# Block size before the layout is known: the page size of NISAR products
+DEFAULT_BLOCK_SIZE = 4 * 2**20
+MIN_BLOCK_SIZE = 256 * 2**10
+MAX_BLOCK_SIZE = 16 * 2**20
+DEFAULT_CACHE_BYTES = 128 * 2**20
+# Ranges closer than this are fetched as one: reading the gap costs less than
+# another round trip
+DEFAULT_MAX_GAP = 1 * 2**20
+
+FetchRanges = Callable[[Sequence[tuple[int, int]]], Sequence[bytes]]
+
+
+class RemoteLayout(NamedTuple):
+    """Storage layout of a remote HDF5 file, and the block size chosen for it.
+
+    ``page_size`` is None if the file is not paged, ``chunk_bytes`` is the
+    largest (uncompressed) chunk of the probed datasets, None if none is chunked.
+    """
+
+    page_size: int | None
+    chunk_bytes: int | None
+    block_size: int
+
+
+def coalesce_ranges(
+    ranges: Iterable[tuple[int, int]], max_gap: int = 0
+) -> list[tuple[int, int]]:
+    """Merge (start, end) byte ranges that overlap or are `max_gap` bytes apart.
+
+    Examples
+    --------
+    >>> coalesce_ranges([(100, 200), (0, 50), (200, 300), (350, 400)])
+    [(0, 50), (100, 300), (350, 400)]
+    >>> coalesce_ranges([(100, 200), (0, 50), (350, 400)], max_gap=50)
+    [(0, 200), (350, 400)]
+
+    """
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RemoteFile(io.RawIOBase):
+    """Read-only file over byte-range requests, cached in aligned blocks.
+
+    Parameters
+    ----------
+    fetch_ranges : Callable[[Sequence[tuple[int, int]]], Sequence[bytes]]
+        Fetch the bytes of each (start, end) range, e.g. concurrently.
+    size : int
+        Size of the file, in bytes.
+    block_size : int
+        Size of the cached blocks, in bytes.
+    cache_bytes : int
+        Maximum size of the cached blocks. The least recently used are dropped.
+    max_gap : int
+        Missing blocks at most this many bytes apart are fetched in one request.
+    name : str
+        Name of the file, e.g. its URL.
+
+    Attributes
+    ----------
+    num_requests, bytes_fetched : int
+        Number of ranges requested, and their total size.
+
+    Examples
+    --------
+    >>> data = bytes(range(256)) * 64
+    >>> f = RemoteFile(lambda rs: [data[a:b] for a, b in rs], len(data), 4096)
+    >>> _ = f.seek(4000)
+    >>> f.read(200) == data[4000:4200], f.num_requests
+    (True, 1)
+
+    """
+
+    def __init__(
+        self,
+        fetch_ranges: FetchRanges,
+        size: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        max_gap: int = DEFAULT_MAX_GAP,
+        name: str = "",
+    ) -> None:
+        super().__init__()
+        self._fetch_ranges = fetch_ranges
+        self.size = size
+        self.block_size = block_size
+        self.cache_bytes = cache_bytes
+        self.max_gap = max_gap
+        self.name = name
+        self.num_requests = 0
+        self.bytes_fetched = 0
+        self._pos = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            msg = f"Invalid whence: {whence}"
+            raise ValueError(msg)
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.pread(len(memoryview(buffer)), self._pos)
+        memoryview(buffer).cast("B")[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def pread(self, size: int, offset: int) -> bytes:
+        """Read `size` bytes at `offset`, without moving the file position."""
+        end = min(offset + size, self.size)
+        if end <= offset:
+            return b""
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        blocks = self._get_blocks(range(first, last + 1))
+        data = b"".join(blocks)
+        start = offset - first * self.block_size
+        return data[start : start + end - offset]
+
+    def prefetch(self, ranges: Iterable[tuple[int, int]]) -> None:
+        """Fetch the blocks of the (start, end) byte ranges in one batch."""
+        indices: set[int] = set()
+        for start, end in ranges:
+            if end > start:
+                first, last = start // self.block_size, (end - 1) // self.block_size
+                indices.update(range(first, last + 1))
+        self._get_blocks(sorted(indices))
+
+    def set_block_size(self, block_size: int) -> None:
+        """Change the block size, keeping the cached bytes that still align."""
+        with self._lock:
+            if block_size == self.block_size:
+                return
+            old = self._blocks
+            ratio = block_size // self.block_size
+            self._blocks = OrderedDict()
+            if block_size > self.block_size and block_size % self.block_size == 0:
+                # Keep the new blocks made entirely of cached old blocks
+                for index in {i // ratio for i in old}:
+                    parts = [old.get(index * ratio + k) for k in range(ratio)]
+                    if all(p is not None for p in parts):
+                        self._blocks[index] = b"".join(parts)  # type: ignore[arg-type]
+            self.block_size = block_size
+
+    def _get_blocks(self, indices: Sequence[int] | range) -> list[bytes]:
+        with self._lock:
+            blocks = {i: self._blocks.get(i) for i in indices}
+            for i, block in blocks.items():
+                if block is not None:
+                    self._blocks.move_to_end(i)
+            block_size = self.block_size
+        missing = [i for i, block in blocks.items() if block is None]
+        if missing:
+            ranges = coalesce_ranges(
+                (
+                    (i * block_size, min((i + 1) * block_size, self.size))
+                    for i in missing
+                ),
+                max_gap=self.max_gap,
+            )
+            fetched = self._fetch_ranges(ranges)
+            with self._lock:
+                self.num_requests += len(ranges)
+                self.bytes_fetched += sum(len(d) for d in fetched)
+                for (start, end), data in zip(ranges, fetched, strict=True):
+                    if len(data) != end - start:
+                        msg = (
+                            f"{self.name}: got {len(data)} bytes for range"
+                            f" {start}-{end}"
+                        )
+                        raise OSError(msg)
+                    # Split into blocks, including those in the merged gaps
+                    for offset in range(0, end - start, block_size):
+                        index = (start + offset) // block_size
+                        block = data[offset : offset + block_size]
+                        blocks[index] = block
+                        if block_size == self.block_size:
+                            self._store(index, block)
+        return [blocks[i] for i in indices]  # type: ignore[misc]
+
+    def _store(self, index: int, block: bytes) -> None:
+        self._blocks[index] = block
+        self._blocks.move_to_end(index)
+        while len(self._blocks) * self.block_size > self.cache_bytes and self._blocks:
+            self._blocks.popitem(last=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"RemoteFile({self.name!r}, size={self.size}, block_size={self.block_size})"
+        )
+
+
+def fsspec_fetcher(fs: Any, path: str) -> tuple[FetchRanges, int]:
+    """Get a range fetcher and the size of `path` on an fsspec filesystem.
+
+    The ranges of a batch are requested concurrently by fsspec's
+    ``cat_ranges``.
+    """
+    size = fs.size(path)
+
+    def fetch_ranges(ranges: Sequence[tuple[int, int]]) -> list[bytes]:
+        if not ranges:
+            return []
+        starts, ends = zip(*ranges, strict=True)
+        return fs.cat_ranges([path] * len(ranges), list(starts), list(ends))
+
+    return fetch_ranges, size
+
+
+def probe_layout(
+    file: RemoteFile, datasets: Iterable[str] = (), **kwargs: Any
+) -> RemoteLayout:
+    """Detect the page size and chunk size of `file`, and pick a block size.
+
+    The block size is the page size of a paged file (a page is what HDF5 reads
+    at once). Otherwise, it is the size of the largest chunk of `datasets`,
+    rounded up to a power of two, and kept between 256 kB and 16 MB.
+
+    Parameters
+    ----------
+    file : RemoteFile
+        Remote HDF5 file.
+    datasets : Iterable[str]
+        Paths of the datasets that will be read.
+    **kwargs : Any
+        Extra arguments of `h5py.File`.
+
+    Returns
+    -------
+    RemoteLayout
+
+    """
+    with h5py.File(file, "r", **kwargs) as hf:
+        fcpl = hf.id.get_create_plist()
+        paged = fcpl.get_file_space_strategy()[0] == h5py.h5f.FSPACE_STRATEGY_PAGE
+        page_size = fcpl.get_file_space_page_size() if paged else None
+        chunk_bytes = None
+        for name in datasets:
+            dset = hf.get(name)
+            if isinstance(dset, h5py.Dataset) and dset.chunks is not None:
+                nbytes = math.prod(dset.chunks) * dset.dtype.itemsize
+                chunk_bytes = max(chunk_bytes or 0, nbytes)
+
+    if page_size is not None:
+        block_size = page_size
+    elif chunk_bytes is not None:
+        block_size = 2 ** math.ceil(math.log2(chunk_bytes))
+        block_size = min(max(block_size, MIN_BLOCK_SIZE), MAX_BLOCK_SIZE)
+    else:
+        block_size = file.block_size
+    return RemoteLayout(page_size, chunk_bytes, block_size)
+
+
+def tune_remote_file(
+    file: RemoteFile,
+    datasets: Iterable[str] = (),
+    page_buf_size: int | None = None,
+) -> dict[str, Any]:
+    """Size the blocks of `file` to its layout, and get its `h5py.File` options.
+
+    Parameters
+    ----------
+    file : RemoteFile
+        Remote HDF5 file, e.g. from `disp_nisar._streaming.open_remote_file`.
+    datasets : Iterable[str]
+        Paths of the datasets that will be read, to size the blocks to their
+        chunks in files that are not paged.
+    page_buf_size : int, optional
+        HDF5 page buffer size for paged files. It is raised to one page if
+        smaller. Default is one page.
+
+    Returns
+    -------
+    dict[str, Any]
+        Keyword arguments for opening `file` with `h5py.File`: the page buffer
+        size of a paged file.
+
+    """
+    layout = probe_layout(file, datasets)
+    file.set_block_size(layout.block_size)
+    logger.debug("Layout of %s: %s", file.name, layout)
+    if layout.page_size is None:
+        return {}
+    return {"page_buf_size": max(page_buf_size or 0, layout.page_size)}
+
+
+def open_remote_hdf5(
+    file: RemoteFile,
+    datasets: Iterable[str] = (),
+    page_buf_size: int | None = None,
+    **kwargs: Any,
+) -> h5py.File:
+    """Open a remote HDF5 file with reads sized to its layout.
+
+    Parameters
+    ----------
+    file : RemoteFile
+        Remote HDF5 file, e.g. from `disp_nisar._streaming.open_remote_file`.
+    datasets : Iterable[str]
+        Paths of the datasets that will be read (see `tune_remote_file`).
+    page_buf_size : int, optional
+        HDF5 page buffer size for paged files (see `tune_remote_file`).
+    **kwargs : Any
+        Extra arguments of `h5py.File` (e.g. ``rdcc_nbytes``).
+
+    Returns
+    -------
+    h5py.File
+
+    """
+    kwargs.update(tune_remote_file(file, datasets, page_buf_size))
+    return h5py.File(file, "r", **kwargs)
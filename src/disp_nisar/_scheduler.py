@@ -0,0 +1,213 @@
+"""Dependency-graph scheduler for the stages of the DISP-NISAR workflow.
+
+Each stage declares the named values it consumes (`inputs`) and the named
+values it produces (`outputs`). The scheduler starts every stage whose inputs
+are available, as long as the sum of the `cores` claimed by running stages fits
+inside the core budget, so independent steps (e.g. the water mask and the
+geometry layers) overlap instead of running back to back.
+
+If given a `RunManifest`, the scheduler records each finished stage and, on a
+rerun, skips stages whose inputs and parameters are unchanged.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from ._manifest import RunManifest
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["Stage", "StageScheduler"]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of the workflow graph.
+
+    Attributes
+    ----------
+    name : str
+        Unique name of the stage, used in logs.
+    func : Callable[..., Mapping[str, Any] | None]
+        Called with the declared `inputs` as keyword arguments. Must return a
+        mapping containing every name in `outputs` (or None if `outputs` is empty).
+    inputs : tuple[str, ...]
+        Names of the values this stage needs before it can start.
+    outputs : tuple[str, ...]
+        Names of the values this stage provides to downstream stages.
+    cores : int
+        Number of cores the stage is expected to keep busy. Used to decide how
+        many stages may run at once. Stages asking for more than the budget are
+        clipped to the budget (and so run alone).
+    params : Any
+        JSON-serializable configuration affecting the stage's outputs.
+        Used with the `inputs` to fingerprint the stage for a `RunManifest`.
+
+    """
+
+    name: str
+    func: Callable[..., Mapping[str, Any] | None]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    cores: int = 1
+    params: Any = None
+
+
+class StageScheduler:
+    """Run a set of `Stage`s concurrently, respecting their data dependencies.
+
+    Parameters
+    ----------
+    stages : Iterable[Stage]
+        The stages to run. When several stages are ready at once, they are
+        started in the order given here.
+    max_cores : int, optional
+        Total core budget shared by the running stages.
+        Default is `os.cpu_count()`.
+    manifest : RunManifest, optional
+        If provided, completed stages are recorded in the manifest, and stages
+        already completed with the same fingerprint are skipped.
+
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        max_cores: int | None = None,
+        manifest: RunManifest | None = None,
+    ):
+        self.stages = list(stages)
+        self.max_cores = max(1, max_cores or os.cpu_count() or 1)
+        self.manifest = manifest
+        self._validate_names()
+
+    def _validate_names(self) -> None:
+        names = [s.name for s in self.stages]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Duplicate stage names: {names}")
+        producers: dict[str, str] = {}
+        for stage in self.stages:
+            for out in stage.outputs:
+                if out in producers:
+                    raise ValueError(
+                        f"Output {out!r} produced by both {producers[out]!r} and"
+                        f" {stage.name!r}"
+                    )
+                producers[out] = stage.name
+
+    def _check_graph(self, available: Iterable[str]) -> None:
+        """Raise if some stage can never start (missing input or a cycle)."""
+        known = set(available)
+        remaining = list(self.stages)
+        while remaining:
+            ready = [s for s in remaining if known.issuperset(s.inputs)]
+            if not ready:
+                blocked = {s.name: sorted(set(s.inputs) - known) for s in remaining}
+                raise ValueError(f"Stages can never run (missing inputs): {blocked}")
+            for s in ready:
+                known.update(s.outputs)
+                remaining.remove(s)
+
+    def _cores(self, stage: Stage) -> int:
+        return min(max(1, stage.cores), self.max_cores)
+
+    def run(self, initial: Mapping[str, Any] | None = None) -> dict[str, Any]:
+        """Run all stages and return every value produced along the way.
+
+        Parameters
+        ----------
+        initial : Mapping[str, Any], optional
+            Values available before any stage runs.
+
+        Returns
+        -------
+        dict[str, Any]
+            The `initial` values plus the outputs of every stage.
+
+        Raises
+        ------
+        ValueError
+            If a stage's inputs can never be satisfied, or a stage does not
+            return one of its declared outputs.
+
+        """
+        values: dict[str, Any] = dict(initial or {})
+        self._check_graph(values.keys())
+
+        pending = list(self.stages)
+        running: dict[Future, tuple[Stage, str | None, float]] = {}
+        # Computed once per stage, when its inputs first become available
+        fingerprints: dict[str, str] = {}
+        cores_in_use = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.stages))) as executor:
+            try:
+                while pending or running:
+                    for stage in list(pending):
+                        if not set(stage.inputs).issubset(values):
+                            continue
+                        kwargs = {k: values[k] for k in stage.inputs}
+                        if self.manifest is not None and stage.name not in fingerprints:
+                            fingerprint = self.manifest.fingerprint(
+                                kwargs, stage.params
+                            )
+                            fingerprints[stage.name] = fingerprint
+                            found, outputs = self.manifest.lookup(
+                                stage.name, fingerprint
+                            )
+                            if found and not set(stage.outputs).issubset(outputs or {}):
+                                # Recorded before the stage had these outputs
+                                found = False
+                            if found:
+                                logger.info(
+                                    f"Skipping stage {stage.name!r}: completed in a"
+                                    " previous run"
+                                )
+                                values.update(_collect_outputs(stage, outputs))
+                                pending.remove(stage)
+                                continue
+                        fingerprint = fingerprints.get(stage.name)
+                        cores = self._cores(stage)
+                        if running and cores_in_use + cores > self.max_cores:
+                            continue
+                        logger.info(f"Starting stage {stage.name!r} ({cores} cores)")
+                        fut = executor.submit(stage.func, **kwargs)
+                        running[fut] = (stage, fingerprint, time.perf_counter())
+                        cores_in_use += cores
+                        pending.remove(stage)
+
+                    if not running:
+                        # Only skipped stages this round: check what's ready now
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        stage, fingerprint, t0 = running.pop(fut)
+                        cores_in_use -= self._cores(stage)
+                        outputs = _collect_outputs(stage, fut.result())
+                        values.update(outputs)
+                        if self.manifest is not None and fingerprint is not None:
+                            self.manifest.record(stage.name, fingerprint, outputs)
+                        elapsed = time.perf_counter() - t0
+                        logger.info(f"Finished stage {stage.name!r} in {elapsed:.1f} s")
+            except BaseException:
+                # Let already-running stages finish so we don't leave half-written
+                # files behind, but don't start anything new.
+                for fut in running:
+                    fut.cancel()
+                raise
+        return values
+
+
+def _collect_outputs(stage: Stage, result: Mapping[str, Any] | None) -> dict[str, Any]:
+    result = dict(result or {})
+    missing = set(stage.outputs) - set(result)
+    if missing:
+        raise ValueError(f"Stage {stage.name!r} did not return {sorted(missing)}")
+    return {k: result[k] for k in stage.outputs}
@@ -4,9 +4,13 @@ from __future__ import annotations
 
 import copy
 import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
 from enum import Enum
 from pathlib import Path
-from typing import Any, Optional, Protocol, Self, Union
+from typing import Any, NamedTuple, Optional, Protocol, Self, Union
 from urllib.parse import ParseResult, urlparse
 
 import h5py
@@ -14,8 +18,25 @@ import numpy as np
 from opera_utils import is_remote_url
 from opera_utils.credentials import AWSCredentials
 
+from ._compute import ComputeContext, get_compute_context
+from ._credentials import get_credential_manager
+from ._remote_read import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_MAX_GAP,
+    RemoteFile,
+    fsspec_fetcher,
+    tune_remote_file,
+)
+from ._remote_read import DEFAULT_CACHE_BYTES as DEFAULT_REMOTE_CACHE_BYTES
+
 logger = logging.getLogger(__name__)
 
+# Files kept open by a `StreamingFileManager` while not in use. With a page
+# buffer each, the idle files of a process hold up to 128 MB
+DEFAULT_MAX_OPEN_FILES = 32
+# Page buffer of each pooled file: one 4 MB page of the paged NISAR products
+DEFAULT_PAGE_BUF_SIZE = 4 * 2**20
+
 try:
     import earthaccess
     import xarray as xr
@@ -334,6 +355,9 @@ def get_earthaccess_s3_creds(
 
     Notes
     -----
+    The credentials are cached for the process, and refreshed before they expire
+    (see `disp_nisar._credentials`).
+
     Uses the `earthaccess` library to login, which requires one of the following
     auth strategies:
         - "all": (default) try all methods until one works
@@ -349,7 +373,7 @@ def get_earthaccess_s3_creds(
         )
     else:
         endpoint = dataset
-    return AWSCredentials.from_asf(endpoint=endpoint)
+    return get_credential_manager().get_s3_credentials(endpoint.value)
 
 
 def get_authorized_s3_client(
@@ -390,7 +414,7 @@ def get_authorized_s3_client(
 
 
 def authenticate_earthdata() -> Any:
-    """Authenticate with NASA Earthdata Login.
+    """Authenticate with NASA Earthdata Login, once per process.
 
     Returns
     -------
@@ -410,22 +434,35 @@ def authenticate_earthdata() -> Any:
         )
         raise ImportError(msg)
 
-    logger.info("Authenticating with NASA Earthdata Login")
-    auth = earthaccess.login()
-    return auth
+    return get_credential_manager().login()
+
 
+def open_remote_file(
+    file_url: str,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    cache_bytes: int = DEFAULT_REMOTE_CACHE_BYTES,
+    max_gap: int = DEFAULT_MAX_GAP,
+) -> RemoteFile:
+    """Open a remote file for range-request reads.
 
-def open_remote_file(file_url: str) -> Any:
-    """Open a remote file using earthaccess.
+    The file is read through earthaccess's authenticated fsspec filesystem,
+    in cached blocks of `block_size` bytes (see `disp_nisar._remote_read`).
 
     Parameters
     ----------
     file_url : str
         URL of the remote file (https:// or s3://).
+    block_size : int, optional
+        Size of the cached blocks, in bytes. `tune_remote_file` sets it from
+        the layout of an HDF5 file.
+    cache_bytes : int, optional
+        Maximum size of the cached blocks, in bytes.
+    max_gap : int, optional
+        Ranges at most this many bytes apart are fetched in one request.
 
     Returns
     -------
-    Any
+    RemoteFile
         File-like object that can be used with h5py.
 
     Raises
@@ -446,17 +483,28 @@ def open_remote_file(file_url: str) -> Any:
     # Authenticate if not already done
     authenticate_earthdata()
 
-    # For s3:// URLs, we can directly open them with earthaccess
-    # For https:// URLs, we need to search for the granule first
     if file_url.startswith("s3://"):
-        # Open S3 file directly
-        file_obj = earthaccess.open([file_url])[0]
+        # Direct S3 access, with the cached temporary credentials
+        import s3fs
+
+        creds = get_earthaccess_s3_creds()
+        fs = s3fs.S3FileSystem(
+            key=creds.access_key_id,
+            secret=creds.secret_access_key,
+            token=creds.session_token,
+        )
     else:
-        # For https URLs, try to open directly
-        # earthaccess.open can handle both granule objects and URLs
-        file_obj = earthaccess.open([file_url])[0]
-
-    return file_obj
+        fs = earthaccess.get_fsspec_https_session()
+
+    fetch_ranges, size = fsspec_fetcher(fs, file_url)
+    return RemoteFile(
+        fetch_ranges,
+        size,
+        block_size=block_size,
+        cache_bytes=cache_bytes,
+        max_gap=max_gap,
+        name=file_url,
+    )
 
 
 def open_h5_file(file_path: str | Path, mode: str = "r"):
@@ -465,6 +513,13 @@ def open_h5_file(file_path: str | Path, mode: str = "r"):
     For remote files, uses h5netcdf with earthaccess for better compatibility.
     For local files, uses h5py (faster).
 
+    Files opened for reading come from the process's pool of open files
+    (`get_file_manager`), so opening the same file again is cheap: closing the
+    returned object, or leaving its ``with`` block, hands the file back to the
+    pool instead of closing it. Files that may have been read this way are to
+    be opened for writing with `open_h5_file` as well, which closes the pooled
+    handle first (see `StreamingFileManager`).
+
     Parameters
     ----------
     file_path : str | Path
@@ -474,8 +529,9 @@ def open_h5_file(file_path: str | Path, mode: str = "r"):
 
     Returns
     -------
-    h5py.File or h5netcdf.legacyapi.File
-        Opened HDF5 file object. Both have compatible interfaces.
+    PooledFile or h5py.File or h5netcdf.File
+        Opened HDF5 file object: in read mode, a `PooledFile`, which gives the
+        file itself in a ``with`` block. All have compatible interfaces.
 
     Examples
     --------
@@ -486,6 +542,11 @@ def open_h5_file(file_path: str | Path, mode: str = "r"):
     ...     data = f['/dataset'][:]
 
     """
+    return get_file_manager().open_h5(file_path, mode)
+
+
+def _open_hdf5(file_path: str | Path, mode: str, **kwargs: Any):
+    """Open a local file with h5py, or a remote one with h5netcdf + earthaccess."""
     if is_remote_url(file_path):
         # Use h5netcdf + earthaccess for remote files
         if not HAS_EARTHACCESS:
@@ -497,21 +558,21 @@ def open_h5_file(file_path: str | Path, mode: str = "r"):
 
         import h5netcdf
 
-        # Authenticate with earthaccess
-        authenticate_earthdata()
-
-        # Get fsspec file object from earthaccess
-        file_objs = earthaccess.open([str(file_path)])
-        if not file_objs:
-            raise FileNotFoundError(f"Could not open remote file: {file_path}")
-
-        file_obj = file_objs[0]
+        if mode != "r":
+            msg = f"Remote files can only be opened for reading, not {mode!r}"
+            raise ValueError(msg)
+        # Range requests sized to the file's pages, with a matching page buffer
+        file_obj = open_remote_file(str(file_path))
+        kwargs.update(
+            tune_remote_file(file_obj, page_buf_size=kwargs.pop("page_buf_size", None))
+        )
 
-        # Open with h5netcdf (compatible with h5py interface)
-        return h5netcdf.File(file_obj, mode, invalid_netcdf=True)
+        # Open with h5netcdf (compatible with h5py interface); other keyword
+        # arguments are passed on to h5py
+        return h5netcdf.File(file_obj, mode, invalid_netcdf=True, **kwargs)
     else:
         # Use h5py for local files (faster)
-        return h5py.File(file_path, mode)
+        return h5py.File(file_path, mode, **kwargs)
 
 
 def open_xarray_group(
@@ -672,8 +733,12 @@ class XarrayStackReader:
         200 pixels overlap in row direction). Used for operations that need
         neighboring pixels like phase linking.
     n_workers : int | None, optional
-        Number of dask workers for parallel processing. If None, uses dask's default.
-        Should typically be set from worker_settings.n_parallel_bursts in runconfig.
+        Number of dask workers, used only outside of a run's `ComputeContext`:
+        the reader then starts its own cluster, shut down by `close`.
+        If None (and no context is active), reads use dask's threaded scheduler.
+    compute : ComputeContext | None, optional
+        Compute context whose dask cluster runs the reads.
+        Default is the active context of the run (`get_compute_context`).
 
     Examples
     --------
@@ -695,6 +760,7 @@ class XarrayStackReader:
         nodata: float | None = None,
         overlap: dict[int, int] | None = None,
         n_workers: int | None = None,
+        compute: ComputeContext | None = None,
     ):
         """Initialize the xarray stack reader."""
         self.file_list = [Path(f) if not is_remote_url(f) else f for f in file_list]
@@ -712,9 +778,16 @@ class XarrayStackReader:
 
         self.chunks = chunks
 
-        # Configure dask if n_workers specified
-        if self.n_workers is not None:
-            self._configure_dask(self.n_workers)
+        # Share the run's dask cluster; without a run, own a cluster if asked to
+        self._owned_compute: ComputeContext | None = None
+        if compute is None:
+            compute = get_compute_context()
+        if compute is None and n_workers is not None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+            compute = self._owned_compute = ComputeContext(
+                n_workers=n_workers, threads_per_worker=threads_per_worker
+            )
+        self.compute = compute
 
         # Check if any files are remote
         self.has_remote = any(is_remote_url(f) for f in self.file_list)
@@ -729,88 +802,6 @@ class XarrayStackReader:
         # Open the dataset
         self._open_dataset(chunks)
 
-    def _configure_dask(self, n_workers: int) -> None:
-        """Configure dask for parallel processing.
-
-        This also configures JAX/NumPy threading to avoid oversubscription.
-
-        Parameters
-        ----------
-        n_workers : int
-            Number of dask workers to use.
-
-        """
-        import multiprocessing
-        import os
-
-        # Calculate threads per worker to avoid oversubscription
-        # Leave 1-2 cores for system if possible
-        total_cores = multiprocessing.cpu_count()
-        threads_per_worker = max(1, total_cores // n_workers)
-
-        # Configure JAX and NumPy threading BEFORE creating workers
-        # This affects all spawned processes
-        logger.info(
-            f"Configuring parallelism: {n_workers} workers × {threads_per_worker} "
-            f"threads = {n_workers * threads_per_worker}/{total_cores} cores"
-        )
-
-        # JAX configuration
-        os.environ["XLA_FLAGS"] = (
-            "--xla_cpu_multi_thread_eigen=true "
-            f"intra_op_parallelism_threads={threads_per_worker} "
-            "inter_op_parallelism_threads=1"
-        )
-
-        # NumPy/BLAS threading (used by JAX backend)
-        os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
-        os.environ["MKL_NUM_THREADS"] = str(threads_per_worker)
-        os.environ["OPENBLAS_NUM_THREADS"] = str(threads_per_worker)
-        os.environ["NUMEXPR_NUM_THREADS"] = str(threads_per_worker)
-
-        # Prevent JAX from pre-allocating all GPU memory
-        os.environ["XLA_PYTHON_CLIENT_PREALLOCATE"] = "false"
-        os.environ["XLA_PYTHON_CLIENT_MEM_FRACTION"] = "0.75"
-
-        logger.info(
-            f"Set thread limits: OMP={threads_per_worker}, "
-            f"JAX intra_op={threads_per_worker}"
-        )
-
-        try:
-            from dask.distributed import Client, LocalCluster
-
-            # Check if a dask client already exists
-            try:
-                from dask.distributed import get_client
-
-                client = get_client()
-                logger.info(
-                    f"Using existing dask client with {len(client.cluster.workers)}"
-                    " workers"
-                )
-            except ValueError:
-                # No client exists, create one
-                logger.info(f"Creating dask LocalCluster with {n_workers} workers")
-                cluster = LocalCluster(
-                    n_workers=n_workers,
-                    threads_per_worker=threads_per_worker,
-                    processes=True,  # CRITICAL: Isolates JAX in each worker
-                    silence_logs=logging.ERROR,
-                )
-                client = Client(cluster)
-                logger.info(f"Dask client created: {client}")
-                logger.info(f"Dashboard: {client.dashboard_link}")
-        except ImportError:
-            # dask.distributed not available, fall back to threaded scheduler
-            logger.warning(
-                "dask.distributed not available, using threaded scheduler. "
-                "Install with: pip install 'dask[distributed]'"
-            )
-            import dask
-
-            dask.config.set(scheduler="threads", num_workers=n_workers)
-
     def _open_dataset(self, chunks: dict[str, int]) -> None:
         """Open the dataset using xarray."""
         if not HAS_EARTHACCESS and self.has_remote:
@@ -865,7 +856,10 @@ class XarrayStackReader:
 
         # Load the data if it's a dask array
         if hasattr(result, "compute"):
-            result = result.compute()
+            if self.compute is not None:
+                (result,) = self.compute.compute(result)
+            else:
+                result = result.compute()
 
         # Convert to numpy array and handle nodata
         arr = np.asarray(result)
@@ -970,9 +964,12 @@ class XarrayStackReader:
         return self.data.dtype
 
     def close(self) -> None:
-        """Close the dataset."""
+        """Close the dataset, and the dask cluster started by this reader."""
         if hasattr(self, "ds"):
             self.ds.close()
+        if self._owned_compute is not None:
+            self._owned_compute.close()
+            self._owned_compute = None
 
     def __enter__(self):
         """Enter context manager."""
@@ -983,18 +980,120 @@ class XarrayStackReader:
         self.close()
 
 
+class PoolInfo(NamedTuple):
+    """Statistics of a `StreamingFileManager`'s handle pool."""
+
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    maxsize: int
+
+
+class _PoolEntry:
+    """An open file of the pool, with the number of leases using it."""
+
+    def __init__(self, file: Any, signature: tuple | None) -> None:
+        self.file = file
+        self.signature = signature
+        self.leases = 0
+
+
+class PooledFile:
+    """Lease of a file open in a `StreamingFileManager`'s pool.
+
+    Used as a context manager, it gives the open ``h5py.File`` (or
+    ``h5netcdf.File``). Otherwise, it forwards item and attribute access to the
+    file. Closing the lease hands the file back to the pool, which keeps it
+    open for the next reader.
+    """
+
+    def __init__(
+        self, manager: StreamingFileManager, key: str, entry: _PoolEntry
+    ) -> None:
+        self._manager = manager
+        self._key = key
+        self._entry = entry
+        self._file = entry.file
+        self._released = False
+
+    @property
+    def file(self) -> Any:
+        """The pooled ``h5py.File`` or ``h5netcdf.File``."""
+        return self._file
+
+    def close(self) -> None:
+        """Return the file to the pool (only the first call does anything)."""
+        if not self._released:
+            self._released = True
+            self._manager._release(self._key, self._entry)
+
+    def __enter__(self) -> Any:
+        return self._file
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._file[key]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._file
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __len__(self) -> int:
+        return len(self._file)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+    def __repr__(self) -> str:
+        return f"PooledFile({self._key!r})"
+
+
 class StreamingFileManager:
-    """Context manager for handling both local and remote file access.
+    """Pool of open HDF5 files, for handling both local and remote file access.
 
     This class provides a unified interface for working with files that may be
     local or remote (https:// or s3://).
 
+    Opening an HDF5 file reads its superblock and metadata, which is a few
+    round trips for remote files. Files opened for reading with `open_h5` are
+    therefore kept open, up to `max_open_files`, and handed to the next reader
+    of the same file. Each call returns a lease (`PooledFile`): a file is only
+    closed once all its leases are closed and it is the least recently used.
+    Local files that changed on disk since they were opened are opened again.
+
+    The pool is meant for the read-only inputs of the workflow. A file that
+    may have been read through it must be opened for writing with
+    ``open_h5(file_path, "a")`` (or `open_h5_file`), which first closes its
+    idle pooled handle: HDF5 refuses to open a file for writing while the
+    process holds it open for reading. New files, written under a temporary
+    name and renamed, need not be.
+
+    The pool belongs to one process. Forked children and unpickled copies (in
+    spawned workers) start with an empty pool rather than sharing the parent's
+    HDF5 handles.
+
     Parameters
     ----------
-    file_list : list[str | Path]
+    file_list : list[str | Path], optional
         List of file paths (local or remote URLs).
     authenticate : bool, optional
         Whether to authenticate with earthaccess on initialization, by default True.
+    max_open_files : int, optional
+        Maximum number of files kept open while not in use.
+    page_buf_size : int, optional
+        Page buffer of each file, in bytes, for files written with paged
+        aggregation (other files are opened without one). 0 disables it.
+    rdcc_nbytes : int, optional
+        Raw chunk cache of each file, in bytes.
+        Default is h5py's default (1 MB).
+    rdcc_nslots : int, optional
+        Number of slots of each file's chunk cache.
+        Default is h5py's default.
 
     Examples
     --------
@@ -1005,16 +1104,39 @@ class StreamingFileManager:
 
     """
 
-    def __init__(self, file_list: list[str | Path], authenticate: bool = True) -> None:
+    def __init__(
+        self,
+        file_list: list[str | Path] | None = None,
+        authenticate: bool = True,
+        max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+        page_buf_size: int = DEFAULT_PAGE_BUF_SIZE,
+        rdcc_nbytes: int | None = None,
+        rdcc_nslots: int | None = None,
+    ) -> None:
         """Initialize the streaming file manager."""
-        self.file_list = file_list
-        self.remote_files = [f for f in file_list if is_remote_url(f)]
-        self.local_files = [f for f in file_list if not is_remote_url(f)]
+        self.file_list = list(file_list or [])
+        self.remote_files = [f for f in self.file_list if is_remote_url(f)]
+        self.local_files = [f for f in self.file_list if not is_remote_url(f)]
         self._authenticated = False
+        self.max_open_files = max_open_files
+        self.page_buf_size = page_buf_size
+        self.rdcc_nbytes = rdcc_nbytes
+        self.rdcc_nslots = rdcc_nslots
+        self._reset()
+        _file_managers.add(self)
 
         if authenticate and self.remote_files:
             self._authenticate()
 
+    def _reset(self) -> None:
+        """Forget the open files, e.g. those inherited from a parent process."""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        # Files without paged aggregation, opened without a page buffer
+        self._unpaged: set[str] = set()
+        self._hits = self._misses = self._evictions = 0
+
     def _authenticate(self) -> None:
         """Authenticate with earthaccess if remote files are present."""
         if not self._authenticated and self.remote_files and HAS_EARTHACCESS:
@@ -1026,11 +1148,21 @@ class StreamingFileManager:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        """Exit the context manager."""
-        # Clean up if needed
-        pass
+        """Exit the context manager, closing the pooled files."""
+        self.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in ("_lock", "_entries", "_unpaged", "_pid"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+        _file_managers.add(self)
 
-    def open_h5(self, file_path: str | Path, mode: str = "r") -> h5py.File:
+    def open_h5(self, file_path: str | Path, mode: str = "r") -> Any:
         """Open an HDF5 file (local or remote).
 
         Parameters
@@ -1042,11 +1174,121 @@ class StreamingFileManager:
 
         Returns
         -------
-        h5py.File
-            Opened HDF5 file.
+        PooledFile or h5py.File or h5netcdf.File
+            In read mode, a lease of the pooled file. In other modes, the file
+            itself, opened outside of the pool (after closing the pooled
+            read-only handle of the same file).
 
         """
-        return open_h5_file(file_path, mode)
+        key = str(file_path)
+        if mode != "r":
+            self.invalidate(file_path)
+            return _open_hdf5(file_path, mode)
+        return PooledFile(self, key, self._acquire(key))
+
+    def _acquire(self, key: str) -> _PoolEntry:
+        if self._pid != os.getpid():
+            self._reset()
+        signature = _file_signature(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.signature != signature or not _is_open(entry.file)
+            ):
+                # Rewritten on disk, or closed by its user: open it again.
+                # If still in use, it is closed when its last lease is.
+                del self._entries[key]
+                if entry.leases == 0:
+                    _close_quietly(entry.file)
+                entry = None
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                entry.leases += 1
+                return entry
+            self._misses += 1
+
+        # Opened without the lock: other files stay available meanwhile
+        file = self._open(key)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.signature == signature:
+                # Opened by another thread meanwhile: use theirs
+                _close_quietly(file)
+                entry = current
+                self._entries.move_to_end(key)
+            else:
+                entry = self._entries[key] = _PoolEntry(file, signature)
+            entry.leases += 1
+            self._evict()
+            return entry
+
+    def _open(self, key: str) -> Any:
+        kwargs: dict[str, Any] = {}
+        if self.rdcc_nbytes is not None:
+            kwargs["rdcc_nbytes"] = self.rdcc_nbytes
+        if self.rdcc_nslots is not None:
+            kwargs["rdcc_nslots"] = self.rdcc_nslots
+        if self.page_buf_size and key not in self._unpaged:
+            try:
+                return _open_hdf5(key, "r", page_buf_size=self.page_buf_size, **kwargs)
+            except OSError:
+                # Older HDF5 refuse a page buffer for files without paged
+                # aggregation (or pages larger than the buffer)
+                logger.debug("Opening %s without a page buffer", key)
+                self._unpaged.add(key)
+        return _open_hdf5(key, "r", **kwargs)
+
+    def _release(self, key: str, entry: _PoolEntry) -> None:
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            entry.leases = max(0, entry.leases - 1)
+            if entry.leases == 0 and self._entries.get(key) is not entry:
+                # Replaced in the pool while in use
+                _close_quietly(entry.file)
+            self._evict()
+
+    def _evict(self) -> None:
+        # Least recently used first; files in use are never closed
+        idle = [k for k, e in self._entries.items() if e.leases == 0]
+        for key in idle[: max(0, len(self._entries) - self.max_open_files)]:
+            _close_quietly(self._entries.pop(key).file)
+            self._evictions += 1
+
+    def invalidate(self, file_path: str | Path) -> None:
+        """Close the pooled handle of `file_path`, e.g. before writing to it."""
+        with self._lock:
+            entry = self._entries.get(str(file_path))
+            if entry is None:
+                return
+            if entry.leases > 0:
+                logger.debug("%s is still in use, not closing it", file_path)
+                return
+            del self._entries[str(file_path)]
+        _close_quietly(entry.file)
+
+    def pool_info(self) -> PoolInfo:
+        """Get the hit/miss statistics and the number of pooled files."""
+        with self._lock:
+            return PoolInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self.max_open_files,
+            )
+
+    def close(self) -> None:
+        """Close all the pooled files."""
+        if self._pid != os.getpid():
+            self._reset()
+            return
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            _close_quietly(entry.file)
 
     def get_file_objects(self, file_paths: list[str | Path] | None = None) -> list:
         """Get file-like objects for a list of files.
@@ -1082,3 +1324,56 @@ class StreamingFileManager:
         result.extend([str(f) for f in local_files])
 
         return result
+
+
+def _file_signature(key: str) -> tuple | None:
+    """Identify the version of a local file on disk (None for remote files)."""
+    if is_remote_url(key):
+        return None
+    try:
+        st = Path(key).stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _is_open(file: Any) -> bool:
+    # h5netcdf files wrap an h5py file
+    h5file = getattr(file, "_h5file", file)
+    if h5file is None:
+        return False
+    fid = getattr(h5file, "id", None)
+    return fid is None or bool(fid.valid)
+
+
+def _close_quietly(file: Any) -> None:
+    try:
+        file.close()
+    except Exception:
+        logger.debug("Failed to close %s", file, exc_info=True)
+
+
+# Managers of this process, emptied in forked children
+_file_managers: weakref.WeakSet[StreamingFileManager] = weakref.WeakSet()
+# Pool used by `open_h5_file`, created on first use
+_file_manager: StreamingFileManager | None = None
+_file_manager_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    global _file_manager_lock
+    _file_manager_lock = threading.Lock()
+    for manager in list(_file_managers):
+        manager._reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_file_manager() -> StreamingFileManager:
+    """Get the process's pool of open HDF5 files, used by `open_h5_file`."""
+    global _file_manager
+    with _file_manager_lock:
+        if _file_manager is None:
+            _file_manager = StreamingFileManager(authenticate=False)
+        return _file_manager
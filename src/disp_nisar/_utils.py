@@ -21,6 +21,7 @@ from osgeo import gdal
 from shapely.geometry import LinearRing, MultiPolygon, Polygon
 from tqdm.contrib.concurrent import thread_map
 
+from ._metadata_index import get_grid_bbox
 from ._streaming import open_h5_file
 
 logger = logging.getLogger(__name__)
@@ -321,21 +322,7 @@ def get_nisar_frame_bbox(
     if Path(cslc_file).suffix in {".h5", ".hdf5"}:
         # Read CRS and bounds directly from NISAR HDF5 metadata
         with open_h5_file(cslc_file, "r") as h5f:
-            grid_group = h5f[f"science/LSAR/GSLC/grids/{frequency}"]
-            epsg = int(grid_group["projection"][()])
-
-            x_coords = grid_group["xCoordinates"][:]
-            y_coords = grid_group["yCoordinates"][:]
-            x_spacing = float(grid_group["xCoordinateSpacing"][()])
-            y_spacing = float(grid_group["yCoordinateSpacing"][()])
-
-            # Compute bounds (left, bottom, right, top)
-            bounds = (
-                float(x_coords.min()) - abs(x_spacing) / 2,
-                float(y_coords.min()) - abs(y_spacing) / 2,
-                float(x_coords.max()) + abs(x_spacing) / 2,
-                float(y_coords.max()) + abs(y_spacing) / 2,
-            )
+            return get_grid_bbox(h5f[f"science/LSAR/GSLC/grids/{frequency}"])
     else:
         # Alternative format handling (non-NISAR HDF5)
         with open_h5_file(cslc_file, "r") as src:
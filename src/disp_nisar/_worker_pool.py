@@ -0,0 +1,139 @@
+"""Process pool whose workers load the heavy modules and the run context once.
+
+With a plain spawn `ProcessPoolExecutor`, every task pickles all its arguments
+(the run configs, the date -> GSLC mapping, ...) and the first task of each
+worker pays for importing dolphin, h5py, GDAL, ... inside the task.
+
+A `WorkerPool` instead sends the run context once per worker, in the pool
+initializer, which also imports the `preload_modules` before any task starts
+and hands over the S3 credentials already fetched by the parent process.
+Tasks then only carry their own arguments, and the context is passed to the task
+function as keyword arguments.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Self, TypeVar
+
+from dolphin.utils import DummyProcessPoolExecutor
+
+from ._credentials import init_worker_credentials, share_credentials
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["WorkerPool", "get_worker_context"]
+
+T = TypeVar("T")
+
+DEFAULT_PRELOAD_MODULES = (
+    "numpy",
+    "h5py",
+    "h5netcdf",
+    "osgeo.gdal",
+    "dolphin.io",
+    "disp_nisar.product",
+)
+
+# Set in each worker by `_initialize_worker`
+_worker_context: dict[str, Any] = {}
+
+
+def get_worker_context() -> Mapping[str, Any]:
+    """Get the run context of the current worker."""
+    return _worker_context
+
+
+def _initialize_worker(
+    context: Mapping[str, Any],
+    preload_modules: Sequence[str],
+    initializer: Callable[..., object] | None,
+    initargs: tuple,
+    credentials: Mapping[str, Any] | None = None,
+) -> None:
+    if credentials:
+        init_worker_credentials(credentials)
+    for name in preload_modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.debug("Could not preload %s", name)
+    _worker_context.clear()
+    _worker_context.update(context)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _call_with_context(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    return func(*args, **kwargs, **_worker_context)
+
+
+class WorkerPool:
+    """Spawn process pool passing a shared run context to every task.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of worker processes. With 1 or fewer, tasks run in the calling
+        process (the context is set there for the lifetime of the pool).
+    context : Mapping[str, Any], optional
+        Keyword arguments added to every task's call. Must be picklable.
+    preload_modules : Sequence[str]
+        Modules imported by each worker when it starts.
+    initializer : Callable, optional
+        Extra function each worker runs once, after the context is set.
+    initargs : tuple
+        Arguments of `initializer`.
+
+    Examples
+    --------
+    >>> def scale(x, factor):
+    ...     return x * factor
+    >>> with WorkerPool(1, context={"factor": 3}, preload_modules=()) as pool:
+    ...     pool.submit(scale, 2).result()
+    6
+
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        context: Mapping[str, Any] | None = None,
+        preload_modules: Sequence[str] = DEFAULT_PRELOAD_MODULES,
+        initializer: Callable[..., object] | None = None,
+        initargs: tuple = (),
+    ):
+        init_args = (dict(context or {}), tuple(preload_modules), initializer, initargs)
+        self._in_process = max_workers <= 1
+        if self._in_process:
+            self._previous_context = dict(_worker_context)
+            _initialize_worker(*init_args)
+            self._executor = DummyProcessPoolExecutor()
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=get_context("spawn"),
+                initializer=_initialize_worker,
+                initargs=(*init_args, share_credentials()),
+            )
+
+    def submit(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        """Run `func(*args, **kwargs, **context)` in a worker."""
+        return self._executor.submit(_call_with_context, func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the workers (see `concurrent.futures.Executor.shutdown`)."""
+        self._executor.shutdown(wait=wait)
+        if self._in_process:
+            _worker_context.clear()
+            _worker_context.update(self._previous_context)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown(wait=True)
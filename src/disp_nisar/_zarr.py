@@ -5,17 +5,32 @@ Zarr store layout
 <output>.zarr/
   freqA/
     HH    : (n_dates, ny, nx_a)  complex64
-    mask  : (n_dates, ny, nx_a)  uint8
+    mask  : (ceil(n_dates / 8), ny, nx_a)  uint8, validity bit-packed along time
     .attrs: dates, xCoordinates, yCoordinates, xCoordinateSpacing,
             yCoordinateSpacing, centerFrequency, projection
   freqB/              [optional]
     HH    : (n_dates, ny, nx_b)  complex64
-    mask  : (n_dates, ny, nx_b)  uint8
-  .zattrs : dates, file_list
+    mask  : (ceil(n_dates / 8), ny, nx_b)  uint8
+  .zattrs : dates, file_list, time_offset
+
+The mask holds one validity bit per pixel and date (bit ``t % 8`` of plane
+``t // 8`` for date ``t``, ``mask.attrs["encoding"] == "bitpacked"``), which
+:class:`ZarrMaskView` unpacks for the requested dates only. Stores written
+with ``pack_mask=False`` keep the GSLC mask values, one byte per date.
 
 Chunk shape is (n_dates, spatial_chunks, spatial_chunks) — all dates per
 spatial tile, which is optimal for phase-linking (reads one chunk per block).
 
+For forward-mode updates, write the store with ``time_chunks`` (1, or the
+ministack size): :func:`append_to_zarr` then adds new dates without rewriting
+the chunks of earlier ones, and :func:`retire_dates` drops the oldest dates by
+moving ``time_offset`` past them (readers only see the dates after it).
+
+:class:`ZarrStack` keeps the decoded chunks it reads in a :class:`ChunkCache`
+(``cache_bytes``, LRU), so the chunks shared by neighbouring blocks with halos
+are read and decompressed once. With ``read_ahead=True`` the chunks of the next
+block, in dolphin's row-major block order, are fetched in the background.
+
 Usage
 -----
     from disp_nisar._zarr import gslc_to_zarr, ZarrStack
@@ -27,18 +42,38 @@ Usage
     stack = ZarrStack('stack.zarr', freq='A')
     block = stack[:, 0:512, 0:512]          # numpy array, shape (n_dates, 512, 512)
     da_arr = stack.as_dask()                # dask array for parallel ops
+
+    # forward mode: add the new acquisitions, drop the oldest
+    gslc_to_zarr(files, 'stack.zarr', time_chunks=1)
+    append_to_zarr(new_files, 'stack.zarr')
+    retire_dates('stack.zarr', len(new_files))
 """
 
 from __future__ import annotations
 
+import logging
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
 from pathlib import Path
-from typing import Any, Sequence
+from typing import Any, NamedTuple, Sequence
 
 import numpy as np
+from dolphin.utils import DummyProcessPoolExecutor
 
+from ._credentials import init_worker_credentials, share_credentials
 from ._streaming import open_h5_file
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = 256 * 2**20
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -80,6 +115,10 @@ def gslc_to_zarr(
     compressor: str = "lz4",
     overwrite: bool = False,
     progress: bool = True,
+    max_workers: int = 4,
+    compression_threads: int | None = None,
+    time_chunks: int | None = None,
+    pack_mask: bool = True,
 ) -> Any:
     """Convert NISAR GSLC HDF5 files to a single Zarr store.
 
@@ -94,12 +133,13 @@ def gslc_to_zarr(
     pol:
         Polarization, default ``'HH'``.
     spatial_chunks:
-        Spatial chunk size in pixels (both x and y). The time dimension is
-        always chunked as ``n_dates`` so every phase-linking block is one chunk.
+        Spatial chunk size in pixels (both x and y).
     row_batch:
-        Number of HDF5 rows to read at once.  Controls peak memory usage:
-        ``n_dates × row_batch × nx × 8 bytes``.
-        Default 1024 rows → ~3.4 GB peak for freqA with 6 dates.
+        Number of HDF5 rows to read at once, rounded down to a multiple of
+        ``spatial_chunks`` so that every chunk is written exactly once.
+        Controls peak memory usage: the next batch is read while the current
+        one is written, so up to ``2 × n_dates × row_batch × nx × 9 bytes``.
+        Default 1024 rows → ~3.4 GB per batch for freqA with 6 dates.
         Use 512 for tighter memory budgets.
     compressor:
         Blosc compressor: ``'lz4'`` (fast), ``'zstd'`` (best ratio), ``'none'``.
@@ -107,6 +147,24 @@ def gslc_to_zarr(
         Recreate the store if it already exists.
     progress:
         Show a tqdm progress bar.
+    max_workers:
+        Number of processes reading the GSLC files, one date at a time.
+        With 1, the files are read in the calling process.
+    compression_threads:
+        Number of chunks Blosc-encoded at once, on zarr's thread pool.
+        Default is the number of CPUs.
+    time_chunks:
+        Number of dates per chunk. Default (None) chunks the time dimension
+        as ``n_dates``, so every phase-linking block is one chunk.
+        For stores updated with :func:`append_to_zarr`, use 1 (an append never
+        rewrites an existing chunk) or the ministack size (an append only
+        rewrites the last, partially filled, time chunk). The bit-packed
+        mask has 8 dates per plane, so its last time chunk is rewritten by
+        an append unless it is full.
+    pack_mask:
+        Store the validity of each pixel (GSLC mask value between 1 and 254)
+        as one bit per date, packed along time. If False, store the GSLC
+        mask values, one byte per pixel and date.
 
     Returns
     -------
@@ -117,18 +175,13 @@ def gslc_to_zarr(
     -----
     For 6 dates of freqA, the uncompressed stack is ~222 GB.  Blosc-lz4
     typically achieves ~2–3× on complex SAR data, so expect ~80–110 GB on disk.
-    Full write time depends on I/O bandwidth; ~30–90 min on a fast NFS/SSD.
+    Reading the HDF5 files (mostly gzip decompression) is the bottleneck, so
+    the write time scales with ``max_workers`` until the I/O bandwidth is
+    saturated.
 
     """
     import zarr
 
-    try:
-        from tqdm.auto import tqdm
-    except ImportError:
-
-        def tqdm(it, **_kw):
-            return it
-
     file_list = [Path(f) for f in file_list]
     n_dates = len(file_list)
     dates = [_parse_date(f) for f in file_list]
@@ -136,8 +189,11 @@ def gslc_to_zarr(
 
     if output_path.exists():
         if not overwrite:
-            print(f"{output_path} already exists — returning existing store.")
-            print("Pass overwrite=True to recreate.")
+            logger.info(
+                "%s already exists, returning the existing store. "
+                "Pass overwrite=True to recreate.",
+                output_path,
+            )
             return zarr.open_group(str(output_path), mode="r")
         import shutil
 
@@ -148,34 +204,18 @@ def gslc_to_zarr(
     root.attrs["dates"] = dates
     root.attrs["n_dates"] = n_dates
     root.attrs["file_list"] = [str(f) for f in file_list]
+    root.attrs["time_offset"] = 0
 
-    # Keep all HDF5 files open for the duration of the write
-    handles = [open_h5_file(f, "r") for f in file_list]
-
-    try:
+    with _ingest_executor(max_workers, compression_threads) as executor:
         for freq_letter in freqs:
             freq_key = f"frequency{freq_letter.upper()}"
             grp_path = f"science/LSAR/GSLC/grids/{freq_key}"
 
-            ds0 = handles[0][f"{grp_path}/{pol}"]
-            ny, nx = ds0.shape
-            dtype = ds0.dtype
-
-            # Read coordinate metadata from first file
-            meta: dict[str, Any] = {}
-            for mkey in [
-                "xCoordinates",
-                "yCoordinates",
-                "xCoordinateSpacing",
-                "yCoordinateSpacing",
-                "centerFrequency",
-                "projection",
-            ]:
-                node = handles[0][grp_path].get(mkey)
-                if node is None:
-                    continue
-                val = node[()]
-                meta[mkey] = val.tolist() if hasattr(val, "tolist") else float(val)
+            with open_h5_file(file_list[0], "r") as hf:
+                ds0 = hf[f"{grp_path}/{pol}"]
+                ny, nx = ds0.shape
+                dtype = ds0.dtype
+                meta = _read_grid_metadata(hf[grp_path])
 
             freq_grp = root.require_group(f"freq{freq_letter.upper()}")
             freq_grp.attrs.update(meta)
@@ -183,7 +223,7 @@ def gslc_to_zarr(
             freq_grp.attrs["pol"] = pol
             freq_grp.attrs["shape_yx"] = [ny, nx]
 
-            chunks = (n_dates, spatial_chunks, spatial_chunks)
+            chunks = (time_chunks or n_dates, spatial_chunks, spatial_chunks)
 
             slc_arr = freq_grp.create_array(
                 pol,
@@ -192,62 +232,591 @@ def gslc_to_zarr(
                 dtype=dtype,
                 compressors=codecs,
             )
-            mask_arr = freq_grp.create_array(
-                "mask",
-                shape=(n_dates, ny, nx),
-                chunks=chunks,
-                dtype="uint8",
-                compressors=codecs,
+            if pack_mask:
+                mask_time_chunks = max(1, -(-chunks[0] // 8))
+                mask_arr = freq_grp.create_array(
+                    "mask",
+                    shape=(_num_planes(n_dates), ny, nx),
+                    chunks=(mask_time_chunks, spatial_chunks, spatial_chunks),
+                    dtype="uint8",
+                    compressors=codecs,
+                    attributes={"encoding": "bitpacked"},
+                )
+            else:
+                mask_arr = freq_grp.create_array(
+                    "mask",
+                    shape=(n_dates, ny, nx),
+                    chunks=chunks,
+                    dtype="uint8",
+                    compressors=codecs,
+                )
+            logger.info(
+                "freq%s/%s: (%s, %s, %s) %s  raw=%.1f GB  chunks=%s",
+                freq_letter.upper(),
+                pol,
+                n_dates,
+                ny,
+                nx,
+                dtype,
+                n_dates * ny * nx * (np.dtype(dtype).itemsize + 1) / 1e9,
+                chunks,
             )
-
-            raw_gb = n_dates * ny * nx * np.dtype(dtype).itemsize / 1e9
-            print(
-                f"freq{freq_letter.upper()}/{pol}: ({n_dates}, {ny}, {nx}) "
-                f"{dtype}  raw={raw_gb:.1f} GB  chunks={chunks}"
+            _ingest_dates(
+                executor,
+                file_list,
+                grp_path,
+                pol,
+                slc_arr,
+                mask_arr,
+                time_start=0,
+                row_batch=row_batch,
+                progress=progress,
             )
 
-            row_starts = range(0, ny, row_batch)
-            for row_start in tqdm(
-                row_starts,
-                desc=f"freq{freq_letter.upper()}→zarr",
-                unit="batch",
-                disable=not progress,
-            ):
-                row_end = min(row_start + row_batch, ny)
-                nrows = row_end - row_start
-
-                slc_buf = np.empty((n_dates, nrows, nx), dtype=dtype)
-                mask_buf = np.empty((n_dates, nrows, nx), dtype="uint8")
-
-                for i, h in enumerate(handles):
-                    slc_buf[i] = h[f"{grp_path}/{pol}"][row_start:row_end, :]
-                    mask_buf[i] = h[f"{grp_path}/mask"][row_start:row_end, :]
-
-                # Zero out invalid pixels (mask==0) so downstream JAX/cuSolver
-                # never receives NaN. Dolphin skips blocks that are all-zero,
-                # so this converts nodata edge regions to skippable zeros.
-                slc_buf[mask_buf == 0] = 0
-
-                slc_arr[:, row_start:row_end, :] = slc_buf
-                mask_arr[:, row_start:row_end, :] = mask_buf
-
-    finally:
-        for h in handles:
-            try:
-                h.close()
-            except Exception:
-                pass
-
     zarr.consolidate_metadata(str(output_path))
-    print(f"\nDone → {output_path}")
+    logger.info("Done → %s", output_path)
     return zarr.open_group(str(output_path), mode="r")
 
 
+def append_to_zarr(
+    file_list: Sequence[str | Path],
+    zarr_path: str | Path,
+    row_batch: int = 1024,
+    progress: bool = True,
+    max_workers: int = 4,
+    compression_threads: int | None = None,
+) -> Any:
+    """Append new GSLC dates to a store written by :func:`gslc_to_zarr`.
+
+    The arrays of every frequency in the store are grown along the time
+    dimension and only the new dates are written: chunks holding earlier
+    dates are left untouched, unless the last time chunk was partially
+    filled (see ``time_chunks`` in :func:`gslc_to_zarr`).
+
+    Parameters
+    ----------
+    file_list:
+        Chronologically sorted list of the new NISAR GSLC .h5 files, all
+        acquired after the last date of the store.
+    zarr_path:
+        Path to the ``.zarr`` store.
+    row_batch:
+        Number of HDF5 rows to read at once (see :func:`gslc_to_zarr`).
+    progress:
+        Show a tqdm progress bar.
+    max_workers:
+        Number of processes reading the GSLC files.
+    compression_threads:
+        Number of chunks Blosc-encoded at once.
+
+    Returns
+    -------
+    zarr.Group
+        Opened root group of the updated store (read-only).
+
+    """
+    import zarr
+
+    file_list = [Path(f) for f in file_list]
+    new_dates = [_parse_date(f) for f in file_list]
+    root = zarr.open_group(str(zarr_path), mode="r+", use_consolidated=False)
+    dates = list(root.attrs["dates"])
+    if dates and new_dates and min(new_dates) <= dates[-1]:
+        msg = (
+            f"Can only append dates after {dates[-1]} to {zarr_path}, got"
+            f" {min(new_dates)}"
+        )
+        raise ValueError(msg)
+
+    with _ingest_executor(max_workers, compression_threads) as executor:
+        for name, freq_grp in sorted(root.groups()):
+            pol = freq_grp.attrs["pol"]
+            grp_path = f"science/LSAR/GSLC/grids/frequency{name.removeprefix('freq')}"
+            slc_arr, mask_arr = freq_grp[pol], freq_grp["mask"]
+            time_start, ny, nx = slc_arr.shape
+            with open_h5_file(file_list[0], "r") as hf:
+                if hf[f"{grp_path}/{pol}"].shape != (ny, nx):
+                    msg = (
+                        f"{file_list[0]} {name} grid has shape"
+                        f" {hf[f'{grp_path}/{pol}'].shape}, the store has {(ny, nx)}"
+                    )
+                    raise ValueError(msg)
+
+            new_size = time_start + len(file_list)
+            slc_arr.resize((new_size, ny, nx))
+            if _is_bitpacked(mask_arr):
+                mask_arr.resize((_num_planes(new_size), ny, nx))
+            else:
+                mask_arr.resize((new_size, ny, nx))
+            logger.info("Appending %s dates to %s/%s", len(file_list), zarr_path, name)
+            _ingest_dates(
+                executor,
+                file_list,
+                grp_path,
+                pol,
+                slc_arr,
+                mask_arr,
+                time_start=time_start,
+                row_batch=row_batch,
+                progress=progress,
+            )
+            freq_grp.attrs["dates"] = dates + new_dates
+
+    root.attrs["dates"] = dates + new_dates
+    root.attrs["n_dates"] = len(dates) + len(new_dates)
+    root.attrs["file_list"] = list(root.attrs["file_list"]) + [
+        str(f) for f in file_list
+    ]
+    zarr.consolidate_metadata(str(zarr_path))
+    return zarr.open_group(str(zarr_path), mode="r")
+
+
+def retire_dates(zarr_path: str | Path, num_dates: int) -> Any:
+    """Drop the ``num_dates`` oldest dates of a store.
+
+    The retired dates are hidden from :class:`ZarrStack` readers by moving
+    the store's ``time_offset``, and the time chunks holding only retired
+    dates are deleted. Chunks with remaining dates are left untouched.
+
+    Parameters
+    ----------
+    zarr_path:
+        Path to the ``.zarr`` store.
+    num_dates:
+        Number of dates to retire, from the start of the stack.
+
+    Returns
+    -------
+    zarr.Group
+        Opened root group of the updated store (read-only).
+
+    """
+    import zarr
+
+    root = zarr.open_group(str(zarr_path), mode="r+", use_consolidated=False)
+    dates = list(root.attrs["dates"])
+    if not 0 <= num_dates <= len(dates):
+        msg = f"Cannot retire {num_dates} of the {len(dates)} dates in {zarr_path}"
+        raise ValueError(msg)
+
+    offset = root.attrs.get("time_offset", 0) + num_dates
+    for _, freq_grp in root.groups():
+        freq_grp.attrs["dates"] = dates[num_dates:]
+        for arr in (freq_grp[freq_grp.attrs["pol"]], freq_grp["mask"]):
+            dates_per_chunk = arr.chunks[0] * (8 if _is_bitpacked(arr) else 1)
+            _delete_time_chunks(zarr_path, arr, offset // dates_per_chunk)
+
+    root.attrs["dates"] = dates[num_dates:]
+    root.attrs["n_dates"] = len(dates) - num_dates
+    root.attrs["file_list"] = list(root.attrs["file_list"])[num_dates:]
+    root.attrs["time_offset"] = offset
+    zarr.consolidate_metadata(str(zarr_path))
+    return zarr.open_group(str(zarr_path), mode="r")
+
+
+def _delete_time_chunks(zarr_path: str | Path, arr: Any, num_time_chunks: int) -> None:
+    """Delete the chunks of the first ``num_time_chunks`` time chunks of `arr`."""
+    _, n_y, n_x = (
+        -(-size // chunk) for size, chunk in zip(arr.shape, arr.chunks, strict=True)
+    )
+    for t in range(num_time_chunks):
+        for y in range(n_y):
+            for x in range(n_x):
+                key = arr.metadata.encode_chunk_key((t, y, x))
+                (Path(zarr_path) / arr.path / key).unlink(missing_ok=True)
+
+
+@contextmanager
+def _ingest_executor(max_workers: int, compression_threads: int | None) -> Iterator:
+    """Start the GSLC reader processes and set zarr's encoding concurrency."""
+    import zarr
+
+    if compression_threads is None:
+        compression_threads = os.cpu_count() or 1
+    Executor = ProcessPoolExecutor if max_workers > 1 else DummyProcessPoolExecutor
+    with (
+        Executor(
+            max_workers,
+            mp_context=get_context("spawn"),
+            # Remote GSLCs are read with the S3 credentials of this process
+            initializer=init_worker_credentials,
+            initargs=(share_credentials(),),
+        ) as executor,
+        # Chunks are Blosc-encoded on zarr's thread pool, this many at a time
+        zarr.config.set({"async.concurrency": compression_threads}),
+    ):
+        yield executor
+
+
+def _ingest_dates(
+    executor: Any,
+    file_list: Sequence[Path],
+    grp_path: str,
+    pol: str,
+    slc_arr: Any,
+    mask_arr: Any,
+    time_start: int,
+    row_batch: int,
+    progress: bool,
+) -> None:
+    """Write the SLCs and masks of `file_list` starting at date `time_start`."""
+    try:
+        from tqdm.auto import tqdm
+    except ImportError:
+
+        def tqdm(it, **_kw):
+            return it
+
+    n_dates = len(file_list)
+    _, ny, nx = slc_arr.shape
+    chunk_rows = slc_arr.chunks[1]
+    row_batch = max(chunk_rows, row_batch - row_batch % chunk_rows)
+    time_end = time_start + n_dates
+    name = slc_arr.path
+
+    batches = [
+        (row_start, min(row_start + row_batch, ny))
+        for row_start in range(0, ny, row_batch)
+    ]
+    t_start = time.perf_counter()
+    t_read = 0.0
+    next_futures = _submit_reads(executor, file_list, grp_path, pol, batches[0])
+    for i, (row_start, row_end) in enumerate(
+        tqdm(batches, desc=f"{name}→zarr", unit="batch", disable=not progress)
+    ):
+        futures = next_futures
+        # Keep the readers busy while this batch is encoded
+        if i + 1 < len(batches):
+            next_futures = _submit_reads(
+                executor, file_list, grp_path, pol, batches[i + 1]
+            )
+
+        nrows = row_end - row_start
+        slc_buf = np.empty((n_dates, nrows, nx), dtype=slc_arr.dtype)
+        mask_buf = np.empty((n_dates, nrows, nx), dtype="uint8")
+        t0 = time.perf_counter()
+        for j, fut in enumerate(futures):
+            slc_buf[j], mask_buf[j] = fut.result()
+        t_read += time.perf_counter() - t0
+
+        slc_arr[time_start:time_end, row_start:row_end, :] = slc_buf
+        _write_mask(mask_arr, mask_buf, time_start, row_start)
+        logger.debug("%s rows %s-%s written", name, row_start, row_end)
+
+    elapsed = time.perf_counter() - t_start
+    num_bytes = n_dates * ny * nx * (slc_arr.dtype.itemsize + 1)
+    logger.info(
+        "Wrote %s: %.1f GB in %.1f s (%.1f MB/s), %.1f s waiting on reads",
+        name,
+        num_bytes / 1e9,
+        elapsed,
+        num_bytes / 1e6 / elapsed,
+        t_read,
+    )
+
+
+def _is_bitpacked(mask_arr: Any) -> bool:
+    return mask_arr.attrs.get("encoding") == "bitpacked"
+
+
+def _num_planes(n_dates: int) -> int:
+    """Get the number of bit planes holding `n_dates` of packed mask."""
+    return -(-n_dates // 8)
+
+
+def _write_mask(
+    mask_arr: Any, mask_buf: np.ndarray, time_start: int, row_start: int
+) -> None:
+    """Write the GSLC masks of dates from `time_start`, packing them if needed."""
+    n_dates, nrows, _ = mask_buf.shape
+    rows = slice(row_start, row_start + nrows)
+    if not _is_bitpacked(mask_arr):
+        mask_arr[time_start : time_start + n_dates, rows, :] = mask_buf
+        return
+
+    # Bits of earlier dates sharing the first plane are kept
+    p0, p1 = time_start // 8, _num_planes(time_start + n_dates)
+    lead = time_start - 8 * p0
+    bits = np.zeros((8 * (p1 - p0), *mask_buf.shape[1:]), dtype=bool)
+    if lead:
+        old = mask_arr[p0 : p0 + 1, rows, :]
+        bits[:lead] = np.unpackbits(old, axis=0, bitorder="little")[:lead]
+    bits[lead : lead + n_dates] = (mask_buf >= 1) & (mask_buf != 255)
+    mask_arr[p0:p1, rows, :] = np.packbits(bits, axis=0, bitorder="little")
+
+
+def _shift_time_key(key: Any, offset: int, shape: tuple[int, ...]) -> Any:
+    """Shift the time index of `key` past the first `offset` stored dates.
+
+    Examples
+    --------
+    >>> _shift_time_key((slice(None), 0), 2, (3, 4, 5))
+    (slice(2, 5, 1), 0)
+    >>> _shift_time_key(-1, 2, (3, 4, 5))
+    (4,)
+
+    """
+    if offset == 0:
+        return key
+    key = key if isinstance(key, tuple) else (key,)
+    if key and key[0] is Ellipsis:
+        key = (slice(None),) * (len(shape) - len(key) + 1) + key[1:]
+    if not key:
+        key = (slice(None),)
+    first, n = key[0], shape[0]
+    if isinstance(first, slice):
+        start, stop, step = first.indices(n)
+        first = slice(start + offset, stop + offset, step)
+    elif isinstance(first, (int, np.integer)):
+        if not -n <= first < n:
+            msg = f"index {first} is out of bounds for {n} dates"
+            raise IndexError(msg)
+        first = offset + first % n
+    else:
+        first = np.asarray(first)
+        if first.dtype == bool:
+            first = np.flatnonzero(first)
+        first = offset + first % n
+    return (first, *key[1:])
+
+
+def _expand_key(key: Any, ndim: int) -> tuple:
+    """Index every axis of an `ndim` array in `key`, replacing any ``...``.
+
+    Examples
+    --------
+    >>> _expand_key((..., 3), 3)
+    (slice(None, None, None), slice(None, None, None), 3)
+    >>> _expand_key(0, 3)
+    (0, slice(None, None, None), slice(None, None, None))
+
+    """
+    key = key if isinstance(key, tuple) else (key,)
+    if any(k is Ellipsis for k in key):
+        i = next(i for i, k in enumerate(key) if k is Ellipsis)
+        key = key[:i] + (slice(None),) * (ndim - len(key) + 1) + key[i + 1 :]
+    return key + (slice(None),) * (ndim - len(key))
+
+
+def _block_region(
+    key: Any, shape: tuple[int, ...]
+) -> tuple[np.ndarray, range, range, tuple[bool, bool, bool]] | None:
+    """Convert `key` to (time indices, rows, cols, squeezed axes), if it is a block.
+
+    Returns None for keys the chunk cache does not handle (strided or fancy
+    spatial indexing, empty selections, ``np.newaxis``...).
+
+    Examples
+    --------
+    >>> _block_region((slice(None), slice(10, 20), 5), (3, 100, 70))
+    (array([0, 1, 2]), range(10, 20), range(5, 6), (False, False, True))
+    >>> _block_region((-1,), (3, 100, 70))
+    (array([2]), range(0, 100), range(0, 70), (True, False, False))
+    >>> _block_region((0, slice(0, 10, 2)), (3, 100, 70)) is None
+    True
+
+    """
+    key = _expand_key(key, len(shape))
+    if len(key) > len(shape):
+        return None
+
+    first, n = key[0], shape[0]
+    if isinstance(first, slice):
+        times = np.arange(*first.indices(n))
+    elif isinstance(first, (int, np.integer)):
+        if not -n <= first < n:
+            return None
+        times = np.array([first % n])
+    elif isinstance(first, (list, np.ndarray)):
+        times = np.asarray(first)
+        if times.dtype == bool:
+            times = np.flatnonzero(times)
+        if times.ndim != 1 or times.dtype.kind not in "iu":
+            return None
+        if times.size and not (-n <= times.min() and times.max() < n):
+            return None
+        times = times % n
+    else:
+        return None
+
+    spatial = []
+    for k, size in zip(key[1:], shape[1:]):
+        if isinstance(k, slice) and k.step in (None, 1):
+            spatial.append(range(*k.indices(size)))
+        elif isinstance(k, (int, np.integer)) and -size <= k < size:
+            spatial.append(range(k % size, k % size + 1))
+        else:
+            return None
+    rows, cols = spatial
+    if not (len(times) and len(rows) and len(cols)):
+        return None
+    squeeze = tuple(isinstance(k, (int, np.integer)) for k in key)
+    return times, rows, cols, squeeze  # type: ignore[return-value]
+
+
+def _read_grid_metadata(grid_group: Any) -> dict[str, Any]:
+    """Read the coordinate metadata of a GSLC frequency grid group."""
+    meta: dict[str, Any] = {}
+    for mkey in [
+        "xCoordinates",
+        "yCoordinates",
+        "xCoordinateSpacing",
+        "yCoordinateSpacing",
+        "centerFrequency",
+        "projection",
+    ]:
+        node = grid_group.get(mkey)
+        if node is None:
+            continue
+        val = node[()]
+        meta[mkey] = val.tolist() if hasattr(val, "tolist") else float(val)
+    return meta
+
+
+def _submit_reads(
+    executor: Any,
+    file_list: Sequence[Path],
+    grp_path: str,
+    pol: str,
+    rows: tuple[int, int],
+) -> list[Future]:
+    return [
+        executor.submit(_read_rows, f, f"{grp_path}/{pol}", f"{grp_path}/mask", *rows)
+        for f in file_list
+    ]
+
+
+def _read_rows(
+    filename: Path, dset_path: str, mask_path: str, row_start: int, row_end: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Read rows of one date's SLC and mask, with invalid pixels zeroed."""
+    # Kept open in the process's file pool between the row blocks
+    with open_h5_file(filename, "r") as hf:
+        slc = hf[dset_path][row_start:row_end, :]
+        mask = hf[mask_path][row_start:row_end, :]
+    # Zero out invalid pixels (mask==0) so downstream JAX/cuSolver
+    # never receives NaN. Dolphin skips blocks that are all-zero,
+    # so this converts nodata edge regions to skippable zeros.
+    slc[mask == 0] = 0
+    return slc, mask
+
+
 # ---------------------------------------------------------------------------
 # Reader — drop-in replacement for dolphin's VRTStack
 # ---------------------------------------------------------------------------
 
 
+def _contiguous_groups(
+    chunk_keys: list[tuple[int, ...]],
+) -> list[list[tuple[int, ...]]]:
+    """Split chunk keys into groups of consecutive indices along every axis.
+
+    Examples
+    --------
+    >>> _contiguous_groups([(0, 0, 0), (0, 0, 1), (5, 0, 0), (5, 0, 1)])
+    [[(0, 0, 0), (0, 0, 1)], [(5, 0, 0), (5, 0, 1)]]
+
+    """
+    groups = [list(chunk_keys)]
+    for axis in range(len(chunk_keys[0]) if chunk_keys else 0):
+        split = []
+        for group in groups:
+            # Map each index to the first index of its run of consecutive indices
+            run_start: dict[int, int] = {}
+            prev = None
+            for index in sorted({key[axis] for key in group}):
+                start = run_start[prev] if prev == index - 1 else index
+                run_start[index] = start
+                prev = index
+            runs: dict[int, list[tuple[int, ...]]] = {}
+            for key in group:
+                runs.setdefault(run_start[key[axis]], []).append(key)
+            split.extend(runs.values())
+        groups = split
+    return groups
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a :class:`ChunkCache`, as `functools.lru_cache` reports them."""
+
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    maxsize: int
+
+
+class ChunkCache:
+    """Thread-safe LRU cache of decoded chunks, bounded in bytes.
+
+    Parameters
+    ----------
+    max_bytes:
+        Total size of the cached arrays. Chunks larger than this are not cached.
+
+    Examples
+    --------
+    >>> cache = ChunkCache(max_bytes=100)
+    >>> cache.put("a", np.zeros(10))
+    >>> cache.get("a").shape, cache.get("b")
+    ((10,), None)
+    >>> cache.put("b", np.zeros(10))  # evicts "a"
+    >>> cache.cache_info()
+    CacheInfo(hits=1, misses=1, evictions=1, currsize=80, maxsize=100)
+
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Any, np.ndarray] = OrderedDict()
+        self._nbytes = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> np.ndarray | None:
+        """Return the cached chunk for `key`, or None, and count the hit/miss."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def put(self, key: Any, value: np.ndarray) -> None:
+        """Cache `value`, evicting the least recently used chunks to make room."""
+        if value.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._data[key] = value
+            self._nbytes += value.nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached chunks (the statistics are kept)."""
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Report the hits, misses and evictions so far, and the size in bytes."""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions, self._nbytes, self.max_bytes
+            )
+
+
 class ZarrStack:
     """Read a Zarr SLC stack produced by :func:`gslc_to_zarr`.
 
@@ -263,6 +832,12 @@ class ZarrStack:
         Frequency band: ``'A'`` or ``'B'``.
     pol:
         Polarization: ``'HH'`` or ``'HV'``.
+    cache_bytes:
+        Size of the cache of decoded chunks (see :class:`ChunkCache`).
+        0 reads every block straight from the store.
+    read_ahead:
+        After each block read, fetch the chunks of the next block in the
+        background, guessing it from the stride between the last two reads.
 
     Examples
     --------
@@ -279,24 +854,31 @@ class ZarrStack:
         zarr_path: str | Path,
         freq: str = "A",
         pol: str = "HH",
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        read_ahead: bool = False,
     ) -> None:
         import zarr
 
         self._path = Path(zarr_path)
         self._freq = freq.upper()
         self._pol = pol
+        self._cache = ChunkCache(cache_bytes) if cache_bytes > 0 else None
+        self._read_ahead = read_ahead
+        self._init_read_state()
 
         root = zarr.open_group(str(zarr_path), mode="r")
         freq_grp = root[f"freq{self._freq}"]
         self._arr = freq_grp[pol]  # zarr.Array (n_dates, ny, nx)
         self._meta = dict(freq_grp.attrs)
         self._root_meta = dict(root.attrs)
+        # Dates before the offset were retired by `retire_dates`
+        self._offset = self._root_meta.get("time_offset", 0)
 
     # -- DatasetReader protocol ------------------------------------------------
 
     @property
     def shape(self) -> tuple[int, ...]:
-        return tuple(self._arr.shape)
+        return (self._arr.shape[0] - self._offset, *self._arr.shape[1:])
 
     @property
     def dtype(self) -> np.dtype:
@@ -307,7 +889,154 @@ class ZarrStack:
         return self._arr.ndim
 
     def __getitem__(self, key: Any) -> np.ndarray:
-        return np.asarray(self._arr[key])
+        key = _shift_time_key(key, self._offset, self.shape)
+        region = None if self._cache is None else _block_region(key, self._arr.shape)
+        if region is None:
+            return np.asarray(self._arr[key])
+
+        times, rows, cols, squeeze = region
+        out = self._read_region(times, rows, cols)
+        if self._read_ahead:
+            self._schedule_read_ahead(times, rows, cols)
+        return out[tuple(0 if s else slice(None) for s in squeeze)]
+
+    # -- Chunk cache -----------------------------------------------------------
+
+    def cache_info(self) -> CacheInfo | None:
+        """Hit/miss statistics of the chunk cache, or None if it is disabled."""
+        return None if self._cache is None else self._cache.cache_info()
+
+    def _init_read_state(self) -> None:
+        self._prev_read: tuple[range, range] | None = None
+        # Chunks being fetched by the read-ahead thread
+        self._pending: dict[tuple[int, ...], Future] = {}
+        self._pending_lock = threading.Lock()
+        self._prefetcher: ThreadPoolExecutor | None = None
+
+    def _chunk_keys(
+        self, times: np.ndarray, rows: range, cols: range
+    ) -> list[tuple[int, ...]]:
+        """List the (time, row, col) indices of the chunks holding a region."""
+        tc, rc, cc = self._arr.chunks
+        return [
+            (t, y, x)
+            for t in np.unique(times // tc).tolist()
+            for y in range(rows.start // rc, (rows.stop - 1) // rc + 1)
+            for x in range(cols.start // cc, (cols.stop - 1) // cc + 1)
+        ]
+
+    def _read_region(self, times: np.ndarray, rows: range, cols: range) -> np.ndarray:
+        tc, rc, cc = self._arr.chunks
+        chunks = self._get_chunks(self._chunk_keys(times, rows, cols))
+
+        out = np.empty((len(times), len(rows), len(cols)), dtype=self.dtype)
+        for (t, y, x), data in chunks.items():
+            sel = np.flatnonzero(times // tc == t)
+            y0, y1 = max(rows.start, y * rc), min(rows.stop, (y + 1) * rc)
+            x0, x1 = max(cols.start, x * cc), min(cols.stop, (x + 1) * cc)
+            out[
+                sel,
+                y0 - rows.start : y1 - rows.start,
+                x0 - cols.start : x1 - cols.start,
+            ] = data[
+                times[sel] - t * tc,
+                y0 - y * rc : y1 - y * rc,
+                x0 - x * cc : x1 - x * cc,
+            ]
+        return out
+
+    def _get_chunks(
+        self, chunk_keys: list[tuple[int, ...]]
+    ) -> dict[tuple[int, ...], np.ndarray]:
+        assert self._cache is not None
+        chunks: dict[tuple[int, ...], np.ndarray] = {}
+        missing = []
+        for key in chunk_keys:
+            data = self._cache.get(key)
+            if data is None:
+                with self._pending_lock:
+                    pending = self._pending.get(key)
+                if pending is not None and pending.exception() is None:
+                    # Being read ahead: wait for it rather than reading it twice
+                    data = pending.result().get(key)
+            if data is None:
+                missing.append(key)
+            else:
+                chunks[key] = data
+        if missing:
+            chunks.update(self._fetch_chunks(missing))
+        return chunks
+
+    def _fetch_chunks(
+        self, chunk_keys: list[tuple[int, ...]]
+    ) -> dict[tuple[int, ...], np.ndarray]:
+        """Read `chunk_keys` in one call per contiguous group, and cache each chunk.
+
+        Each group of keys (see `_contiguous_groups`) is read as its bounding
+        box, so the chunks between sparse keys (e.g. the first and last dates)
+        are not read.
+        """
+        assert self._cache is not None
+        chunk_shape = self._arr.chunks
+        chunks = {}
+        for group in _contiguous_groups(chunk_keys):
+            lo = np.min(group, axis=0)
+            hi = np.max(group, axis=0) + 1
+            data = np.asarray(self._arr.blocks[tuple(map(slice, lo, hi))])
+            for key in group:
+                start = [(k - low) * c for k, low, c in zip(key, lo, chunk_shape)]
+                chunk = data[tuple(slice(s, s + c) for s, c in zip(start, chunk_shape))]
+                # Copy so the cache does not keep the whole bounding box alive
+                chunks[key] = chunk.copy()
+                self._cache.put(key, chunks[key])
+        return chunks
+
+    def _schedule_read_ahead(self, times: np.ndarray, rows: range, cols: range) -> None:
+        """Fetch the chunks of the block after (`rows`, `cols`) in the background."""
+        prev, self._prev_read = self._prev_read, (rows, cols)
+        # Blocks are read row by row, left to right, possibly overlapping
+        step = len(cols)
+        if prev is not None and prev[0] == rows and prev[1].start < cols.start:
+            step = cols.start - prev[1].start
+        ncols = self._arr.shape[2]
+        if cols.start + step >= ncols:
+            return
+        next_cols = range(cols.start + step, min(cols.stop + step, ncols))
+
+        assert self._cache is not None
+        chunk_keys = self._chunk_keys(times, rows, next_cols)
+        with self._pending_lock:
+            chunk_keys = [
+                k for k in chunk_keys if k not in self._pending and k not in self._cache
+            ]
+            if not chunk_keys:
+                return
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="zarr-read-ahead"
+                )
+            future = self._prefetcher.submit(self._fetch_chunks, chunk_keys)
+            for key in chunk_keys:
+                self._pending[key] = future
+        future.add_done_callback(lambda _: self._clear_pending(chunk_keys))
+
+    def _clear_pending(self, chunk_keys: list[tuple[int, ...]]) -> None:
+        with self._pending_lock:
+            for key in chunk_keys:
+                self._pending.pop(key, None)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Sent to worker processes without the cached chunks or the thread
+        state = self.__dict__.copy()
+        for name in ["_prev_read", "_pending", "_pending_lock", "_prefetcher"]:
+            del state[name]
+        if self._cache is not None:
+            state["_cache"] = ChunkCache(self._cache.max_bytes)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_read_state()
 
     # -- VRTStack compatibility ------------------------------------------------
 
@@ -385,7 +1114,7 @@ class ZarrStack:
 
         da_arr = da.from_zarr(
             str(self._path), component=f"freq{self._freq}/{self._pol}"
-        )
+        )[self._offset :]
         if chunks is not None:
             da_arr = da_arr.rechunk(chunks)
         return da_arr
@@ -400,17 +1129,35 @@ class ZarrStack:
 
 
 class ZarrMaskView:
-    """Thin wrapper for the mask array inside a ZarrStack store."""
+    """Thin wrapper for the mask array inside a ZarrStack store.
+
+    Bit-packed masks are unpacked on read, only for the planes of the requested
+    dates, and returned as 1 (valid) / 0 (invalid) uint8 arrays.
+    """
 
     def __init__(self, zarr_path: Path, freq: str) -> None:
         import zarr
 
         root = zarr.open_group(str(zarr_path), mode="r")
         self._arr = root[f"freq{freq}"]["mask"]
+        self._offset = root.attrs.get("time_offset", 0)
+        self._packed = _is_bitpacked(self._arr)
+        self._n_dates = len(root.attrs["dates"])
 
     @property
     def shape(self) -> tuple[int, ...]:
-        return tuple(self._arr.shape)
+        return (self._n_dates, *self._arr.shape[1:])
 
     def __getitem__(self, key: Any) -> np.ndarray:
-        return np.asarray(self._arr[key])
+        if not self._packed:
+            key = _shift_time_key(key, self._offset, self.shape)
+            return np.asarray(self._arr[key])
+
+        first, *spatial = _expand_key(key, len(self.shape))
+        times = np.arange(self.shape[0])[first] + self._offset
+        planes = np.atleast_1d(times // 8)
+        p0, p1 = (planes.min(), planes.max() + 1) if planes.size else (0, 0)
+        packed = np.asarray(self._arr[(slice(p0, p1), *spatial)])
+        shifts = np.atleast_1d(times % 8).reshape(-1, *[1] * (packed.ndim - 1))
+        bits = (packed[planes - p0] >> shifts.astype(np.uint8)) & 1
+        return bits[0] if times.ndim == 0 else bits
@@ -0,0 +1,375 @@
+"""Read the input GSLCs of the displacement workflow from a Zarr stack.
+
+dolphin's wrapped phase workflow builds a `VRTStack` over the input GSLCs (for
+the PS selection and for every ministack) and reads each block through GDAL's
+HDF5 driver. With a Zarr input store (see `_zarr.gslc_to_zarr`), the
+`ZarrVRTStack` used here instead reads the dates present in the store from the
+`ZarrStack`, and only the other inputs (the compressed SLCs) through the VRT.
+
+`zarr_input_stacks` swaps it into dolphin's wrapped phase modules for the
+duration of a run, including in the spawned workers which process the azimuth
+blocks in parallel.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import numpy as np
+from dolphin import io
+from dolphin._types import Filename
+
+from ._zarr import ZarrStack, append_to_zarr, gslc_to_zarr, retire_dates
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ZarrVRTStack",
+    "get_gslc_mask_from_zarr",
+    "prepare_zarr_stack",
+    "zarr_input_stacks",
+]
+
+
+def prepare_zarr_stack(
+    gslc_files: Sequence[Filename],
+    zarr_path: Filename,
+    freqs: Sequence[str] = ("A",),
+    pol: str = "HH",
+    max_workers: int = 4,
+) -> Path:
+    """Convert the GSLCs to a Zarr store, reusing an existing store if possible.
+
+    An existing store holding `freqs` and `pol` is reused as is if it holds the
+    same GSLCs. If its last dates are the first of `gslc_files` (the next run
+    of a forward-mode frame), the dates before them are retired and the new
+    GSLCs appended. Otherwise, the store is recreated.
+
+    Parameters
+    ----------
+    gslc_files : Sequence[Filename]
+        Chronologically sorted GSLC files (no compressed SLCs).
+    zarr_path : Filename
+        Path to the ``.zarr`` store.
+    freqs : Sequence[str]
+        Frequencies to store, e.g. ``("A", "B")``.
+    pol : str
+        Polarization to store.
+    max_workers : int
+        Number of processes reading the GSLCs.
+
+    Returns
+    -------
+    Path
+        Path to the store.
+
+    """
+    import zarr
+
+    zarr_path = Path(zarr_path)
+    names = [Path(str(f)).name for f in gslc_files]
+    if zarr_path.exists():
+        root = zarr.open_group(str(zarr_path), mode="r")
+        stored = [Path(f).name for f in root.attrs.get("file_list", [])]
+        groups = dict(root.groups())
+        has_freqs = all(
+            f"freq{f}" in groups and groups[f"freq{f}"].attrs.get("pol") == pol
+            for f in freqs
+        )
+        # Number of stored dates before the first one of `gslc_files`
+        num_retired = next(
+            (k for k in range(len(stored)) if stored[k:] == names[: len(stored) - k]),
+            None,
+        )
+        if has_freqs and num_retired is not None:
+            new_files = list(gslc_files)[len(stored) - num_retired :]
+            if num_retired == 0 and not new_files:
+                logger.info("Reusing the Zarr input stack %s", zarr_path)
+                return zarr_path
+            logger.info(
+                "Updating the Zarr input stack %s: retiring %s dates, adding %s",
+                zarr_path,
+                num_retired,
+                len(new_files),
+            )
+            retire_dates(zarr_path, num_retired)
+            if new_files:
+                append_to_zarr(
+                    new_files, zarr_path, progress=False, max_workers=max_workers
+                )
+            return zarr_path
+        logger.info("%s does not match the input GSLCs, recreating it", zarr_path)
+
+    gslc_to_zarr(
+        gslc_files,
+        zarr_path,
+        freqs=freqs,
+        pol=pol,
+        overwrite=True,
+        progress=False,
+        max_workers=max_workers,
+        time_chunks=1,
+    )
+    return zarr_path
+
+
+def get_gslc_mask_from_zarr(
+    zarr_path: Filename, frequency: str, gslc_file: Filename
+) -> Any:
+    """Get the validity mask of `gslc_file` from the Zarr input stack.
+
+    Same output as `opera_utils.nisar.get_gslc_mask`, read from the store's
+    `ZarrMaskView` instead of the GSLC.
+
+    Parameters
+    ----------
+    zarr_path : Filename
+        Path to the ``.zarr`` store.
+    frequency : str
+        Frequency layer, e.g. ``"frequencyA"``.
+    gslc_file : Filename
+        GSLC of the date to read, matched to the store's dates by file name.
+
+    Returns
+    -------
+    xr.DataArray
+        uint8 DataArray (1 = valid pixel) on the GSLC grid, with its CRS.
+
+    """
+    import rioxarray  # noqa: F401
+    import xarray as xr
+
+    stack = ZarrStack(zarr_path, freq=frequency.removeprefix("frequency"))
+    names = [f.name for f in stack.file_list]
+    raw = stack.mask[names.index(Path(str(gslc_file)).name)]
+    x_coords, y_coords = stack.get_coordinates()
+    # valid = subswath value >= 1 (0 = invalid focus, 255 = fill/nodata)
+    valid = (raw >= 1) & (raw != 255)
+    return xr.DataArray(
+        valid.astype(np.uint8),
+        dims=("y", "x"),
+        coords={"y": y_coords, "x": x_coords},
+        attrs={
+            "long_name": "valid sample mask",
+            "flag_values": "0,1",
+            "flag_meanings": "invalid valid",
+        },
+    ).rio.write_crs(f"EPSG:{int(stack._meta['projection'])}")
+
+
+class ZarrVRTStack(io.VRTStack):
+    """`VRTStack` reading the dates held in a Zarr input stack from the store.
+
+    The VRT file is still written, for the georeferencing of the outputs
+    (``like_filename``), and used to read the inputs missing from the store.
+
+    Parameters
+    ----------
+    file_list : Sequence[Filename]
+        Input files, as for `VRTStack`. Files are matched to the store's dates
+        by file name.
+    *args : Any
+        Other arguments of `VRTStack`.
+    zarr_path : Filename
+        Path to the ``.zarr`` store written by `gslc_to_zarr`.
+    **kwargs : Any
+        Other keyword arguments of `VRTStack`. `subdataset` selects the
+        frequency and polarization read from the store.
+
+    """
+
+    def __init__(
+        self, file_list: Sequence[Filename], *args: Any, zarr_path: Filename, **kwargs
+    ):
+        super().__init__(file_list, *args, **kwargs)
+        freq, pol = _parse_subdataset(self.subdataset)
+        # dolphin reads the blocks in order: fetch the next one while this one
+        # is processed
+        self._zarr_stack = ZarrStack(zarr_path, freq=freq, pol=pol, read_ahead=True)
+        if self._zarr_stack.shape[1:] != self.shape[1:]:
+            msg = (
+                f"{zarr_path} has shape {self._zarr_stack.shape[1:]}, the inputs"
+                f" {self.shape[1:]}"
+            )
+            raise ValueError(msg)
+        name_to_index = {f.name: i for i, f in enumerate(self._zarr_stack.file_list)}
+        self._zarr_indices = [
+            name_to_index.get(Path(str(f)).name) for f in self.file_list
+        ]
+
+    def read_stack(
+        self,
+        band: int | None = None,
+        subsample_factor: int = 1,
+        rows: slice | None = None,
+        cols: slice | None = None,
+        masked: bool | None = None,
+        keepdims: bool = True,
+    ):
+        """Read in the SLC stack, from the Zarr store where possible."""
+        if masked is None:
+            masked = self._read_masked
+        bands = list(range(len(self))) if band is None else [band - 1]
+        indices = [self._zarr_indices[b] for b in bands]
+        if subsample_factor != 1 or masked or all(i is None for i in indices):
+            return super().read_stack(
+                band, subsample_factor, rows, cols, masked, keepdims
+            )
+
+        rows = rows if rows is not None else slice(None)
+        cols = cols if cols is not None else slice(None)
+        in_zarr = [k for k, i in enumerate(indices) if i is not None]
+        zarr_data = self._zarr_stack[[indices[k] for k in in_zarr], rows, cols]
+        if len(in_zarr) == len(bands):
+            data = zarr_data
+        else:
+            data = np.empty((len(bands), *zarr_data.shape[1:]), dtype=zarr_data.dtype)
+            data[in_zarr] = zarr_data
+            for k, b in enumerate(bands):
+                if indices[k] is None:
+                    data[k] = super().read_stack(
+                        band=b + 1, rows=rows, cols=cols, masked=False, keepdims=False
+                    )
+        if band is not None and not (len(self) == 1 and keepdims):
+            return data[0]
+        return data
+
+
+def _parse_subdataset(subdataset: str | None) -> tuple[str, str]:
+    """Get the frequency letter and polarization of a GSLC subdataset.
+
+    Examples
+    --------
+    >>> _parse_subdataset("/science/LSAR/GSLC/grids/frequencyB/HV")
+    ('B', 'HV')
+
+    """
+    if not subdataset or "/frequency" not in subdataset:
+        msg = f"Not a GSLC grid subdataset: {subdataset}"
+        raise ValueError(msg)
+    freq_key, pol = subdataset.rstrip("/").split("/")[-2:]
+    return freq_key.removeprefix("frequency"), pol
+
+
+# Zarr stores of the running `zarr_input_stacks` contexts, by subdataset
+_registrations: list[tuple[str, str]] = []
+_saved_attributes: list[tuple[ModuleType, str, Any]] = []
+_lock = threading.RLock()
+
+
+@contextmanager
+def zarr_input_stacks(subdataset: str, zarr_path: Filename | None) -> Iterator[None]:
+    """Make dolphin's wrapped phase workflow read `subdataset` from `zarr_path`.
+
+    Within the context, the `VRTStack`s built by dolphin for the input SLCs of
+    `subdataset` are `ZarrVRTStack`s. Contexts may be nested or run from
+    several threads (e.g. the freqA and freqB runs).
+
+    Parameters
+    ----------
+    subdataset : str
+        Input subdataset, e.g. ``"/science/LSAR/GSLC/grids/frequencyA/HH"``.
+    zarr_path : Filename, optional
+        Path to the ``.zarr`` store. If None, the inputs are read as usual.
+
+    """
+    if zarr_path is None:
+        yield
+        return
+    registrations = [(subdataset.strip("/"), str(zarr_path))]
+    _register(registrations)
+    try:
+        yield
+    finally:
+        _unregister(registrations)
+
+
+def _run_wrapped_phase(
+    *args: Any, zarr_inputs: Sequence[tuple[str, str]], **kwargs: Any
+) -> Any:
+    """Run `wrapped_phase.run` with the Zarr input stacks (in a spawned worker)."""
+    from dolphin.workflows import wrapped_phase
+
+    _register(zarr_inputs)
+    try:
+        return wrapped_phase.run(*args, **kwargs)
+    finally:
+        _unregister(zarr_inputs)
+
+
+def _register(registrations: Sequence[tuple[str, str]]) -> None:
+    with _lock:
+        if not _registrations:
+            _patch_dolphin()
+        _registrations.extend(registrations)
+
+
+def _unregister(registrations: Sequence[tuple[str, str]]) -> None:
+    with _lock:
+        for registration in registrations:
+            _registrations.remove(registration)
+        if not _registrations:
+            _unpatch_dolphin()
+
+
+class _WrappedPhaseModule:
+    """Stand-in for `dolphin.workflows.wrapped_phase` in `displacement`.
+
+    `displacement.run` submits ``wrapped_phase.run`` to a spawn process pool,
+    where the patches of this process are missing: hand it a function which
+    applies them in the worker first.
+    """
+
+    def __init__(self, module: ModuleType):
+        self._module = module
+
+    @property
+    def run(self) -> Any:
+        with _lock:
+            zarr_inputs = list(_registrations)
+        return partial(_run_wrapped_phase, zarr_inputs=zarr_inputs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module, name)
+
+
+def _make_vrt_stack(
+    file_list: Sequence[Filename], *args: Any, subdataset: str | None = None, **kwargs
+) -> io.VRTStack:
+    with _lock:
+        zarr_paths = dict(_registrations)
+    zarr_path = zarr_paths.get((subdataset or "").strip("/"))
+    if zarr_path is None:
+        return io.VRTStack(file_list, *args, subdataset=subdataset, **kwargs)
+    return ZarrVRTStack(
+        file_list, *args, subdataset=subdataset, zarr_path=zarr_path, **kwargs
+    )
+
+
+def _patch_dolphin() -> None:
+    from dolphin.workflows import displacement, sequential, wrapped_phase
+
+    patches: list[tuple[ModuleType, str, Any]] = [
+        (wrapped_phase, "VRTStack", _make_vrt_stack),
+        (sequential, "VRTStack", _make_vrt_stack),
+    ]
+    if isinstance(displacement.wrapped_phase, ModuleType):
+        patches.append(
+            (displacement, "wrapped_phase", _WrappedPhaseModule(wrapped_phase))
+        )
+    for module, name, value in patches:
+        _saved_attributes.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+
+def _unpatch_dolphin() -> None:
+    while _saved_attributes:
+        module, name, value = _saved_attributes.pop()
+        setattr(module, name, value)
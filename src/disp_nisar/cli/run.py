@@ -12,6 +12,7 @@ def run_main(config_file: str, debug: bool = False) -> None:
     # rest of imports here so --help doesn't take forever
     from opera_utils import is_remote_url
 
+    from disp_nisar._metadata_index import GslcMetadataIndex
     from disp_nisar.main import run
     from disp_nisar.pge_runconfig import RunConfig
 
@@ -25,8 +26,12 @@ def run_main(config_file: str, debug: bool = False) -> None:
         run_dolphin(config_file=config_file, debug=debug)
         return
 
-    cfg = pge_runconfig.to_workflow()
-    run(cfg, pge_runconfig=pge_runconfig, debug=debug)
+    # Read the GSLC metadata once, for both the workflow setup and the products
+    metadata_index = GslcMetadataIndex.from_files(
+        pge_runconfig.input_file_group.gslc_file_list
+    )
+    cfg = pge_runconfig.to_workflow(metadata_index=metadata_index)
+    run(cfg, pge_runconfig=pge_runconfig, debug=debug, metadata_index=metadata_index)
 
 
 def _disable_gpu_early(config_file: str) -> None:
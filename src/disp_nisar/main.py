@@ -1,20 +1,21 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Iterable, Mapping, Sequence
-from concurrent.futures import ProcessPoolExecutor
-from dataclasses import asdict
+import os
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, replace
 from datetime import datetime, timedelta, timezone
-from itertools import repeat
-from multiprocessing import get_context
+from functools import partial
 from pathlib import Path
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
 import numpy as np
 from dolphin import PathOrStr, io, stitching
 from dolphin._log import log_runtime, setup_logging
 from dolphin.unwrap._utils import create_combined_mask
-from dolphin.utils import DummyProcessPoolExecutor, full_suffix, get_max_memory_usage
+from dolphin.utils import full_suffix, get_max_memory_usage
 from dolphin.workflows.config import DisplacementWorkflow
 from dolphin.workflows.displacement import OutputPaths
 from dolphin.workflows.displacement import run as run_displacement
@@ -22,31 +23,50 @@ from opera_utils import get_dates, group_by_date
 from opera_utils.nisar import get_gslc_mask
 
 from disp_nisar import __version__, product
+from disp_nisar._baselines import create_baseline_cache
+from disp_nisar._compute import ComputeContext, get_threads_per_process
+from disp_nisar._manifest import RunManifest, run_or_resume
 from disp_nisar._masking import (
     create_mask_from_distance,  # , create_layover_shadow_masks
 )
+from disp_nisar._metadata_index import GslcMetadataIndex
 from disp_nisar._ps import precompute_ps
 from disp_nisar._reference import ReferencePoint, read_reference_point
 from disp_nisar._remote_input import trim_staged_slc_arrays
+from disp_nisar._scheduler import Stage, StageScheduler
 from disp_nisar._utils import (
     _convert_meters_to_radians,
     _create_correlation_images,
-    _frequency_to_wavelength,
     _intersect_masks,
     _update_snaphu_conncomps,
     _update_spurt_conncomps,
 )
+from disp_nisar._worker_pool import WorkerPool
+from disp_nisar._zarr_input import (
+    get_gslc_mask_from_zarr,
+    prepare_zarr_stack,
+    zarr_input_stacks,
+)
 from disp_nisar.ionosphere import get_ionosphere_phase_screen
 from disp_nisar.pge_runconfig import AlgorithmParameters, RunConfig
+from disp_nisar.product_info import DISPLACEMENT_PRODUCTS
+from disp_nisar.solid_earth_tides import populate_tide_cache
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_FILENAME = "run_manifest.json"
+STATIC_LAYER_CACHE_FILENAME = "static_layers.h5"
+SOLID_EARTH_TIDE_CACHE_DIRNAME = "solid_earth_tides"
+BASELINE_CACHE_FILENAME = "baselines.h5"
+ZARR_STORE_FILENAME = "gslc_stack.zarr"
+
 
 @log_runtime
 def run(
     cfg: DisplacementWorkflow,
     pge_runconfig: RunConfig,
     debug: bool = False,
+    metadata_index: GslcMetadataIndex | None = None,
 ) -> None:
     """Run the displacement workflow on a stack of SLCs.
 
@@ -59,6 +79,9 @@ def run(
     debug : bool, optional
         Enable debug logging.
         Default is False.
+    metadata_index : GslcMetadataIndex, optional
+        Metadata of the input GSLCs, if already scanned (e.g. for
+        `RunConfig.to_workflow`). By default, the GSLCs are scanned here.
 
     """
     cfg.work_directory.mkdir(exist_ok=True, parents=True)
@@ -70,6 +93,8 @@ def run(
     _assert_no_duplicate_dates(cfg.cslc_file_list)
     _assert_compressed_slcs_consecutive(cfg.cslc_file_list)
     _warn_date_gaps(cfg.cslc_file_list)
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex.from_files(cfg.cslc_file_list)
 
     # Handle forward mode - get second to last date for re-referencing
     gslc_dates = [get_dates(f)[0] for f in cfg.cslc_file_list]
@@ -93,25 +118,317 @@ def run(
                 second_to_last_date + timedelta(days=1)
             )
 
+    # Record finished stages, so a rerun after a crash resumes where it stopped
+    manifest = RunManifest(cfg.work_directory / MANIFEST_FILENAME)
+    stages = _build_stages(
+        cfg=cfg,
+        pge_runconfig=pge_runconfig,
+        second_to_last_date=second_to_last_date,
+        processing_start_datetime=processing_start_datetime,
+        manifest=manifest,
+        debug=debug,
+        metadata_index=metadata_index,
+    )
+    scheduler = StageScheduler(
+        stages, max_cores=pge_runconfig.stage_core_budget, manifest=manifest
+    )
+    # One set of thread limits and at most one dask cluster for the whole run,
+    # shut down here even if a stage fails
+    with ComputeContext.from_worker_settings(
+        cfg.worker_settings, max_cores=pge_runconfig.stage_core_budget
+    ):
+        scheduler.run()
+
+    logger.info(f"Product type: {pge_runconfig.primary_executable.product_type}")
+    logger.info(f"Product version: {pge_runconfig.product_path_group.product_version}")
+    max_mem = get_max_memory_usage(units="GB")
+    logger.info(f"Maximum memory usage: {max_mem:.2f} GB")
+    logger.info(f"Config file dolphin version: {cfg._dolphin_version}")
+    logger.info(f"Current running disp_nisar version: {__version__}")
+
+
+def _get_frequency(pge_runconfig: RunConfig) -> str:
+    frequency = pge_runconfig.input_file_group.frequency
+    return frequency if isinstance(frequency, str) else frequency.value
+
+
+def _get_polarization(pge_runconfig: RunConfig) -> str:
+    polarization = pge_runconfig.input_file_group.polarization
+    return polarization if isinstance(polarization, str) else polarization.value
+
+
+def _build_stages(
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    second_to_last_date: datetime,
+    processing_start_datetime: datetime,
+    manifest: RunManifest | None = None,
+    debug: bool = False,
+    metadata_index: GslcMetadataIndex | None = None,
+) -> list[Stage]:
+    """Describe the workflow as a graph of `Stage`s for the `StageScheduler`.
+
+    The pre-displacement steps (GSLC mask, water mask, geometry layers) are
+    independent of each other, as are the freqB displacement run and the
+    compressed SLC outputs, so the scheduler may overlap them.
+
+    Stages run in threads, so they never modify the shared `cfg`: the values
+    they produce are passed on as stage outputs, and the stages that need
+    them in a `DisplacementWorkflow` work on their own copy (`_stage_config`).
+    The copy run by the displacement stage is passed on as
+    ``displacement_cfg``, which the product stages record as the run's
+    `dolphin` configuration.
+    """
     # Get the first non-compressed CSLC file for mask generation
     first_non_compressed = next(
         (f for f in cfg.cslc_file_list if "compressed" not in f.name.lower()),
         cfg.cslc_file_list[0],
     )
+    frequency = _get_frequency(pge_runconfig)
+    all_cores = pge_runconfig.stage_core_budget or os.cpu_count() or 1
+    n_workers = cfg.worker_settings.n_parallel_bursts or 4
+    algorithm_parameters = AlgorithmParameters.from_yaml(
+        pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
+    )
+    # Configuration hashed into each stage's fingerprint for the run manifest.
+    # GSLC names are kept as strings: staged GSLCs are rewritten by `trim_inputs`
+    # so their mtimes are not a reliable fingerprint.
+    ancillary = pge_runconfig.dynamic_ancillary_file_group
+    input_params = pge_runconfig.input_file_group.model_dump(mode="json")
+    algorithm_params = algorithm_parameters.model_dump(mode="json")
+    product_params = {
+        "inputs": input_params,
+        "algorithm_parameters": algorithm_params,
+        "primary_executable": pge_runconfig.primary_executable.model_dump(mode="json"),
+        "product_path_group": pge_runconfig.product_path_group.model_dump(mode="json"),
+    }
+    # With the Zarr input backend, the stages reading the GSLCs wait for the store
+    use_zarr = pge_runconfig.input_file_group.input_backend == "zarr"
+    zarr_inputs: tuple[str, ...] = ("zarr_store",) if use_zarr else ()
+    run_freq_b = not ancillary.gunw_files
+
+    stages: list[Stage] = []
+    if use_zarr:
+        # freqB is converted too when it's run for the split-spectrum ionosphere
+        freqs = [frequency.removeprefix("frequency")]
+        if run_freq_b and "B" not in freqs:
+            freqs.append("B")
+        stages.append(
+            Stage(
+                name="zarr_stack",
+                func=partial(_stage_zarr_stack, cfg, pge_runconfig, tuple(freqs)),
+                outputs=("zarr_store",),
+                cores=n_workers,
+                params={"inputs": input_params, "freqs": freqs},
+            )
+        )
+    stages += [
+        Stage(
+            name="gslc_mask",
+            func=partial(_stage_gslc_mask, cfg, first_non_compressed, frequency),
+            inputs=zarr_inputs,
+            outputs=("gslc_mask_file",),
+            params={
+                "gslc": str(first_non_compressed),
+                "frequency": frequency,
+                "strides": cfg.output_options.strides.model_dump(),
+            },
+        ),
+        Stage(
+            name="water_mask",
+            func=partial(_stage_water_mask, cfg, pge_runconfig),
+            outputs=("water_mask_latlon",),
+            params={"mask_file": ancillary.mask_file},
+        ),
+        Stage(
+            name="combine_masks",
+            func=partial(_stage_combine_masks, cfg),
+            inputs=("gslc_mask_file", "water_mask_latlon"),
+            outputs=("mask_file",),
+        ),
+        Stage(
+            name="geometry",
+            func=partial(
+                _stage_geometry, cfg, pge_runconfig, first_non_compressed, frequency
+            ),
+            outputs=("layover_shadow_mask_files", "geometry_files"),
+            cores=n_workers,
+            params={
+                "gslc": str(first_non_compressed),
+                "frequency": frequency,
+                "dem_file": ancillary.dem_file,
+            },
+        ),
+        Stage(
+            name="precompute_ps",
+            func=partial(_stage_precompute_ps, cfg),
+            inputs=("layover_shadow_mask_files", *zarr_inputs),
+            outputs=("amplitude_dispersion_files", "amplitude_mean_files"),
+            cores=n_workers,
+            params={
+                "inputs": input_params,
+                "ps_options": algorithm_params["ps_options"],
+            },
+        ),
+        Stage(
+            name="displacement",
+            func=partial(
+                _stage_displacement, cfg, pge_runconfig, second_to_last_date, debug
+            ),
+            inputs=(
+                "mask_file",
+                "layover_shadow_mask_files",
+                "geometry_files",
+                "amplitude_dispersion_files",
+                "amplitude_mean_files",
+                *zarr_inputs,
+            ),
+            outputs=("out_paths", "displacement_cfg"),
+            cores=all_cores,
+            params={
+                "inputs": input_params,
+                "algorithm_parameters": algorithm_params,
+                "primary_executable": product_params["primary_executable"],
+            },
+        ),
+    ]
 
-    # Create GSLC mask first (in native GSLC CRS - UTM)
-    gslc_mask_file = cfg.work_directory / "gslc_mask.tif"
+    # IONOSPHERE
+    if run_freq_b:
+        # if GUNW are not specified, run splitspectrum based on freq.A/B
+        stages.append(
+            Stage(
+                name="displacement_freqB",
+                func=partial(
+                    _stage_displacement_freq_b,
+                    cfg,
+                    pge_runconfig,
+                    debug,
+                    metadata_index,
+                ),
+                # After freqA, as before: both claim all the cores
+                inputs=("out_paths", *zarr_inputs),
+                outputs=("freqB_work_directory", "freqB_cslc_file"),
+                cores=all_cores,
+                params={
+                    "inputs": input_params,
+                    "ionosphere_algorithm_parameters_file": (
+                        ancillary.ionosphere_algorithm_parameters_file
+                    ),
+                },
+            )
+        )
+        stages.append(
+            Stage(
+                name="ionosphere",
+                func=partial(_stage_split_spectrum_ionosphere, cfg),
+                inputs=("out_paths", "freqB_work_directory", "freqB_cslc_file"),
+                outputs=("ionospheric_corrections",),
+            )
+        )
+    else:
+        stages.append(
+            Stage(
+                name="ionosphere",
+                func=partial(_stage_gunw_ionosphere, pge_runconfig),
+                inputs=("out_paths",),
+                outputs=("ionospheric_corrections",),
+                params={
+                    "gunw_files": [str(f) for f in ancillary.gunw_files],
+                    "frequency": frequency,
+                    "polarization": _get_polarization(pge_runconfig),
+                },
+            )
+        )
 
-    try:
-        logger.info(f"Creating GSLC mask from {first_non_compressed}")
-        gslc_mask = get_gslc_mask(
-            first_non_compressed,
-            frequency=(
-                pge_runconfig.input_file_group.frequency
-                if isinstance(pge_runconfig.input_file_group.frequency, str)
-                else pge_runconfig.input_file_group.frequency.value
+    stages.append(
+        Stage(
+            name="trim_inputs",
+            func=partial(_stage_trim_inputs, cfg, pge_runconfig),
+            inputs=("out_paths", "ionospheric_corrections"),
+        )
+    )
+    stages.append(
+        Stage(
+            name="products",
+            func=partial(
+                _stage_products,
+                pge_runconfig,
+                processing_start_datetime,
+                manifest,
+                metadata_index,
             ),
+            inputs=("out_paths", "ionospheric_corrections", "displacement_cfg"),
+            outputs=("product_paths",),
+            cores=algorithm_parameters.num_parallel_products,
+            params=product_params,
+        )
+    )
+    if pge_runconfig.product_path_group.save_compressed_slc:
+        # Its pool of processes runs alongside the products: keep it to its cores
+        compressed_slc_cores = min(3, all_cores)
+        stages.append(
+            Stage(
+                name="compressed_products",
+                func=partial(
+                    _stage_compressed_products, pge_runconfig, compressed_slc_cores
+                ),
+                inputs=("out_paths", "displacement_cfg"),
+                cores=compressed_slc_cores,
+                params=product_params["product_path_group"],
+            )
         )
+    return stages
+
+
+def _stage_config(cfg: DisplacementWorkflow, **updates: Any) -> DisplacementWorkflow:
+    """Copy `cfg` for one stage, setting the values produced by upstream stages.
+
+    `updates` are top-level fields of `cfg`, or ``geometry_files`` for
+    ``correction_options.geometry_files``.
+    """
+    stage_cfg = cfg.model_copy(deep=True)
+    if "geometry_files" in updates:
+        stage_cfg.correction_options.geometry_files = updates.pop("geometry_files")
+    for name, value in updates.items():
+        setattr(stage_cfg, name, value)
+    return stage_cfg
+
+
+def _stage_zarr_stack(
+    cfg: DisplacementWorkflow, pge_runconfig: RunConfig, freqs: tuple[str, ...]
+) -> dict[str, Path]:
+    zarr_store = (
+        pge_runconfig.input_file_group.zarr_store
+        or cfg.work_directory / ZARR_STORE_FILENAME
+    )
+    gslc_files = [f for f in cfg.cslc_file_list if "compressed" not in f.name.lower()]
+    logger.info(f"Preparing the Zarr input stack {zarr_store}")
+    prepare_zarr_stack(
+        gslc_files,
+        zarr_store,
+        freqs=freqs,
+        pol=_get_polarization(pge_runconfig),
+        max_workers=cfg.worker_settings.n_parallel_bursts or 4,
+    )
+    return {"zarr_store": zarr_store}
+
+
+def _stage_gslc_mask(
+    cfg: DisplacementWorkflow,
+    gslc_file: Path,
+    frequency: str,
+    zarr_store: Path | None = None,
+) -> dict[str, Path | None]:
+    # Create GSLC mask first (in native GSLC CRS - UTM)
+    gslc_mask_file: Path | None = cfg.work_directory / "gslc_mask.tif"
+    try:
+        if zarr_store is not None:
+            logger.info(f"Creating GSLC mask from {gslc_file} in {zarr_store}")
+            gslc_mask = get_gslc_mask_from_zarr(zarr_store, frequency, gslc_file)
+        else:
+            logger.info(f"Creating GSLC mask from {gslc_file}")
+            gslc_mask = get_gslc_mask(gslc_file, frequency=frequency)
         strides_dict = cfg.output_options.strides.model_dump()
         gslc_mask_strided = gslc_mask.isel(
             y=slice(None, None, strides_dict["y"]),
@@ -126,75 +443,92 @@ def run(
     except Exception as e:
         logger.warning(f"Failed to create GSLC mask: {e}; continuing without it")
         gslc_mask_file = None
+    return {"gslc_mask_file": gslc_mask_file}
+
+
+def _stage_water_mask(
+    cfg: DisplacementWorkflow, pge_runconfig: RunConfig
+) -> dict[str, Path | None]:
+    mask_file = pge_runconfig.dynamic_ancillary_file_group.mask_file
+    if not mask_file:
+        return {"water_mask_latlon": None}
+    water_binary_mask_latlon = cfg.work_directory / "water_binary_mask_latlon.tif"
+    create_mask_from_distance(
+        water_distance_file=mask_file,
+        output_file=water_binary_mask_latlon,
+        # Set a little conservative for the general processing
+        land_buffer=1,
+        ocean_buffer=1,
+    )
+    return {"water_mask_latlon": water_binary_mask_latlon}
 
-    # Setup the water mask and warp to match GSLC CRS
-    if pge_runconfig.dynamic_ancillary_file_group.mask_file:
-        water_binary_mask_latlon = cfg.work_directory / "water_binary_mask_latlon.tif"
-        create_mask_from_distance(
-            water_distance_file=pge_runconfig.dynamic_ancillary_file_group.mask_file,
-            output_file=water_binary_mask_latlon,
-            # Set a little conservative for the general processing
-            land_buffer=1,
-            ocean_buffer=1,
-        )
 
-        # Warp water mask to match GSLC CRS if GSLC mask exists
-        if gslc_mask_file is not None:
-            water_binary_mask = cfg.work_directory / "water_binary_mask.tif"
-            logger.info("Warping water mask to match GSLC native CRS")
-            stitching.warp_to_match(
-                input_file=water_binary_mask_latlon,
-                match_file=gslc_mask_file,
-                output_file=water_binary_mask,
-            )
-        else:
-            water_binary_mask = water_binary_mask_latlon
+def _stage_combine_masks(
+    cfg: DisplacementWorkflow,
+    gslc_mask_file: Path | None,
+    water_mask_latlon: Path | None,
+) -> dict[str, Path | None]:
+    # Warp water mask to match GSLC CRS if GSLC mask exists
+    if water_mask_latlon is not None and gslc_mask_file is not None:
+        water_binary_mask = cfg.work_directory / "water_binary_mask.tif"
+        logger.info("Warping water mask to match GSLC native CRS")
+        stitching.warp_to_match(
+            input_file=water_mask_latlon,
+            match_file=gslc_mask_file,
+            output_file=water_binary_mask,
+        )
     else:
-        water_binary_mask = None
+        water_binary_mask = water_mask_latlon
 
     # Combine masks for unwrapping (both in GSLC native CRS)
+    mask_file = cfg.mask_file
     if water_binary_mask is not None and gslc_mask_file is not None:
-        combined_mask_file = cfg.work_directory / "water_gslc_combined_mask.tif"
+        mask_file = cfg.work_directory / "water_gslc_combined_mask.tif"
         logger.info("Combining water mask and GSLC mask for unwrapping")
         _intersect_masks(
             mask_filenames=[gslc_mask_file, water_binary_mask],
-            output_filename=combined_mask_file,
+            output_filename=mask_file,
         )
-        cfg.mask_file = combined_mask_file
     elif water_binary_mask is not None:
-        cfg.mask_file = water_binary_mask
+        mask_file = water_binary_mask
         logger.info("Using water mask for unwrapping")
     elif gslc_mask_file is not None:
-        cfg.mask_file = gslc_mask_file
+        mask_file = gslc_mask_file
         logger.info("Using GSLC mask for unwrapping")
+    return {"mask_file": mask_file}
 
+
+def _stage_geometry(
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    gslc_file: Path,
+    frequency: str,
+) -> dict[str, list[Path]]:
     # Build a layover/shadow mask from the GSLC radarGrid datacubes + DEM.
     # This replaces the OPERA-CSLC nodata-mask path (which doesn't apply to
     # NISAR) and gives wrapped_phase a real per-frame mask.
+    layover_shadow_mask_files = list(cfg.layover_shadow_mask_files)
+    geometry_files = list(cfg.correction_options.geometry_files)
     dem_file = pge_runconfig.dynamic_ancillary_file_group.dem_file
-    if dem_file is not None and not cfg.layover_shadow_mask_files:
+    if dem_file is not None and not layover_shadow_mask_files:
         from disp_nisar._geometry import prepare_geometry_layers
 
         geometry_dir = cfg.work_directory / "geometry"
         try:
             template_raster = _build_frame_template(
-                first_non_compressed,
-                frequency=(
-                    pge_runconfig.input_file_group.frequency
-                    if isinstance(pge_runconfig.input_file_group.frequency, str)
-                    else pge_runconfig.input_file_group.frequency.value
-                ),
+                gslc_file,
+                frequency=frequency,
                 output_path=geometry_dir / "frame_template.tif",
             )
             geometry_layers = prepare_geometry_layers(
-                gslc_path=first_non_compressed,
+                gslc_path=gslc_file,
                 dem_path=dem_file,
                 output_dir=geometry_dir,
                 template_raster=template_raster,
                 n_workers=cfg.worker_settings.n_parallel_bursts or 4,
             )
-            cfg.layover_shadow_mask_files = [geometry_layers["layover_shadow_mask"]]
-            cfg.correction_options.geometry_files = [
+            layover_shadow_mask_files = [geometry_layers["layover_shadow_mask"]]
+            geometry_files = [
                 geometry_layers["incidence_angle"],
                 geometry_layers["los_east"],
                 geometry_layers["los_north"],
@@ -211,14 +545,56 @@ def run(
             "No DEM provided in dynamic_ancillary_file_group; skipping layover/shadow"
             " mask generation"
         )
+    return {
+        "layover_shadow_mask_files": layover_shadow_mask_files,
+        "geometry_files": geometry_files,
+    }
+
 
+def _stage_precompute_ps(
+    cfg: DisplacementWorkflow,
+    layover_shadow_mask_files: list[Path],
+    zarr_store: Path | None = None,
+) -> dict[str, list[Path]]:
+    if not any("compressed" in f.name.lower() for f in cfg.cslc_file_list):
+        return {
+            "amplitude_dispersion_files": list(cfg.amplitude_dispersion_files),
+            "amplitude_mean_files": list(cfg.amplitude_mean_files),
+        }
+    # If we are passed Compressed SLCs, combine the old amplitudes with the
+    # current real SLCs for a better estimate of amplitude dispersion for PS/SHPs
+    logger.info("Combining old amplitudes with current SLCs")
+    combined_dispersion_files, combined_mean_files = precompute_ps(
+        cfg=_stage_config(cfg, layover_shadow_mask_files=layover_shadow_mask_files),
+        zarr_store=zarr_store,
+    )
+    return {
+        "amplitude_dispersion_files": combined_dispersion_files,
+        "amplitude_mean_files": combined_mean_files,
+    }
+
+
+def _stage_displacement(
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    second_to_last_date: datetime,
+    debug: bool,
+    mask_file: Path | None,
+    layover_shadow_mask_files: list[Path],
+    geometry_files: list[Path],
+    amplitude_dispersion_files: list[Path],
+    amplitude_mean_files: list[Path],
+    zarr_store: Path | None = None,
+) -> dict[str, Any]:
+    cfg = _stage_config(
+        cfg,
+        mask_file=mask_file,
+        layover_shadow_mask_files=layover_shadow_mask_files,
+        geometry_files=geometry_files,
+    )
     if any("compressed" in f.name.lower() for f in cfg.cslc_file_list):
-        # If we are passed Compressed SLCs, combine the old amplitudes with the
-        # current real SLCs for a better estimate of amplitude dispersion for PS/SHPs
-        logger.info("Combining old amplitudes with current SLCs")
-        combined_dispersion_files, combined_mean_files = precompute_ps(cfg=cfg)
-        cfg.amplitude_dispersion_files = combined_dispersion_files
-        cfg.amplitude_mean_files = combined_mean_files
+        cfg.amplitude_dispersion_files = amplitude_dispersion_files
+        cfg.amplitude_mean_files = amplitude_mean_files
     else:
         # This is the first ministack: The amplitude estimation will be weak.
         # Drop the PS threshold to a conservative number to avoid false positives
@@ -226,7 +602,8 @@ def run(
 
     # Run dolphin's displacement workflow
     # Note: For NISAR, there's no stitching needed since it's one huge frame
-    out_paths = run_displacement(cfg=cfg, debug=debug, raise_on_empty=False)
+    with zarr_input_stacks(cfg.input_options.subdataset, zarr_store):
+        out_paths = run_displacement(cfg=cfg, debug=debug, raise_on_empty=False)
 
     assert out_paths.timeseries_paths is not None
     assert out_paths.timeseries_residual_paths is not None
@@ -256,92 +633,146 @@ def run(
         logger.info(f"Before filtering: {len(out_paths.timeseries_paths)} outputs")
         out_paths = _filter_before_last_processed(out_paths, last_processed)
         logger.info(f"After filtering: {len(out_paths.timeseries_paths)} outputs")
+    return {"out_paths": out_paths, "displacement_cfg": cfg}
 
-    # Obtain wavelength based on frequency
-    wavelength = _frequency_to_wavelength(
-        pge_runconfig.input_file_group.frequency, cfg.cslc_file_list[0]
-    )
-    # IONOSPHERE
-    if not pge_runconfig.dynamic_ancillary_file_group.gunw_files:
-        from disp_nisar.ionosphere import (
-            get_center_frequencies,
-            run_ionosphere_estimation,
-        )
 
-        # if GUNW are not specified, run splitspectrum based on freq.A/B
-        # load algorithm_ionosphere_parameters.yaml for freq.B
-        cfg_freqB = pge_runconfig.to_workflow(
-            frequency="frequencyB", scratch_suffix="_freqB"
-        )
-        # Mirror freqA spatial extent so freqB processes the same area
-        # pge_runconfig.py:521-523 always overwrites bounds from the frame_id lookup
-        cfg_freqB.output_options.bounds = cfg.output_options.bounds
-        cfg_freqB.output_options.bounds_epsg = cfg.output_options.bounds_epsg
-        cfg_freqB.output_options.epsg = cfg.output_options.epsg
-
-        # Note: implement and test carying compressed slcs
-        # with forward/historical mode, for workflow with freqB
-        # probably keep it same as freqA to keep it consistent
+def _stage_displacement_freq_b(
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    debug: bool,
+    metadata_index: GslcMetadataIndex | None,
+    out_paths: OutputPaths,  # noqa: ARG001
+    zarr_store: Path | None = None,
+) -> dict[str, Path | str]:
+    # load algorithm_ionosphere_parameters.yaml for freq.B
+    cfg_freqB = pge_runconfig.to_workflow(
+        frequency="frequencyB", scratch_suffix="_freqB", metadata_index=metadata_index
+    )
+    # Mirror freqA spatial extent so freqB processes the same area
+    # pge_runconfig.py:521-523 always overwrites bounds from the frame_id lookup
+    cfg_freqB.output_options.bounds = cfg.output_options.bounds
+    cfg_freqB.output_options.bounds_epsg = cfg.output_options.bounds_epsg
+    cfg_freqB.output_options.epsg = cfg.output_options.epsg
+
+    # Note: implement and test carying compressed slcs
+    # with forward/historical mode, for workflow with freqB
+    # probably keep it same as freqA to keep it consistent
+    with zarr_input_stacks(cfg_freqB.input_options.subdataset, zarr_store):
         run_displacement(cfg=cfg_freqB, debug=debug, raise_on_empty=False)
 
-        # freqB only feeds split-spectrum ionosphere via its timeseries (built
-        # from the stitched result) and its compressed SLCs are not carried
-        # forward, so clear its per-block trees entirely.
-        _prune_block_dirs(cfg_freqB.work_directory)
-
-        # Run split-spectrum ionosphere estimation for freq.B and freq.A
-        # use runconfigs as input to run_ionosphere_estimation.
-        f_A, f_B = get_center_frequencies(cfg_freqB.cslc_file_list[0])
-        out_paths.ionospheric_corrections = [
-            iono_path
-            for _, iono_path, _ in run_ionosphere_estimation(
-                ts_dir_A=cfg.work_directory / "timeseries",  # TODO: use out_paths
-                ts_dir_B=cfg_freqB.work_directory / "timeseries",
-                out_dir=cfg.work_directory / "ionosphere",
-                f_A=f_A,
-                f_B=f_B,
-                smooth_sigma=5.0,  # expose smoothing as a parameter.
-            )
-        ]
-    else:
-        # Read the ionosphere phase screen for timeseries from GUNW files
-        out_paths.ionospheric_corrections = get_ionosphere_phase_screen(
-            pge_runconfig.dynamic_ancillary_file_group.gunw_files,
-            out_paths.timeseries_paths,
-            frequency=pge_runconfig.input_file_group.frequency,
-            polarization=pge_runconfig.input_file_group.polarization,
+    # freqB only feeds split-spectrum ionosphere via its timeseries (built
+    # from the stitched result) and its compressed SLCs are not carried
+    # forward, so clear its per-block trees entirely.
+    _prune_block_dirs(cfg_freqB.work_directory)
+    return {
+        "freqB_work_directory": cfg_freqB.work_directory,
+        # A string, as the staged GSLC is rewritten by `trim_inputs`: a `Path`
+        # would change the fingerprints of the ionosphere stage and products
+        "freqB_cslc_file": str(cfg_freqB.cslc_file_list[0]),
+    }
+
+
+def _stage_split_spectrum_ionosphere(
+    cfg: DisplacementWorkflow,
+    out_paths: OutputPaths,  # noqa: ARG001
+    freqB_work_directory: Path,
+    freqB_cslc_file: str,
+) -> dict[str, list[Path]]:
+    from disp_nisar.ionosphere import (
+        get_center_frequencies,
+        run_ionosphere_estimation,
+    )
+
+    # Run split-spectrum ionosphere estimation for freq.B and freq.A
+    # use runconfigs as input to run_ionosphere_estimation.
+    f_A, f_B = get_center_frequencies(Path(freqB_cslc_file))
+    ionospheric_corrections = [
+        iono_path
+        for _, iono_path, _ in run_ionosphere_estimation(
+            ts_dir_A=cfg.work_directory / "timeseries",  # TODO: use out_paths
+            ts_dir_B=freqB_work_directory / "timeseries",
+            out_dir=cfg.work_directory / "ionosphere",
+            f_A=f_A,
+            f_B=f_B,
+            smooth_sigma=5.0,  # expose smoothing as a parameter.
         )
+    ]
+    return {"ionospheric_corrections": ionospheric_corrections}
+
+
+def _stage_gunw_ionosphere(
+    pge_runconfig: RunConfig, out_paths: OutputPaths
+) -> dict[str, list[Path]]:
+    # Read the ionosphere phase screen for timeseries from GUNW files
+    ionospheric_corrections = get_ionosphere_phase_screen(
+        pge_runconfig.dynamic_ancillary_file_group.gunw_files,
+        out_paths.timeseries_paths,
+        frequency=pge_runconfig.input_file_group.frequency,
+        polarization=pge_runconfig.input_file_group.polarization,
+    )
+    return {"ionospheric_corrections": ionospheric_corrections}
 
-    # The displacement workflows (freqA above, and freqB for split-spectrum)
+
+def _stage_trim_inputs(
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    out_paths: OutputPaths,  # noqa: ARG001
+    ionospheric_corrections: list[Path],  # noqa: ARG001
+) -> None:
+    # The displacement workflows (freqA, and freqB for split-spectrum)
     # have now consumed the input SLC arrays. create_products only reads
     # metadata/coordinates, so reclaim disk by stripping the heavy SLC pixel
     # arrays from any GSLCs we staged (user-provided originals are left alone).
-    polarization = pge_runconfig.input_file_group.polarization
-    if not isinstance(polarization, str):
-        polarization = polarization.value
+    # The trimmed copy atomically replaces the original, so product stages
+    # reading metadata concurrently always see a complete file.
     trim_staged_slc_arrays(
         cfg.cslc_file_list,
         stage_dir=pge_runconfig.product_path_group.scratch_path / "stage_inputs",
         frequencies=("frequencyA", "frequencyB"),
-        polarization=polarization,
+        polarization=_get_polarization(pge_runconfig),
     )
 
-    # Note: move correcting nominal displacement with ionosphere inside the
-    # create_products function, or just pulling it out from iono_corrected dir
-    create_products(
+
+def _stage_products(
+    pge_runconfig: RunConfig,
+    processing_start_datetime: datetime,
+    manifest: RunManifest | None,
+    metadata_index: GslcMetadataIndex | None,
+    out_paths: OutputPaths,
+    ionospheric_corrections: list[Path],
+    displacement_cfg: DisplacementWorkflow,
+) -> dict[str, list[Path]]:
+    # `out_paths` is shared with the stages running alongside: set on a copy
+    out_paths = replace(out_paths, ionospheric_corrections=ionospheric_corrections)
+    # Obtain wavelength based on frequency
+    wavelength = (metadata_index or GslcMetadataIndex()).get_wavelength(
+        displacement_cfg.cslc_file_list[0], _get_frequency(pge_runconfig)
+    )
+    product_paths = create_products(
         out_paths=out_paths,
-        cfg=cfg,
+        cfg=displacement_cfg,
         pge_runconfig=pge_runconfig,
         wavelength=wavelength,
         processing_start_datetime=processing_start_datetime,
+        write_compressed_slcs=False,
+        manifest=manifest,
+        metadata_index=metadata_index,
     )
+    return {"product_paths": product_paths}
 
-    logger.info(f"Product type: {pge_runconfig.primary_executable.product_type}")
-    logger.info(f"Product version: {pge_runconfig.product_path_group.product_version}")
-    max_mem = get_max_memory_usage(units="GB")
-    logger.info(f"Maximum memory usage: {max_mem:.2f} GB")
-    logger.info(f"Config file dolphin version: {cfg._dolphin_version}")
-    logger.info(f"Current running disp_nisar version: {__version__}")
+
+def _stage_compressed_products(
+    pge_runconfig: RunConfig,
+    cores: int,
+    out_paths: OutputPaths,
+    displacement_cfg: DisplacementWorkflow,
+) -> None:
+    create_compressed_slc_products(
+        out_paths=out_paths,
+        cfg=displacement_cfg,
+        pge_runconfig=pge_runconfig,
+        cores=cores,
+    )
 
 
 def _prune_block_dirs(work_directory: Path, keep_files: Iterable[Path] = ()) -> int:
@@ -404,7 +835,10 @@ def create_products(
     pge_runconfig: RunConfig,
     wavelength: float,
     processing_start_datetime: datetime | None = None,
-):
+    write_compressed_slcs: bool = True,
+    manifest: RunManifest | None = None,
+    metadata_index: GslcMetadataIndex | None = None,
+) -> list[Path]:
     """Create NetCDF products from the outputs of dolphin's displacement workflow.
 
     Parameters
@@ -419,7 +853,20 @@ def create_products(
         The wavelength in which the data is acquired
     processing_start_datetime : datetime.datetime, optional
         The processing start datetime. If not provided, datetime.now() is used.
+    write_compressed_slcs : bool
+        If True (default), also write the compressed SLC outputs when
+        `save_compressed_slc` is set in `pge_runconfig`.
+        `run` sets this to False and writes them in a separate stage.
+    manifest : RunManifest, optional
+        If provided, steps (and individual products) finished in a previous run
+        with the same inputs are skipped, and newly finished ones are recorded.
+    metadata_index : GslcMetadataIndex, optional
+        Metadata of the input GSLCs scanned at the start of the run.
 
+    Returns
+    -------
+    list[Path]
+        Paths to the created displacement products.
 
     """
     if processing_start_datetime is None:
@@ -485,10 +932,16 @@ def create_products(
     ## TODO: remove stitched from naming in run_displacement
     # Check and update correlation paths
     if set(group_by_date(out_paths.stitched_cor_paths).keys()) != disp_date_keys:
-        out_paths.stitched_cor_paths = _create_correlation_images(
-            out_paths.timeseries_paths,
-            wavelength=wavelength,
-            window_size=(11, 11),
+        out_paths.stitched_cor_paths = run_or_resume(
+            manifest,
+            "create_products/correlation",
+            lambda: _create_correlation_images(
+                out_paths.timeseries_paths,
+                wavelength=wavelength,
+                window_size=(11, 11),
+            ),
+            inputs=out_paths.timeseries_paths,
+            params={"wavelength": wavelength, "window_size": [11, 11]},
         )
     # if set(group_by_date(out_paths.cor_paths).keys()) != disp_date_keys:
     #     out_paths.cor_paths = _create_correlation_images(
@@ -499,32 +952,49 @@ def create_products(
     # Check and update connected components paths
     assert out_paths.conncomp_paths is not None
     if set(group_by_date(out_paths.conncomp_paths).keys()) != disp_date_keys:
-        # TODO: need to set the frequency properly based on input data or config
-        logger.info("Converting timeseries rasters to radians")
-        timeseries_rad_paths = _convert_meters_to_radians(
-            out_paths.timeseries_paths, wavelength=wavelength
-        )
-        method = cfg.unwrap_options.unwrap_method
-        if method in ("snaphu", "phass", "whirlwind"):
-            row_looks, col_looks = cfg.phase_linking.half_window.to_looks()
-            nlooks = row_looks * col_looks
-            out_paths.conncomp_paths = _update_snaphu_conncomps(
-                timeseries_paths=timeseries_rad_paths,
-                stitched_cor_paths=out_paths.stitched_cor_paths,
-                mask_filename=combined_mask_file,
-                unwrap_options=cfg.unwrap_options,
-                nlooks=nlooks,
-            )
-        elif method == "spurt":
-            out_paths.conncomp_paths = _update_spurt_conncomps(
-                # We don't need the scaled-to-radians version here:
-                timeseries_paths=out_paths.timeseries_paths,
-                template_conncomp_path=out_paths.conncomp_paths[0],
-            )
-        else:
-            raise NotImplementedError(
-                f"Regrowing connected components not implemented for {method}"
+
+        def _regrow_conncomps() -> list[Path]:
+            # TODO: need to set the frequency properly based on input data or config
+            logger.info("Converting timeseries rasters to radians")
+            timeseries_rad_paths = _convert_meters_to_radians(
+                out_paths.timeseries_paths, wavelength=wavelength
             )
+            method = cfg.unwrap_options.unwrap_method
+            if method in ("snaphu", "phass", "whirlwind"):
+                row_looks, col_looks = cfg.phase_linking.half_window.to_looks()
+                nlooks = row_looks * col_looks
+                return _update_snaphu_conncomps(
+                    timeseries_paths=timeseries_rad_paths,
+                    stitched_cor_paths=out_paths.stitched_cor_paths,
+                    mask_filename=combined_mask_file,
+                    unwrap_options=cfg.unwrap_options,
+                    nlooks=nlooks,
+                )
+            elif method == "spurt":
+                return _update_spurt_conncomps(
+                    # We don't need the scaled-to-radians version here:
+                    timeseries_paths=out_paths.timeseries_paths,
+                    template_conncomp_path=out_paths.conncomp_paths[0],
+                )
+            else:
+                raise NotImplementedError(
+                    f"Regrowing connected components not implemented for {method}"
+                )
+
+        out_paths.conncomp_paths = run_or_resume(
+            manifest,
+            "create_products/conncomps",
+            _regrow_conncomps,
+            inputs=[
+                out_paths.timeseries_paths,
+                out_paths.stitched_cor_paths,
+                combined_mask_file,
+            ],
+            params={
+                "wavelength": wavelength,
+                "unwrap_options": cfg.unwrap_options.model_dump(mode="json"),
+            },
+        )
 
     # Get the incidence angles for /identification metadata
     if len(cfg.correction_options.geometry_files) > 0:
@@ -542,7 +1012,7 @@ def create_products(
     logger.info(f"Creating {len(out_paths.timeseries_paths)} outputs in {out_dir}")
     # Group all the CSLCs by date to pick out ref/secondaries
     date_to_cslc_files = group_by_date(cfg.cslc_file_list, date_idx=0)
-    create_displacement_products(
+    product_paths = create_displacement_products(
         out_paths,
         out_dir=out_dir,
         date_to_cslc_files=date_to_cslc_files,
@@ -556,18 +1026,62 @@ def create_products(
         near_far_incidence_angles=near_far_incidence_angles,
         water_mask=matching_water_binary_mask,
         max_workers=algorithm_parameters.num_parallel_products,
+        manifest=manifest,
+        static_layer_cache=cfg.work_directory / STATIC_LAYER_CACHE_FILENAME,
+        solid_earth_tide_cache=cfg.work_directory / SOLID_EARTH_TIDE_CACHE_DIRNAME,
+        baseline_cache=cfg.work_directory / BASELINE_CACHE_FILENAME,
+        metadata_index=metadata_index,
+        product_params={
+            "algorithm_parameters": algorithm_parameters.model_dump(mode="json"),
+            "product_path_group": pge_runconfig.product_path_group.model_dump(
+                mode="json"
+            ),
+            "wavelength": wavelength,
+            "reference_point": list(ref_point) if ref_point is not None else None,
+            "geometry_files": list(cfg.correction_options.geometry_files),
+        },
     )
     logger.info("Finished creating output products.")
 
-    if pge_runconfig.product_path_group.save_compressed_slc:
-        logger.info(f"Saving {len(out_paths.comp_slc_dict.items())} compressed SLCs")
-        output_dir = out_dir / "compressed_slcs"
-        output_dir.mkdir(exist_ok=True)
-        product.create_compressed_products(
-            comp_slc_dict=out_paths.comp_slc_dict,
-            output_dir=output_dir,
-            cslc_file_list=cfg.cslc_file_list,
+    if write_compressed_slcs:
+        create_compressed_slc_products(
+            out_paths=out_paths, cfg=cfg, pge_runconfig=pge_runconfig
         )
+    return product_paths
+
+
+def create_compressed_slc_products(
+    out_paths: OutputPaths,
+    cfg: DisplacementWorkflow,
+    pge_runconfig: RunConfig,
+    cores: int | None = None,
+) -> None:
+    """Save the compressed SLCs, if requested by `save_compressed_slc`.
+
+    Parameters
+    ----------
+    out_paths: [dolphin.workflows.displacement.OutputPaths][]
+        Output files of the `dolphin.workflows.DisplacementWorkflow`.
+    cfg : DisplacementWorkflow
+        `DisplacementWorkflow` object for controlling the workflow.
+    pge_runconfig : disp_nisar.pge_config.RunConfig
+        PGE-specific metadata for the output product.
+    cores : int, optional
+        Number of cores used to create the products.
+        Default is the cores of the run.
+
+    """
+    if not pge_runconfig.product_path_group.save_compressed_slc:
+        return
+    logger.info(f"Saving {len(out_paths.comp_slc_dict.items())} compressed SLCs")
+    output_dir = pge_runconfig.product_path_group.output_directory / "compressed_slcs"
+    output_dir.mkdir(exist_ok=True, parents=True)
+    product.create_compressed_products(
+        comp_slc_dict=out_paths.comp_slc_dict,
+        output_dir=output_dir,
+        cslc_file_list=cfg.cslc_file_list,
+        cores=cores,
+    )
 
 
 def _assert_dates_match(
@@ -778,6 +1292,13 @@ def process_product(
     los_east_file: Path | None = None,
     los_north_file: Path | None = None,
     near_far_incidence_angles: tuple[float, float] = (33.0, 47.0),
+    static_layer_cache: Path | None = None,
+    solid_earth_tide_cache: Path | None = None,
+    baseline_cache: Path | None = None,
+    algorithm_parameters: AlgorithmParameters | None = None,
+    metadata_index: GslcMetadataIndex | None = None,
+    compression_threads: int | None = None,
+    configure_logging: bool = True,
 ) -> Path:
     """Create a single displacement product.
 
@@ -807,6 +1328,25 @@ def process_product(
     near_far_incidence_angles : tuple[float, float]
         Tuple of near range incidence angle, far range incidence angle.
         If not specified, uses approximate Sentinel-1 values of (30.0, 45.0)
+    static_layer_cache : Path, optional
+        Layers shared by all products, already compressed by
+        `product.create_static_layer_cache`.
+    solid_earth_tide_cache : Path, optional
+        Directory of the per-acquisition solid earth tide grids of the run.
+    baseline_cache : Path, optional
+        Per-acquisition baselines of the run against a common reference.
+    algorithm_parameters : AlgorithmParameters, optional
+        Already loaded algorithm parameters of `pge_runconfig`.
+    metadata_index : GslcMetadataIndex, optional
+        Metadata of the input GSLCs scanned at the start of the run.
+    compression_threads : int, optional
+        Number of threads compressing the product's layers.
+        Default is set by `product.create_output_product`.
+    configure_logging : bool
+        Set up logging to `pge_runconfig.log_file`. False when the worker
+        already does (see `_initialize_product_worker`). The messages logged
+        while the product is created also go to its own
+        ``log_<output_name>.log``, next to `files.unwrapped`, in either case.
 
     Returns
     -------
@@ -815,60 +1355,154 @@ def process_product(
 
     """
     output_name = files.unwrapped.name.replace(full_suffix(files.unwrapped), ".nc")
+    if configure_logging:
+        _initialize_product_worker(pge_runconfig.log_file)
+
     # Extra logging for product creation
-    product_filename = files.unwrapped.parent / f"log_{output_name}.log"
-    setup_logging(logger_name="disp_nisar", debug=True, filename=product_filename)
-    setup_logging(logger_name="disp_nisar", debug=True, filename=pge_runconfig.log_file)
+    with _product_log(files.unwrapped.parent / f"log_{output_name}.log"):
+        corrections = {}
 
-    corrections = {}
+        if files.ionosphere is not None:
+            warped_iono = stitching.warp_to_match(
+                files.ionosphere, files.unwrapped, resample_alg="bilinear"
+            )
+            # Read (in meters) one strip at a time while the product is written
+            corrections["ionosphere"] = partial(
+                _load_scaled_rows, warped_iono, wavelength / (4.0 * np.pi)
+            )
+        else:
+            logger.warning(
+                "Missing ionospheric correction for %s. Creating empty layer.",
+                files.unwrapped,
+            )
 
-    if files.ionosphere is not None:
-        warped_iono = stitching.warp_to_match(
-            files.ionosphere, files.unwrapped, resample_alg="bilinear"
+        output_path = out_dir / output_name
+        ref_date, secondary_date = get_dates(output_name)[:2]
+        # The reference one could be compressed, or real
+        # Also possible to have multiple compressed files with same reference date
+        ref_slc_files = date_to_cslc_files[(ref_date,)]
+        logger.info(f"Found {len(ref_slc_files)} for reference date {ref_date}")
+        secondary_slc_files = date_to_cslc_files[(secondary_date,)]
+        logger.info(
+            f"Found {len(secondary_slc_files)} for secondary date {secondary_date}"
         )
-        iono_radians = io.load_gdal(warped_iono)
-        iono_radians *= wavelength / (4.0 * np.pi)
-        corrections["ionosphere"] = iono_radians
-    else:
-        logger.warning(
-            "Missing ionospheric correction for %s. Creating empty layer.",
-            files.unwrapped,
+
+        product.create_output_product(
+            output_name=output_path,
+            unw_filename=files.unwrapped,
+            conncomp_filename=files.conncomp,
+            temp_coh_filename=files.temp_coh,
+            ifg_corr_filename=files.correlation,
+            ps_mask_filename=files.ps_mask,
+            shp_count_filename=files.shp_counts,
+            similarity_filename=files.similarity,
+            timeseries_residual_filename=files.residual,
+            water_mask_filename=files.water_mask,
+            los_east_file=los_east_file,
+            los_north_file=los_north_file,
+            near_far_incidence_angles=near_far_incidence_angles,
+            pge_runconfig=pge_runconfig,
+            dolphin_config=dolphin_config,
+            radar_wavelength=wavelength,
+            reference_cslc_files=ref_slc_files,
+            secondary_cslc_files=secondary_slc_files,
+            corrections=corrections,
+            reference_point=reference_point,
+            processing_start_datetime=processing_start_datetime,
+            static_layer_cache=static_layer_cache,
+            solid_earth_tide_cache=solid_earth_tide_cache,
+            baseline_cache=baseline_cache,
+            algorithm_parameters=algorithm_parameters,
+            metadata_index=metadata_index,
+            compression_threads=compression_threads,
         )
 
-    output_path = out_dir / output_name
-    ref_date, secondary_date = get_dates(output_name)[:2]
-    # The reference one could be compressed, or real
-    # Also possible to have multiple compressed files with same reference date
-    ref_slc_files = date_to_cslc_files[(ref_date,)]
-    logger.info(f"Found {len(ref_slc_files)} for reference date {ref_date}")
-    secondary_slc_files = date_to_cslc_files[(secondary_date,)]
-    logger.info(f"Found {len(secondary_slc_files)} for secondary date {secondary_date}")
-
-    product.create_output_product(
-        output_name=output_path,
-        unw_filename=files.unwrapped,
-        conncomp_filename=files.conncomp,
-        temp_coh_filename=files.temp_coh,
-        ifg_corr_filename=files.correlation,
-        ps_mask_filename=files.ps_mask,
-        shp_count_filename=files.shp_counts,
-        similarity_filename=files.similarity,
-        timeseries_residual_filename=files.residual,
-        water_mask_filename=files.water_mask,
-        los_east_file=los_east_file,
-        los_north_file=los_north_file,
-        near_far_incidence_angles=near_far_incidence_angles,
-        pge_runconfig=pge_runconfig,
-        dolphin_config=dolphin_config,
-        radar_wavelength=wavelength,
-        reference_cslc_files=ref_slc_files,
-        secondary_cslc_files=secondary_slc_files,
-        corrections=corrections,
-        reference_point=reference_point,
-        processing_start_datetime=processing_start_datetime,
+        return output_path
+
+
+def _initialize_product_worker(log_file: Path | None) -> None:
+    setup_logging(logger_name="disp_nisar", debug=True, filename=log_file)
+
+
+@contextmanager
+def _product_log(filename: Path) -> Iterator[None]:
+    """Also write the `disp_nisar` log messages to `filename` within the block."""
+    pkg_logger = logging.getLogger("disp_nisar")
+    handler = logging.FileHandler(filename)
+    handler.setLevel(logging.DEBUG)
+    # Same format as the run log
+    formatter = next((h.formatter for h in pkg_logger.handlers if h.formatter), None)
+    if formatter is not None:
+        handler.setFormatter(formatter)
+    pkg_logger.addHandler(handler)
+    try:
+        yield
+    finally:
+        pkg_logger.removeHandler(handler)
+        handler.close()
+
+
+def _create_baseline_cache(
+    output_name: Path,
+    files: Sequence[ProductFiles],
+    date_to_cslc_files: Mapping[tuple[datetime], list[Path]],
+    algorithm_parameters: AlgorithmParameters,
+    manifest: RunManifest | None,
+    product_params: Any,
+) -> Path | None:
+    """Compute the baselines of all acquisitions of `files` against one reference.
+
+    Returns None if it fails, leaving each product to compute its own baselines.
+    """
+    # The products compute baselines from the first CSLC of each date
+    cslc_files = sorted(
+        {
+            product.get_start_end_cslcs(date_to_cslc_files[(date,)])[0]
+            for f in files
+            for date in get_dates(f.unwrapped)[:2]
+        },
+        key=lambda f: Path(f).name,
     )
+    like_filename = files[0].unwrapped
+    cols, rows = io.get_raster_xysize(like_filename)
+    y, x = product.get_baseline_grid(
+        io.get_raster_gt(like_filename), (rows, cols), algorithm_parameters
+    )
+    epsg = io.get_raster_crs(like_filename).to_epsg()
+    try:
+        return run_or_resume(
+            manifest,
+            "create_products/baselines",
+            lambda: create_baseline_cache(output_name, cslc_files, x=x, y=y, epsg=epsg),
+            # Names only: the staged GSLCs are rewritten by `trim_inputs`
+            inputs=[str(f) for f in cslc_files],
+            params=product_params,
+        )
+    except Exception:
+        logger.error("Failed to compute the baselines of the run", exc_info=True)
+        return None
+
+
+def _get_static_layer_files(files: Sequence[ProductFiles]) -> dict[str, Path]:
+    """Get the product layers made from the same file in every product."""
+    layer_names = {
+        "temp_coh": DISPLACEMENT_PRODUCTS.temporal_coherence.name,
+        "ps_mask": DISPLACEMENT_PRODUCTS.persistent_scatterer_mask.name,
+        "shp_counts": DISPLACEMENT_PRODUCTS.shp_counts.name,
+        "similarity": DISPLACEMENT_PRODUCTS.phase_similarity.name,
+        "residual": DISPLACEMENT_PRODUCTS.timeseries_inversion_residuals.name,
+        "water_mask": DISPLACEMENT_PRODUCTS.water_mask.name,
+    }
+    static_files = {}
+    for field, name in layer_names.items():
+        paths = {getattr(f, field) for f in files}
+        if len(paths) == 1 and (path := paths.pop()) is not None:
+            static_files[name] = Path(path)
+    return static_files
 
-    return output_path
+
+def _load_scaled_rows(filename: Path, scale: float, rows: slice) -> np.ndarray:
+    return io.load_gdal(filename, rows=rows) * scale
 
 
 def create_displacement_products(
@@ -885,7 +1519,13 @@ def create_displacement_products(
     near_far_incidence_angles: tuple[float, float] = (30.0, 45.0),
     water_mask: Path | None = None,
     max_workers: int = 3,
-) -> None:
+    manifest: RunManifest | None = None,
+    product_params: Any = None,
+    static_layer_cache: Path | None = None,
+    solid_earth_tide_cache: Path | None = None,
+    baseline_cache: Path | None = None,
+    metadata_index: GslcMetadataIndex | None = None,
+) -> list[Path]:
     """Run parallel processing for all interferograms.
 
     Parameters
@@ -921,6 +1561,33 @@ def create_displacement_products(
     max_workers : int
         Number of parallel products to process.
         Default is 3.
+    manifest : RunManifest, optional
+        If provided, products already created by a previous run from the same
+        input files and `product_params` are skipped, and each newly finished
+        product is recorded.
+    product_params : Any
+        Configuration affecting the products' content, used in the fingerprint
+        of each product in `manifest`.
+    static_layer_cache : Path, optional
+        If provided (and more than one product is made), the layers identical in
+        all products are compressed once into this file, and each product copies
+        their compressed chunks.
+    solid_earth_tide_cache : Path, optional
+        If provided, the solid earth tides of every acquisition are computed
+        once, in parallel, into this directory, and reused by all products.
+    baseline_cache : Path, optional
+        If provided (and more than one product is made), the baseline of every
+        acquisition against a common reference is computed once into this file,
+        and each product takes the difference of its two dates.
+    metadata_index : GslcMetadataIndex, optional
+        Metadata of the input GSLCs, sent to every worker instead of having each
+        product reopen its GSLCs. By default, the GSLCs of the products to make
+        are scanned here.
+
+    Returns
+    -------
+    list[Path]
+        Paths to the created products.
 
     """
     iono_files = out_paths.ionospheric_corrections or [None] * len(
@@ -952,28 +1619,121 @@ def create_displacement_products(
         )
     ]
 
-    executor_class = (
-        ProcessPoolExecutor if max_workers > 1 else DummyProcessPoolExecutor
+    # Skip the products finished in a previous run
+    product_paths: dict[str, Path] = {}
+    fingerprints: dict[str, str] = {}
+    todo: list[ProductFiles] = []
+    for f in files:
+        key = _product_key(f)
+        if manifest is not None:
+            fingerprints[key] = manifest.fingerprint(f, product_params)
+            found, path = manifest.lookup(key, fingerprints[key])
+            if found:
+                logger.info(f"Skipping {path.name}: created in a previous run")
+                product_paths[key] = path
+                continue
+        todo.append(f)
+
+    algorithm_parameters = AlgorithmParameters.from_yaml(
+        pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
     )
-    ctx = get_context("spawn")
-    with executor_class(max_workers=max_workers, mp_context=ctx) as executor:
-        list(  # Force evaluation to retrieve results/raise exceptions
-            executor.map(
-                process_product,
-                files,
-                repeat(out_dir),
-                repeat(date_to_cslc_files),
-                repeat(pge_runconfig),
-                repeat(dolphin_config),
-                repeat(wavelength),
-                repeat(processing_start_datetime),
-                repeat(reference_point),
-                repeat(los_east_file),
-                repeat(los_north_file),
-                repeat(near_far_incidence_angles),
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex.from_files(
+            [
+                cslc
+                for f in todo
+                for date in get_dates(f.unwrapped)[:2]
+                for cslc in date_to_cslc_files[(date,)]
+            ]
+        )
+    if static_layer_cache is not None and len(todo) > 1:
+        static_files = _get_static_layer_files(todo)
+        static_layer_cache = run_or_resume(
+            manifest,
+            "create_products/static_layers",
+            lambda: product.create_static_layer_cache(
+                static_layer_cache,
+                static_files,
+                algorithm_parameters=algorithm_parameters,
+            ),
+            inputs=static_files,
+            params=product_params,
+        )
+    else:
+        static_layer_cache = None
+
+    if baseline_cache is not None and len(todo) > 1:
+        baseline_cache = _create_baseline_cache(
+            baseline_cache,
+            todo,
+            date_to_cslc_files,
+            algorithm_parameters=algorithm_parameters,
+            manifest=manifest,
+            product_params=product_params,
+        )
+    else:
+        baseline_cache = None
+
+    if solid_earth_tide_cache is not None and todo and los_east_file is not None:
+        acquisition_times = {
+            t
+            for f in todo
+            for date in get_dates(f.unwrapped)[:2]
+            for t in product.get_acquisition_times(
+                date_to_cslc_files[(date,)], metadata_index
             )
+        }
+        populate_tide_cache(
+            solid_earth_tide_cache,
+            acquisition_times,
+            like_filename=todo[0].unwrapped,
+            max_workers=max_workers,
         )
 
+    # Sent once to each worker, rather than with every product
+    run_context = {
+        "out_dir": out_dir,
+        "date_to_cslc_files": date_to_cslc_files,
+        "pge_runconfig": pge_runconfig,
+        "dolphin_config": dolphin_config,
+        "wavelength": wavelength,
+        "processing_start_datetime": processing_start_datetime,
+        "reference_point": reference_point,
+        "los_east_file": los_east_file,
+        "los_north_file": los_north_file,
+        "near_far_incidence_angles": near_far_incidence_angles,
+        "static_layer_cache": static_layer_cache,
+        "solid_earth_tide_cache": solid_earth_tide_cache,
+        "baseline_cache": baseline_cache,
+        "algorithm_parameters": algorithm_parameters,
+        "metadata_index": metadata_index,
+        # Sized here: the workers are outside of the run's `ComputeContext`
+        "compression_threads": get_threads_per_process(max_workers),
+        "configure_logging": False,
+    }
+    with WorkerPool(
+        max_workers,
+        context=run_context,
+        # Without workers, the products run here, where logging is already set up
+        initializer=_initialize_product_worker if max_workers > 1 else None,
+        initargs=(pge_runconfig.log_file,),
+    ) as executor:
+        future_to_key = {
+            executor.submit(process_product, f): _product_key(f) for f in todo
+        }
+        for fut in as_completed(future_to_key):
+            key = future_to_key[fut]
+            product_paths[key] = fut.result()
+            if manifest is not None:
+                manifest.record(key, fingerprints[key], product_paths[key])
+
+    return [product_paths[_product_key(f)] for f in files]
+
+
+def _product_key(files: ProductFiles) -> str:
+    """Name of a product's entry in the `RunManifest`."""
+    return f"product/{files.unwrapped.name}"
+
 
 def _create_nodata_mask(filename: PathOrStr, output_filename: PathOrStr) -> None:
     # Mark nodata as 0/False, valid as 1/True
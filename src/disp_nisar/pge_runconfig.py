@@ -60,7 +60,7 @@ except ImportError:
 from pydantic import ConfigDict, Field, field_validator
 
 from ._common import NISAR_DATASET_NAME
-from ._utils import _frequency_to_wavelength, get_nisar_frame_bbox
+from ._metadata_index import GslcMetadataIndex
 from .enums import ImagingFrequency, Polarization, ProcessingMode
 
 logger = logging.getLogger(__name__)
@@ -111,6 +111,31 @@ class InputFileGroup(YamlModel):
             " (corr_window_y // 2) * stride_y) + 5."
         ),
     )
+    input_backend: Literal["hdf5", "zarr"] = Field(
+        "hdf5",
+        description=(
+            "Reader for the GSLCs in `gslc_file_list`. 'zarr' first converts them"
+            " to the Zarr store `zarr_store` (one read per GSLC), which the PS and"
+            " phase linking steps then read instead of the HDF5 files."
+        ),
+    )
+    zarr_store: Optional[Path] = Field(
+        None,
+        description=(
+            "Zarr store of the GSLCs when `input_backend` is 'zarr'. An existing"
+            " store is reused, or updated with the new GSLCs in forward mode. If"
+            " None, uses `gslc_stack.zarr` in the scratch directory."
+        ),
+    )
+    staging_mode: Literal["download", "subset"] = Field(
+        "download",
+        description=(
+            "How remote GSLC/GUNW URLs are staged locally. 'download' downloads"
+            " each whole granule, then extracts the layers used. 'subset' reads"
+            " only those layers with HTTP/S3 range requests, never downloading"
+            " the full granule."
+        ),
+    )
     model_config = ConfigDict(
         extra="forbid",
         json_schema_extra={
@@ -291,6 +316,32 @@ class AlgorithmParameters(YamlModel):
             " create the short wavelength displacement layer"
         ),
     )
+    spatial_filter_method: Literal["full", "pyramid"] = Field(
+        "full",
+        description=(
+            "How the long wavelengths are removed for the short wavelength"
+            " displacement layer. 'full' filters the full resolution frame;"
+            " 'pyramid' estimates them on a decimated grid and upsamples strip by"
+            " strip, using less memory, with results close to (not equal to) 'full'."
+        ),
+    )
+    correction_layer_grid: Literal["full", "coarse"] = Field(
+        "full",
+        description=(
+            "Grid of the smooth layers in the /corrections group (ionosphere, solid"
+            " earth tide, perpendicular baseline). 'coarse' stores them every"
+            " `correction_subsample` pixels with their own x/y coordinates, to be"
+            " bilinearly interpolated to the product grid."
+        ),
+    )
+    correction_subsample: int = Field(
+        50,
+        ge=1,
+        description=(
+            "Spacing, in product pixels, of the correction layers when"
+            " `correction_layer_grid` is 'coarse'."
+        ),
+    )
     browse_image_vmin_vmax: tuple[float, float] = Field(
         (-0.10, 0.10),
         description=(
@@ -335,6 +386,15 @@ class RunConfig(YamlModel):
 
     # General workflow metadata
     worker_settings: WorkerSettings = Field(default_factory=WorkerSettings)
+    stage_core_budget: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Number of cores shared by workflow stages which can run concurrently"
+            " (e.g. the water mask and the geometry layers). If None, uses all"
+            " available cores."
+        ),
+    )
 
     log_file: Optional[Path] = Field(
         default=Path("output/disp_nisar_workflow.log"),
@@ -365,6 +425,7 @@ class RunConfig(YamlModel):
         self,
         frequency: str | None = None,
         scratch_suffix: str | None = None,
+        metadata_index: GslcMetadataIndex | None = None,
     ):
         """Convert to a `DisplacementWorkflow` object.
 
@@ -377,6 +438,9 @@ class RunConfig(YamlModel):
             Suffix appended to ``scratch_path`` to keep separate work directories.
             Defaults to ``""`` for the configured frequency, or ``"_<frequency>"``
             when ``frequency`` overrides the configured value.
+        metadata_index : GslcMetadataIndex, optional
+            Metadata of the input GSLCs, used for the frame bounds and the
+            wavelength instead of reading the first GSLC.
 
         """
         configured_freq = str(self.input_file_group.frequency)
@@ -394,6 +458,7 @@ class RunConfig(YamlModel):
             algorithm_parameters_file=algo_file,
             frequency=freq,
             scratch_suffix=scratch_suffix,
+            metadata_index=metadata_index,
         )
 
     def to_ionosphere_workflow(self):
@@ -424,6 +489,7 @@ class RunConfig(YamlModel):
         algorithm_parameters_file: Path,
         frequency: str,
         scratch_suffix: str = "",
+        metadata_index: GslcMetadataIndex | None = None,
     ):
         """Build a `DisplacementWorkflow` from this RunConfig.
 
@@ -436,8 +502,12 @@ class RunConfig(YamlModel):
         scratch_suffix : str
             Suffix appended to ``scratch_path`` to keep freqA and freqB work
             directories separate (e.g. ``"_ionosphere"``).
+        metadata_index : GslcMetadataIndex, optional
+            Metadata of the input GSLCs. By default, the GSLCs used are read.
 
         """
+        if metadata_index is None:
+            metadata_index = GslcMetadataIndex()
         # PGE doesn't sort the GSLCs in date order (or any order?)
         gslc_file_list = sort_files_by_date(self.input_file_group.gslc_file_list)[0]
         base_scratch = self.product_path_group.scratch_path
@@ -497,10 +567,8 @@ class RunConfig(YamlModel):
         # If we add modes or polarization, then that could be checked in this section
         # as well
 
-        bounds_epsg_gslc, bounds_gslc = get_nisar_frame_bbox(
-            self.input_file_group.gslc_file_list[0],
-            frequency=frequency,
-            polarization=polarization,
+        bounds_epsg_gslc, bounds_gslc = metadata_index.get_frame_bbox(
+            self.input_file_group.gslc_file_list[0], frequency=frequency
         )
         if bounds_epsg_gslc != bounds_epsg:
             raise ValueError(
@@ -523,7 +591,7 @@ class RunConfig(YamlModel):
 
         # Setup the OPERA-specific options to adjust from dolphin's defaults
         try:
-            wavelength = _frequency_to_wavelength(frequency, gslc_file_list[0])
+            wavelength = metadata_index.get_wavelength(gslc_file_list[0], frequency)
         except (KeyError, OSError):
             logger.warning(
                 "Could not read center frequency from %s; wavelength will not be set"
@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import datetime
-import gc
 import logging
-import subprocess
-from collections.abc import Iterable, Mapping
+import os
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from io import StringIO
 from multiprocessing import get_context
 from pathlib import Path
@@ -19,20 +21,23 @@ import pyproj
 from dolphin import __version__ as dolphin_version
 from dolphin import filtering, io
 from dolphin._types import Filename
-from dolphin.io import round_mantissa
 from dolphin.utils import DummyProcessPoolExecutor, format_dates
 from dolphin.workflows import DisplacementWorkflow, YamlModel
-from numpy.typing import ArrayLike, DTypeLike
+from numpy.typing import DTypeLike
 from opera_utils import (
     filter_by_date,
     get_dates,
-    get_zero_doppler_time,
     parse_filename,
 )
 
 from . import __version__ as disp_nisar_version
-from ._baselines import _interpolate_data, compute_baselines
-from ._common import DATETIME_FORMAT, NISAR_DATASET_NAME, NISAR_IDENTIFICATION_GROUP
+from ._baselines import _interpolate_data, compute_baselines, read_pair_baseline
+from ._chunks import copy_chunks, write_chunked
+from ._coarse_grid import CoarseGrid
+from ._common import DATETIME_FORMAT, NISAR_DATASET_NAME
+from ._compute import get_threads_per_process
+from ._filtering import estimate_long_wavelength, remove_long_wavelength
+from ._metadata_index import SNAPSHOT_PATHS, GslcMetadataIndex, write_snapshot
 from ._reference import ReferencePoint
 from ._streaming import open_h5_file
 from ._utils import extract_footprint
@@ -60,6 +65,10 @@ GLOBAL_ATTRS = {
 # Page size should be larger than the largest chunk in the file
 FILE_OPTS = {"fs_strategy": "page", "fs_page_size": 4 * 1024 * 1024}
 CHUNK_SHAPE = (256, 256)
+# Layers are streamed in strips of whole chunk rows, so each chunk is written once
+STRIP_ROWS = 2 * CHUNK_SHAPE[0]
+# Mantissa bits kept in the correction layers
+CORRECTIONS_KEEP_BITS = 10
 
 # Convert chunks to a tuple or h5py errors
 HDF5_OPTS = io.DEFAULT_HDF5_OPTIONS.copy()
@@ -76,6 +85,18 @@ GRID_MAPPING_DSET = "spatial_ref"
 
 COMPRESSED_SLC_TEMPLATE = "compressed_{date_str}.h5"
 
+# Name of the layer holding the part of `recommended_mask` common to all products
+STATIC_MASK_DSET = "static_bad_pixel_mask"
+STATIC_MASK_INPUTS = (
+    DISPLACEMENT_PRODUCTS.temporal_coherence.name,
+    DISPLACEMENT_PRODUCTS.phase_similarity.name,
+    DISPLACEMENT_PRODUCTS.water_mask.name,
+)
+
+# A correction layer source: a full array, a raster file, or a function
+# returning the requested `rows` of the layer
+RowSource = Union[np.ndarray, Filename, Callable[..., np.ndarray]]
+
 
 def create_output_product(
     output_name: Filename,
@@ -98,10 +119,19 @@ def create_output_product(
     los_north_file: Filename | None = None,
     near_far_incidence_angles: tuple[float, float] = (30.0, 45.0),
     reference_point: ReferencePoint | None = None,
-    corrections: Optional[dict[str, ArrayLike]] = None,
+    corrections: Optional[dict[str, RowSource]] = None,
+    compression_threads: int | None = None,
+    static_layer_cache: Filename | None = None,
+    solid_earth_tide_cache: Filename | None = None,
+    baseline_cache: Filename | None = None,
+    algorithm_parameters: AlgorithmParameters | None = None,
+    metadata_index: GslcMetadataIndex | None = None,
 ):
     """Create the OPERA output product in NetCDF format.
 
+    All layers are read, combined and written in strips of `STRIP_ROWS` rows;
+    only the long wavelength filter uses a full-frame view of the displacement.
+
     Parameters
     ----------
     output_name : Filename, optional
@@ -149,15 +179,41 @@ def create_output_product(
     reference_point : ReferencePoint, optional
         Named tuple with (row, col, lat, lon) of selected reference pixel.
         If None, will record empty in the dataset's attributes
-    corrections : dict[str, ArrayLike], optional
-        A dictionary of corrections to write to the output file, by default None
+    corrections : dict[str, RowSource], optional
+        A dictionary of corrections to write to the output file, by default None.
+        Each value is either a full array, a path to a raster, or a function
+        returning the requested `rows` of the layer.
+    compression_threads : int, optional
+        Number of threads compressing chunks of the output layers.
+        Default is the cores of the run divided by `num_parallel_products`
+        (see `get_threads_per_process`).
+    static_layer_cache : Filename, optional
+        File made by `create_static_layer_cache`. Layers (and the static part of
+        the recommended mask) found there for the same source files are copied
+        as pre-compressed chunks instead of being read and compressed again.
+    solid_earth_tide_cache : Filename, optional
+        Directory of per-acquisition tide grids shared by the products of a run
+        (see `solid_earth_tides.populate_tide_cache`).
+    baseline_cache : Filename, optional
+        Per-acquisition baselines against a common reference, made by
+        `_baselines.create_baseline_cache`. If both acquisitions are found on the
+        same grid, the pair's baseline is their difference; otherwise it is
+        computed from the two orbits.
+    algorithm_parameters : AlgorithmParameters, optional
+        Algorithm parameters of the run. If None, they are loaded from the
+        `algorithm_parameters_file` of `pge_runconfig`.
+    metadata_index : GslcMetadataIndex, optional
+        Metadata of the input GSLCs scanned at the start of the run. GSLCs not
+        in the index are read (once) while creating the product.
 
     """
-    if corrections is None:
-        corrections = {}
-    algorithm_parameters = AlgorithmParameters.from_yaml(
-        pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
-    )
+    corrections = dict(corrections or {})
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex()
+    if algorithm_parameters is None:
+        algorithm_parameters = AlgorithmParameters.from_yaml(
+            pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
+        )
 
     crs = io.get_raster_crs(unw_filename)
     gt = io.get_raster_gt(unw_filename)
@@ -169,43 +225,14 @@ def create_output_product(
     if len(secondary_cslc_files) == 0:
         raise ValueError("Missing input secondary cslc files")
 
-    def _get_start_end_cslcs(files):
-        if len(files) == 1:
-            start = end = files[0]
-        else:
-            # TODO: Check this, there is no burst id
-            # Sorting by name means the earlier Burst IDs come first.
-            # Since the Burst Ids are numbered in increasing order of acquisition time,
-            # This is also valid to get the start/end bursts within the frame.
-            start, *_, end = sorted(files, key=lambda f: Path(f).name)
-        logger.debug(f"Start, end files: {start}, {end}")
-        return start, end
-
     # TODO: the following functions from opera_utils need to be checked for NISAR
-    reference_start_file, reference_end_file = _get_start_end_cslcs(
-        reference_cslc_files
-    )
-    reference_start_time = get_zero_doppler_time(
-        reference_start_file,
-        dataset=f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerStartTime",
-        datetime_format="%Y-%m-%dT%H:%M:%S.%f",
-    )
-    reference_end_time = get_zero_doppler_time(
-        reference_end_file,
-        dataset=f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerEndTime",
-        datetime_format="%Y-%m-%dT%H:%M:%S.%f",
+    reference_start_file, _ = get_start_end_cslcs(reference_cslc_files)
+    reference_start_time, reference_end_time = get_acquisition_times(
+        reference_cslc_files, metadata_index
     )
-
-    secondary_start, secondary_end = _get_start_end_cslcs(secondary_cslc_files)
-    secondary_start_time = get_zero_doppler_time(
-        secondary_start,
-        dataset=f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerStartTime",
-        datetime_format="%Y-%m-%dT%H:%M:%S.%f",
-    )
-    secondary_end_time = get_zero_doppler_time(
-        secondary_end,
-        dataset=f"{NISAR_IDENTIFICATION_GROUP}/zeroDopplerEndTime",
-        datetime_format="%Y-%m-%dT%H:%M:%S.%f",
+    secondary_start, _ = get_start_end_cslcs(secondary_cslc_files)
+    secondary_start_time, secondary_end_time = get_acquisition_times(
+        secondary_cslc_files, metadata_index
     )
 
     phase2disp = -1 * float(radar_wavelength) / (4.0 * np.pi)
@@ -219,79 +246,28 @@ def create_output_product(
     # Get bounds for "Bounding box corners"
     bounds = io.get_raster_bounds(unw_filename)
 
-    # Load and process unwrapped phase data, needs more custom masking
-    unw_arr_ma = io.load_gdal(unw_filename, masked=True)
-    unw_arr = np.ma.filled(unw_arr_ma, 0)
-    del unw_arr_ma
-    gc.collect()
-    mask = unw_arr == 0
-
     input_units = io.get_raster_units(unw_filename)
     if not input_units or input_units not in ("meters", "radians"):
         logger.warning(f"Unknown units for {unw_filename}: assuming radians")
-        unw_arr *= phase2disp
-        disp_arr = unw_arr
+        disp_scale = phase2disp
     elif input_units == "radians":
-        unw_arr *= phase2disp
-        disp_arr = unw_arr
+        disp_scale = phase2disp
     else:
-        disp_arr = unw_arr
-
-    # Apply ionospheric correction (in meters) before the short-wavelength filter
-    iono_arr = corrections.get("ionosphere") if corrections else None
-    if iono_arr is not None:
-        iono_arr = np.asarray(iono_arr, dtype=np.float32)
-        if reference_point is not None:
-            iono_arr -= iono_arr[reference_point.row, reference_point.col]
-        disp_arr -= iono_arr
-        del iono_arr
-        gc.collect()
+        disp_scale = 1.0
+
+    # Ionospheric correction (in meters), applied before the short-wavelength filter
+    iono_source = corrections.get("ionosphere")
+    if iono_source is not None and reference_point is not None:
+        ref_row = slice(reference_point.row, reference_point.row + 1)
+        iono_ref = float(_read_rows(iono_source, ref_row)[0, reference_point.col])
+        corrections["ionosphere"] = partial(
+            _read_rows_with_offset, iono_source, -iono_ref
+        )
 
     _, x_res, _, _, _, y_res = gt
     # Average for the pixel spacing for filtering
     pixel_spacing = (abs(x_res) + abs(y_res)) / 2
     wavelength_cutoff = algorithm_parameters.spatial_wavelength_cutoff
-    logger.info(
-        "Creating short wavelength displacement product with %s meter cutoff",
-        wavelength_cutoff,
-    )
-
-    # Create the commended mask:
-    temporal_coherence = io.load_gdal(temp_coh_filename, masked=True)
-    # Get summary statistics on the layers for CMR filtering/searching purposes
-    average_temporal_coherence = temporal_coherence.mean()
-
-    if water_mask_filename:
-        water_mask_data = io.load_gdal(water_mask_filename, masked=True).filled(0)
-        is_water = water_mask_data == 0
-        del water_mask_data
-    else:
-        # Not provided: Don't indicate anything is water in this mask.
-        is_water = np.zeros(temporal_coherence.shape, dtype=bool)
-
-    conncomps = io.load_gdal(conncomp_filename, masked=True).filled(0)
-    similarity = io.load_gdal(similarity_filename, masked=True).filled(0)
-
-    # Mark pixels that are bad
-    is_zero_conncomp = conncomps == 0
-    del conncomps
-    bad_temporal_coherence = (
-        temporal_coherence
-        < algorithm_parameters.recommended_temporal_coherence_threshold
-    )
-    del temporal_coherence
-    bad_similarity = similarity < algorithm_parameters.recommended_similarity_threshold
-    del similarity
-    is_low_quality = bad_temporal_coherence & bad_similarity
-    del bad_temporal_coherence, bad_similarity
-
-    # If a pixel has any of the reasons to be bad, recommend masking
-    bad_pixel_mask = is_water | is_zero_conncomp | is_low_quality
-    # Note: An alternate way to view this:
-    # good_conncomp & is_no_water & (good_temporal_coherence | good_similarity)
-    del is_water, is_zero_conncomp, is_low_quality
-    recommended_mask = np.logical_not(bad_pixel_mask)
-    gc.collect()
 
     # Add the current threshold to the product attributes
     DISPLACEMENT_PRODUCTS.recommended_mask.attrs |= {
@@ -302,29 +278,50 @@ def create_output_product(
             algorithm_parameters.recommended_temporal_coherence_threshold
         ),
     }
-
-    filtered_disp_arr = filtering.filter_long_wavelength(
-        unwrapped_phase=disp_arr,
-        bad_pixel_mask=bad_pixel_mask,
-        wavelength_cutoff=wavelength_cutoff,
-        pixel_spacing=pixel_spacing,
-    ).astype(np.float32)
     DISPLACEMENT_PRODUCTS.short_wavelength_displacement.attrs |= {
         "wavelength_cutoff": str(wavelength_cutoff),
         "wavelength_cutoff_units": "meters",
     }
 
-    disp_arr[mask] = np.nan
-    num_nodata_pixels = np.sum(mask)
-    del mask
-    # Be more aggressive with the short wavelength displacement mask:
-    filtered_disp_arr[bad_pixel_mask] = np.nan
-    del bad_pixel_mask
-    gc.collect()
-
     product_infos: list[ProductInfo] = list(DISPLACEMENT_PRODUCTS)
-
-    with h5netcdf.File(output_name, "w", **FILE_OPTS) as f:
+    disp_info, short_wavelength_info, mask_info = product_infos[:3]
+    # The remaining layers are copied from dolphin's outputs
+    data_files = [
+        conncomp_filename,
+        temp_coh_filename,
+        ifg_corr_filename,
+        ps_mask_filename,
+        shp_count_filename,
+        water_mask_filename,
+        similarity_filename,
+        timeseries_residual_filename,
+    ]
+    layer_files = {
+        info.name: Path(filename)
+        for info, filename in zip(product_infos[3:], data_files, strict=True)
+        if filename is not None and Path(filename).exists()
+    }
+    for name in (
+        DISPLACEMENT_PRODUCTS.connected_component_labels.name,
+        DISPLACEMENT_PRODUCTS.temporal_coherence.name,
+        DISPLACEMENT_PRODUCTS.phase_similarity.name,
+    ):
+        if name not in layer_files:
+            raise ValueError(f"Missing input file for {name}")
+
+    num_nodata_pixels = 0
+    temp_coh_sum = 0.0
+    temp_coh_count = 0
+    if compression_threads is None:
+        # Products are written `num_parallel_products` at a time: share the cores
+        compression_threads = get_threads_per_process(
+            algorithm_parameters.num_parallel_products
+        )
+    with (
+        h5netcdf.File(output_name, "w", **FILE_OPTS) as f,
+        ThreadPoolExecutor(compression_threads) as executor,
+        _open_static_layer_cache(static_layer_cache) as cache_hf,
+    ):
         f.attrs.update(GLOBAL_ATTRS)
         _create_grid_mapping(group=f, crs=crs, gt=gt)
 
@@ -341,335 +338,403 @@ def create_output_product(
             long_name="Time corresponding to beginning of reference acquisition",
             variable_name="reference_time",
         )
-        info = product_infos[0]
-        round_mantissa(disp_arr, keep_bits=info.keep_bits)
-        _create_geo_dataset(
-            group=f,
-            name=info.name,
-            data=disp_arr,
-            long_name=info.long_name,
-            description=info.description,
-            fillvalue=info.fillvalue,
-            attrs=info.attrs,
+        # Create all layers empty, then fill them one strip of chunks at a time.
+        # Layers with no input file are left unwritten, so they read as fillvalue.
+        variables = {
+            info.name: _create_empty_geo_dataset(group=f, info=info)
+            for info in product_infos
+        }
+        # Declare the correction layers too, before any data is written
+        correction_grid = (
+            CoarseGrid(
+                gt=tuple(gt),
+                shape=shape,
+                subsample=algorithm_parameters.correction_subsample,
+            )
+            if algorithm_parameters.correction_layer_grid == "coarse"
+            else None
         )
-        del disp_arr
-        gc.collect()
+        correction_vars = _create_corrections_group(
+            f=f,
+            shape=shape,
+            gt=gt,
+            crs=crs,
+            secondary_start_time=secondary_start_time,
+            reference_point=reference_point,
+            grid=correction_grid,
+        )
+
+        def write_strip(
+            name: str, block: np.ndarray, rows: slice, keep_bits: int | None = None
+        ) -> None:
+            write_chunked(
+                variables[name]._h5ds,
+                block,
+                row_start=rows.start,
+                keep_bits=keep_bits,
+                executor=executor,
+            )
 
-        info = product_infos[1]
-        round_mantissa(filtered_disp_arr, keep_bits=info.keep_bits)
-        _create_geo_dataset(
-            group=f,
-            name=info.name,
-            data=filtered_disp_arr,
-            long_name=info.long_name,
-            description=info.description,
-            fillvalue=info.fillvalue,
-            attrs=info.attrs,
+        # Layers shared by all products may be pre-compressed in the run's cache
+        cached = _get_cached_layers(cache_hf, layer_files)
+        static_mask = _get_cached_static_mask(
+            cache_hf, layer_files, algorithm_parameters
         )
+        mask_inputs = set() if static_mask is not None else set(STATIC_MASK_INPUTS)
+        files_to_read = {
+            name: filename
+            for name, filename in layer_files.items()
+            if name not in cached or name in mask_inputs
+        }
+        temp_coh_name = DISPLACEMENT_PRODUCTS.temporal_coherence.name
+        if temp_coh_name in cached:
+            temp_coh_attrs = cached[temp_coh_name].attrs
+            temp_coh_sum = float(temp_coh_attrs["temporal_coherence_sum"])
+            temp_coh_count = int(temp_coh_attrs["temporal_coherence_count"])
+        logger.info(f"Using cached layers for {output_name}: {sorted(cached)}")
+
+        logger.info(f"Writing {output_name} in strips of {STRIP_ROWS} rows")
+        for row_slice, _ in io.iter_blocks(shape, block_shape=(STRIP_ROWS, cols)):
+            # Load each ancillary layer once: used both for the mask and the output
+            layers = {
+                name: io.load_gdal(filename, rows=row_slice, masked=True)
+                for name, filename in files_to_read.items()
+            }
 
-        make_browse_image_from_arr(
+            unw = io.load_gdal(unw_filename, rows=row_slice, masked=True).filled(0)
+            nodata = unw == 0
+            num_nodata_pixels += int(nodata.sum())
+            disp = unw.astype(np.float32) * np.float32(disp_scale)
+            del unw
+            if "ionosphere" in corrections:
+                disp -= _read_rows(corrections["ionosphere"], row_slice)
+
+            # Create the recommended mask:
+            if static_mask is not None:
+                is_static_bad = static_mask[row_slice, :] != 0
+            else:
+                is_static_bad = _get_static_bad_pixel_mask(layers, algorithm_parameters)
+            if temp_coh_name not in cached:
+                # Get summary statistics on the layers for CMR filtering/searching
+                valid_temp_coh = layers[temp_coh_name].compressed()
+                temp_coh_sum += float(valid_temp_coh.sum(dtype=np.float64))
+                temp_coh_count += valid_temp_coh.size
+
+            conncomps = layers[DISPLACEMENT_PRODUCTS.connected_component_labels.name]
+            is_zero_conncomp = conncomps.filled(0) == 0
+            # If a pixel has any of the reasons to be bad, recommend masking
+            bad_pixel_mask = is_static_bad | is_zero_conncomp
+            # Note: An alternate way to view this:
+            # good_conncomp & is_no_water & (good_temporal_coherence | good_similarity)
+            recommended_mask = np.logical_not(bad_pixel_mask).astype("uint8")
+            write_strip(mask_info.name, recommended_mask, row_slice)
+
+            disp[nodata] = np.nan
+            write_strip(disp_info.name, disp, row_slice, disp_info.keep_bits)
+
+            for name, block in layers.items():
+                if name in cached:
+                    continue
+                info = _get_product_info(name)
+                out = block.filled(info.fillvalue).astype(info.dtype)
+                write_strip(name, out, row_slice, info.keep_bits)
+
+        for name, dset in cached.items():
+            # Already rounded and compressed: copy the chunks as they are
+            if not copy_chunks(dset, variables[name]._h5ds):
+                for row_slice, _ in io.iter_blocks(
+                    shape, block_shape=(STRIP_ROWS, cols)
+                ):
+                    write_strip(name, dset[row_slice, :], row_slice)
+
+        # The long wavelength filter is the only step needing the whole frame
+        logger.info(
+            "Creating short wavelength displacement product with %s meter cutoff",
+            wavelength_cutoff,
+        )
+        _write_short_wavelength_displacement(
+            disp_var=variables[disp_info.name],
+            mask_var=variables[mask_info.name],
+            out_var=variables[short_wavelength_info.name],
+            wavelength_cutoff=wavelength_cutoff,
+            pixel_spacing=pixel_spacing,
+            keep_bits=short_wavelength_info.keep_bits,
+            method=algorithm_parameters.spatial_filter_method,
+            executor=executor,
+        )
+        _make_browse_image(
             output_filename=Path(output_name).with_suffix(
-                f".{product_infos[1].name}.png"
+                f".{short_wavelength_info.name}.png"
             ),
-            arr=filtered_disp_arr,
-            mask=recommended_mask,
+            data_var=variables[short_wavelength_info.name],
+            mask_var=variables[mask_info.name],
             vmin=algorithm_parameters.browse_image_vmin_vmax[0],
             vmax=algorithm_parameters.browse_image_vmin_vmax[1],
         )
-        del filtered_disp_arr
-        gc.collect()
 
-        # Add the recommended mask, which is already loaded
-        info = product_infos[2]
-        _create_geo_dataset(
-            group=f,
-            name=info.name,
-            data=recommended_mask.astype("uint8"),
-            description=info.description,
-            long_name=info.long_name,
-            fillvalue=info.fillvalue,
-            attrs=info.attrs,
+        average_temporal_coherence = (
+            temp_coh_sum / temp_coh_count if temp_coh_count else np.nan
         )
 
-        # For the others, create empty datasets here; filled blockwise below
-        # to avoid loading the full (multi-GiB) rasters into memory at once.
-        data_files = [
-            conncomp_filename,
-            temp_coh_filename,
-            ifg_corr_filename,
-            ps_mask_filename,
-            shp_count_filename,
-            water_mask_filename,
-            similarity_filename,
-            timeseries_residual_filename,
-        ]
-
-        blockwise_writes: list[tuple[Any, Path]] = []
-        for info, filename in zip(product_infos[3:], data_files, strict=True):
-            if filename is not None and Path(filename).exists():
-                # Create empty variable structure; data filled blockwise after context
-                var = f.create_variable(
-                    info.name,
-                    dimensions=["y", "x"],
-                    dtype=info.dtype,
-                    fillvalue=info.fillvalue,
-                    **HDF5_OPTS,
+        y, x = get_baseline_grid(gt, shape, algorithm_parameters)
+        baseline_arr = None
+        if baseline_cache is not None:
+            baseline_arr = read_pair_baseline(
+                baseline_cache, reference_start_file, secondary_start, x=x, y=y
+            )
+        if baseline_arr is None:
+            try:
+                logger.info("Calculating perpendicular baselines")
+                baseline_arr = compute_baselines(
+                    reference_start_file,
+                    secondary_start,
+                    x=x,
+                    y=y,
+                    epsg=crs.to_epsg(),
+                    wavelength=radar_wavelength,
+                    height=0,
                 )
-                _attrs = {
-                    **(info.attrs or {}),
-                    "description": info.description,
-                    "grid_mapping": GRID_MAPPING_DSET,
-                }
-                if info.long_name:
-                    _attrs["long_name"] = info.long_name
-                var.attrs.update(_attrs)
-                blockwise_writes.append((info, Path(filename)))
-            else:
-                data = np.full(shape=shape, fill_value=info.fillvalue, dtype=info.dtype)
-                _create_geo_dataset(
-                    group=f,
-                    name=info.name,
-                    data=data,
-                    description=info.description,
-                    long_name=info.long_name,
-                    fillvalue=info.fillvalue,
-                    attrs=info.attrs,
+            except Exception:
+                logger.error(
+                    f"Failed to compute baselines for {reference_start_file},"
+                    f" {secondary_start}",
+                    exc_info=True,
                 )
+                baseline_arr = np.zeros((len(y), len(x)))
+        del y, x
+        if correction_grid is not None:
+            corrections["baseline"] = baseline_arr
+        else:
+            # Upsampled one strip at a time while writing the corrections group
+            corrections["baseline"] = partial(_interpolate_data, baseline_arr, shape)
 
-    # Fill ancillary datasets one strip at a time to avoid multi-GiB allocations
-    xsize = shape[1]
-    with h5py.File(output_name, "a") as hf:
-        for info, filename in blockwise_writes:
-            dset = hf[f"/{info.name}"]
-            for row_slice, _ in io.iter_blocks(shape, block_shape=(512, xsize)):
-                block = io.load_gdal(filename, rows=row_slice, masked=True).filled(
-                    info.fillvalue
-                )
-                block = block.astype(info.dtype)
-                if info.keep_bits is not None:
-                    round_mantissa(block, keep_bits=info.keep_bits)
-                dset[row_slice, :] = block
+        if los_east_file is not None and los_north_file is not None:
+            logger.info("Calculating solid earth tide")
+            ref_tuple = (
+                (reference_point.row, reference_point.col) if reference_point else None
+            )
+            orbit_direction = _get_orbit_direction(
+                reference_cslc_files[0], metadata_index
+            )
+            solid_earth_los = calculate_solid_earth_tides_correction(
+                like_filename=unw_filename,
+                reference_start_time=reference_start_time,
+                reference_stop_time=reference_end_time,
+                secondary_start_time=secondary_start_time,
+                secondary_stop_time=secondary_end_time,
+                los_east_file=los_east_file,
+                los_north_file=los_north_file,
+                orbit_direction=orbit_direction,
+                reference_point=ref_tuple,
+                subsample=correction_grid.subsample if correction_grid else 1,
+                cache_dir=solid_earth_tide_cache,
+            )
+            corrections["solid_earth"] = solid_earth_los
 
-    # Compute baseline now (after displacement/mask arrays are freed) to avoid
-    # holding a full-size float32 in memory during the filtering step above.
-    y, x = _create_yx_arrays(gt=gt, shape=shape)
-    # TODO: do we need all corrections/smaller grids to be same subsample factor?
-    subsample = 50
-    y, x = y[::subsample], x[::subsample]
-    try:
-        logger.info("Calculating perpendicular baselines subsampled by %s", subsample)
-        baseline_arr = compute_baselines(
-            reference_start_file,
-            secondary_start,
-            x=x,
-            y=y,
-            epsg=crs.to_epsg(),
-            wavelength=radar_wavelength,
-            height=0,
+        _write_corrections(
+            correction_vars, corrections, grid=correction_grid, executor=executor
         )
-    except Exception:
-        logger.error(
-            f"Failed to compute baselines for {reference_start_file},"
-            f" {secondary_start}",
-            exc_info=True,
-        )
-        baseline_arr = np.zeros((100, 100))
-    del y, x
-    corrections["baseline"] = _interpolate_data(baseline_arr, shape=shape).astype(
-        "float32"
-    )
-    del baseline_arr
 
-    if los_east_file is not None and los_north_file is not None:
-        logger.info("Calculating solid earth tide")
-        ref_tuple = (
-            (reference_point.row, reference_point.col) if reference_point else None
-        )
-        orbit_direction = _get_orbit_direction(reference_cslc_files[0])
-        solid_earth_los = calculate_solid_earth_tides_correction(
-            like_filename=unw_filename,
+        reference_orbit_type = _get_orbit_type(reference_cslc_files[0], metadata_index)
+        secondary_orbit_type = _get_orbit_type(secondary_cslc_files[0], metadata_index)
+        _create_identification_group(
+            f=f,
+            pge_runconfig=pge_runconfig,
+            radar_wavelength=radar_wavelength,
+            reference_orbit_type=reference_orbit_type,
+            secondary_orbit_type=secondary_orbit_type,
             reference_start_time=reference_start_time,
-            reference_stop_time=reference_end_time,
+            reference_end_time=reference_end_time,
             secondary_start_time=secondary_start_time,
-            secondary_stop_time=secondary_end_time,
-            los_east_file=los_east_file,
-            los_north_file=los_north_file,
-            orbit_direction=orbit_direction,
-            reference_point=ref_tuple,
+            secondary_end_time=secondary_end_time,
+            footprint_wkt=footprint_wkt,
+            num_nodata_pixels=num_nodata_pixels,
+            product_bounds=tuple(bounds),
+            average_temporal_coherence=average_temporal_coherence,
+            near_far_incidence_angles=near_far_incidence_angles,
+            processing_start_datetime=processing_start_datetime,
+        )
+
+        _create_metadata_group(
+            f=f,
+            pge_runconfig=pge_runconfig,
+            dolphin_config=dolphin_config,
+        )
+        copy_cslc_metadata_to_displacement(
+            reference_cslc_file=reference_start_file,
+            secondary_cslc_file=secondary_start,
+            # Copy through the open file, rather than reopening it with h5py
+            output_disp_file=f._h5file,
+            metadata_index=metadata_index,
         )
-        corrections["solid_earth"] = solid_earth_los
-
-    _create_corrections_group(
-        output_name=output_name,
-        corrections=corrections,
-        shape=shape,
-        gt=gt,
-        crs=crs,
-        secondary_start_time=secondary_start_time,
-        reference_point=reference_point,
-    )
-
-    reference_orbit_type = _get_orbit_type(reference_cslc_files[0])
-    secondary_orbit_type = _get_orbit_type(secondary_cslc_files[0])
-    _create_identification_group(
-        output_name=output_name,
-        pge_runconfig=pge_runconfig,
-        radar_wavelength=radar_wavelength,
-        reference_orbit_type=reference_orbit_type,
-        secondary_orbit_type=secondary_orbit_type,
-        reference_start_time=reference_start_time,
-        reference_end_time=reference_end_time,
-        secondary_start_time=secondary_start_time,
-        secondary_end_time=secondary_end_time,
-        footprint_wkt=footprint_wkt,
-        num_nodata_pixels=num_nodata_pixels,
-        product_bounds=tuple(bounds),
-        average_temporal_coherence=average_temporal_coherence,
-        near_far_incidence_angles=near_far_incidence_angles,
-        processing_start_datetime=processing_start_datetime,
-    )
-
-    _create_metadata_group(
-        output_name=output_name,
-        pge_runconfig=pge_runconfig,
-        dolphin_config=dolphin_config,
-    )
-    copy_cslc_metadata_to_displacement(
-        reference_cslc_file=reference_start_file,
-        secondary_cslc_file=secondary_start,
-        output_disp_file=output_name,
-    )
-    # Final repack to remove "Unaccounted space"
-    logger.info(f"Repacking {output_name} with h5repack")
-    tmpfile = Path(output_name).with_suffix(".tmp.h5")
-    # h5repack with no options keeps all fs_page strategy/chunks the same
-    subprocess.run(["h5repack", output_name, tmpfile])
-    Path(output_name).unlink()
-    tmpfile.rename(output_name)
 
 
 def _create_corrections_group(
-    output_name: Filename,
-    corrections: dict[str, ArrayLike],
+    f: h5netcdf.File,
     shape: tuple[int, int],
     gt: list[float],
     crs: pyproj.CRS,
     secondary_start_time: datetime.datetime,
     reference_point: ReferencePoint | None,
-) -> None:
-    keep_bits = 10
-    logger.debug("Rounding mantissa in corrections to %s bits", keep_bits)
-    for data in corrections.values():
-        # Use same amount of truncation for all correction layers
-        if np.issubdtype(data.dtype, np.floating):
-            round_mantissa(data, keep_bits=keep_bits)
-    logger.info("Creating corrections group in %s", output_name)
-    with h5netcdf.File(output_name, "a") as f:
-        # Create the group holding phase corrections used on the unwrapped phase
-        corrections_group = f.create_group(CORRECTIONS_GROUP_NAME)
-        corrections_group.attrs["description"] = (
-            "Phase corrections which may be used to correct the displacement image"
-        )
-        # Lazy: only allocate the zeros placeholder if at least one correction
-        # is missing — avoids an unconditional ~18 GiB allocation.
-        _zeros_arr: np.ndarray | None = None
-
-        def _zeros() -> np.ndarray:
-            nonlocal _zeros_arr
-            if _zeros_arr is None:
-                _zeros_arr = np.zeros(shape, dtype="float32")
-            return _zeros_arr
-
-        # TODO: Are we going to downsample these for space?
-        # if so, they need they're own X/Y variables and GeoTransform
-        _create_grid_mapping(group=corrections_group, crs=crs, gt=gt)
-        _create_yx_dsets(group=corrections_group, gt=gt, shape=shape, include_time=True)
-        _create_time_dset(
-            group=corrections_group,
-            time=secondary_start_time,
-            long_name="Time corresponding to beginning of secondary image",
-        )
-        ionosphere = (
-            corrections["ionosphere"] if "ionosphere" in corrections else _zeros()
-        )
-        _create_geo_dataset(
-            group=corrections_group,
-            name="ionospheric_delay",
-            long_name="Ionospheric Delay",
-            data=ionosphere,
-            description=(
-                "Ionospheric phase delay that has already been applied to correct"
-                " /displacement. Stored for reference."
-            ),
-            fillvalue=np.nan,
-            attrs={"units": "meters"},
-        )
-        solid_earth = (
-            corrections["solid_earth"] if "solid_earth" in corrections else _zeros()
-        )
-        _create_geo_dataset(
-            group=corrections_group,
-            name="solid_earth_tide",
-            long_name="Solid Earth Tide",
-            data=solid_earth,
-            description=(
-                "Solid Earth tide between the reference and secondary acquisition"
-                " times, projected onto the radar line of sight"
+    grid: CoarseGrid | None = None,
+) -> dict[str, h5netcdf.Variable]:
+    """Declare the corrections group, returning its (empty) layers by correction key.
+
+    The layers are filled later with `_write_corrections`. If `grid` is given,
+    they are declared on its coarse grid, with the group's own x/y coordinates
+    and grid mapping.
+    """
+    keep_bits = CORRECTIONS_KEEP_BITS
+    logger.info("Creating corrections group in %s", f.filename)
+    # Create the group holding phase corrections used on the unwrapped phase
+    corrections_group = f.create_group(CORRECTIONS_GROUP_NAME)
+    corrections_group.attrs["description"] = (
+        "Phase corrections which may be used to correct the displacement image"
+    )
+
+    chunks = None
+    if grid is not None:
+        gt, shape = list(grid.coarse_gt), grid.coarse_shape
+        chunks = tuple(min(c, n) for c, n in zip(CHUNK_SHAPE, shape))
+        corrections_group.attrs["interpolation"] = (
+            f"Layers are sampled every {grid.subsample} pixels of the displacement"
+            " grid, at the x/y coordinates of this group. Bilinearly interpolate"
+            " them to the displacement grid's x/y coordinates."
+        )
+    _create_grid_mapping(group=corrections_group, crs=crs, gt=gt)
+    _create_yx_dsets(group=corrections_group, gt=gt, shape=shape, include_time=True)
+    _create_time_dset(
+        group=corrections_group,
+        time=secondary_start_time,
+        long_name="Time corresponding to beginning of secondary image",
+    )
+    layers = [
+        (
+            "ionosphere",
+            ProductInfo(
+                name="ionospheric_delay",
+                long_name="Ionospheric Delay",
+                description=(
+                    "Ionospheric phase delay that has already been applied to"
+                    " correct /displacement. Stored for reference."
+                ),
+                fillvalue=np.nan,
+                dtype=np.float32,
+                attrs={"units": "meters"},
+                keep_bits=keep_bits,
             ),
-            fillvalue=np.nan,
-            attrs={"units": "meters"},
-        )
-        baseline = corrections["baseline"] if "baseline" in corrections else _zeros()
-        _create_geo_dataset(
-            group=corrections_group,
-            name="perpendicular_baseline",
-            long_name="Perpendicular Baseline",
-            data=baseline,
-            description=(
-                "Perpendicular baseline between reference and secondary acquisitions."
-                " May be used to correct for DEM error in the displacement imagery."
+        ),
+        (
+            "solid_earth",
+            ProductInfo(
+                name="solid_earth_tide",
+                long_name="Solid Earth Tide",
+                description=(
+                    "Solid Earth tide between the reference and secondary"
+                    " acquisition times, projected onto the radar line of sight"
+                ),
+                fillvalue=np.nan,
+                dtype=np.float32,
+                attrs={"units": "meters"},
+                keep_bits=keep_bits,
             ),
-            fillvalue=np.nan,
-            attrs={"units": "meters"},
-        )
-        # Make a scalar dataset for the reference point
-        if reference_point is not None:
-            row, col, lat, lon = reference_point
-            ref_attrs = {
-                "rows": [row],
-                "cols": [col],
-                "latitudes": [lat],
-                "longitudes": [lon],
-                "units": "unitless",
-            }
-        else:
-            ref_attrs = {
-                "rows": [],
-                "cols": [],
-                "latitudes": [],
-                "longitudes": [],
-                "units": "unitless",
-            }
-        _create_dataset(
-            group=corrections_group,
-            name="reference_point",
-            dimensions=(),
-            data=0,
-            fillvalue=0,
-            description=(
-                "Dummy dataset containing attributes recording the spatial location"
-                " where the reference phase was taken."
+        ),
+        (
+            "baseline",
+            ProductInfo(
+                name="perpendicular_baseline",
+                long_name="Perpendicular Baseline",
+                description=(
+                    "Perpendicular baseline between reference and secondary"
+                    " acquisitions. May be used to correct for DEM error in the"
+                    " displacement imagery."
+                ),
+                fillvalue=np.nan,
+                dtype=np.float32,
+                attrs={"units": "meters"},
+                keep_bits=keep_bits,
             ),
-            dtype=int,
-            # Note: the dataset contains attributes with lists, since the reference
-            # could have come from multiple points (e.g. boxcar average of an area).
-            attrs=ref_attrs,
+        ),
+    ]
+    variables = {
+        key: _create_empty_geo_dataset(
+            group=corrections_group, info=info, chunks=chunks
         )
+        for key, info in layers
+    }
+
+    # Make a scalar dataset for the reference point
+    if reference_point is not None:
+        row, col, lat, lon = reference_point
+        ref_attrs = {
+            "rows": [row],
+            "cols": [col],
+            "latitudes": [lat],
+            "longitudes": [lon],
+            "units": "unitless",
+        }
+    else:
+        ref_attrs = {
+            "rows": [],
+            "cols": [],
+            "latitudes": [],
+            "longitudes": [],
+            "units": "unitless",
+        }
+    _create_dataset(
+        group=corrections_group,
+        name="reference_point",
+        dimensions=(),
+        data=0,
+        fillvalue=0,
+        description=(
+            "Dummy dataset containing attributes recording the spatial location"
+            " where the reference phase was taken."
+        ),
+        dtype=int,
+        # Note: the dataset contains attributes with lists, since the reference
+        # could have come from multiple points (e.g. boxcar average of an area).
+        attrs=ref_attrs,
+    )
+    return variables
+
+
+def _write_corrections(
+    variables: Mapping[str, h5netcdf.Variable],
+    corrections: Mapping[str, RowSource],
+    grid: CoarseGrid | None = None,
+    executor: Executor | None = None,
+) -> None:
+    """Fill the correction layers strip by strip. Missing corrections are zeros.
+
+    With a coarse `grid`, corrections already on the grid are written as is, and
+    full resolution ones are sampled at its points.
+    """
+    logger.debug("Rounding mantissa in corrections to %s bits", CORRECTIONS_KEEP_BITS)
+    for key, var in variables.items():
+        source = corrections.get(key)
+        shape = var.shape
+        if grid is not None and source is not None:
+            if not (isinstance(source, np.ndarray) and source.shape == shape):
+                source = _sample_on_grid(source, grid)
+        for row_slice, _ in io.iter_blocks(shape, block_shape=(STRIP_ROWS, shape[1])):
+            if source is None:
+                block = np.zeros((row_slice.stop - row_slice.start, shape[1]))
+            else:
+                block = _read_rows(source, row_slice)
+            # Use same amount of truncation for all correction layers
+            write_chunked(
+                var._h5ds,
+                np.asarray(block, dtype=var.dtype),
+                row_start=row_slice.start,
+                keep_bits=CORRECTIONS_KEEP_BITS,
+                executor=executor,
+            )
 
 
 # TODO: Need to change CEOS Metadata for NISAR
 def _create_identification_group(
-    output_name: Filename,
+    f: h5netcdf.File,
     pge_runconfig: RunConfig,
     radar_wavelength: float,
     reference_orbit_type: str,
@@ -686,867 +751,854 @@ def _create_identification_group(
     near_far_incidence_angles: tuple[float, float] = (30.0, 45.0),
 ) -> None:
     """Create the identification group in the output file."""
-    logger.info("Creating /identification group in %s", output_name)
-    with h5netcdf.File(output_name, "a") as f:
-        identification_group = f.create_group(IDENTIFICATION_GROUP_NAME)
-        _create_dataset(
-            group=identification_group,
-            name="processing_facility",
-            dimensions=(),
-            data="NASA Jet Propulsion Laboratory on AWS",
-            fillvalue=None,
-            description="Product processing facility",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="frame_id",
-            dimensions=(),
-            data=pge_runconfig.input_file_group.frame_id,
-            fillvalue=None,
-            description="ID number of the processed frame",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="product_version",
-            dimensions=(),
-            data=pge_runconfig.product_path_group.product_version,
-            fillvalue=None,
-            description="Version of the product",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="processing_start_datetime",
-            dimensions=(),
-            data=processing_start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-            fillvalue=None,
-            description="UTC datetime of the start of processing for this product",
-        )
+    logger.info("Creating /identification group in %s", f.filename)
+    identification_group = f.create_group(IDENTIFICATION_GROUP_NAME)
+    _create_dataset(
+        group=identification_group,
+        name="processing_facility",
+        dimensions=(),
+        data="NASA Jet Propulsion Laboratory on AWS",
+        fillvalue=None,
+        description="Product processing facility",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="frame_id",
+        dimensions=(),
+        data=pge_runconfig.input_file_group.frame_id,
+        fillvalue=None,
+        description="ID number of the processed frame",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="product_version",
+        dimensions=(),
+        data=pge_runconfig.product_path_group.product_version,
+        fillvalue=None,
+        description="Version of the product",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="processing_start_datetime",
+        dimensions=(),
+        data=processing_start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+        fillvalue=None,
+        description="UTC datetime of the start of processing for this product",
+    )
 
-        frame_id = pge_runconfig.input_file_group.frame_id
-        url = f"https://search.asf.alaska.edu/#/?dataset=OPERA-S1&productTypes=DISP-S1-STATIC&frame={frame_id}"
-        _create_dataset(
-            group=identification_group,
-            name="static_layers_data_access",
-            dimensions=(),
-            data=url,
-            fillvalue=None,
-            description=(
-                "URL of the static layers product associated with this Displacement"
-                " product. This includes the radar unit look vector for each pixel."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="radar_band",
-            dimensions=(),
-            data="C",
-            fillvalue=None,
-            description="Acquired radar frequency band",
-        )
+    frame_id = pge_runconfig.input_file_group.frame_id
+    url = f"https://search.asf.alaska.edu/#/?dataset=OPERA-S1&productTypes=DISP-S1-STATIC&frame={frame_id}"
+    _create_dataset(
+        group=identification_group,
+        name="static_layers_data_access",
+        dimensions=(),
+        data=url,
+        fillvalue=None,
+        description=(
+            "URL of the static layers product associated with this Displacement"
+            " product. This includes the radar unit look vector for each pixel."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="radar_band",
+        dimensions=(),
+        data="C",
+        fillvalue=None,
+        description="Acquired radar frequency band",
+    )
 
-        _create_dataset(
-            group=identification_group,
-            name="reference_zero_doppler_start_time",
-            dimensions=(),
-            data=reference_start_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "Zero doppler start time of the frame for the reference acquisition."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="reference_zero_doppler_end_time",
-            dimensions=(),
-            data=reference_end_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "Zero doppler start time of the frame for the reference acquisition."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="secondary_zero_doppler_start_time",
-            dimensions=(),
-            data=secondary_start_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "Zero doppler start time of the frame for the secondary acquisition."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="secondary_zero_doppler_end_time",
-            dimensions=(),
-            data=secondary_end_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "Zero doppler start time of the frame for the secondary acquisition."
-            ),
-        )
+    _create_dataset(
+        group=identification_group,
+        name="reference_zero_doppler_start_time",
+        dimensions=(),
+        data=reference_start_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "Zero doppler start time of the frame for the reference acquisition."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="reference_zero_doppler_end_time",
+        dimensions=(),
+        data=reference_end_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "Zero doppler start time of the frame for the reference acquisition."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="secondary_zero_doppler_start_time",
+        dimensions=(),
+        data=secondary_start_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "Zero doppler start time of the frame for the secondary acquisition."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="secondary_zero_doppler_end_time",
+        dimensions=(),
+        data=secondary_end_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "Zero doppler start time of the frame for the secondary acquisition."
+        ),
+    )
 
-        _create_dataset(
-            group=identification_group,
-            name="bounding_polygon",
-            dimensions=(),
-            data=footprint_wkt,
-            fillvalue=None,
-            description="WKT representation of bounding polygon of the image",
-            attrs={"units": "degrees"},
-        )
+    _create_dataset(
+        group=identification_group,
+        name="bounding_polygon",
+        dimensions=(),
+        data=footprint_wkt,
+        fillvalue=None,
+        description="WKT representation of bounding polygon of the image",
+        attrs={"units": "degrees"},
+    )
 
-        _create_dataset(
-            group=identification_group,
-            name="radar_wavelength",
-            dimensions=(),
-            data=radar_wavelength,
-            fillvalue=None,
-            description="Wavelength of the transmitted signal",
-            attrs={"units": "meters"},
-        )
+    _create_dataset(
+        group=identification_group,
+        name="radar_wavelength",
+        dimensions=(),
+        data=radar_wavelength,
+        fillvalue=None,
+        description="Wavelength of the transmitted signal",
+        attrs={"units": "meters"},
+    )
 
-        _create_dataset(
-            group=identification_group,
-            name="reference_datetime",
-            dimensions=(),
-            data=reference_start_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "UTC datetime of the acquisition sensing start of the reference epoch"
-                " to which the unwrapped phase is referenced."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="secondary_datetime",
-            dimensions=(),
-            data=secondary_start_time.strftime(DATETIME_FORMAT),
-            fillvalue=None,
-            description=(
-                "UTC datetime of the acquisition sensing start of current acquisition"
-                " used to create the unwrapped phase."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="average_temporal_coherence",
-            dimensions=(),
-            data=average_temporal_coherence,
-            fillvalue=None,
-            description="Mean value of valid pixels within temporal_coherence layer.",
-            attrs={"units": "unitless"},
-        )
-        # CEOS: Section 1.3
-        _create_dataset(
-            group=identification_group,
-            name="ceos_analysis_ready_data_product_type",
-            dimensions=(),
-            data="InSAR",
-            fillvalue=None,
-            description="CEOS Analysis Ready Data (CARD) product type name",
-            attrs={"units": "unitless"},
-        )
-        # CEOS: Section 1.4
-        _create_dataset(
-            group=identification_group,
-            name="ceos_analysis_ready_data_document_identifier",
-            dimensions=(),
-            data="https://ceos.org/ard/files/PFS/SAR/v1.2/CEOS-ARD_PFS_Synthetic_Aperture_Radar_v1.2.pdf",
-            fillvalue=None,
-            description="CEOS Analysis Ready Data (CARD) document identifier",
-            attrs={"units": "unitless"},
-        )
-        input_dts = sorted(
-            [get_dates(f)[0] for f in pge_runconfig.input_file_group.gslc_file_list]
-        )
-        processing_dts = sorted(
-            get_dates(f)[1]
-            for f in pge_runconfig.input_file_group.gslc_file_list
-            if "compressed" not in str(f).lower()
-        )
-        parsed_files = [
-            parse_filename(f)
-            for f in pge_runconfig.input_file_group.gslc_file_list
-            if "compressed" not in str(f).lower()
-        ]
-        input_sensors = {p.get("sensor") for p in parsed_files if p.get("sensor")}
-
-        # CEOS: Section 1.5
-        _create_dataset(
-            group=identification_group,
-            name="source_data_processing_facility",
-            dimensions=(),
-            data="NASA Jet Propulsion Laboratory on AWS",
-            fillvalue=None,
-            description="Product processing facility",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_imaging_geometry",
-            dimensions=(),
-            data="Geocoded",
-            fillvalue=None,
-            description="Imaging geometry of input coregistered SLCs",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_satellite_names",
-            dimensions=(),
-            data=",".join(input_sensors),
-            fillvalue=None,
-            description="Names of satellites included in input granules",
-        )
-        starting_date_str = input_dts[0].isoformat()
-        _create_dataset(
-            group=identification_group,
-            name="source_data_earliest_acquisition",
-            dimensions=(),
-            data=starting_date_str,
-            fillvalue=None,
-            description="Datetime of earliest input granule used during processing",
-            attrs={"units": "unitless"},
-        )
-        last_date_str = input_dts[-1].isoformat()
-        _create_dataset(
-            group=identification_group,
-            name="source_data_latest_acquisition",
-            dimensions=(),
-            data=last_date_str,
-            fillvalue=None,
-            description="Datetime of latest input granule used during processing",
-            attrs={"units": "unitless"},
-        )
-        early_processing_date_str = processing_dts[0].isoformat()
-        _create_dataset(
-            group=identification_group,
-            name="source_data_earliest_processing_datetime",
-            dimensions=(),
-            data=early_processing_date_str,
-            fillvalue=None,
-            description="Earliest processing datetime of input granules",
-            attrs={"units": "unitless"},
-        )
-        last_processing_date_str = processing_dts[-1].isoformat()
-        _create_dataset(
-            group=identification_group,
-            name="source_data_latest_processing_datetime",
-            dimensions=(),
-            data=last_processing_date_str,
-            fillvalue=None,
-            description="Latest processing datetime of input granules",
-            attrs={"units": "unitless"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="ceos_number_of_input_granules",
-            dimensions=(),
-            data=len(pge_runconfig.input_file_group.gslc_file_list),
-            fillvalue=None,
-            description="Number of input data granule used during processing.",
-            attrs={"units": "unitless"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_reference_orbit_type",
-            dimensions=(),
-            data=reference_orbit_type,
-            fillvalue=None,
-            description=(
-                "Type of orbit (forcast, near real-time, medium precision, precise,"
-                " custom)used during input data processing for the reference"
-                " acquisition"
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_secondary_orbit_type",
-            dimensions=(),
-            data=secondary_orbit_type,
-            fillvalue=None,
-            description=(
-                "Type of orbit (forcast, near real-time, medium precision, precise,"
-                " custom)used during input data processing for the secondary"
-                " acquisition"
-            ),
-        )
+    _create_dataset(
+        group=identification_group,
+        name="reference_datetime",
+        dimensions=(),
+        data=reference_start_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "UTC datetime of the acquisition sensing start of the reference epoch"
+            " to which the unwrapped phase is referenced."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="secondary_datetime",
+        dimensions=(),
+        data=secondary_start_time.strftime(DATETIME_FORMAT),
+        fillvalue=None,
+        description=(
+            "UTC datetime of the acquisition sensing start of current acquisition"
+            " used to create the unwrapped phase."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="average_temporal_coherence",
+        dimensions=(),
+        data=average_temporal_coherence,
+        fillvalue=None,
+        description="Mean value of valid pixels within temporal_coherence layer.",
+        attrs={"units": "unitless"},
+    )
+    # CEOS: Section 1.3
+    _create_dataset(
+        group=identification_group,
+        name="ceos_analysis_ready_data_product_type",
+        dimensions=(),
+        data="InSAR",
+        fillvalue=None,
+        description="CEOS Analysis Ready Data (CARD) product type name",
+        attrs={"units": "unitless"},
+    )
+    # CEOS: Section 1.4
+    _create_dataset(
+        group=identification_group,
+        name="ceos_analysis_ready_data_document_identifier",
+        dimensions=(),
+        data="https://ceos.org/ard/files/PFS/SAR/v1.2/CEOS-ARD_PFS_Synthetic_Aperture_Radar_v1.2.pdf",
+        fillvalue=None,
+        description="CEOS Analysis Ready Data (CARD) document identifier",
+        attrs={"units": "unitless"},
+    )
+    input_dts = sorted(
+        [get_dates(f)[0] for f in pge_runconfig.input_file_group.gslc_file_list]
+    )
+    processing_dts = sorted(
+        get_dates(f)[1]
+        for f in pge_runconfig.input_file_group.gslc_file_list
+        if "compressed" not in str(f).lower()
+    )
+    parsed_files = [
+        parse_filename(f)
+        for f in pge_runconfig.input_file_group.gslc_file_list
+        if "compressed" not in str(f).lower()
+    ]
+    input_sensors = {p.get("sensor") for p in parsed_files if p.get("sensor")}
+
+    # CEOS: Section 1.5
+    _create_dataset(
+        group=identification_group,
+        name="source_data_processing_facility",
+        dimensions=(),
+        data="NASA Jet Propulsion Laboratory on AWS",
+        fillvalue=None,
+        description="Product processing facility",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_imaging_geometry",
+        dimensions=(),
+        data="Geocoded",
+        fillvalue=None,
+        description="Imaging geometry of input coregistered SLCs",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_satellite_names",
+        dimensions=(),
+        data=",".join(input_sensors),
+        fillvalue=None,
+        description="Names of satellites included in input granules",
+    )
+    starting_date_str = input_dts[0].isoformat()
+    _create_dataset(
+        group=identification_group,
+        name="source_data_earliest_acquisition",
+        dimensions=(),
+        data=starting_date_str,
+        fillvalue=None,
+        description="Datetime of earliest input granule used during processing",
+        attrs={"units": "unitless"},
+    )
+    last_date_str = input_dts[-1].isoformat()
+    _create_dataset(
+        group=identification_group,
+        name="source_data_latest_acquisition",
+        dimensions=(),
+        data=last_date_str,
+        fillvalue=None,
+        description="Datetime of latest input granule used during processing",
+        attrs={"units": "unitless"},
+    )
+    early_processing_date_str = processing_dts[0].isoformat()
+    _create_dataset(
+        group=identification_group,
+        name="source_data_earliest_processing_datetime",
+        dimensions=(),
+        data=early_processing_date_str,
+        fillvalue=None,
+        description="Earliest processing datetime of input granules",
+        attrs={"units": "unitless"},
+    )
+    last_processing_date_str = processing_dts[-1].isoformat()
+    _create_dataset(
+        group=identification_group,
+        name="source_data_latest_processing_datetime",
+        dimensions=(),
+        data=last_processing_date_str,
+        fillvalue=None,
+        description="Latest processing datetime of input granules",
+        attrs={"units": "unitless"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="ceos_number_of_input_granules",
+        dimensions=(),
+        data=len(pge_runconfig.input_file_group.gslc_file_list),
+        fillvalue=None,
+        description="Number of input data granule used during processing.",
+        attrs={"units": "unitless"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_reference_orbit_type",
+        dimensions=(),
+        data=reference_orbit_type,
+        fillvalue=None,
+        description=(
+            "Type of orbit (forcast, near real-time, medium precision, precise,"
+            " custom)used during input data processing for the reference"
+            " acquisition"
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_secondary_orbit_type",
+        dimensions=(),
+        data=secondary_orbit_type,
+        fillvalue=None,
+        description=(
+            "Type of orbit (forcast, near real-time, medium precision, precise,"
+            " custom)used during input data processing for the secondary"
+            " acquisition"
+        ),
+    )
 
-        # CEOS: Section 1.6.4 source acquisition parameters
-        _create_dataset(
-            group=identification_group,
-            name="acquisition_mode",
-            dimensions=(),
-            data="IW",
-            fillvalue=None,
-            description="Radar acquisition mode for input products",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="radar_center_frequency",
-            dimensions=(),
-            data=5405000454.33435,
-            fillvalue=None,
-            description="Radar center frequency of input products",
-            attrs={"units": "Hertz"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_acquisition_polarization",
-            dimensions=(),
-            data="VV/VH",
-            fillvalue=None,
-            description="Polarization type of source radar acquisition ",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_polarization",
-            dimensions=(),
-            data="HH",
-            fillvalue=None,
-            description="Radar polarization of input products used",
-            attrs={"units": "unitless"},
-        )
-        # CEOS: Section 1.6.7 source data attributes
-        _create_dataset(
-            group=identification_group,
-            name="source_data_original_institution",
-            dimensions=(),
-            data=(
-                "NASA's Jet Propulsion Laboratory (JPL) and ISRO (Indian Space Research"
-                " Organisation)"
-            ),
-            fillvalue=None,
-            description="Original processing institution of NISAR SLC data",
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_access",
-            dimensions=(),
-            data="https://search.asf.alaska.edu/#/?dataset=OPERA-NI&productTypes=CSLC",
-            fillvalue=None,
-            description=(
-                "The metadata identifies the location from where the source data can be"
-                " retrieved, expressed as a URL or DOI."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_file_list",
-            dimensions=(),
-            data=",".join(
-                p.stem for p in pge_runconfig.input_file_group.gslc_file_list
-            ),
-            fillvalue=None,
-            description=(
-                "List of input coregistered SLC granules used to create displacement"
-                " frame"
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_range_resolutions",
-            dimensions=(),
-            data="[3-10, 30-50, 7-10]",
-            fillvalue=None,
-            description=(
-                "List of [StripMap, ScanSAR and Interferometric wide swath mode]"
-                "range resolutions from source L1 NISAR SLCs"
-            ),
-            attrs={"units": "meters"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_azimuth_resolutions",
-            dimensions=(),
-            data="[3-10, 30-50, 7-10]",
-            fillvalue=None,
-            description=(
-                "List of [StripMap, ScanSAR and Interferometric wide swath mode]"
-                "azimuth resolutions from source L1 NISAR SLCs"
-            ),
-            attrs={"units": "meters"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_x_spacing",
-            dimensions=(),
-            data=10,
-            fillvalue=None,
-            description="Pixel spacing of source geocoded SLC data in the x-direction.",
-            attrs={"units": "meters"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_y_spacing",
-            dimensions=(),
-            data=10,
-            fillvalue=None,
-            description="Pixel spacing of source geocoded SLC data in the y-direction.",
-            attrs={"units": "meters"},
-        )
-        # Source for the max. NESZ:
-        # (https://sentinels.copernicus.eu/web/sentinel/user-guides/
-        # 1.6.9
-        _create_dataset(
-            group=identification_group,
-            name="source_data_max_noise_equivalent_sigma_zero",
-            dimensions=(),
-            data=-22.0,
-            fillvalue=None,
-            description="Maximum Noise equivalent sigma0 in dB",
-            attrs={"units": "dB"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="source_data_dem_name",
-            dimensions=(),
-            data="Copernicus GLO-30",
-            fillvalue=None,
-            description=(
-                "Name of Digital Elevation Model used during input data processing."
-            ),
-        )
-        _create_dataset(
-            group=identification_group,
-            name="near_range_incidence_angle",
-            dimensions=(),
-            data=near_far_incidence_angles[0],
-            fillvalue=None,
-            description="Incidence angle at the near range of the displacement frame",
-            attrs={"units": "degrees"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="far_range_incidence_angle",
-            dimensions=(),
-            data=near_far_incidence_angles[1],
-            fillvalue=None,
-            description="Incidence angle at the far range of the displacement frame",
-            attrs={"units": "degrees"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="product_data_polarization",
-            dimensions=(),
-            data="VV",
-            fillvalue=None,
-            description="Radar polarization of displacement products",
-        )
-        # CEOS: 1.7.3
-        _create_dataset(
-            group=identification_group,
-            name="product_sample_spacing",
-            dimensions=(),
-            data=30,
-            fillvalue=None,
-            description=(
-                "Spacing between adjacent X/Y samples of displacement product in UTM"
-                " coordinates"
-            ),
-            attrs={"units": "meters"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="nodata_pixel_count",
-            dimensions=(),
-            data=num_nodata_pixels,
-            fillvalue=None,
-            description="Number of nodata pixels",
-            attrs={"units": "unitless"},
-        )
-        # CEOS: 1.7.7
-        _create_dataset(
-            group=identification_group,
-            name="product_bounding_box",
-            dimensions=(),
-            data=",".join(map(str, product_bounds)),
-            fillvalue=None,
-            description=(
-                "Opposite corners of the product file in the UTM coordinates as (west,"
-                " south, east, north)"
-            ),
-            attrs={"units": "meters"},
-        )
-        _create_dataset(
-            group=identification_group,
-            name="product_data_access",
-            dimensions=(),
-            data=(
-                "https://search.asf.alaska.edu/#/?dataset=OPERA-S1&productTypes=DISP-S1"
-            ),
-            fillvalue=None,
-            description=(
-                "The metadata identifies the location from where the source data can be"
-                " retrieved, expressed as a URL or DOI."
-            ),
-        )
+    # CEOS: Section 1.6.4 source acquisition parameters
+    _create_dataset(
+        group=identification_group,
+        name="acquisition_mode",
+        dimensions=(),
+        data="IW",
+        fillvalue=None,
+        description="Radar acquisition mode for input products",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="radar_center_frequency",
+        dimensions=(),
+        data=5405000454.33435,
+        fillvalue=None,
+        description="Radar center frequency of input products",
+        attrs={"units": "Hertz"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_acquisition_polarization",
+        dimensions=(),
+        data="VV/VH",
+        fillvalue=None,
+        description="Polarization type of source radar acquisition ",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_polarization",
+        dimensions=(),
+        data="HH",
+        fillvalue=None,
+        description="Radar polarization of input products used",
+        attrs={"units": "unitless"},
+    )
+    # CEOS: Section 1.6.7 source data attributes
+    _create_dataset(
+        group=identification_group,
+        name="source_data_original_institution",
+        dimensions=(),
+        data=(
+            "NASA's Jet Propulsion Laboratory (JPL) and ISRO (Indian Space Research"
+            " Organisation)"
+        ),
+        fillvalue=None,
+        description="Original processing institution of NISAR SLC data",
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_access",
+        dimensions=(),
+        data="https://search.asf.alaska.edu/#/?dataset=OPERA-NI&productTypes=CSLC",
+        fillvalue=None,
+        description=(
+            "The metadata identifies the location from where the source data can be"
+            " retrieved, expressed as a URL or DOI."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_file_list",
+        dimensions=(),
+        data=",".join(p.stem for p in pge_runconfig.input_file_group.gslc_file_list),
+        fillvalue=None,
+        description=(
+            "List of input coregistered SLC granules used to create displacement frame"
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_range_resolutions",
+        dimensions=(),
+        data="[3-10, 30-50, 7-10]",
+        fillvalue=None,
+        description=(
+            "List of [StripMap, ScanSAR and Interferometric wide swath mode]"
+            "range resolutions from source L1 NISAR SLCs"
+        ),
+        attrs={"units": "meters"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_azimuth_resolutions",
+        dimensions=(),
+        data="[3-10, 30-50, 7-10]",
+        fillvalue=None,
+        description=(
+            "List of [StripMap, ScanSAR and Interferometric wide swath mode]"
+            "azimuth resolutions from source L1 NISAR SLCs"
+        ),
+        attrs={"units": "meters"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_x_spacing",
+        dimensions=(),
+        data=10,
+        fillvalue=None,
+        description="Pixel spacing of source geocoded SLC data in the x-direction.",
+        attrs={"units": "meters"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_y_spacing",
+        dimensions=(),
+        data=10,
+        fillvalue=None,
+        description="Pixel spacing of source geocoded SLC data in the y-direction.",
+        attrs={"units": "meters"},
+    )
+    # Source for the max. NESZ:
+    # (https://sentinels.copernicus.eu/web/sentinel/user-guides/
+    # 1.6.9
+    _create_dataset(
+        group=identification_group,
+        name="source_data_max_noise_equivalent_sigma_zero",
+        dimensions=(),
+        data=-22.0,
+        fillvalue=None,
+        description="Maximum Noise equivalent sigma0 in dB",
+        attrs={"units": "dB"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="source_data_dem_name",
+        dimensions=(),
+        data="Copernicus GLO-30",
+        fillvalue=None,
+        description=(
+            "Name of Digital Elevation Model used during input data processing."
+        ),
+    )
+    _create_dataset(
+        group=identification_group,
+        name="near_range_incidence_angle",
+        dimensions=(),
+        data=near_far_incidence_angles[0],
+        fillvalue=None,
+        description="Incidence angle at the near range of the displacement frame",
+        attrs={"units": "degrees"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="far_range_incidence_angle",
+        dimensions=(),
+        data=near_far_incidence_angles[1],
+        fillvalue=None,
+        description="Incidence angle at the far range of the displacement frame",
+        attrs={"units": "degrees"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="product_data_polarization",
+        dimensions=(),
+        data="VV",
+        fillvalue=None,
+        description="Radar polarization of displacement products",
+    )
+    # CEOS: 1.7.3
+    _create_dataset(
+        group=identification_group,
+        name="product_sample_spacing",
+        dimensions=(),
+        data=30,
+        fillvalue=None,
+        description=(
+            "Spacing between adjacent X/Y samples of displacement product in UTM"
+            " coordinates"
+        ),
+        attrs={"units": "meters"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="nodata_pixel_count",
+        dimensions=(),
+        data=num_nodata_pixels,
+        fillvalue=None,
+        description="Number of nodata pixels",
+        attrs={"units": "unitless"},
+    )
+    # CEOS: 1.7.7
+    _create_dataset(
+        group=identification_group,
+        name="product_bounding_box",
+        dimensions=(),
+        data=",".join(map(str, product_bounds)),
+        fillvalue=None,
+        description=(
+            "Opposite corners of the product file in the UTM coordinates as (west,"
+            " south, east, north)"
+        ),
+        attrs={"units": "meters"},
+    )
+    _create_dataset(
+        group=identification_group,
+        name="product_data_access",
+        dimensions=(),
+        data=("https://search.asf.alaska.edu/#/?dataset=OPERA-S1&productTypes=DISP-S1"),
+        fillvalue=None,
+        description=(
+            "The metadata identifies the location from where the source data can be"
+            " retrieved, expressed as a URL or DOI."
+        ),
+    )
 
 
 def _create_metadata_group(
-    output_name: Filename,
+    f: h5netcdf.File,
     pge_runconfig: RunConfig,
     dolphin_config: DisplacementWorkflow,
 ) -> None:
     """Create the metadata group in the output file."""
-    logger.info("Creating /metadata group in %s", output_name)
-    with h5netcdf.File(output_name, "a") as f:
-        metadata_group = f.create_group(METADATA_GROUP_NAME)
-        _create_dataset(
-            group=metadata_group,
-            name="algorithm_theoretical_basis_document_id",
-            dimensions=(),
-            data="JPL D-108765",
-            fillvalue=None,
-            description=(
-                "Document identifier for Algorithm Theoretical Basis Document (ATBD)"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="product_specification_document_id",
-            dimensions=(),
-            data="JPL D-108772",
-            fillvalue=None,
-            description="Document identifier for Product Specification",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="disp_nisar_software_version",
-            dimensions=(),
-            data=disp_nisar_version,
-            fillvalue=None,
-            description=(
-                "Version of the disp-nisar software used to generate the product."
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="dolphin_software_version",
-            dimensions=(),
-            data=dolphin_version,
-            fillvalue=None,
-            description="Version of the dolphin software used to generate the product.",
-        )
+    logger.info("Creating /metadata group in %s", f.filename)
+    metadata_group = f.create_group(METADATA_GROUP_NAME)
+    _create_dataset(
+        group=metadata_group,
+        name="algorithm_theoretical_basis_document_id",
+        dimensions=(),
+        data="JPL D-108765",
+        fillvalue=None,
+        description=(
+            "Document identifier for Algorithm Theoretical Basis Document (ATBD)"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="product_specification_document_id",
+        dimensions=(),
+        data="JPL D-108772",
+        fillvalue=None,
+        description="Document identifier for Product Specification",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="disp_nisar_software_version",
+        dimensions=(),
+        data=disp_nisar_version,
+        fillvalue=None,
+        description=(
+            "Version of the disp-nisar software used to generate the product."
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="dolphin_software_version",
+        dimensions=(),
+        data=dolphin_version,
+        fillvalue=None,
+        description="Version of the dolphin software used to generate the product.",
+    )
 
-        def _to_string(model: YamlModel):
-            ss = StringIO()
-            model.to_yaml(ss)
-            return "".join(c for c in ss.getvalue() if ord(c) < 128)
-
-        _create_dataset(
-            group=metadata_group,
-            name="pge_runconfig",
-            dimensions=(),
-            data=_to_string(pge_runconfig),
-            fillvalue=None,
-            description=(
-                "The full PGE runconfig YAML file used to generate the product."
-            ),
-        )
-        algo_param_path = (
-            pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
-        )
-        param_str = "".join(c for c in algo_param_path.read_text() if ord(c) < 128)
-        _create_dataset(
-            group=metadata_group,
-            name="algorithm_parameters_yaml",
-            dimensions=(),
-            data=param_str,
-            fillvalue=None,
-            description=(
-                "The algorithm parameters used in the runconfig YAML file used to"
-                " generate the product."
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="dolphin_workflow_config",
-            dimensions=(),
-            data=_to_string(dolphin_config),
-            fillvalue=None,
-            description=(
-                "The configuration parameters used by `dolphin` during the processing."
-            ),
-        )
-        # CEOS 1.7.10
-        _create_dataset(
-            group=metadata_group,
-            name="product_pixel_coordinate_convention",
-            dimensions=(),
-            data="pixel_center",
-            fillvalue=None,
-            description="x/y coordinate convention referring to pixel center or corner",
-        )
-        # CEOS 3.11
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_product_measurement_projection",
-            dimensions=(),
-            data="line of sight",
-            fillvalue=None,
-            description=(
-                "Projection of the displacement image (Line of sight, Horizontal,"
-                " Vertical)"
-            ),
-        )
-        # CEOS 4.5
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_gridding_convention",
-            dimensions=(),
-            data="Snap to grid",
-            fillvalue=None,
-            description=(
-                "Whether a consistent gridding/sampling frame is used for"
-                " ascending/descending frames."
-            ),
-        )
-        # CEOS 1.7.16
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_insar_pair_baseline_criteria_information",
-            dimensions=(),
-            data="All",
-            fillvalue=None,
-            description="InSAR pair baseline selection criteria",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_insar_azimuth_common_band_filtering",
-            dimensions=(),
-            data="False",
-            fillvalue=None,
-            description=(
-                "Flag to indicate if azimuth filtering applied during interferogram"
-                " formation"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_insar_range_spectral_shift_filtering",
-            dimensions=(),
-            data="False",
-            fillvalue=None,
-            description=(
-                "Flag to indicate if range spectral shift filtering applied during"
-                " interferogram formation"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_insar_orbital_baseline_refinement",
-            dimensions=(),
-            data="False",
-            fillvalue=None,
-            description=(
-                "Flag to indicate if baseline refinement applied during interferogram"
-                " formation"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_shp_selection_selection_criteria",
-            dimensions=(),
-            data=str(dolphin_config.phase_linking.shp_method.value),
-            fillvalue=None,
-            description="Name of statistically homogeneous pixel selection criteria",
-        )
-        row_size, col_size = dolphin_config.phase_linking.half_window.to_looks()
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_shp_selection_window_size",
-            dimensions=(),
-            data=f"{row_size}x{col_size}",
-            fillvalue=None,
-            description=(
-                "Size of window as (rows x columns) in pixels to search for SHPs"
-            ),
-            attrs={"units": "pixels"},
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_shp_selection_selection_threshold",
-            dimensions=(),
-            data=dolphin_config.phase_linking.shp_alpha,
-            fillvalue=None,
-            description="Threshold for selecting statistically homogeneous pixels",
-            attrs={"units": "unitless"},
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_persistent_scatterer_selection_criteria",
-            dimensions=(),
-            data="Amplitude Dispersion",
-            fillvalue=None,
-            description="Name of persistent scatterer selection criteria",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_persistent_scatterer_amplitude_dispersion_threshold",
-            dimensions=(),
-            data=dolphin_config.ps_options.amp_dispersion_threshold,
-            fillvalue=None,
-            description="Threshold for persistent scatterer selection",
-            attrs={"units": "unitless"},
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_persistent_scatterer_selection_criteria_doi",
-            dimensions=(),
-            data="https://doi.org/10.1109/36.898661",
-            fillvalue=None,
-            description=(
-                "DOI of reference describing persistent scatterer selection criteria"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_phase_similarity_metric_doi",
-            dimensions=(),
-            data="https://doi.org/10.1109/TGRS.2022.3210868",
-            fillvalue=None,
-            description="DOI of reference describing phase cosine similarity metric",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_estimated_phase_quality_metric_algorithm",
-            dimensions=(),
-            data="Gaussian filtering",
-            fillvalue=None,
-            description=(
-                "Algorithm used on wrapped phase to create estimated phase"
-                " quality metric"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_phase_unwrapping_method",
-            dimensions=(),
-            data=str(dolphin_config.unwrap_options.unwrap_method.value),
-            fillvalue=None,
-            description="Name of phase unwrapping method",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_phase_unwrapping_snaphu_doi",
-            dimensions=(),
-            data="https://doi.org/10.1364/JOSAA.18.000338",
-            fillvalue=None,
-            description="DOI to reference describing SNAPHU phase unwrapping algorithm",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_phase_unwrapping_spurt_doi",
-            dimensions=(),
-            data="https://doi.org/10.1016/j.rse.2023.113456",
-            fillvalue=None,
-            description="DOI to reference describing spurt phase unwrapping algorithm",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_phase_unwrapping_similarity_threshold",
-            dimensions=(),
-            data=dolphin_config.unwrap_options.preprocess_options.interpolation_similarity_threshold,
-            fillvalue=None,
-            description=(
-                "Threshold on phase similarity used to mask and interpolate"
-                " interferogram before unwrapping"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_atmospheric_phase_correction",
-            dimensions=(),
-            data="None",
-            fillvalue=None,
-            description="Method used to correct for atmosphere phase noise",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_ionospheric_phase_correction",
-            dimensions=(),
-            data="None",
-            fillvalue=None,
-            description="Method used to correct for ionospheric phase noise",
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_noise_removal",
-            dimensions=(),
-            data="No",
-            fillvalue=None,
-            description=(
-                "Flag if noise removal* has been applied (Y/N). Metadata should include"
-                " the noise removal algorithm and reference to the algorithm as URL or"
-                " DOI."
-            ),
-        )
-        # CEOS 4.3
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_absolute_geolocation_ground_range_bias",
-            dimensions=(),
-            data=-0.06,
-            fillvalue=None,
-            attrs={"units": "meters"},
-            description=(
-                "Estimated mean absolute geolocation error for input geocoded SLCs, as"
-                " assessed via corner reflector analysis, in the ground range direction"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_absolute_geolocation_ground_range_stddev",
-            dimensions=(),
-            data=0.38,
-            fillvalue=None,
-            attrs={"units": "meters"},
-            description=(
-                "Estimated standard deviation of absolute geolocation error for input"
-                " geocoded SLCs, as assessed via corner reflector analysis, in the"
-                " ground range direction"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_absolute_geolocation_azimuth_bias",
-            dimensions=(),
-            data=-0.04,
-            fillvalue=None,
-            attrs={"units": "meters"},
-            description=(
-                "Estimated mean absolute geolocation error for input geocoded SLCs, as"
-                " assessed via corner reflector analysis, in the azimuth direction"
-            ),
-        )
-        _create_dataset(
-            group=metadata_group,
-            name="ceos_absolute_geolocation_azimuth_stddev",
-            dimensions=(),
-            data=0.46,
-            fillvalue=None,
-            attrs={"units": "meters"},
-            description=(
-                "Estimated standard deviation of absolute geolocation error for input"
-                " geocoded SLCs, as assessed via corner reflector analysis, in the"
-                " azimuth direction"
-            ),
-        )
+    def _to_string(model: YamlModel):
+        ss = StringIO()
+        model.to_yaml(ss)
+        return "".join(c for c in ss.getvalue() if ord(c) < 128)
+
+    _create_dataset(
+        group=metadata_group,
+        name="pge_runconfig",
+        dimensions=(),
+        data=_to_string(pge_runconfig),
+        fillvalue=None,
+        description=("The full PGE runconfig YAML file used to generate the product."),
+    )
+    algo_param_path = (
+        pge_runconfig.dynamic_ancillary_file_group.algorithm_parameters_file
+    )
+    param_str = "".join(c for c in algo_param_path.read_text() if ord(c) < 128)
+    _create_dataset(
+        group=metadata_group,
+        name="algorithm_parameters_yaml",
+        dimensions=(),
+        data=param_str,
+        fillvalue=None,
+        description=(
+            "The algorithm parameters used in the runconfig YAML file used to"
+            " generate the product."
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="dolphin_workflow_config",
+        dimensions=(),
+        data=_to_string(dolphin_config),
+        fillvalue=None,
+        description=(
+            "The configuration parameters used by `dolphin` during the processing."
+        ),
+    )
+    # CEOS 1.7.10
+    _create_dataset(
+        group=metadata_group,
+        name="product_pixel_coordinate_convention",
+        dimensions=(),
+        data="pixel_center",
+        fillvalue=None,
+        description="x/y coordinate convention referring to pixel center or corner",
+    )
+    # CEOS 3.11
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_product_measurement_projection",
+        dimensions=(),
+        data="line of sight",
+        fillvalue=None,
+        description=(
+            "Projection of the displacement image (Line of sight, Horizontal, Vertical)"
+        ),
+    )
+    # CEOS 4.5
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_gridding_convention",
+        dimensions=(),
+        data="Snap to grid",
+        fillvalue=None,
+        description=(
+            "Whether a consistent gridding/sampling frame is used for"
+            " ascending/descending frames."
+        ),
+    )
+    # CEOS 1.7.16
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_insar_pair_baseline_criteria_information",
+        dimensions=(),
+        data="All",
+        fillvalue=None,
+        description="InSAR pair baseline selection criteria",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_insar_azimuth_common_band_filtering",
+        dimensions=(),
+        data="False",
+        fillvalue=None,
+        description=(
+            "Flag to indicate if azimuth filtering applied during interferogram"
+            " formation"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_insar_range_spectral_shift_filtering",
+        dimensions=(),
+        data="False",
+        fillvalue=None,
+        description=(
+            "Flag to indicate if range spectral shift filtering applied during"
+            " interferogram formation"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_insar_orbital_baseline_refinement",
+        dimensions=(),
+        data="False",
+        fillvalue=None,
+        description=(
+            "Flag to indicate if baseline refinement applied during interferogram"
+            " formation"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_shp_selection_selection_criteria",
+        dimensions=(),
+        data=str(dolphin_config.phase_linking.shp_method.value),
+        fillvalue=None,
+        description="Name of statistically homogeneous pixel selection criteria",
+    )
+    row_size, col_size = dolphin_config.phase_linking.half_window.to_looks()
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_shp_selection_window_size",
+        dimensions=(),
+        data=f"{row_size}x{col_size}",
+        fillvalue=None,
+        description=("Size of window as (rows x columns) in pixels to search for SHPs"),
+        attrs={"units": "pixels"},
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_shp_selection_selection_threshold",
+        dimensions=(),
+        data=dolphin_config.phase_linking.shp_alpha,
+        fillvalue=None,
+        description="Threshold for selecting statistically homogeneous pixels",
+        attrs={"units": "unitless"},
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_persistent_scatterer_selection_criteria",
+        dimensions=(),
+        data="Amplitude Dispersion",
+        fillvalue=None,
+        description="Name of persistent scatterer selection criteria",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_persistent_scatterer_amplitude_dispersion_threshold",
+        dimensions=(),
+        data=dolphin_config.ps_options.amp_dispersion_threshold,
+        fillvalue=None,
+        description="Threshold for persistent scatterer selection",
+        attrs={"units": "unitless"},
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_persistent_scatterer_selection_criteria_doi",
+        dimensions=(),
+        data="https://doi.org/10.1109/36.898661",
+        fillvalue=None,
+        description=(
+            "DOI of reference describing persistent scatterer selection criteria"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_phase_similarity_metric_doi",
+        dimensions=(),
+        data="https://doi.org/10.1109/TGRS.2022.3210868",
+        fillvalue=None,
+        description="DOI of reference describing phase cosine similarity metric",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_estimated_phase_quality_metric_algorithm",
+        dimensions=(),
+        data="Gaussian filtering",
+        fillvalue=None,
+        description=(
+            "Algorithm used on wrapped phase to create estimated phase quality metric"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_phase_unwrapping_method",
+        dimensions=(),
+        data=str(dolphin_config.unwrap_options.unwrap_method.value),
+        fillvalue=None,
+        description="Name of phase unwrapping method",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_phase_unwrapping_snaphu_doi",
+        dimensions=(),
+        data="https://doi.org/10.1364/JOSAA.18.000338",
+        fillvalue=None,
+        description="DOI to reference describing SNAPHU phase unwrapping algorithm",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_phase_unwrapping_spurt_doi",
+        dimensions=(),
+        data="https://doi.org/10.1016/j.rse.2023.113456",
+        fillvalue=None,
+        description="DOI to reference describing spurt phase unwrapping algorithm",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_phase_unwrapping_similarity_threshold",
+        dimensions=(),
+        data=dolphin_config.unwrap_options.preprocess_options.interpolation_similarity_threshold,
+        fillvalue=None,
+        description=(
+            "Threshold on phase similarity used to mask and interpolate"
+            " interferogram before unwrapping"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_atmospheric_phase_correction",
+        dimensions=(),
+        data="None",
+        fillvalue=None,
+        description="Method used to correct for atmosphere phase noise",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_ionospheric_phase_correction",
+        dimensions=(),
+        data="None",
+        fillvalue=None,
+        description="Method used to correct for ionospheric phase noise",
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_noise_removal",
+        dimensions=(),
+        data="No",
+        fillvalue=None,
+        description=(
+            "Flag if noise removal* has been applied (Y/N). Metadata should include"
+            " the noise removal algorithm and reference to the algorithm as URL or"
+            " DOI."
+        ),
+    )
+    # CEOS 4.3
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_absolute_geolocation_ground_range_bias",
+        dimensions=(),
+        data=-0.06,
+        fillvalue=None,
+        attrs={"units": "meters"},
+        description=(
+            "Estimated mean absolute geolocation error for input geocoded SLCs, as"
+            " assessed via corner reflector analysis, in the ground range direction"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_absolute_geolocation_ground_range_stddev",
+        dimensions=(),
+        data=0.38,
+        fillvalue=None,
+        attrs={"units": "meters"},
+        description=(
+            "Estimated standard deviation of absolute geolocation error for input"
+            " geocoded SLCs, as assessed via corner reflector analysis, in the"
+            " ground range direction"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_absolute_geolocation_azimuth_bias",
+        dimensions=(),
+        data=-0.04,
+        fillvalue=None,
+        attrs={"units": "meters"},
+        description=(
+            "Estimated mean absolute geolocation error for input geocoded SLCs, as"
+            " assessed via corner reflector analysis, in the azimuth direction"
+        ),
+    )
+    _create_dataset(
+        group=metadata_group,
+        name="ceos_absolute_geolocation_azimuth_stddev",
+        dimensions=(),
+        data=0.46,
+        fillvalue=None,
+        attrs={"units": "meters"},
+        description=(
+            "Estimated standard deviation of absolute geolocation error for input"
+            " geocoded SLCs, as assessed via corner reflector analysis, in the"
+            " azimuth direction"
+        ),
+    )
 
 
-def _get_orbit_direction(cslc_filename: Filename) -> Literal["ascending", "descending"]:
-    with open_h5_file(cslc_filename) as hf:
-        # NISAR path; fall back to the legacy OPERA-CSLC path for old fixtures.
-        if "/science/LSAR/identification/orbitPassDirection" in hf:
-            out = hf["/science/LSAR/identification/orbitPassDirection"][()]
-        else:
-            out = hf["/identification/orbit_pass_direction"][()]
-        if isinstance(out, bytes):
-            out = out.decode("utf-8")
-    return out.lower()
+def _get_orbit_direction(
+    cslc_filename: Filename, metadata_index: GslcMetadataIndex | None = None
+) -> Literal["ascending", "descending"]:
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex()
+    # NISAR path, or the legacy OPERA-CSLC path for old fixtures (see `scan_gslc`)
+    out = metadata_index.get(cslc_filename).orbit_direction
+    if out is None:
+        raise ValueError(f"No orbit pass direction found in {cslc_filename}")
+    return cast(Literal["ascending", "descending"], out)
 
 
 def _get_orbit_type(
-    cslc_filename: Filename,
+    cslc_filename: Filename, metadata_index: GslcMetadataIndex | None = None
 ) -> Literal[
     "Forecast Orbit Ephemeris",
     "Near real-time Orbit Ephemeris",
@@ -1561,10 +1613,11 @@ def _get_orbit_type(
         "MOE": "Medium precision Orbit Ephemeris",
         "DOE": "custom",
     }
-    with open_h5_file(cslc_filename) as hf:
-        out = hf["/science/LSAR/GSLC/metadata/orbit/orbitType"][()]
-        if isinstance(out, bytes):
-            out = out.decode("utf-8")
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex()
+    out = metadata_index.get(cslc_filename).orbit_type
+    if out not in orbit_types:
+        raise ValueError(f"Unknown orbit type {out!r} in {cslc_filename}")
 
     # Use cast to explicitly tell the type checker the return value is a Literal
     return cast(
@@ -1579,6 +1632,389 @@ def _get_orbit_type(
     )
 
 
+def get_start_end_cslcs(files: Sequence[Filename]) -> tuple[Filename, Filename]:
+    """Get the first and last CSLC files (in acquisition order) of one date."""
+    if len(files) == 1:
+        start = end = files[0]
+    else:
+        # TODO: Check this, there is no burst id
+        # Sorting by name means the earlier Burst IDs come first.
+        # Since the Burst Ids are numbered in increasing order of acquisition time,
+        # This is also valid to get the start/end bursts within the frame.
+        start, *_, end = sorted(files, key=lambda f: Path(f).name)
+    logger.debug(f"Start, end files: {start}, {end}")
+    return start, end
+
+
+def get_baseline_grid(
+    gt: list[float], shape: tuple[int, int], algorithm_parameters: AlgorithmParameters
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the (y, x) coordinates where the perpendicular baselines are computed."""
+    if algorithm_parameters.correction_layer_grid == "coarse":
+        # Computed and stored directly on the coarse grid
+        grid = CoarseGrid(
+            gt=tuple(gt),
+            shape=shape,
+            subsample=algorithm_parameters.correction_subsample,
+        )
+        return grid.coordinates()
+    y, x = _create_yx_arrays(gt=gt, shape=shape)
+    # TODO: do we need all corrections/smaller grids to be same subsample factor?
+    subsample = 50
+    return y[::subsample], x[::subsample]
+
+
+def get_acquisition_times(
+    cslc_files: Sequence[Filename],
+    metadata_index: GslcMetadataIndex | None = None,
+) -> tuple[datetime.datetime, datetime.datetime]:
+    """Get the zero Doppler start and end times of the acquisition in `cslc_files`.
+
+    The times are looked up in `metadata_index`, if given, else read from the files.
+    """
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex()
+    start_file, end_file = get_start_end_cslcs(cslc_files)
+    start_time = metadata_index.get(start_file).zero_doppler_start_time
+    end_time = metadata_index.get(end_file).zero_doppler_end_time
+    if start_time is None or end_time is None:
+        msg = f"Missing zero Doppler start/end time in {start_file}, {end_file}"
+        raise ValueError(msg)
+    return start_time, end_time
+
+
+def create_static_layer_cache(
+    output_name: Filename,
+    layer_files: Mapping[str, Filename | None],
+    algorithm_parameters: AlgorithmParameters,
+    max_workers: int | None = None,
+) -> Path:
+    """Compress the layers shared by all products of a run, once.
+
+    Each layer is rounded and compressed with the same filters as the product
+    layers (`HDF5_OPTS`), so `create_output_product` can copy its chunks as is.
+    If the temporal coherence and similarity are given, the part of the
+    `recommended_mask` not depending on the interferogram (water, and low
+    temporal coherence with low similarity) is stored as well.
+
+    Parameters
+    ----------
+    output_name : Filename
+        Path to the HDF5 cache file to create.
+    layer_files : Mapping[str, Filename | None]
+        Source raster for each product layer name (see `DISPLACEMENT_PRODUCTS`).
+        Missing files are skipped.
+    algorithm_parameters : AlgorithmParameters
+        Used for the recommended mask thresholds.
+    max_workers : int, optional
+        Number of threads compressing chunks. Default is the number of CPUs.
+
+    Returns
+    -------
+    Path
+        `output_name`
+
+    """
+    output_name = Path(output_name)
+    files = {
+        name: Path(filename)
+        for name, filename in layer_files.items()
+        if filename is not None and Path(filename).exists()
+    }
+    if not files:
+        raise ValueError("No static layer files to cache")
+    cols, rows = io.get_raster_xysize(next(iter(files.values())))
+    shape = (rows, cols)
+    has_mask_inputs = all(name in files for name in STATIC_MASK_INPUTS[:2])
+
+    logger.info(f"Caching compressed static layers {sorted(files)} in {output_name}")
+    # Write to a temporary name, so a partial cache is never picked up
+    tmp_name = output_name.with_suffix(".tmp" + output_name.suffix)
+    temp_coh_name = DISPLACEMENT_PRODUCTS.temporal_coherence.name
+    temp_coh_sum, temp_coh_count = 0.0, 0
+    with (
+        h5py.File(tmp_name, "w", **FILE_OPTS) as hf,
+        ThreadPoolExecutor(max_workers) as executor,
+    ):
+        dsets = {}
+        for name, filename in files.items():
+            info = _get_product_info(name)
+            dsets[name] = hf.create_dataset(
+                name,
+                shape=shape,
+                dtype=info.dtype,
+                fillvalue=info.fillvalue,
+                **HDF5_OPTS,
+            )
+            dsets[name].attrs["source"] = _get_source_id(filename)
+        if has_mask_inputs:
+            mask_dset = hf.create_dataset(
+                STATIC_MASK_DSET, shape=shape, dtype="uint8", fillvalue=0, **HDF5_OPTS
+            )
+            mask_dset.attrs.update(_get_static_mask_attrs(files, algorithm_parameters))
+
+        for row_slice, _ in io.iter_blocks(shape, block_shape=(STRIP_ROWS, cols)):
+            layers = {
+                name: io.load_gdal(filename, rows=row_slice, masked=True)
+                for name, filename in files.items()
+            }
+            for name, block in layers.items():
+                info = _get_product_info(name)
+                write_chunked(
+                    dsets[name],
+                    block.filled(info.fillvalue).astype(info.dtype),
+                    row_start=row_slice.start,
+                    keep_bits=info.keep_bits,
+                    executor=executor,
+                )
+            if has_mask_inputs:
+                is_static_bad = _get_static_bad_pixel_mask(layers, algorithm_parameters)
+                write_chunked(
+                    mask_dset,
+                    is_static_bad.astype("uint8"),
+                    row_start=row_slice.start,
+                    executor=executor,
+                )
+            if temp_coh_name in layers:
+                valid_temp_coh = layers[temp_coh_name].compressed()
+                temp_coh_sum += float(valid_temp_coh.sum(dtype=np.float64))
+                temp_coh_count += valid_temp_coh.size
+
+        if temp_coh_name in dsets:
+            dsets[temp_coh_name].attrs["temporal_coherence_sum"] = temp_coh_sum
+            dsets[temp_coh_name].attrs["temporal_coherence_count"] = temp_coh_count
+    tmp_name.replace(output_name)
+    return output_name
+
+
+def _get_source_id(filename: Filename) -> str:
+    """Identify the version of a source raster by its path, size and mtime."""
+    path = Path(filename).resolve()
+    st = path.stat()
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _get_static_mask_attrs(
+    layer_files: Mapping[str, Path], algorithm_parameters: AlgorithmParameters
+) -> dict[str, Any]:
+    sources = [
+        _get_source_id(layer_files[name]) if name in layer_files else ""
+        for name in STATIC_MASK_INPUTS
+    ]
+    return {
+        "sources": sources,
+        "temporal_coherence_threshold": (
+            algorithm_parameters.recommended_temporal_coherence_threshold
+        ),
+        "similarity_threshold": algorithm_parameters.recommended_similarity_threshold,
+    }
+
+
+def _get_static_bad_pixel_mask(
+    layers: Mapping[str, np.ma.MaskedArray],
+    algorithm_parameters: AlgorithmParameters,
+) -> np.ndarray:
+    """Get the pixels to mask in every product: water, or low quality pixels."""
+    temporal_coherence = layers[DISPLACEMENT_PRODUCTS.temporal_coherence.name]
+    similarity = layers[DISPLACEMENT_PRODUCTS.phase_similarity.name]
+    water_name = DISPLACEMENT_PRODUCTS.water_mask.name
+    if water_name in layers:
+        is_water = layers[water_name].filled(0) == 0
+    else:
+        # Not provided: Don't indicate anything is water in this mask.
+        is_water = np.zeros(temporal_coherence.shape, dtype=bool)
+    # As in the full frame masked-array computation, the temporal coherence is
+    # compared as stored: its nodata pixels keep their nodata value.
+    is_low_quality = (
+        np.ma.getdata(temporal_coherence)
+        < algorithm_parameters.recommended_temporal_coherence_threshold
+    ) & (similarity.filled(0) < algorithm_parameters.recommended_similarity_threshold)
+    return is_water | is_low_quality
+
+
+def _open_static_layer_cache(
+    filename: Filename | None,
+) -> h5py.File | nullcontext[None]:
+    if filename is None or not Path(filename).exists():
+        return nullcontext(None)
+    return h5py.File(filename, "r")
+
+
+def _get_cached_layers(
+    hf: h5py.File | None, layer_files: Mapping[str, Path]
+) -> dict[str, h5py.Dataset]:
+    """Get the cached datasets made from the same source files as `layer_files`."""
+    if hf is None:
+        return {}
+    return {
+        name: hf[name]
+        for name, filename in layer_files.items()
+        if name in hf and hf[name].attrs.get("source") == _get_source_id(filename)
+    }
+
+
+def _get_cached_static_mask(
+    hf: h5py.File | None,
+    layer_files: Mapping[str, Path],
+    algorithm_parameters: AlgorithmParameters,
+) -> h5py.Dataset | None:
+    """Get the cached static mask, if made with the same inputs and thresholds."""
+    if hf is None or STATIC_MASK_DSET not in hf:
+        return None
+    dset = hf[STATIC_MASK_DSET]
+    expected = _get_static_mask_attrs(layer_files, algorithm_parameters)
+    for key, value in expected.items():
+        cached_value = dset.attrs.get(key)
+        if key == "sources":
+            cached_value = [_decode_attr(v) for v in cached_value]
+        if cached_value is None or list(np.atleast_1d(cached_value)) != list(
+            np.atleast_1d(value)
+        ):
+            return None
+    return dset
+
+
+def _decode_attr(value: Any) -> Any:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _sample_on_grid(source: RowSource, grid: CoarseGrid) -> np.ndarray:
+    """Sample a full resolution `source` at the points of the coarse `grid`."""
+    rows, cols = grid.indices()
+    return np.vstack([_read_rows(source, slice(r, r + 1))[:, cols] for r in rows])
+
+
+def _read_rows(source: RowSource, rows: slice) -> np.ndarray:
+    """Read a strip of `rows` from an array, a raster file, or a row reader."""
+    if callable(source):
+        return np.asarray(source(rows=rows))
+    if isinstance(source, np.ndarray):
+        return source[rows]
+    return io.load_gdal(source, rows=rows)
+
+
+def _read_rows_with_offset(source: RowSource, offset: float, rows: slice) -> np.ndarray:
+    return _read_rows(source, rows) + offset
+
+
+def _get_product_info(name: str) -> ProductInfo:
+    return next(info for info in DISPLACEMENT_PRODUCTS if info.name == name)
+
+
+def _write_short_wavelength_displacement(
+    disp_var: h5netcdf.Variable,
+    mask_var: h5netcdf.Variable,
+    out_var: h5netcdf.Variable,
+    wavelength_cutoff: float,
+    pixel_spacing: float,
+    keep_bits: int | None,
+    method: Literal["full", "pyramid"] = "full",
+    executor: Executor | None = None,
+) -> None:
+    """Filter the long wavelengths out of `disp_var` and write into `out_var`.
+
+    The written `disp_var` and `mask_var` layers are read back as the input.
+    `method="full"` runs `dolphin.filtering.filter_long_wavelength` on the full
+    resolution frame. With `"pyramid"`, the long wavelengths are estimated on a
+    decimated grid and removed strip by strip (see `_filtering`).
+    """
+    shape = disp_var.shape
+
+    def read_block(rows: slice) -> tuple[np.ndarray, np.ndarray]:
+        return disp_var[rows, :], mask_var[rows, :] == 0
+
+    if method == "pyramid":
+        model = estimate_long_wavelength(
+            read_block,
+            shape=shape,
+            wavelength_cutoff=wavelength_cutoff,
+            pixel_spacing=pixel_spacing,
+            block_rows=STRIP_ROWS,
+        )
+
+        def filter_block(rows: slice) -> tuple[np.ndarray, np.ndarray]:
+            disp, bad_pixel_mask = read_block(rows)
+            block = remove_long_wavelength(model, disp, bad_pixel_mask, rows)
+            return block, bad_pixel_mask
+
+    elif method == "full":
+        disp, bad_pixel_mask = read_block(slice(None))
+        filtered = filtering.filter_long_wavelength(
+            unwrapped_phase=np.nan_to_num(disp),
+            bad_pixel_mask=bad_pixel_mask,
+            wavelength_cutoff=wavelength_cutoff,
+            pixel_spacing=pixel_spacing,
+        ).astype(np.float32)
+        del disp
+
+        def filter_block(rows: slice) -> tuple[np.ndarray, np.ndarray]:
+            return filtered[rows], bad_pixel_mask[rows]
+
+    else:
+        raise ValueError(f"Unknown spatial filter method: {method}")
+
+    for row_slice, _ in io.iter_blocks(shape, block_shape=(STRIP_ROWS, shape[1])):
+        block, bad_pixel_mask = filter_block(row_slice)
+        # Be more aggressive with the short wavelength displacement mask:
+        block[bad_pixel_mask] = np.nan
+        write_chunked(
+            out_var._h5ds,
+            block,
+            row_start=row_slice.start,
+            keep_bits=keep_bits,
+            executor=executor,
+        )
+
+
+def _make_browse_image(
+    output_filename: Filename,
+    data_var: h5netcdf.Variable,
+    mask_var: h5netcdf.Variable,
+    vmin: float,
+    vmax: float,
+    max_dim_allowed: int = 2048,
+) -> None:
+    """Create the PNG browse image from a strided read of a written layer."""
+    step = max(1, max(data_var.shape) // max_dim_allowed)
+    make_browse_image_from_arr(
+        output_filename=output_filename,
+        arr=data_var[::step, ::step],
+        mask=mask_var[::step, ::step],
+        max_dim_allowed=max_dim_allowed,
+        vmin=vmin,
+        vmax=vmax,
+    )
+
+
+def _create_empty_geo_dataset(
+    *,
+    group: h5netcdf.Group,
+    info: ProductInfo,
+    x_name: str = "x",
+    y_name: str = "y",
+    grid_mapping_dset_name=GRID_MAPPING_DSET,
+    chunks: tuple[int, int] | None = None,
+) -> h5netcdf.Variable:
+    """Create a chunked 2D variable for `info`, to be filled in strips."""
+    options = HDF5_OPTS if chunks is None else {**HDF5_OPTS, "chunks": chunks}
+    var = group.create_variable(
+        info.name,
+        dimensions=[y_name, x_name],
+        dtype=info.dtype,
+        fillvalue=info.fillvalue,
+        **options,
+    )
+    attrs = {
+        **(info.attrs or {}),
+        "description": info.description,
+        "grid_mapping": grid_mapping_dset_name,
+    }
+    if info.long_name:
+        attrs["long_name"] = info.long_name
+    var.attrs.update(attrs)
+    return var
+
+
 def _create_dataset(
     *,
     group: h5netcdf.Group,
@@ -1763,8 +2199,30 @@ class CompressedSLCInfo(NamedTuple):
     opera_cslc_file: Path
 
 
-def process_compressed_slc(info: CompressedSLCInfo) -> Path:
-    """Make one compressed SLC output product."""
+def process_compressed_slc(
+    info: CompressedSLCInfo,
+    compression_threads: int = 1,
+    overwrite: bool = False,
+) -> Path:
+    """Make one compressed SLC output product.
+
+    Parameters
+    ----------
+    info : CompressedSLCInfo
+        Input compressed SLC raster, output directory and matching GSLC.
+    compression_threads : int
+        Number of threads compressing the chunks of the output layers.
+        Default is 1.
+    overwrite : bool
+        Recreate the product if it already exists.
+        Default is False.
+
+    Returns
+    -------
+    Path
+        Path to the compressed SLC product.
+
+    """
     # burst_id, comp_slc_file, output_dir, opera_cslc_file = info
     comp_slc_file, output_dir, opera_cslc_file = info
     date_str = format_dates(*get_dates(comp_slc_file.stem))
@@ -1772,8 +2230,11 @@ def process_compressed_slc(info: CompressedSLCInfo) -> Path:
     name = COMPRESSED_SLC_TEMPLATE.format(date_str=date_str)
     outname = Path(output_dir) / name
 
-    if outname.exists():
+    # Products are renamed into place once complete, so an existing one is whole
+    if outname.exists() and not overwrite:
         logger.info(f"Skipping existing {outname}")
+        return outname
+    tmp_name = outname.with_suffix(".tmp" + outname.suffix)
 
     crs = io.get_raster_crs(comp_slc_file)
     gt = io.get_raster_gt(comp_slc_file)
@@ -1791,7 +2252,7 @@ def process_compressed_slc(info: CompressedSLCInfo) -> Path:
     dispersion_dset_name = "amplitude_dispersion"
     group_name = "/".join(parts)
     logger.info(f"Writing {outname}")
-    with h5py.File(outname, "w") as hf:
+    with h5py.File(tmp_name, "w") as hf:
         # add type to root for GDAL recognition of complex datasets in NetCDF
         ctype = h5py.h5t.py_create(np.complex64)
         ctype.commit(hf["/"].id, np.bytes_("complex64"))
@@ -1799,7 +2260,7 @@ def process_compressed_slc(info: CompressedSLCInfo) -> Path:
     # COMPASS used "_coordinates" instead of "x"/"y"
     x_name, y_name = "x_coordinates", "y_coordinates"
     grid_mapping_dset_name = "projection"
-    with h5netcdf.File(outname, mode="a", invalid_netcdf=True) as f:
+    with h5netcdf.File(tmp_name, mode="a", invalid_netcdf=True) as f:
         f.attrs.update(attrs)
 
         data_group = f.create_group(group_name)
@@ -1850,41 +2311,93 @@ def process_compressed_slc(info: CompressedSLCInfo) -> Path:
             }
         )
 
-    # Fill both datasets one strip at a time using iter_blocks
+    # Fill both datasets one strip at a time, compressing the chunks in parallel
     slc_dset_path = f"{group_name}/{dset_name}"
     disp_dset_path = f"{group_name}/{dispersion_dset_name}"
-    with h5py.File(outname, "a") as hf:
+    with (
+        h5py.File(tmp_name, "a") as hf,
+        ThreadPoolExecutor(compression_threads) as executor,
+    ):
         slc_dset = hf[slc_dset_path]
         disp_dset = hf[disp_dset_path]
-        for row_slice, _col_slice in io.iter_blocks(shape, block_shape=(512, xsize)):
+        for row_slice, (slc_block, disp_block) in _iter_raster_strips(
+            comp_slc_file, bands=(1, 2), shape=shape
+        ):
             # Band 1: complex SLC; COMPASS used `truncate_mantissa` default, 10 bits
-            slc_block = io.load_gdal(comp_slc_file, band=1, rows=row_slice).astype(
-                np.complex64
+            write_chunked(
+                slc_dset,
+                slc_block.astype(np.complex64),
+                row_start=row_slice.start,
+                keep_bits=10,
+                executor=executor,
             )
-            round_mantissa(slc_block, keep_bits=10)
-            slc_dset[row_slice, :] = slc_block
-
             # Band 2: amplitude dispersion
-            disp_block = io.load_gdal(
-                comp_slc_file, band=2, rows=row_slice
-            ).real.astype(np.float32)
-            round_mantissa(disp_block, keep_bits=10)
-            disp_dset[row_slice, :] = disp_block
+            write_chunked(
+                disp_dset,
+                disp_block.real.astype(np.float32),
+                row_start=row_slice.start,
+                keep_bits=10,
+                executor=executor,
+            )
 
-    copy_cslc_metadata_to_compressed(opera_cslc_file, outname)
+    copy_cslc_metadata_to_compressed(opera_cslc_file, tmp_name)
+    tmp_name.replace(outname)
 
     return outname
 
 
+def _iter_raster_strips(
+    filename: Filename, bands: Sequence[int], shape: tuple[int, int]
+) -> Iterator[tuple[slice, list[np.ndarray]]]:
+    """Read `bands` of a raster in strips of `STRIP_ROWS` rows.
+
+    The raster is opened once, and the next strip is read (in a background
+    thread, as GDAL releases the GIL) while the caller handles the current one.
+    """
+    from osgeo import gdal
+
+    ds = gdal.Open(os.fspath(filename))
+    if ds is None:
+        raise ValueError(f"Unable to open {filename}")
+    rows, cols = shape
+
+    def _read(row_slice: slice) -> list[np.ndarray]:
+        nrows = row_slice.stop - row_slice.start
+        return [
+            ds.GetRasterBand(b).ReadAsArray(0, row_slice.start, cols, nrows)
+            for b in bands
+        ]
+
+    row_slices = [
+        slice(start, min(start + STRIP_ROWS, rows))
+        for start in range(0, rows, STRIP_ROWS)
+    ]
+    # A single reader thread: the dataset handle is never used concurrently
+    with ThreadPoolExecutor(1) as reader:
+        pending = reader.submit(_read, row_slices[0]) if row_slices else None
+        for i, row_slice in enumerate(row_slices):
+            blocks = pending.result()
+            if i + 1 < len(row_slices):
+                pending = reader.submit(_read, row_slices[i + 1])
+            yield row_slice, blocks
+    ds = None
+
+
 def _copy_hdf5_dsets(
     source_file: Filename,
-    dest_file: Filename,
+    dest_file: Filename | h5py.File,
     dsets_to_copy: Iterable[tuple[str, str | None]],
     prepend_str: str = "",
     error_on_missing: bool = False,
     delete_if_exists: bool = True,
 ) -> None:
-    with open_h5_file(source_file, "r") as src, h5py.File(dest_file, "a") as dst:
+    # An already open destination is used as is (and left open)
+    dst_context = (
+        nullcontext(dest_file)
+        if isinstance(dest_file, h5py.File)
+        else open_h5_file(dest_file, "a")
+    )
+    with open_h5_file(source_file, "r") as src, dst_context as dst:
         for dset_path, new_path in dsets_to_copy:
             if dset_path not in src:
                 msg = f"Dataset or group {dset_path} not found in {source_file}"
@@ -1972,17 +2485,26 @@ def copy_cslc_metadata_to_compressed(
 def copy_cslc_metadata_to_displacement(
     reference_cslc_file: Filename,
     secondary_cslc_file: Filename,
-    output_disp_file: Filename,
+    output_disp_file: Filename | h5py.File,
+    metadata_index: GslcMetadataIndex | None = None,
 ) -> None:
-    """Copy metadata from input reference/secondary CSLC files to DISP output."""
+    """Copy metadata from input reference/secondary CSLC files to DISP output.
+
+    `output_disp_file` may be a path, or the product's open `h5py.File`.
+    The groups held in memory by `metadata_index` are written without reopening
+    the CSLC files.
+    """
+    if metadata_index is None:
+        metadata_index = GslcMetadataIndex()
     dsets_to_copy = [("/science/LSAR/GSLC/metadata/orbit", None)]  #          Group
     for cslc_file, prepend_str in zip(
         [reference_cslc_file, secondary_cslc_file], ["reference_", "secondary_"]
     ):
-        _copy_hdf5_dsets(
+        _copy_indexed_dsets(
             source_file=cslc_file,
             dest_file=output_disp_file,
             dsets_to_copy=dsets_to_copy,
+            metadata_index=metadata_index,
             prepend_str=prepend_str,
         )
 
@@ -2016,18 +2538,59 @@ def copy_cslc_metadata_to_displacement(
         #     "metadata/source_data_software_s1_reader_version",
         # ),
     ]
-    _copy_hdf5_dsets(
+    _copy_indexed_dsets(
         source_file=reference_cslc_file,
         dest_file=output_disp_file,
         dsets_to_copy=common_dsets,
+        metadata_index=metadata_index,
     )
 
 
+def _copy_indexed_dsets(
+    source_file: Filename,
+    dest_file: Filename | h5py.File,
+    dsets_to_copy: Iterable[tuple[str, str | None]],
+    metadata_index: GslcMetadataIndex,
+    prepend_str: str = "",
+) -> None:
+    """Copy datasets as `_copy_hdf5_dsets`, from `metadata_index` when indexed."""
+    snapshots = metadata_index.get(source_file).snapshots
+    not_indexed = []
+    dst_context = (
+        nullcontext(dest_file)
+        if isinstance(dest_file, h5py.File)
+        else open_h5_file(dest_file, "a")
+    )
+    with dst_context as dst:
+        for dset_path, new_path in dsets_to_copy:
+            if dset_path in snapshots:
+                if new_path is None:
+                    parent, name = Path(dset_path).parent, Path(dset_path).name
+                    new_path = str(parent / f"{prepend_str}{name}")
+                write_snapshot(dst, snapshots[dset_path], new_path)
+            elif dset_path in SNAPSHOT_PATHS:
+                # Indexed, but missing from the file
+                logger.warning(
+                    f"Dataset or group {dset_path} not found in {source_file}"
+                )
+            else:
+                not_indexed.append((dset_path, new_path))
+        if not_indexed:
+            _copy_hdf5_dsets(
+                source_file=source_file,
+                dest_file=dst,
+                dsets_to_copy=not_indexed,
+                prepend_str=prepend_str,
+            )
+
+
 def create_compressed_products(
     comp_slc_dict: Mapping[str, Sequence[Path]],
     output_dir: Filename,
     cslc_file_list: Sequence[Path],
     max_workers: int = 3,
+    overwrite: bool = False,
+    cores: int | None = None,
 ) -> list[Path]:
     """Create all compressed SLC output products.
 
@@ -2042,8 +2605,16 @@ def create_compressed_products(
         Used to pick out metadata corresponding to each compressed SLC's
         reference date.
     max_workers : int
-        Number of parallel threads to use to create products.
-        Default is 2.
+        Number of products created in parallel (in separate processes). The
+        CPUs are shared between them to compress the output chunks.
+        Default is 3.
+    overwrite : bool
+        Recreate the products which already exist in `output_dir`.
+        Default is False.
+    cores : int, optional
+        Number of cores shared by the processes to compress the output chunks
+        (at most `cores` processes are used).
+        Default is the cores of the run (see `get_threads_per_process`).
 
     Returns
     -------
@@ -2066,17 +2637,27 @@ def create_compressed_products(
             c = CompressedSLCInfo(comp_slc_file, output_dir, cur_opera_cslc)
             compressed_slc_infos.append(c)
 
-    # executor_class = (
-    #     ProcessPoolExecutor if max_workers > 1 else DummyProcessPoolExecutor
-    # )
-    executor_class = DummyProcessPoolExecutor
+    max_workers = max(1, min(max_workers, len(compressed_slc_infos)))
+    if cores is None:
+        compression_threads = get_threads_per_process(max_workers)
+    else:
+        max_workers = min(max_workers, max(1, cores))
+        compression_threads = max(1, cores // max_workers)
+    func = partial(
+        process_compressed_slc,
+        compression_threads=compression_threads,
+        overwrite=overwrite,
+    )
+    executor_class = (
+        ProcessPoolExecutor if max_workers > 1 else DummyProcessPoolExecutor
+    )
     ctx = get_context("spawn")
 
     with executor_class(
         max_workers=max_workers,
         mp_context=ctx,
     ) as executor:
-        results = list(executor.map(process_compressed_slc, compressed_slc_infos))
+        results = list(executor.map(func, compressed_slc_infos))
 
     logger.info("Finished creating all compressed SLC products.")
     return results
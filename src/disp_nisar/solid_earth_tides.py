@@ -4,8 +4,15 @@ This module calculates solid earth tides corrections using pysolid,
 adapted from disp-s1 for NISAR data processing.
 """
 
+import hashlib
+import json
 import logging
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
+from multiprocessing import get_context
+from pathlib import Path
 from typing import Literal, TypeAlias, TypeVar
 
 import numpy as np
@@ -18,12 +25,17 @@ from rasterio.transform import Affine
 from rasterio.warp import Resampling, reproject, transform_bounds
 from scipy.ndimage import zoom
 
+from ._coarse_grid import CoarseGrid
+
 # https://github.com/pandas-dev/pandas-stubs/blob/1bc27e67098106089ce1e61b60c42aa81ec286af/pandas-stubs/_typing.pyi#L65-L66
 DateTimeLike: TypeAlias = date | datetime | pd.Timestamp
 MaybeMaskedArray = TypeVar("MaybeMaskedArray", np.ndarray, np.ma.MaskedArray)
 
 logger = logging.getLogger(__name__)
 
+# Size of the lat/lon grid on which pysolid evaluates the tides
+TIDE_GRID_SHAPE = (500, 500)
+
 
 def resample_to_target(
     array: MaybeMaskedArray, target_shape: tuple[int, int]
@@ -53,6 +65,8 @@ def calculate_solid_earth_tides_correction(
     los_north_file: Filename,
     orbit_direction: Literal["ascending", "descending"],
     reference_point: tuple[int, int] | None = None,
+    subsample: int = 1,
+    cache_dir: Filename | None = None,
 ) -> np.ndarray:
     """Calculate the relative displacement correction for solid earth tides.
 
@@ -82,12 +96,22 @@ def calculate_solid_earth_tides_correction(
         Spatial reference (row, col) for relative corrections.
         If None, no reference point correction is applied.
         Default is None.
+    subsample : int
+        If greater than 1, return the correction on the `CoarseGrid` sampling
+        the reference raster every `subsample` pixels, rather than on the full
+        resolution grid.
+        Default is 1.
+    cache_dir : Filename, optional
+        Directory of ENU tide grids shared by all products of a run (see
+        `populate_tide_cache`). Grids found there are reused, and new ones are
+        saved there.
 
     Returns
     -------
     np.ndarray
         2D numpy array containing the solid earth tides correction in meters,
-        with the same shape and projection as the reference raster.
+        with the same shape and projection as the reference raster (or its
+        `CoarseGrid`, if `subsample` > 1).
         Nodata values are filled with `nan`
 
     Notes
@@ -103,52 +127,24 @@ def calculate_solid_earth_tides_correction(
     from the entire array to provide a relative correction.
 
     """
-    # Load bounds, CRS, and transform from like_filename using GDAL
-    # (rasterio may not support all GDAL dtypes, e.g. Float16)
-    from osgeo import gdal, osr
-
-    ds = gdal.Open(str(like_filename))
-    if ds is None:
-        msg = f"Could not open {like_filename}"
-        raise FileNotFoundError(msg)
-    gt = ds.GetGeoTransform()
-    width = ds.RasterXSize
-    height = ds.RasterYSize
+    gt, width, height, crs = _get_raster_grid(like_filename)
     affine_transform = Affine.from_gdal(*gt)
-    srs = osr.SpatialReference(wkt=ds.GetProjection())
-    crs = CRS.from_wkt(srs.ExportToWkt())
-    bounds = rasterio.transform.array_bounds(height, width, affine_transform)
-    ds = None
-
-    # Transform bounds to EPSG:4326
-    if not crs.is_geographic:
-        bounds_geo = transform_bounds(crs, "EPSG:4326", *bounds)
-    else:
-        bounds_geo = bounds
-
-    min_lon, min_lat, max_lon, max_lat = bounds_geo
+    grid = CoarseGrid(gt=tuple(gt), shape=(height, width), subsample=subsample)
+    if subsample > 1:
+        # Output on the coarse grid: only the reference point needs full resolution
+        affine_transform = Affine.from_gdal(*grid.coarse_gt)
+        height, width = grid.coarse_shape
 
-    # Define coarse grid size
-    grid_rows = 500
-    grid_cols = 500
-
-    # Create meta dictionary for pysolid
-    meta = {
-        "LENGTH": grid_rows,
-        "WIDTH": grid_cols,
-        "X_FIRST": min_lon,
-        "Y_FIRST": max_lat,
-        "X_STEP": (max_lon - min_lon) / (grid_cols - 1),
-        "Y_STEP": -(max_lat - min_lat) / (grid_rows - 1),
-    }
+    meta = get_tide_grid_meta(like_filename)
+    grid_rows = meta["LENGTH"]
 
     # Compute SET corrections at start and end times for reference
     logger.info("Computing SET corrections for reference image")
-    tide_e_start_ref, tide_n_start_ref, tide_u_start_ref = calc_solid_earth_tides_grid(
-        reference_start_time, meta, verbose=False
+    tide_e_start_ref, tide_n_start_ref, tide_u_start_ref = get_enu_tide_grid(
+        reference_start_time, meta, cache_dir=cache_dir
     )
-    tide_e_end_ref, tide_n_end_ref, tide_u_end_ref = calc_solid_earth_tides_grid(
-        reference_stop_time, meta, verbose=False
+    tide_e_end_ref, tide_n_end_ref, tide_u_end_ref = get_enu_tide_grid(
+        reference_stop_time, meta, cache_dir=cache_dir
     )
 
     # Compute blending weights
@@ -170,11 +166,11 @@ def calculate_solid_earth_tides_correction(
 
     # Compute SET corrections at start and end times for secondary
     logger.info("Computing SET corrections for secondary image")
-    tide_e_start_sec, tide_n_start_sec, tide_u_start_sec = calc_solid_earth_tides_grid(
-        secondary_start_time, meta, verbose=False
+    tide_e_start_sec, tide_n_start_sec, tide_u_start_sec = get_enu_tide_grid(
+        secondary_start_time, meta, cache_dir=cache_dir
     )
-    tide_e_end_sec, tide_n_end_sec, tide_u_end_sec = calc_solid_earth_tides_grid(
-        secondary_stop_time, meta, verbose=False
+    tide_e_end_sec, tide_n_end_sec, tide_u_end_sec = get_enu_tide_grid(
+        secondary_stop_time, meta, cache_dir=cache_dir
     )
 
     # Blend corrections for secondary
@@ -215,15 +211,10 @@ def calculate_solid_earth_tides_correction(
             resampling=Resampling.bilinear,
         )
 
-    # Load LOS vectors
+    # Load LOS vectors, at the same points as the tides
     logger.info("Loading LOS vectors")
-    los_east = io.load_gdal(los_east_file, masked=True)
-    los_north = io.load_gdal(los_north_file, masked=True)
-
-    # Check shapes and resample if necessary
-    if los_east.shape != (height, width):
-        los_east = resample_to_target(los_east, (height, width))
-        los_north = resample_to_target(los_north, (height, width))
+    los_east = _load_los(los_east_file, grid)
+    los_north = _load_los(los_north_file, grid)
 
     los_up = np.sqrt(1 - los_east**2 - los_north**2)
 
@@ -237,6 +228,167 @@ def calculate_solid_earth_tides_correction(
     # Apply reference point correction if needed
     if reference_point is not None:
         ref_row, ref_col = reference_point
-        set_los -= set_los[ref_row, ref_col]
+        if subsample > 1:
+            ref_window = (slice(ref_row, ref_row + 1), slice(ref_col, ref_col + 1))
+            set_los -= grid.upsample(set_los.filled(np.nan), *ref_window)[0, 0]
+        else:
+            set_los -= set_los[ref_row, ref_col]
 
     return set_los.filled(np.nan).astype("float32")
+
+
+def _load_los(filename: Filename, grid: CoarseGrid) -> np.ma.MaskedArray:
+    """Load a LOS component on the output grid of the correction.
+
+    With a coarse `grid`, the raster is sampled at the points of `grid.indices()`
+    (every `subsample` pixels, starting at the first), where the tides are
+    evaluated. A raster of another shape than the reference raster is resampled
+    to the output shape.
+    """
+    out_shape = grid.coarse_shape if grid.subsample > 1 else grid.shape
+    cols, rows = io.get_raster_xysize(filename)
+    if grid.subsample > 1 and (rows, cols) == grid.shape:
+        row_idxs, col_idxs = grid.indices()
+        return np.ma.vstack(
+            [
+                io.load_gdal(filename, masked=True, rows=slice(r, r + 1))[:, col_idxs]
+                for r in row_idxs
+            ]
+        )
+    los = io.load_gdal(filename, masked=True, subsample_factor=grid.subsample)
+    # Check shapes and resample if necessary
+    return resample_to_target(los, out_shape)
+
+
+def get_tide_grid_meta(like_filename: Filename) -> dict[str, float]:
+    """Get the pysolid lat/lon grid covering the raster `like_filename`."""
+    gt, width, height, crs = _get_raster_grid(like_filename)
+    bounds = rasterio.transform.array_bounds(height, width, Affine.from_gdal(*gt))
+    # Transform bounds to EPSG:4326
+    if not crs.is_geographic:
+        bounds_geo = transform_bounds(crs, "EPSG:4326", *bounds)
+    else:
+        bounds_geo = bounds
+    min_lon, min_lat, max_lon, max_lat = bounds_geo
+
+    grid_rows, grid_cols = TIDE_GRID_SHAPE
+    return {
+        "LENGTH": grid_rows,
+        "WIDTH": grid_cols,
+        "X_FIRST": min_lon,
+        "Y_FIRST": max_lat,
+        "X_STEP": (max_lon - min_lon) / (grid_cols - 1),
+        "Y_STEP": -(max_lat - min_lat) / (grid_rows - 1),
+    }
+
+
+def get_enu_tide_grid(
+    time: DateTimeLike,
+    meta: dict[str, float],
+    cache_dir: Filename | None = None,
+) -> np.ndarray:
+    """Get the (east, north, up) solid earth tides at `time` on the grid `meta`.
+
+    Parameters
+    ----------
+    time : DateTimeLike
+        Time of the acquisition.
+    meta : dict[str, float]
+        pysolid grid definition (see `get_tide_grid_meta`).
+    cache_dir : Filename, optional
+        If given, load the grid from this directory when it was already computed
+        for the same time and grid, or save it there otherwise.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (3, LENGTH, WIDTH), in meters.
+
+    """
+    if cache_dir is None:
+        return np.stack(calc_solid_earth_tides_grid(time, meta, verbose=False))
+    path = _get_tide_cache_path(cache_dir, time, meta)
+    if path.exists():
+        logger.debug(f"Loading cached solid earth tides from {path}")
+        return np.load(path)
+    tides = np.stack(calc_solid_earth_tides_grid(time, meta, verbose=False))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so other processes never load a partial file
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, tides)
+    tmp_path.replace(path)
+    return tides
+
+
+def populate_tide_cache(
+    cache_dir: Filename,
+    times: Iterable[DateTimeLike],
+    like_filename: Filename,
+    max_workers: int = 4,
+) -> None:
+    """Compute, in parallel, the tide grids of all acquisition `times` of a run.
+
+    Each unique time is computed once, so products sharing an acquisition (e.g.
+    the reference of a ministack) reuse its grid through `cache_dir`.
+
+    Parameters
+    ----------
+    cache_dir : Filename
+        Directory to save the grids in.
+    times : Iterable[DateTimeLike]
+        Start/stop times of the acquisitions.
+    like_filename : Filename
+        Raster on the product grid, used to define the tide grid.
+    max_workers : int
+        Number of processes running pysolid.
+        Default is 4.
+
+    """
+    meta = get_tide_grid_meta(like_filename)
+    todo = sorted(
+        {t for t in times if not _get_tide_cache_path(cache_dir, t, meta).exists()}
+    )
+    logger.info(f"Computing solid earth tides for {len(todo)} acquisition times")
+    if max_workers <= 1 or len(todo) <= 1:
+        for t in todo:
+            get_enu_tide_grid(t, meta, cache_dir=cache_dir)
+        return
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as executor:
+        futures = [executor.submit(_save_tide_grid, t, meta, cache_dir) for t in todo]
+        for future in futures:
+            future.result()
+
+
+def _save_tide_grid(
+    time: DateTimeLike, meta: dict[str, float], cache_dir: Filename
+) -> None:
+    # The grid is read back from `cache_dir`, not sent back to the parent process
+    get_enu_tide_grid(time, meta, cache_dir=cache_dir)
+
+
+def _get_tide_cache_path(
+    cache_dir: Filename, time: DateTimeLike, meta: dict[str, float]
+) -> Path:
+    grid_hash = hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+    time_str = pd.Timestamp(time).strftime("%Y%m%dT%H%M%S%f")
+    return Path(cache_dir) / f"tides_{time_str}_{grid_hash[:12]}.npy"
+
+
+def _get_raster_grid(like_filename: Filename) -> tuple[tuple, int, int, CRS]:
+    """Get the GeoTransform, width, height and CRS of `like_filename`."""
+    # Use GDAL, since rasterio may not support all GDAL dtypes (e.g. Float16)
+    from osgeo import gdal, osr
+
+    ds = gdal.Open(str(like_filename))
+    if ds is None:
+        msg = f"Could not open {like_filename}"
+        raise FileNotFoundError(msg)
+    gt = ds.GetGeoTransform()
+    width = ds.RasterXSize
+    height = ds.RasterYSize
+    srs = osr.SpatialReference(wkt=ds.GetProjection())
+    crs = CRS.from_wkt(srs.ExportToWkt())
+    ds = None
+    return gt, width, height, crs
@@ -29,6 +29,10 @@ class ComparisonError(ValidationError):
     """Exception raised when two datasets do not match."""
 
 
+class LayoutError(ValidationError):
+    """Raised when a product is not laid out in fixed-size file space pages."""
+
+
 def compare_groups(
     golden_group: h5py.Group,
     test_group: h5py.Group,
@@ -497,12 +501,80 @@ def _check_compressed_slc_dirs(golden: Filename, test: Filename) -> None:
         )
 
 
+def get_page_size(hf: h5py.File) -> int | None:
+    """Get the file space page size of `hf`, or None if it does not use pages."""
+    fcpl = hf.id.get_create_plist()
+    strategy, _persist, _threshold = fcpl.get_file_space_strategy()
+    if strategy != h5py.h5f.FSPACE_STRATEGY_PAGE:
+        return None
+    return fcpl.get_file_space_page_size()
+
+
+def check_paged_layout(filename: Filename, page_size: int | None = None) -> None:
+    """Check that `filename` is laid out for readers using HDF5 page buffering.
+
+    Parameters
+    ----------
+    filename : Filename
+        Path to the HDF5 file.
+    page_size : int, optional
+        Expected file space page size, in bytes. If None, any page size passes.
+
+    Raises
+    ------
+    LayoutError
+        If the file does not use the paged file space strategy (or uses a
+        different `page_size`), if a dataset's chunks do not fit in one page,
+        or if a dataset cannot be read through a page buffer.
+
+    """
+    with h5py.File(filename, "r") as hf:
+        file_page_size = get_page_size(hf)
+        if file_page_size is None:
+            raise LayoutError(f"{filename} does not use the paged file space strategy")
+        if page_size is not None and file_page_size != page_size:
+            raise LayoutError(
+                f"{filename} has page size {file_page_size}, expected {page_size}"
+            )
+        too_large = []
+        dset_names = []
+
+        def _check_chunks(name: str, obj) -> None:
+            if not isinstance(obj, h5py.Dataset):
+                return
+            if obj.size > 0:
+                dset_names.append(name)
+            if obj.chunks is not None:
+                chunk_bytes = int(np.prod(obj.chunks)) * obj.dtype.itemsize
+                if chunk_bytes > file_page_size:
+                    too_large.append(name)
+
+        hf.visititems(_check_chunks)
+        if too_large:
+            raise LayoutError(f"Chunks larger than one page in {filename}: {too_large}")
+
+    # Page buffering only works on paged files: read as such a reader would
+    try:
+        with h5py.File(filename, "r", page_buf_size=file_page_size) as hf:
+            for name in dset_names:
+                dset = hf[name]
+                _ = dset[(0,) * dset.ndim] if dset.ndim else dset[()]
+    except OSError as e:
+        raise LayoutError(f"Cannot read {filename} with page buffering: {e}") from e
+
+
 def compare(golden: Filename, test: Filename, data_dset: str = DSET_DEFAULT) -> None:
     """Compare two HDF5 files for consistency."""
     logger.info("Comparing HDF5 contents...")
     with h5py.File(golden, "r") as hf_g, h5py.File(test, "r") as hf_t:
         compare_groups(hf_g, hf_t)
 
+    logger.info("Checking file space layout...")
+    with h5py.File(golden, "r") as hf_g:
+        golden_page_size = get_page_size(hf_g)
+    if golden_page_size is not None:
+        check_paged_layout(test, page_size=golden_page_size)
+
     logger.info("Checking geospatial metadata...")
     _check_raster_geometadata(
         io.format_nc_filename(golden, data_dset),
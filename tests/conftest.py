@@ -1,5 +1,9 @@
 import os
+import re
 import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Literal
 
@@ -135,3 +139,63 @@ def scratch_dir(tmp_path_factory):
         pytest.skip("Real data not available")
     tmpdir = tmp_path_factory.mktemp("test_data")
     return _untar_dir(tmpdir, WORKFLOW_SCRATCH_FILE) / "scratch"
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serve the files of `server.directory`, honouring single-range requests."""
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool):
+        path = self.server.directory / self.path.lstrip("/")
+        if not path.is_file():
+            self.send_error(404)
+            return
+        size = path.stat().st_size
+        start, end = 0, size
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match[1])
+            end = min(int(match[2]) + 1, size) if match[2] else size
+        self.server.requests.append((self.command, self.path, start, end))
+        time.sleep(self.server.latency)
+        self.send_response(206 if match else 200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self.end_headers()
+        if send_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                self.wfile.write(f.read(end - start))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_range_server(tmp_path):
+    """HTTP server of the files in `server.directory` (a temporary directory).
+
+    Supports byte-range requests, like remote object stores, and records each
+    request as (method, path, start, end) in `server.requests`. Set
+    `server.latency` (seconds) to simulate the round trip to a remote store.
+    The URL of a served file is `server.url(name)`.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeRequestHandler)
+    server.directory = tmp_path / "served"
+    server.directory.mkdir()
+    server.requests = []
+    server.latency = 0.0
+    server.url = lambda name: f"http://127.0.0.1:{server.server_port}/{name}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
@@ -1,8 +1,50 @@
 """Tests for pure helpers in disp_nisar._baselines."""
 
+from pathlib import Path
+
 import numpy as np
+import pytest
+
+from disp_nisar import _baselines
+from disp_nisar._baselines import (
+    _get_grids,
+    _interpolate_data,
+    create_baseline_cache,
+    read_pair_baseline,
+)
+from disp_nisar._orbit import (
+    OrbitArrays,
+    compute_perpendicular_baselines,
+    geo2rdr_zero_doppler,
+    llh_to_xyz,
+)
+
+GM = 3.986004418e14
+ORBIT_LON = np.deg2rad(-116.5)
+
+
+def _circular_orbit(radius, lon=ORBIT_LON, spacing=10.0):
+    """Polar circular orbit in the plane of meridian `lon`, centered at 35 N."""
+    omega = np.sqrt(GM / radius**3)
+    times = np.arange(-300, 300 + spacing, spacing)
+    theta = np.deg2rad(35) + omega * times
+    in_plane = np.array([np.cos(lon), np.sin(lon), 0.0])
+    up = np.array([0.0, 0.0, 1.0])
+    positions = radius * (
+        np.cos(theta)[:, None] * in_plane + np.sin(theta)[:, None] * up
+    )
+    velocities = (
+        radius
+        * omega
+        * (-np.sin(theta)[:, None] * in_plane + np.cos(theta)[:, None] * up)
+    )
+    return OrbitArrays(times=times, positions=positions, velocities=velocities)
+
 
-from disp_nisar._baselines import _get_grids
+@pytest.fixture
+def targets():
+    lon, lat = np.meshgrid(np.linspace(-117.3, -117.0, 7), np.linspace(34.5, 35.5, 5))
+    return llh_to_xyz(lon, lat, 100.0)
 
 
 class TestGetGrids:
@@ -29,3 +71,93 @@ class TestGetGrids:
         lon, _ = _get_grids(x, y, 32611)
         # Larger easting -> larger (less negative) longitude
         assert lon[0, 1] > lon[0, 0]
+
+
+def test_interpolate_data_rows_match_full_output():
+    data = np.arange(12, dtype=float).reshape(3, 4)
+    full = _interpolate_data(data, shape=(20, 30))
+    assert full.shape == (20, 30)
+    strip = _interpolate_data(data, shape=(20, 30), rows=slice(5, 12))
+    np.testing.assert_allclose(strip, full[5:12])
+
+
+def test_geo2rdr_zero_doppler_matches_circular_orbit(targets):
+    radius = 7.07e6
+    orbit = _circular_orbit(radius)
+    az_time, slant_range = geo2rdr_zero_doppler(targets, orbit)
+
+    # Closest point of the circle: the target's angle within the orbit plane
+    in_plane = np.array([np.cos(ORBIT_LON), np.sin(ORBIT_LON), 0.0])
+    theta = np.arctan2(targets[:, 2], targets @ in_plane)
+    omega = np.sqrt(GM / radius**3)
+    expected_time = (theta - np.deg2rad(35)) / omega
+    np.testing.assert_allclose(az_time, expected_time, atol=1e-5)
+
+    pos, _, _ = orbit.interpolate(az_time)
+    np.testing.assert_allclose(slant_range, np.linalg.norm(targets - pos, axis=1))
+
+
+def test_batch_baselines_match_isce3(targets):
+    isce3 = pytest.importorskip("isce3")
+    baseline = pytest.importorskip("dolphin.baseline")
+
+    orbit_ref = _circular_orbit(7.07e6)
+    orbit_sec = _circular_orbit(7.07e6 + 150, lon=ORBIT_LON + 2e-5)
+    batch = compute_perpendicular_baselines(targets, orbit_ref, orbit_sec)
+
+    epoch = isce3.core.DateTime("2025-01-01T00:00:00")
+
+    def to_isce3(orbit):
+        svs = [
+            isce3.core.StateVector(epoch + isce3.core.TimeDelta(float(t)), p, v)
+            for t, p, v in zip(orbit.times, orbit.positions, orbit.velocities)
+        ]
+        return isce3.core.Orbit(svs, epoch)
+
+    ellipsoid = isce3.core.Ellipsoid()
+    isce3_orbits = to_isce3(orbit_ref), to_isce3(orbit_sec)
+    expected = []
+    for xyz in targets:
+        llh = ellipsoid.xyz_to_lon_lat(xyz).reshape(3, 1)
+        solutions = [
+            isce3.geometry.geo2rdr(
+                llh,
+                ellipsoid,
+                orbit,
+                isce3.core.LUT2d(),
+                0.24,
+                isce3.core.LookSide.Right,
+            )
+            for orbit in isce3_orbits
+        ]
+        (t_ref, r_ref), (t_sec, r_sec) = solutions
+        pos_ref, vel_ref = isce3_orbits[0].interpolate(t_ref)
+        pos_sec, _ = isce3_orbits[1].interpolate(t_sec)
+        expected.append(
+            baseline.compute(llh, pos_ref, pos_sec, r_ref, r_sec, vel_ref, ellipsoid)
+        )
+    np.testing.assert_allclose(batch, np.ravel(expected), rtol=1e-3, atol=1e-2)
+
+
+def test_pair_baseline_from_cache(tmp_path, monkeypatch):
+    orbits = {
+        "a.h5": _circular_orbit(7.07e6),
+        "b.h5": _circular_orbit(7.07e6 + 60, lon=ORBIT_LON + 1e-5),
+        "c.h5": _circular_orbit(7.07e6 - 80, lon=ORBIT_LON + 3e-5),
+    }
+    monkeypatch.setattr(
+        _baselines.OrbitArrays, "from_h5", lambda f: orbits[Path(f).name]
+    )
+    x = np.linspace(440_000, 470_000, 4)
+    y = np.linspace(3_800_000, 3_900_000, 3)
+    cache = create_baseline_cache(
+        tmp_path / "baselines.h5", list(orbits), x=x, y=y, epsg=32611
+    )
+
+    lon, lat = _get_grids(x, y, 32611)
+    xyz = llh_to_xyz(lon, lat)
+    expected = compute_perpendicular_baselines(xyz, orbits["b.h5"], orbits["c.h5"])
+    out = read_pair_baseline(cache, "b.h5", "c.h5", x=x, y=y)
+    np.testing.assert_allclose(out.ravel(), expected, rtol=1e-2)
+    # Different grid: not usable
+    assert read_pair_baseline(cache, "b.h5", "c.h5", x=x + 30, y=y) is None
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar._chunks import (
+    copy_chunks,
+    decode_chunk,
+    get_chunk_codec,
+    write_chunked,
+)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(50, 70)).astype(np.float32)
+
+
+@pytest.mark.parametrize("shuffle", [True, False])
+@pytest.mark.parametrize("dtype", ["float32", "int16", "uint8"])
+def test_write_chunked_roundtrip(tmp_path, data, shuffle, dtype):
+    arr = (data * 100).astype(dtype)
+    with h5py.File(tmp_path / "out.h5", "w") as hf:
+        dset = hf.create_dataset(
+            "data",
+            shape=arr.shape,
+            dtype=dtype,
+            chunks=(16, 32),
+            compression="gzip",
+            shuffle=shuffle,
+        )
+        with ThreadPoolExecutor(4) as executor:
+            # Two strips of whole chunk rows; the last one ends at the edge
+            write_chunked(dset, arr[:32], row_start=0, executor=executor)
+            write_chunked(dset, arr[32:], row_start=32, executor=executor)
+
+    with h5py.File(tmp_path / "out.h5") as hf:
+        np.testing.assert_array_equal(hf["data"][()], arr)
+
+
+def test_write_chunked_keeps_input(tmp_path, data):
+    # Strips as wide as the chunks: each chunk is a contiguous view of `data`
+    arr = data[:, :32].copy()
+    expected = arr.copy()
+    with h5py.File(tmp_path / "out.h5", "w") as hf:
+        dset = hf.create_dataset(
+            "data", shape=arr.shape, dtype=arr.dtype, chunks=(16, 32), shuffle=True
+        )
+        write_chunked(dset, arr, row_start=0, keep_bits=8)
+        rounded = dset[()]
+    np.testing.assert_array_equal(arr, expected)
+    assert not np.array_equal(rounded, expected)
+    np.testing.assert_allclose(rounded, expected, rtol=2**-8)
+
+
+def test_direct_chunks_match_hdf5_pipeline(tmp_path, data):
+    kwargs = {"chunks": (16, 32), "compression": "gzip", "shuffle": True}
+    with h5py.File(tmp_path / "out.h5", "w") as hf:
+        direct = hf.create_dataset("direct", shape=data.shape, dtype="f4", **kwargs)
+        write_chunked(direct, data)
+        hf.create_dataset("regular", data=data, **kwargs)
+
+    with h5py.File(tmp_path / "out.h5") as hf:
+        codec = get_chunk_codec(hf["direct"])
+        for name in ("direct", "regular"):
+            filter_mask, raw = hf[name].id.read_direct_chunk((16, 32))
+            chunk = decode_chunk(raw, np.float32, (16, 32), codec, filter_mask)
+            np.testing.assert_array_equal(chunk, data[16:32, 32:64])
+
+
+def test_unaligned_write_falls_back(tmp_path, data):
+    with h5py.File(tmp_path / "out.h5", "w") as hf:
+        dset = hf.create_dataset(
+            "data", shape=data.shape, dtype="f4", chunks=(16, 32), compression="gzip"
+        )
+        write_chunked(dset, data[:10], row_start=0)
+        write_chunked(dset, data[10:], row_start=10)
+        np.testing.assert_array_equal(dset[()], data)
+
+
+def test_unsupported_filter_falls_back(tmp_path, data):
+    with h5py.File(tmp_path / "out.h5", "w") as hf:
+        dset = hf.create_dataset(
+            "data", shape=data.shape, dtype="f4", chunks=(16, 32), fletcher32=True
+        )
+        assert get_chunk_codec(dset) is None
+        write_chunked(dset, data)
+        np.testing.assert_array_equal(dset[()], data)
+
+
+def test_copy_chunks(tmp_path, data):
+    kwargs = {
+        "shape": data.shape,
+        "dtype": "f4",
+        "chunks": (16, 32),
+        "compression": "gzip",
+        "shuffle": True,
+        "fillvalue": np.nan,
+    }
+    with (
+        h5py.File(tmp_path / "src.h5", "w") as src,
+        h5py.File(tmp_path / "dst.h5", "w") as dst,
+    ):
+        src.create_dataset("data", **kwargs)
+        # Leave the last strip of chunks unwritten
+        write_chunked(src["data"], data[:32])
+        dst.create_dataset("data", **kwargs)
+        assert copy_chunks(src["data"], dst["data"])
+        out = dst["data"][()]
+        np.testing.assert_array_equal(out[:32], data[:32])
+        assert np.isnan(out[32:]).all()
+
+        dst.create_dataset("other", **(kwargs | {"shuffle": False}))
+        assert not copy_chunks(src["data"], dst["other"])
@@ -0,0 +1,51 @@
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar._coarse_grid import CoarseGrid, read_correction_layer
+
+
+@pytest.fixture
+def grid():
+    return CoarseGrid(
+        gt=(500_000, 30, 0, 4_000_000, 0, -30), shape=(230, 310), subsample=50
+    )
+
+
+def _plane(y, x):
+    return 1e-3 * (x - 500_000) - 2e-3 * (y - 4_000_000) + 0.5
+
+
+def test_upsample_plane_is_exact(grid):
+    y, x = grid.coordinates()
+    coarse = _plane(y[:, None], x[None, :])
+    assert coarse.shape == grid.coarse_shape
+
+    full_y = 4_000_000 - 30 * (np.arange(grid.shape[0]) + 0.5)
+    full_x = 500_000 + 30 * (np.arange(grid.shape[1]) + 0.5)
+    expected = _plane(full_y[:, None], full_x[None, :])
+    np.testing.assert_allclose(grid.upsample(coarse), expected, rtol=1e-5)
+
+    rows, cols = slice(120, 130), slice(7, 260)
+    np.testing.assert_allclose(
+        grid.upsample(coarse, rows, cols), expected[rows, cols], rtol=1e-5
+    )
+
+
+def test_read_correction_layer(tmp_path, grid):
+    y, x = grid.coordinates()
+    full_y = 4_000_000 - 30 * (np.arange(grid.shape[0]) + 0.5)
+    full_x = 500_000 + 30 * (np.arange(grid.shape[1]) + 0.5)
+    filename = tmp_path / "product.nc"
+    with h5py.File(filename, "w") as hf:
+        hf["y"], hf["x"] = full_y, full_x
+        group = hf.create_group("corrections")
+        group["y"], group["x"] = y, x
+        group["coarse"] = _plane(y[:, None], x[None, :])
+        group["full"] = _plane(full_y[:, None], full_x[None, :])
+
+    rows, cols = slice(33, 101), slice(250, None)
+    expected = _plane(full_y[rows, None], full_x[None, cols])
+    for name in ["coarse", "full"]:
+        out = read_correction_layer(filename, name, rows=rows, cols=cols)
+        np.testing.assert_allclose(out, expected, rtol=1e-5)
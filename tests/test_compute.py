@@ -0,0 +1,74 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from disp_nisar._compute import (
+    ComputeContext,
+    get_compute_context,
+    get_threads_per_process,
+    total_memory,
+)
+from disp_nisar._stack_reader import ChunkedStackReader
+
+
+def test_compute_context_environment(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "16")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    with ComputeContext(n_workers=2, threads_per_worker=3) as outer:
+        assert os.environ["OMP_NUM_THREADS"] == "3"
+        assert os.environ["MKL_NUM_THREADS"] == "3"
+        assert "intra_op_parallelism_threads=3" in os.environ["XLA_FLAGS"]
+        with ComputeContext(threads_per_worker=1) as inner:
+            assert get_compute_context() is inner
+            assert os.environ["OMP_NUM_THREADS"] == "1"
+        assert get_compute_context() is outer
+        assert os.environ["OMP_NUM_THREADS"] == "3"
+    assert get_compute_context() is None
+    assert os.environ["OMP_NUM_THREADS"] == "16"
+    assert "MKL_NUM_THREADS" not in os.environ
+
+
+def test_compute_context_from_worker_settings():
+    settings = SimpleNamespace(n_parallel_bursts=8, threads_per_worker=2)
+    compute = ComputeContext.from_worker_settings(settings, max_cores=6)
+    # 8 workers of 2 threads don't fit in 6 cores
+    assert (compute.n_workers, compute.threads_per_worker) == (3, 2)
+    assert 0 < compute.memory_limit * 3 <= total_memory()
+
+    compute = ComputeContext.from_worker_settings(
+        settings, max_cores=32, memory_limit=2**30
+    )
+    assert (compute.n_workers, compute.memory_limit) == (8, 2**30)
+
+    with pytest.raises(ValueError, match="positive"):
+        ComputeContext(n_workers=0)
+
+
+def test_pools_sized_from_compute_context(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    filename = tmp_path / "slc.h5"
+    with h5py.File(filename, "w") as hf:
+        hf.create_dataset("data", shape=(4, 4), dtype="complex64")
+
+    cpus = os.cpu_count() or 1
+    assert get_threads_per_process(2) == max(1, cpus // 2)
+    with ComputeContext(n_workers=3, threads_per_worker=2) as compute:
+        assert compute.cores == 6
+        # e.g. the compression threads of each of 4 product workers
+        assert get_threads_per_process(4) == 1
+        with ChunkedStackReader([filename], "data") as reader:
+            assert reader._executor._max_workers == 6
+    assert get_threads_per_process(cpus * 2) == 1
+
+
+def test_compute_context_cluster_shut_down():
+    pytest.importorskip("dask.distributed")
+    da = pytest.importorskip("dask.array")
+
+    with ComputeContext(n_workers=1, memory_limit=2**30, processes=False) as compute:
+        client = compute.get_client()
+        assert compute.get_client() is client
+        (total,) = compute.compute(da.ones(10, chunks=5).sum())
+        assert total == 10
+    assert client.status == "closed"
@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from opera_utils.credentials import AWSCredentials
+
+from disp_nisar import _credentials
+from disp_nisar._credentials import (
+    CredentialManager,
+    StaticCredentialProvider,
+    get_credential_manager,
+    set_credential_provider,
+    share_credentials,
+)
+from disp_nisar._streaming import get_earthaccess_s3_creds
+from disp_nisar._worker_pool import WorkerPool
+
+NISAR = "https://nisar.asf.earthdatacloud.nasa.gov/s3credentials"
+CREDS = AWSCredentials("key", "secret", "token")
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(_credentials, "_manager", None)
+    provider = StaticCredentialProvider(CREDS, auth="session")
+    manager = set_credential_provider(provider)
+    yield provider
+    manager.close()
+
+
+def test_login_and_credentials_cached(provider):
+    manager = get_credential_manager()
+    with ThreadPoolExecutor(8) as pool:
+        auths = list(pool.map(lambda _: manager.login(), range(16)))
+        creds = list(pool.map(lambda _: get_earthaccess_s3_creds("nisar"), range(16)))
+    assert auths == ["session"] * 16
+    assert creds == [CREDS] * 16
+    assert provider.num_logins == 1
+    assert provider.num_fetches == 1
+
+
+def test_expired_credentials_fetched_again():
+    # Valid for less than the minimum validity: never reused
+    provider = StaticCredentialProvider(CREDS, lifetime=timedelta(seconds=10))
+    manager = CredentialManager(provider)
+    manager.get_s3_credentials(NISAR)
+    manager.get_s3_credentials(NISAR)
+    assert provider.num_fetches == 2
+    manager.close()
+
+
+def test_background_refresh():
+    lifetime = timedelta(hours=1)
+    provider = StaticCredentialProvider(CREDS, lifetime=lifetime)
+    # Refreshed 0.1 s after each fetch
+    manager = CredentialManager(
+        provider, refresh_margin=lifetime - timedelta(seconds=0.1)
+    )
+    manager.get_s3_credentials(NISAR)
+    first = manager.snapshot()[NISAR].expiration
+    deadline = time.monotonic() + 10
+    while provider.num_fetches < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert provider.num_fetches >= 3
+    assert manager.snapshot()[NISAR].expiration > first
+
+    manager.close()
+    num_fetches = provider.num_fetches
+    time.sleep(0.3)
+    assert provider.num_fetches == num_fetches
+
+
+def test_failed_refresh_retried(monkeypatch):
+    monkeypatch.setattr(_credentials, "RETRY_DELAY", timedelta(seconds=0.1))
+    lifetime = timedelta(hours=1)
+    provider = StaticCredentialProvider(CREDS, lifetime=lifetime)
+    fetch = provider.fetch_s3_credentials
+    calls = []
+
+    def flaky_fetch(endpoint):
+        calls.append(endpoint)
+        if len(calls) == 2:
+            raise OSError("throttled")
+        return fetch(endpoint)
+
+    provider.fetch_s3_credentials = flaky_fetch
+    manager = CredentialManager(
+        provider, refresh_margin=lifetime - timedelta(seconds=0.2)
+    )
+    # The cached credentials stay in use while the refresh is retried
+    deadline = time.monotonic() + 10
+    while len(calls) < 3 and time.monotonic() < deadline:
+        assert manager.get_s3_credentials(NISAR) == CREDS
+        time.sleep(0.05)
+    manager.close()
+    assert len(calls) >= 3
+    assert provider.num_fetches == len(calls) - 1
+
+
+def test_workers_seeded(provider):
+    get_earthaccess_s3_creds("nisar")
+    expected = share_credentials()
+    assert set(expected) == {NISAR}
+    with WorkerPool(2, preload_modules=()) as pool:
+        # The workers' default provider would request new credentials from ASF
+        seeded = pool.submit(share_credentials).result()
+    assert seeded == expected
+    assert provider.num_fetches == 1
@@ -1,8 +1,15 @@
+import logging
 from contextlib import chdir
+from datetime import datetime
+from functools import partial
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
+from disp_nisar import main
+from disp_nisar._manifest import RunManifest
+from disp_nisar._scheduler import Stage, StageScheduler
 from disp_nisar.cli.run import run_main
 
 TEST_DATA_DIR = Path(__file__).parent / "data/delivery_data_small"
@@ -15,3 +22,105 @@ def test_run_main():
 
     with chdir(TEST_DATA_DIR):
         run_main(config_file="config_files/runconfig_historical.yaml")
+
+
+def test_process_product_writes_product_log(tmp_path, monkeypatch, caplog):
+    def create_output_product(output_name, **_):
+        logging.getLogger("disp_nisar.product").info("Writing %s", output_name.name)
+
+    monkeypatch.setattr(main.product, "create_output_product", create_output_product)
+    unw_dir = tmp_path / "unwrapped"
+    unw_dir.mkdir()
+    files = main.ProductFiles(
+        *(unw_dir / f"20221119_20221213.{ext}" for ext in ["unw.tif", "conncomp"]),
+        *(tmp_path / name for name in ["tcorr.tif", "ifg.cor", "shp.tif", "ps.tif"]),
+        None,
+        *(tmp_path / name for name in ["similarity.tif", "residual.tif"]),
+        None,
+    )
+    dates = {(datetime(2022, 11, 19),): [], (datetime(2022, 12, 13),): []}
+    caplog.set_level(logging.INFO, logger="disp_nisar")
+    num_handlers = len(logging.getLogger("disp_nisar").handlers)
+
+    # As in a worker whose logging is set up by `_initialize_product_worker`
+    output_path = main.process_product(
+        files,
+        out_dir=tmp_path,
+        date_to_cslc_files=dates,
+        pge_runconfig=None,
+        dolphin_config=None,
+        wavelength=0.24,
+        processing_start_datetime=datetime(2024, 1, 1),
+        configure_logging=False,
+    )
+    assert output_path == tmp_path / "20221119_20221213.nc"
+    log_text = (unw_dir / "log_20221119_20221213.nc.log").read_text()
+    assert "Missing ionospheric correction" in log_text
+    assert "Writing 20221119_20221213.nc" in log_text
+    # Only while the product was created
+    assert len(logging.getLogger("disp_nisar").handlers) == num_handlers
+
+
+def test_split_spectrum_products_resume_after_trim(tmp_path, monkeypatch):
+    staged = tmp_path / "stage_inputs" / "NISAR_L2_GSLC_20221119.h5"
+    staged.parent.mkdir()
+    staged.write_bytes(b"GSLC with its SLC arrays")
+    cfg_freq_b = SimpleNamespace(
+        cslc_file_list=[staged],
+        work_directory=tmp_path / "scratch_freqB",
+        input_options=SimpleNamespace(subdataset="/science/LSAR/GSLC/grids"),
+        output_options=SimpleNamespace(),
+    )
+    cfg_freq_b.work_directory.mkdir()
+    cfg = SimpleNamespace(
+        output_options=SimpleNamespace(bounds=None, bounds_epsg=4326, epsg=32611)
+    )
+    pge_runconfig = SimpleNamespace(to_workflow=lambda **_: cfg_freq_b)
+    monkeypatch.setattr(main, "run_displacement", lambda **_: None)
+    calls = []
+
+    def ionosphere(freqB_cslc_file, **_):
+        calls.append("ionosphere")
+        iono_file = tmp_path / "iono.tif"
+        iono_file.write_text(str(freqB_cslc_file))
+        return {"ionospheric_corrections": [iono_file]}
+
+    def trim_inputs(**_):
+        calls.append("trim_inputs")
+        staged.write_bytes(b"GSLC")
+
+    def products(**_):
+        calls.append("products")
+        return {"product_paths": []}
+
+    freq_b = partial(
+        main._stage_displacement_freq_b, cfg, pge_runconfig, False, None, None
+    )
+    stages = [
+        Stage(
+            "displacement_freqB",
+            freq_b,
+            outputs=("freqB_work_directory", "freqB_cslc_file"),
+        ),
+        Stage(
+            "ionosphere",
+            ionosphere,
+            inputs=("freqB_work_directory", "freqB_cslc_file"),
+            outputs=("ionospheric_corrections",),
+        ),
+        Stage("trim_inputs", trim_inputs, inputs=("ionospheric_corrections",)),
+        Stage(
+            "products",
+            products,
+            inputs=("ionospheric_corrections",),
+            outputs=("product_paths",),
+        ),
+    ]
+    manifest_file = tmp_path / "manifest.json"
+    StageScheduler(stages, manifest=RunManifest(manifest_file)).run()
+    assert sorted(calls) == ["ionosphere", "products", "trim_inputs"]
+
+    # Resumed after the staged GSLC was trimmed
+    calls.clear()
+    StageScheduler(stages, manifest=RunManifest(manifest_file)).run()
+    assert calls == []
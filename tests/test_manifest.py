@@ -0,0 +1,149 @@
+"""Tests for the run manifest used to resume workflow stages."""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from disp_nisar._manifest import RunManifest, run_or_resume
+from disp_nisar._scheduler import Stage, StageScheduler
+
+
+@dataclass
+class _Outputs:
+    paths: list[Path]
+    name: str
+
+
+class _Config(BaseModel):
+    files: list[Path]
+    threshold: float
+
+
+def test_record_and_lookup(tmp_path):
+    infile = tmp_path / "in.txt"
+    infile.write_text("a")
+    outfile = tmp_path / "out.txt"
+    outfile.write_text("b")
+
+    manifest = RunManifest(tmp_path / "manifest.json")
+    fp = manifest.fingerprint([infile], {"param": 1})
+    manifest.record("stage", fp, _Outputs(paths=[outfile], name="x"))
+
+    # Reload from disk, as a rerun would
+    manifest = RunManifest(tmp_path / "manifest.json")
+    found, outputs = manifest.lookup("stage", fp)
+    assert found
+    assert outputs == _Outputs(paths=[outfile], name="x")
+
+
+def test_record_model(tmp_path):
+    config = _Config(files=[tmp_path / "in.txt"], threshold=0.15)
+    manifest = RunManifest(tmp_path / "manifest.json")
+    manifest.record("stage", "abc", {"config": config})
+
+    manifest = RunManifest(tmp_path / "manifest.json")
+    found, outputs = manifest.lookup("stage", "abc")
+    assert found
+    assert outputs == {"config": config}
+    # Only the values of a model are fingerprinted
+    assert RunManifest.fingerprint(config) == RunManifest.fingerprint(
+        _Config(files=[tmp_path / "in.txt"], threshold=0.15)
+    )
+
+
+def test_fingerprint_changes(tmp_path):
+    infile = tmp_path / "in.txt"
+    infile.write_text("a")
+    fp = RunManifest.fingerprint([infile], {"param": 1})
+    assert fp == RunManifest.fingerprint([infile], {"param": 1})
+    assert fp != RunManifest.fingerprint([infile], {"param": 2})
+
+    st = infile.stat()
+    os.utime(infile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert fp != RunManifest.fingerprint([infile], {"param": 1})
+
+    # A string path is only fingerprinted by name
+    fp_str = RunManifest.fingerprint({"file": str(infile)})
+    infile.write_text("longer contents")
+    assert fp_str == RunManifest.fingerprint({"file": str(infile)})
+
+
+def test_missing_output_reruns(tmp_path):
+    outfile = tmp_path / "out.txt"
+    outfile.write_text("b")
+    manifest = RunManifest(tmp_path / "manifest.json")
+    manifest.record("stage", "abc", [outfile])
+    assert manifest.lookup("stage", "abc")[0]
+    outfile.unlink()
+    assert not manifest.lookup("stage", "abc")[0]
+
+
+def test_run_or_resume(tmp_path):
+    manifest = RunManifest(tmp_path / "manifest.json")
+    calls = []
+
+    def func():
+        calls.append(1)
+        return {"value": 3}
+
+    assert run_or_resume(manifest, "step", func, params=1) == {"value": 3}
+    assert run_or_resume(manifest, "step", func, params=1) == {"value": 3}
+    assert len(calls) == 1
+    run_or_resume(manifest, "step", func, params=2)
+    assert len(calls) == 2
+
+
+def test_scheduler_resumes(tmp_path):
+    calls = []
+
+    def make_stages(fail: bool):
+        def first():
+            calls.append("first")
+            out = tmp_path / "first.txt"
+            out.write_text("1")
+            return {"first": out}
+
+        def second(first):
+            calls.append("second")
+            if fail:
+                raise RuntimeError("killed")
+            return {"second": first.read_text()}
+
+        return [
+            Stage("first", first, outputs=("first",)),
+            Stage("second", second, inputs=("first",), outputs=("second",)),
+        ]
+
+    manifest_file = tmp_path / "manifest.json"
+    try:
+        StageScheduler(make_stages(True), manifest=RunManifest(manifest_file)).run()
+    except RuntimeError:
+        pass
+    values = StageScheduler(
+        make_stages(False), manifest=RunManifest(manifest_file)
+    ).run()
+    assert values["second"] == "1"
+    assert calls == ["first", "second", "second"]
+
+
+def test_scheduler_reruns_stage_missing_outputs(tmp_path):
+    calls = []
+
+    def first():
+        calls.append("first")
+        return {"first": 1, "extra": 2}
+
+    manifest_file = tmp_path / "manifest.json"
+    StageScheduler(
+        [Stage("first", first, outputs=("first",))],
+        manifest=RunManifest(manifest_file),
+    ).run()
+    # The stage now has an output its recorded run did not keep
+    values = StageScheduler(
+        [Stage("first", first, outputs=("first", "extra"))],
+        manifest=RunManifest(manifest_file),
+    ).run()
+    assert values == {"first": 1, "extra": 2}
+    assert calls == ["first", "first"]
@@ -0,0 +1,99 @@
+import pickle
+from datetime import datetime
+
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar._metadata_index import (
+    NISAR_ORBIT_GROUP,
+    GslcMetadataIndex,
+    scan_gslc,
+    write_snapshot,
+)
+
+IDENTIFICATION = "/science/LSAR/identification"
+
+
+def _make_gslc(filename, start="2024-01-01T00:00:10.123456789"):
+    with h5py.File(filename, "w") as hf:
+        ident = hf.create_group(IDENTIFICATION)
+        ident["zeroDopplerStartTime"] = np.bytes_(start)
+        ident["zeroDopplerEndTime"] = np.bytes_("2024-01-01T00:00:40.5")
+        ident["orbitPassDirection"] = np.bytes_("Ascending")
+        ident["trackNumber"] = 42
+        ident["lookDirection"] = np.bytes_("Left")
+
+        orbit = hf.create_group(NISAR_ORBIT_GROUP)
+        orbit.attrs["comment"] = "state vectors"
+        time = orbit.create_dataset("time", data=np.arange(10.0))
+        time.attrs["units"] = np.bytes_("seconds since 2024-01-01 00:00:00")
+        time.make_scale("time")
+        for name in ["position", "velocity"]:
+            dset = orbit.create_dataset(
+                name, data=np.ones((10, 3)), chunks=(5, 3), compression="gzip"
+            )
+            dset.dims[0].attach_scale(time)
+        orbit.create_dataset("orbitType", data="POE", dtype=h5py.string_dtype())
+
+        grid = hf.create_group("/science/LSAR/GSLC/grids/frequencyA")
+        grid["centerFrequency"] = 1.25e9
+        grid["projection"] = 32611
+        grid["xCoordinates"] = 300_000 + 10.0 * np.arange(100)
+        grid["yCoordinates"] = 4_000_000 - 5.0 * np.arange(50)
+        grid["xCoordinateSpacing"] = 10.0
+        grid["yCoordinateSpacing"] = -5.0
+
+
+def test_scan_gslc(tmp_path):
+    filename = tmp_path / "gslc_20240101.h5"
+    _make_gslc(filename)
+    meta = scan_gslc(filename)
+    assert meta.zero_doppler_start_time == datetime(2024, 1, 1, 0, 0, 10, 123456)
+    assert meta.zero_doppler_end_time == datetime(2024, 1, 1, 0, 0, 40, 500000)
+    assert meta.orbit_type == "POE"
+    assert meta.orbit_direction == "ascending"
+    assert meta.center_frequencies == {"frequencyA": 1.25e9}
+    epsg, bbox = meta.frame_bboxes["frequencyA"]
+    assert epsg == 32611
+    assert tuple(bbox) == (299_995, 3_999_752.5, 301_000 - 5, 4_000_002.5)
+
+    # Sent to workers by pickling, and looked up by file name
+    index = pickle.loads(pickle.dumps(GslcMetadataIndex([meta])))
+    assert "/elsewhere/gslc_20240101.h5" in index
+    assert index.get_frame_bbox(filename) == (epsg, bbox)
+
+
+def test_index_scans_missing_files(tmp_path):
+    files = [tmp_path / f"gslc_2024010{i}.h5" for i in range(1, 4)]
+    for i, f in enumerate(files):
+        _make_gslc(f, start=f"2024-01-0{i + 1}T00:00:10.0")
+    index = GslcMetadataIndex.from_files(files[:2], max_workers=1)
+    assert len(index) == 2
+    assert files[2] not in index
+    assert index.get(files[2]).zero_doppler_start_time == datetime(2024, 1, 3, 0, 0, 10)
+    assert len(index) == 3
+
+    with pytest.raises(OSError):
+        index.get(tmp_path / "missing.h5")
+
+
+def test_write_snapshot_matches_copy(tmp_path):
+    filename = tmp_path / "gslc_20240101.h5"
+    _make_gslc(filename)
+    snapshot = scan_gslc(filename).snapshots[NISAR_ORBIT_GROUP]
+    new_path = "/science/LSAR/GSLC/metadata/reference_orbit"
+    with h5py.File(tmp_path / "out.h5", "w") as dst:
+        write_snapshot(dst, snapshot, new_path)
+
+    with h5py.File(filename) as src, h5py.File(tmp_path / "out.h5") as dst:
+        expected, out = src[NISAR_ORBIT_GROUP], dst[new_path]
+        assert out.attrs["comment"] == expected.attrs["comment"]
+        assert set(out) == set(expected)
+        for name in expected:
+            np.testing.assert_array_equal(out[name][()], expected[name][()])
+            assert out[name].dtype == expected[name].dtype
+        assert out["orbitType"][()] == b"POE"
+        assert out["position"].compression == "gzip"
+        assert out["position"].dims[0][0].name == f"{new_path}/time"
+        assert h5py.h5ds.is_scale(out["time"].id)
@@ -116,6 +116,8 @@ def test_algorithm_parameters_defaults():
     assert params.recommended_temporal_coherence_threshold == 0.6
     assert params.recommended_similarity_threshold == 0.5
     assert params.spatial_wavelength_cutoff == 25_000
+    assert params.spatial_filter_method == "full"
+    assert params.correction_layer_grid == "full"
     assert params.browse_image_vmin_vmax == (-0.10, 0.10)
     assert params.num_parallel_products == 3
 
@@ -1,6 +1,8 @@
 from pathlib import Path
+from types import SimpleNamespace
 
 import h5py
+import numpy as np
 import pytest
 
 from disp_nisar import product
@@ -83,3 +85,139 @@ def test_create_compressed_slc(tmp_path):
             in hf
         )
     # assert "/metadata/processing_information/input_burst_metadata/wavelength" in hf
+
+
+def test_compressed_products_share_cores(tmp_path, monkeypatch):
+    calls = []
+
+    def process_compressed_slc(info, compression_threads, **_):
+        calls.append(compression_threads)
+        return info.comp_slc_file
+
+    monkeypatch.setattr(product, "process_compressed_slc", process_compressed_slc)
+    comp_slc_files = [
+        tmp_path / f"compressed_20060630_2023010{i}_20230113.tif" for i in (1, 2)
+    ]
+    # Given one core, the products are made here, one at a time
+    paths = product.create_compressed_products(
+        {"": comp_slc_files},
+        cslc_file_list=[TEST_GSLC_FILE],
+        output_dir=tmp_path,
+        cores=1,
+    )
+    assert paths == comp_slc_files
+    assert calls == [1, 1]
+
+
+def test_process_compressed_slc_skips_existing(tmp_path):
+    from osgeo import gdal, osr
+
+    rows, cols = 700, 300
+    rng = np.random.default_rng(0)
+    slc = (rng.normal(size=(rows, cols)) + 1j * rng.normal(size=(rows, cols))).astype(
+        np.complex64
+    )
+    dispersion = rng.uniform(size=(rows, cols)).astype(np.complex64)
+    comp_slc_file = tmp_path / "compressed_20230101_20230101_20230113.tif"
+    ds = gdal.GetDriverByName("GTiff").Create(
+        str(comp_slc_file), cols, rows, 2, gdal.GDT_CFloat32
+    )
+    ds.SetGeoTransform((300_000, 30, 0, 4_000_000, 0, -30))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(32611)
+    ds.SetProjection(srs.ExportToWkt())
+    ds.GetRasterBand(1).WriteArray(slc)
+    ds.GetRasterBand(2).WriteArray(dispersion)
+    ds = None
+    gslc_file = tmp_path / "gslc.h5"
+    h5py.File(gslc_file, "w").close()
+
+    info = product.CompressedSLCInfo(comp_slc_file, tmp_path, gslc_file)
+    outname = product.process_compressed_slc(info, compression_threads=2)
+    with h5py.File(outname) as hf:
+        group = hf["/science/LSAR/GSLC/grids/frequencyA"]
+        np.testing.assert_allclose(group["HH"][()], slc, rtol=1e-3)
+        np.testing.assert_allclose(
+            group["amplitude_dispersion"][()], dispersion.real, rtol=1e-3
+        )
+
+    mtime = outname.stat().st_mtime_ns
+    assert product.process_compressed_slc(info) == outname
+    assert outname.stat().st_mtime_ns == mtime
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+@pytest.mark.parametrize("temp_coh_nodata", [0.0, np.nan])
+def test_strip_recommended_mask_matches_full_frame(temp_coh_nodata):
+    rng = np.random.default_rng(0)
+    shape = (3 * product.STRIP_ROWS // 2, 50)
+    names = product.DISPLACEMENT_PRODUCTS
+    temp_coh = rng.uniform(size=shape).astype(np.float32)
+    temp_coh[rng.uniform(size=shape) < 0.2] = temp_coh_nodata
+    similarity = rng.uniform(size=shape).astype(np.float32)
+    similarity[rng.uniform(size=shape) < 0.1] = np.nan
+    water = rng.integers(0, 2, shape, dtype=np.uint8)
+    conncomps = rng.integers(0, 3, shape, dtype=np.uint16)
+    algorithm_parameters = SimpleNamespace(
+        recommended_temporal_coherence_threshold=0.6,
+        recommended_similarity_threshold=0.5,
+    )
+
+    # As loaded by `io.load_gdal(..., masked=True)`
+    def load(arr, nodata):
+        if np.isnan(nodata):
+            return np.ma.masked_invalid(arr)
+        return np.ma.masked_equal(arr, nodata)
+
+    layers = {
+        names.temporal_coherence.name: load(temp_coh, temp_coh_nodata),
+        names.phase_similarity.name: load(similarity, np.nan),
+        names.water_mask.name: load(water, 255),
+        names.connected_component_labels.name: load(conncomps, 65535),
+    }
+
+    # The full frame computation, before the products were streamed
+    is_water = layers[names.water_mask.name].filled(0) == 0
+    is_zero_conncomp = layers[names.connected_component_labels.name].filled(0) == 0
+    bad_temporal_coherence = (
+        layers[names.temporal_coherence.name]
+        < algorithm_parameters.recommended_temporal_coherence_threshold
+    )
+    bad_similarity = (
+        layers[names.phase_similarity.name].filled(0)
+        < algorithm_parameters.recommended_similarity_threshold
+    )
+    is_low_quality = bad_temporal_coherence & bad_similarity
+    bad_pixel_mask = is_water | is_zero_conncomp | is_low_quality
+    expected = np.logical_not(bad_pixel_mask).astype("uint8")
+
+    strips = []
+    for start in range(0, shape[0], product.STRIP_ROWS):
+        rows = slice(start, start + product.STRIP_ROWS)
+        strip_layers = {name: layer[rows] for name, layer in layers.items()}
+        is_static_bad = product._get_static_bad_pixel_mask(
+            strip_layers, algorithm_parameters
+        )
+        is_zero_conncomp = (
+            strip_layers[names.connected_component_labels.name].filled(0) == 0
+        )
+        strips.append(np.logical_not(is_static_bad | is_zero_conncomp))
+    np.testing.assert_array_equal(
+        np.vstack(strips).astype("uint8"), np.asarray(expected)
+    )
+
+
+def test_copy_into_file_read_from_pool(tmp_path):
+    source = tmp_path / "source.h5"
+    dest = tmp_path / "dest.h5"
+    with h5py.File(source, "w") as hf:
+        hf["/metadata/value"] = np.arange(3)
+    with h5py.File(dest, "w") as hf:
+        hf["/data"] = np.zeros(3)
+    # Read first, leaving a read-only handle of it in the pool
+    with product.open_h5_file(dest) as hf:
+        assert "/metadata" not in hf
+
+    product._copy_hdf5_dsets(source, dest, [("/metadata", None)])
+    with product.open_h5_file(dest) as hf:
+        np.testing.assert_array_equal(hf["/metadata/value"][()], np.arange(3))
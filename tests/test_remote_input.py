@@ -0,0 +1,94 @@
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar import _remote_input, _streaming
+from disp_nisar._remote_input import _extract_subset, stage_remote_inputs
+from disp_nisar._remote_read import RemoteFile, fsspec_fetcher
+
+fsspec = pytest.importorskip("fsspec")
+pytest.importorskip("aiohttp")
+
+GRID = "/science/LSAR/GSLC/grids/frequencyA"
+SHAPE = (512, 400)
+
+
+def _write_gslc(filename):
+    rng = np.random.default_rng(0)
+    with h5py.File(filename, "w", fs_strategy="page", fs_page_size=64 * 1024) as hf:
+        hf["/science/LSAR/identification/absoluteOrbitNumber"] = 123
+        hf["/science/LSAR/GSLC/metadata/orbit/time"] = np.arange(10.0)
+        grid = hf.create_group(GRID)
+        x = grid.create_dataset("xCoordinates", data=np.arange(SHAPE[1]) * 10.0)
+        y = grid.create_dataset("yCoordinates", data=np.arange(SHAPE[0]) * -5.0)
+        grid["projection"] = 32611
+        grid["listOfPolarizations"] = np.array([b"HH", b"HV"])
+        x.make_scale("xCoordinates")
+        y.make_scale("yCoordinates")
+        for name in ["HH", "HV", "mask"]:
+            if name == "mask":
+                data = rng.integers(0, 3, SHAPE, dtype=np.uint8)
+            else:
+                data = (rng.normal(size=SHAPE) + 1j * rng.normal(size=SHAPE)).astype(
+                    np.complex64
+                )
+            dset = grid.create_dataset(
+                name, data=data, chunks=(128, 128), compression="gzip", shuffle=True
+            )
+            dset.attrs["units"] = "unitless"
+            dset.dims[0].attach_scale(y)
+            dset.dims[1].attach_scale(x)
+
+
+def _datasets(hf):
+    names = []
+    hf.visititems(
+        lambda name, obj: names.append(name) if isinstance(obj, h5py.Dataset) else None
+    )
+    return sorted(names)
+
+
+def test_stage_subset_with_range_requests(http_range_server, tmp_path, monkeypatch):
+    name = "NISAR_L2_PR_GSLC_001.h5"
+    source = http_range_server.directory / name
+    _write_gslc(source)
+    remote_files = []
+
+    def open_remote_file(url):
+        fetch_ranges, size = fsspec_fetcher(fsspec.filesystem("http"), url)
+        # Small first blocks, as the 4 MB default would span this small file, and
+        # no merged gaps, so the bytes fetched are only those read
+        remote_files.append(
+            RemoteFile(fetch_ranges, size, block_size=4096, max_gap=0, name=url)
+        )
+        return remote_files[-1]
+
+    monkeypatch.setattr(_streaming, "open_remote_file", open_remote_file)
+    monkeypatch.setattr(_remote_input, "authenticate_earthdata", lambda: None)
+
+    (staged,) = stage_remote_inputs(
+        [http_range_server.url(name)],
+        scratch_dir=tmp_path / "gslc",
+        polarization="HH",
+        staging_mode="subset",
+    )
+    assert staged == tmp_path / "gslc" / name
+    assert sorted(p.name for p in staged.parent.iterdir()) == [name]
+
+    # Same layers as extracted from a full download
+    expected = tmp_path / "expected.h5"
+    _extract_subset(source, expected, ["frequencyA"], "HH")
+    with h5py.File(staged) as hf, h5py.File(expected) as hf_expected:
+        assert _datasets(hf) == _datasets(hf_expected)
+        assert f"{GRID}/HV" not in hf
+        for dset_name in _datasets(hf):
+            np.testing.assert_array_equal(hf[dset_name][()], hf_expected[dset_name][()])
+        hh = hf[f"{GRID}/HH"]
+        assert hh.compression == "gzip"
+        assert hh.attrs["units"] == "unitless"
+        assert hh.dims[0][0].name == f"{GRID}/yCoordinates"
+        assert hh.dims[1][0].name == f"{GRID}/xCoordinates"
+
+    # The HV chunks (over 40% of the file) were never fetched
+    (remote,) = remote_files
+    assert remote.bytes_fetched < 0.6 * source.stat().st_size
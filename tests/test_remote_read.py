@@ -0,0 +1,96 @@
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar import _stack_reader, _streaming
+from disp_nisar._remote_read import (
+    RemoteFile,
+    fsspec_fetcher,
+    open_remote_hdf5,
+    probe_layout,
+)
+from disp_nisar._stack_reader import ChunkedStackReader
+
+fsspec = pytest.importorskip("fsspec")
+pytest.importorskip("aiohttp")
+
+DSET = "/science/LSAR/GSLC/grids/frequencyA/HH"
+SHAPE = (256, 200)
+PAGE_SIZE = 64 * 1024
+
+
+def _write_gslc(filename, data, **kwargs):
+    with h5py.File(filename, "w", **kwargs) as hf:
+        hf.create_dataset(
+            DSET, data=data, chunks=(64, 64), compression="gzip", shuffle=True
+        )
+
+
+def _open_remote(url, **kwargs):
+    fetch_ranges, size = fsspec_fetcher(fsspec.filesystem("http"), url)
+    return RemoteFile(fetch_ranges, size, name=url, **kwargs)
+
+
+@pytest.fixture
+def stack(http_range_server):
+    rng = np.random.default_rng(0)
+    data = (rng.normal(size=(3, *SHAPE)) + 1j * rng.normal(size=(3, *SHAPE))).astype(
+        np.complex64
+    )
+    urls = []
+    for i, arr in enumerate(data):
+        name = f"gslc_{i}.h5"
+        _write_gslc(
+            http_range_server.directory / name,
+            arr,
+            fs_strategy="page",
+            fs_page_size=PAGE_SIZE,
+        )
+        urls.append(http_range_server.url(name))
+    return urls, data
+
+
+def test_remote_hdf5_sized_to_pages(http_range_server, stack):
+    urls, data = stack
+    remote = _open_remote(urls[0], block_size=4096)
+    with open_remote_hdf5(remote, [DSET]) as hf:
+        assert remote.block_size == PAGE_SIZE
+        assert hf.id.get_access_plist().get_page_buffer_size()[0] == PAGE_SIZE
+        np.testing.assert_array_equal(hf[DSET][:], data[0])
+    # Whole pages were requested, each at most once
+    assert remote.bytes_fetched <= remote.size + PAGE_SIZE
+    ranges = [r[2:] for r in http_range_server.requests if r[0] == "GET"]
+    assert len(ranges) == len(set(ranges)) == remote.num_requests
+
+
+def test_probe_layout_unpaged(http_range_server):
+    _write_gslc(
+        http_range_server.directory / "unpaged.h5",
+        np.zeros(SHAPE, dtype=np.complex64),
+    )
+    remote = _open_remote(http_range_server.url("unpaged.h5"))
+    layout = probe_layout(remote, [DSET])
+    # 64 x 64 complex64 chunks of 32 kB: blocks of at least 256 kB
+    assert layout == (None, 64 * 64 * 8, 256 * 1024)
+
+
+def test_chunked_stack_reader_remote(stack, monkeypatch):
+    urls, data = stack
+    remote_files = []
+
+    def open_remote_file(url):
+        remote_files.append(_open_remote(url, max_gap=0))
+        return remote_files[-1]
+
+    monkeypatch.setattr(_streaming, "open_remote_file", open_remote_file)
+    monkeypatch.setattr(_stack_reader, "is_remote_url", lambda _: True)
+    with ChunkedStackReader(urls, DSET, max_workers=2) as reader:
+        requests_before = [f.num_requests for f in remote_files]
+        np.testing.assert_array_equal(
+            reader[:, 100:140, 30:170], data[:, 100:140, 30:170]
+        )
+        np.testing.assert_array_equal(reader[1, 250:, :10], data[1, 250:, :10])
+    # Each file's window was fetched in one batch, of at most 2 merged ranges
+    # (the chunks of a row are contiguous in the file)
+    for f, before in zip(remote_files, requests_before, strict=True):
+        assert 0 < f.num_requests - before <= 4
@@ -0,0 +1,89 @@
+"""Tests for the workflow stage scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from disp_nisar._scheduler import Stage, StageScheduler
+
+
+def test_runs_in_dependency_order():
+    order = []
+
+    def make(name, value):
+        def func(**kwargs):
+            order.append(name)
+            return {f"{name}_out": value + sum(kwargs.values())}
+
+        return func
+
+    stages = [
+        Stage("c", make("c", 100), inputs=("a_out", "b_out"), outputs=("c_out",)),
+        Stage("a", make("a", 1), outputs=("a_out",)),
+        Stage("b", make("b", 10), inputs=("a_out",), outputs=("b_out",)),
+    ]
+    values = StageScheduler(stages, max_cores=4).run()
+    assert order == ["a", "b", "c"]
+    assert values["c_out"] == 100 + 1 + 11
+
+
+def test_independent_stages_overlap():
+    # Both stages must be running at once for the barrier to release
+    barrier = threading.Barrier(2, timeout=5)
+
+    def func():
+        barrier.wait()
+
+    stages = [Stage("x", func), Stage("y", func)]
+    StageScheduler(stages, max_cores=2).run()
+
+
+def test_core_budget_serializes():
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def func():
+        with lock:
+            active.append(1)
+            max_active.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    stages = [Stage(name, func, cores=2) for name in ("x", "y", "z")]
+    StageScheduler(stages, max_cores=3).run()
+    assert max(max_active) == 1
+
+
+def test_initial_values():
+    stages = [Stage("a", lambda x: {"y": x * 2}, inputs=("x",), outputs=("y",))]
+    assert StageScheduler(stages).run({"x": 3})["y"] == 6
+
+
+def test_missing_input_raises():
+    stages = [Stage("a", dict, inputs=("x",))]
+    with pytest.raises(ValueError, match="missing inputs"):
+        StageScheduler(stages).run()
+
+
+def test_missing_output_raises():
+    stages = [Stage("a", lambda: {}, outputs=("x",))]
+    with pytest.raises(ValueError, match="did not return"):
+        StageScheduler(stages).run()
+
+
+def test_duplicate_output_raises():
+    stages = [Stage("a", dict, outputs=("x",)), Stage("b", dict, outputs=("x",))]
+    with pytest.raises(ValueError, match="produced by both"):
+        StageScheduler(stages)
+
+
+def test_stage_error_propagates():
+    def fail():
+        raise RuntimeError("boom")
+
+    stages = [Stage("a", fail), Stage("b", lambda: None)]
+    with pytest.raises(RuntimeError, match="boom"):
+        StageScheduler(stages).run()
@@ -3,10 +3,16 @@ from pathlib import Path
 
 import numpy as np
 import pytest
+import rasterio
 from dolphin import io
+from rasterio.transform import Affine
 
+from disp_nisar._coarse_grid import CoarseGrid
 from disp_nisar.solid_earth_tides import (
+    _load_los,
     calculate_solid_earth_tides_correction,
+    get_enu_tide_grid,
+    get_tide_grid_meta,
     resample_to_target,
 )
 
@@ -38,6 +44,52 @@ def test_calculate_solid_earth_tides_correction(orbit_direction):
     assert np.nanmax(solid_earth_t) < 0.1
 
 
+def test_tide_grid_cache(tmp_path):
+    ifgram_filename = TEST_DATA_DIR / "20160716_20160809.unw.tif"
+    meta = get_tide_grid_meta(ifgram_filename)
+    time = datetime(2016, 7, 16, 13, 27, 39, 698599)
+
+    tides = get_enu_tide_grid(time, meta, cache_dir=tmp_path)
+    assert tides.shape == (3, meta["LENGTH"], meta["WIDTH"])
+    assert len(list(tmp_path.glob("tides_*.npy"))) == 1
+    np.testing.assert_array_equal(get_enu_tide_grid(time, meta), tides)
+    np.testing.assert_array_equal(
+        get_enu_tide_grid(time, meta, cache_dir=tmp_path), tides
+    )
+
+
+def test_load_los_at_coarse_points(tmp_path):
+    shape, subsample = (53, 41), 10
+    rows, cols = np.mgrid[: shape[0], : shape[1]]
+    los = (rows * 1000 + cols).astype(np.float32)
+    filename = tmp_path / "los_east.tif"
+    gt = (500_000.0, 30.0, 0.0, 4_000_000.0, 0.0, -30.0)
+    with rasterio.open(
+        filename,
+        "w",
+        driver="GTiff",
+        height=shape[0],
+        width=shape[1],
+        count=1,
+        dtype="float32",
+        crs="EPSG:32611",
+        transform=Affine.from_gdal(*gt),
+        nodata=0,
+    ) as dst:
+        dst.write(los, 1)
+
+    grid = CoarseGrid(gt=gt, shape=shape, subsample=subsample)
+    out = _load_los(filename, grid)
+    # Sampled where the tides are evaluated: rows 0, 10, ..., 50 and the last row,
+    # columns 0, 10, ..., 40
+    assert out.shape == grid.coarse_shape == (7, 5)
+    row_idxs, col_idxs = grid.indices()
+    np.testing.assert_array_equal(out, los[np.ix_(row_idxs, col_idxs)])
+    # The nodata pixel (0, 0) stays masked
+    assert out.mask[0, 0]
+    assert out.mask.sum() == 1
+
+
 def test_resample_to_target_same_shape():
     """If array already matches target shape, return it unchanged."""
     arr = np.ones((10, 10), dtype=np.float64)
@@ -0,0 +1,79 @@
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar._stack_reader import ChunkedStackReader
+
+DSET = "/science/LSAR/GSLC/grids/frequencyA/HH"
+SHAPE = (100, 70)
+
+
+@pytest.fixture
+def stack_files(tmp_path):
+    rng = np.random.default_rng(0)
+    files, data = [], []
+    layouts = [
+        {"chunks": (32, 32), "compression": "gzip", "shuffle": True},
+        {"chunks": (32, 16), "compression": "gzip"},
+        {"chunks": (32, 32)},
+        # Not chunked: read through h5py
+        {},
+    ]
+    for i, layout in enumerate(layouts):
+        arr = (rng.normal(size=SHAPE) + 1j * rng.normal(size=SHAPE)).astype(
+            np.complex64
+        )
+        filename = tmp_path / f"slc_{i}.h5"
+        with h5py.File(filename, "w") as hf:
+            dset = hf.create_dataset(
+                DSET, SHAPE, np.complex64, fillvalue=5 + 0j, **layout
+            )
+            if i == 0:
+                # Leave the chunks of the bottom-right corner unwritten
+                dset[:64] = arr[:64]
+                dset[64:, :32] = arr[64:, :32]
+                arr[64:, 32:] = 5
+            else:
+                dset[:] = arr
+        files.append(filename)
+        data.append(arr)
+    return files, np.stack(data)
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        np.s_[:],
+        np.s_[:, 10:60, 20:55],
+        np.s_[:, 90:, 60:],
+        np.s_[1, 31:33, 31:33],
+        np.s_[[3, 0], 5, :],
+        np.s_[-1, :, -1],
+        np.s_[..., 40],
+        np.s_[1:3, ::7, 3:9],
+        np.s_[:, 0:0],
+    ],
+)
+def test_chunked_stack_reader(stack_files, key):
+    files, expected = stack_files
+    with ChunkedStackReader(files, DSET, max_workers=3) as reader:
+        assert reader.shape == (4, *SHAPE)
+        assert reader.dtype == np.complex64
+        np.testing.assert_array_equal(reader[key], expected[key])
+
+
+def test_chunked_stack_reader_nodata(stack_files):
+    files, expected = stack_files
+    with ChunkedStackReader(files, DSET, nodata=5) as reader:
+        block = reader[0, 60:, 30:]
+    assert isinstance(block, np.ma.MaskedArray)
+    np.testing.assert_array_equal(block.mask, expected[0, 60:, 30:] == 5)
+    assert block.mask[10:, 10:].all()
+
+
+def test_chunked_stack_reader_shape_mismatch(stack_files, tmp_path):
+    files, _ = stack_files
+    with h5py.File(tmp_path / "other.h5", "w") as hf:
+        hf.create_dataset(DSET, (10, 10), np.complex64)
+    with pytest.raises(ValueError, match="other.h5"):
+        ChunkedStackReader([*files, tmp_path / "other.h5"], DSET)
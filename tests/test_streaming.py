@@ -0,0 +1,89 @@
+import os
+import pickle
+
+import h5py
+import numpy as np
+import pytest
+
+from disp_nisar import _streaming
+from disp_nisar._streaming import StreamingFileManager
+
+
+@pytest.fixture
+def h5_files(tmp_path):
+    files = []
+    for i in range(3):
+        filename = tmp_path / f"file_{i}.h5"
+        with h5py.File(filename, "w", fs_strategy="page", fs_page_size=4096) as hf:
+            hf["data"] = np.full(5, i)
+        files.append(filename)
+    return files
+
+
+def test_handles_reused(h5_files):
+    with StreamingFileManager(page_buf_size=2**20, rdcc_nbytes=2**21) as manager:
+        with manager.open_h5(h5_files[0]) as hf:
+            first = hf
+            assert hf["data"][0] == 0
+        lease = manager.open_h5(h5_files[0])
+        assert "data" in lease
+        assert lease.file is first
+        assert lease.file.id.get_access_plist().get_page_buffer_size()[0] == 2**20
+        assert lease.file.id.get_access_plist().get_cache()[2] == 2**21
+        lease.close()
+        info = manager.pool_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert not first.id.valid
+
+
+def test_least_recently_used_closed(h5_files):
+    manager = StreamingFileManager(max_open_files=2)
+    in_use = manager.open_h5(h5_files[0])
+    for filename in h5_files[1:]:
+        with manager.open_h5(filename):
+            pass
+    # The file in use stays open, the idle file used the longest ago is closed
+    info = manager.pool_info()
+    assert (info.evictions, info.currsize) == (1, 2)
+    assert in_use["data"][0] == 0
+    in_use.close()
+    with manager.open_h5(h5_files[2]):
+        pass
+    assert manager.pool_info().hits == 1
+    manager.close()
+
+
+def test_changed_file_reopened(h5_files):
+    manager = StreamingFileManager()
+    with manager.open_h5(h5_files[0]) as hf:
+        assert hf["data"][0] == 0
+    # Replaced on disk
+    tmp_name = h5_files[0].with_suffix(".tmp")
+    with h5py.File(tmp_name, "w") as hf:
+        hf["data"] = np.full(5, 10)
+    os.replace(tmp_name, h5_files[0])
+    with manager.open_h5(h5_files[0]) as hf:
+        assert hf["data"][0] == 10
+    # Written in place: the pooled read-only handle is closed first
+    with manager.open_h5(h5_files[0], "a") as hf:
+        hf["data"][0] = 20
+    with manager.open_h5(h5_files[0]) as hf:
+        assert hf["data"][0] == 20
+    assert manager.pool_info().misses == 3
+    manager.close()
+
+
+def test_pool_not_shared_with_other_processes(h5_files):
+    manager = StreamingFileManager(max_open_files=4)
+    with manager.open_h5(h5_files[0]):
+        pass
+    # As unpickled in a spawned worker
+    copy = pickle.loads(pickle.dumps(manager))
+    assert copy.max_open_files == 4
+    assert copy.pool_info().currsize == 0
+    # As in a forked child
+    _streaming._reset_after_fork()
+    assert manager.pool_info().currsize == 0
+    with manager.open_h5(h5_files[0]) as hf:
+        assert hf["data"][0] == 0
+    manager.close()
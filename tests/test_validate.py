@@ -4,9 +4,11 @@ import pytest
 
 from disp_nisar.validate import (
     ComparisonError,
+    LayoutError,
     _fmt_ratio,
     _validate_conncomp_labels,
     _validate_dataset,
+    check_paged_layout,
     compare_groups,
 )
 
@@ -102,3 +104,36 @@ def test_validate_conncomp_labels_low_overlap(tmp_path):
     with h5py.File(f, "r") as hf:
         with pytest.raises(ComparisonError, match="failed validation"):
             _validate_conncomp_labels(hf["test"], hf["ref"])
+
+
+def _write_paged_file(filename, page_size=None, chunks=(4, 4)):
+    opts = {"fs_strategy": "page", "fs_page_size": page_size} if page_size else {}
+    with h5py.File(filename, "w", **opts) as hf:
+        hf.create_dataset(
+            "data", data=np.ones((16, 16), dtype="float32"), chunks=chunks
+        )
+        hf.create_dataset("scalar", data=1)
+
+
+def test_check_paged_layout(tmp_path):
+    f = tmp_path / "paged.h5"
+    _write_paged_file(f, page_size=4096)
+    check_paged_layout(f)
+    check_paged_layout(f, page_size=4096)
+    with pytest.raises(LayoutError, match="page size"):
+        check_paged_layout(f, page_size=8192)
+
+
+def test_check_paged_layout_not_paged(tmp_path):
+    f = tmp_path / "default.h5"
+    _write_paged_file(f)
+    with pytest.raises(LayoutError, match="paged file space"):
+        check_paged_layout(f)
+
+
+def test_check_paged_layout_chunk_larger_than_page(tmp_path):
+    f = tmp_path / "big_chunks.h5"
+    # One 16x16 float32 chunk is 1024 bytes, which is over a 512 byte page
+    _write_paged_file(f, page_size=512, chunks=(16, 16))
+    with pytest.raises(LayoutError, match="larger than one page"):
+        check_paged_layout(f)
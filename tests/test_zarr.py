@@ -0,0 +1,239 @@
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pytest
+
+zarr = pytest.importorskip("zarr")
+
+from disp_nisar._zarr import (  # noqa: E402
+    ZarrStack,
+    append_to_zarr,
+    gslc_to_zarr,
+    retire_dates,
+)
+from disp_nisar._zarr_input import prepare_zarr_stack  # noqa: E402
+
+GRID = "/science/LSAR/GSLC/grids/frequencyA"
+
+# The store's metadata is consolidated, which is not yet part of the v3 spec
+pytestmark = pytest.mark.filterwarnings("ignore:Consolidated metadata:UserWarning")
+
+
+def _make_gslcs(tmp_path, num_dates=3, shape=(100, 70), first_day=1):
+    rng = np.random.default_rng(first_day)
+    files, slcs, masks = [], [], []
+    for i in range(num_dates):
+        slc = (rng.normal(size=shape) + 1j * rng.normal(size=shape)).astype(
+            np.complex64
+        )
+        mask = (rng.random(shape) > 0.2).astype(np.uint8)
+        filename = tmp_path / f"NISAR_L2_GSLC_202401{first_day + i:02d}T000000_x.h5"
+        with h5py.File(filename, "w") as hf:
+            grid = hf.create_group(GRID)
+            grid.create_dataset("HH", data=slc, chunks=(32, 32), compression="gzip")
+            grid["mask"] = mask
+            grid["xCoordinates"] = 10.0 * np.arange(shape[1])
+            grid["yCoordinates"] = -5.0 * np.arange(shape[0])
+            grid["xCoordinateSpacing"] = 10.0
+            grid["yCoordinateSpacing"] = -5.0
+        files.append(filename)
+        slcs.append(np.where(mask == 0, 0, slc))
+        masks.append(mask)
+    return files, np.stack(slcs), np.stack(masks)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_gslc_to_zarr(tmp_path, max_workers):
+    files, expected_slc, expected_mask = _make_gslcs(tmp_path)
+    # Not a multiple of the chunk size: rounded down to 32 rows per batch
+    root = gslc_to_zarr(
+        files,
+        tmp_path / "stack.zarr",
+        spatial_chunks=32,
+        row_batch=50,
+        progress=False,
+        max_workers=max_workers,
+        compression_threads=2,
+    )
+    grp = root["freqA"]
+    assert grp.attrs["dates"] == ["20240101", "20240102", "20240103"]
+    assert grp.attrs["xCoordinateSpacing"] == 10.0
+    assert grp["HH"].chunks == (3, 32, 32)
+    np.testing.assert_array_equal(grp["HH"][:], expected_slc)
+    # 3 dates of validity bits, packed in one plane
+    assert grp["mask"].shape == (1, 100, 70)
+    mask = ZarrStack(tmp_path / "stack.zarr").mask
+    np.testing.assert_array_equal(mask[:], expected_mask)
+
+
+def test_append_and_retire(tmp_path):
+    files, slc, mask = _make_gslcs(tmp_path, num_dates=3)
+    new_files, new_slc, new_mask = _make_gslcs(tmp_path, num_dates=2, first_day=4)
+    zarr_path = tmp_path / "stack.zarr"
+    gslc_to_zarr(
+        files,
+        zarr_path,
+        spatial_chunks=32,
+        progress=False,
+        max_workers=1,
+        time_chunks=1,
+    )
+    # The mask's bit planes hold 8 dates, so only the SLC chunks are left as is
+    chunk_files = sorted(zarr_path.glob("freqA/HH/c/*/*/*"))
+    before = {f: f.read_bytes() for f in chunk_files}
+
+    append_to_zarr(new_files, zarr_path, progress=False, max_workers=1)
+    assert all(f.read_bytes() == data for f, data in before.items())
+    stack = ZarrStack(zarr_path)
+    assert stack.dates == ["20240101", "20240102", "20240103", "20240104", "20240105"]
+    np.testing.assert_array_equal(stack[:], np.concatenate([slc, new_slc]))
+
+    with pytest.raises(ValueError, match="after 20240105"):
+        append_to_zarr(files[:1], zarr_path, progress=False, max_workers=1)
+
+    retire_dates(zarr_path, 2)
+    assert not any(f.exists() for f in chunk_files if "/c/0/" in str(f))
+    assert all(f.exists() for f in chunk_files if "/c/2/" in str(f))
+    stack = ZarrStack(zarr_path)
+    assert stack.shape == (3, 100, 70)
+    assert stack.dates == ["20240103", "20240104", "20240105"]
+    assert len(stack.file_list) == 3
+    expected = np.concatenate([slc, new_slc])[2:]
+    np.testing.assert_array_equal(stack[:], expected)
+    np.testing.assert_array_equal(stack[-1, 10:20], expected[-1, 10:20])
+    np.testing.assert_array_equal(stack[[0, 2]], expected[[0, 2]])
+    np.testing.assert_array_equal(
+        stack.mask[..., 3], np.concatenate([mask, new_mask])[2:, :, 3]
+    )
+
+
+def test_prepare_zarr_stack(tmp_path):
+    files, slc, _ = _make_gslcs(tmp_path, num_dates=4)
+    zarr_path = tmp_path / "stack.zarr"
+    prepare_zarr_stack(files[:3], zarr_path, max_workers=1)
+    assert ZarrStack(zarr_path).dates == ["20240101", "20240102", "20240103"]
+
+    # Same inputs: the store is reused as is
+    chunk = next(zarr_path.glob("freqA/HH/c/0/*/*"))
+    mtime = chunk.stat().st_mtime_ns
+    prepare_zarr_stack(files[:3], zarr_path, max_workers=1)
+    assert chunk.stat().st_mtime_ns == mtime
+
+    # Next forward-mode run: the oldest date is retired, the new one appended
+    prepare_zarr_stack(files[1:], zarr_path, max_workers=1)
+    stack = ZarrStack(zarr_path)
+    assert stack.dates == ["20240102", "20240103", "20240104"]
+    np.testing.assert_array_equal(stack[:], slc[1:])
+    assert not chunk.exists()
+
+    # Unrelated inputs: the store is recreated
+    prepare_zarr_stack(files[:2], zarr_path, max_workers=1)
+    assert ZarrStack(zarr_path).dates == ["20240101", "20240102"]
+    assert ZarrStack(zarr_path)._offset == 0
+
+
+@pytest.mark.parametrize("read_ahead", [False, True])
+def test_chunk_cache_block_reads(tmp_path, read_ahead):
+    files, slc, _ = _make_gslcs(tmp_path)
+    zarr_path = tmp_path / "stack.zarr"
+    gslc_to_zarr(files, zarr_path, spatial_chunks=32, progress=False, max_workers=1)
+    stack = ZarrStack(zarr_path, read_ahead=read_ahead)
+    fetched = []
+    fetch_chunks = stack._fetch_chunks
+    stack._fetch_chunks = lambda keys: fetched.extend(keys) or fetch_chunks(keys)
+
+    # Overlapping 40x40 blocks with a 10 pixel halo, in dolphin's order
+    for r in range(0, 100, 30):
+        for c in range(0, 70, 30):
+            block = stack[:, r : r + 40, c : c + 40]
+            np.testing.assert_array_equal(block, slc[:, r : r + 40, c : c + 40])
+    # The 4 x 3 chunks were each read and decoded once
+    assert sorted(fetched) == [(0, y, x) for y in range(4) for x in range(3)]
+    info = stack.cache_info()
+    assert info.hits > 0
+    assert info.currsize == slc.nbytes
+    if not read_ahead:
+        assert info.misses == 12
+
+    # Other keys are read straight from the store
+    np.testing.assert_array_equal(stack[1], slc[1])
+    np.testing.assert_array_equal(stack[[0, 2], 5, 3:9], slc[[0, 2], 5, 3:9])
+    np.testing.assert_array_equal(stack[..., ::3], slc[..., ::3])
+
+    # A cache too small for one chunk still returns the data
+    stack = ZarrStack(zarr_path, cache_bytes=1000)
+    np.testing.assert_array_equal(stack[:, 20:40, 20:40], slc[:, 20:40, 20:40])
+    assert stack.cache_info().currsize == 0
+
+
+def test_sparse_dates_read_by_contiguous_groups(tmp_path):
+    files, slc, _ = _make_gslcs(tmp_path)
+    zarr_path = tmp_path / "stack.zarr"
+    gslc_to_zarr(
+        files,
+        zarr_path,
+        spatial_chunks=32,
+        time_chunks=1,
+        progress=False,
+        max_workers=1,
+    )
+    stack = ZarrStack(zarr_path)
+    arr = stack._arr
+    reads = []
+
+    class RecordingBlocks:
+        def __getitem__(self, key):
+            reads.append(tuple((k.start, k.stop) for k in key))
+            return arr.blocks[key]
+
+    stack._arr = SimpleNamespace(
+        shape=arr.shape, dtype=arr.dtype, chunks=arr.chunks, blocks=RecordingBlocks()
+    )
+    out = stack[[0, 2], 10:60, 0:40]
+    np.testing.assert_array_equal(out, slc[[0, 2], 10:60, 0:40])
+    # The first and last dates, without the chunks of the date between
+    assert sorted(reads) == [((0, 1), (0, 2), (0, 2)), ((2, 3), (0, 2), (0, 2))]
+
+
+@pytest.mark.parametrize("pack_mask", [False, True])
+def test_mask_view(tmp_path, pack_mask):
+    files, _, _ = _make_gslcs(tmp_path, num_dates=12)
+    raw_masks = []
+    for i, f in enumerate(files):
+        with h5py.File(f, "r+") as hf:
+            # GSLC masks hold subswath numbers, and 255 outside the swath
+            mask = hf[f"{GRID}/mask"][()] * (1 + i % 2)
+            mask[:5] = 255
+            hf[f"{GRID}/mask"][()] = mask
+        raw_masks.append(mask)
+    raw_masks = np.stack(raw_masks)
+    zarr_path = tmp_path / "stack.zarr"
+    gslc_to_zarr(
+        files[:10],
+        zarr_path,
+        spatial_chunks=32,
+        progress=False,
+        max_workers=1,
+        time_chunks=1,
+        pack_mask=pack_mask,
+    )
+    append_to_zarr(files[10:], zarr_path, progress=False, max_workers=1)
+    retire_dates(zarr_path, 3)
+
+    stack = ZarrStack(zarr_path)
+    expected = raw_masks[3:]
+    if pack_mask:
+        expected = ((expected >= 1) & (expected != 255)).astype(np.uint8)
+        assert zarr.open_array(zarr_path / "freqA/mask").shape == (2, 100, 70)
+    assert stack.mask.shape == (9, 100, 70)
+    for key in [
+        np.s_[:],
+        np.s_[4],
+        np.s_[-1, 10:20, ::3],
+        np.s_[3:8, 40, 5:60],
+        np.s_[[0, 5, 8], 1:9],
+        np.s_[..., 7],
+        np.s_[2:2],
+    ]:
+        np.testing.assert_array_equal(stack.mask[key], expected[key])